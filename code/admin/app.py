@@ -67,7 +67,8 @@ from starlette.datastructures import MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from common.config import CURRENT_VERSION
-from common.db import DBManager
+from common.db import DBManager, DEFAULT_DURABILITY, DURABILITY_PROFILES
+from common.async_db import AsyncDB
 from common.backup_scheduler import BackupConfig, DailySQLiteBackupScheduler
 from common.common_helpers import (
     discord_urls_from_config,
@@ -159,6 +160,9 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 DB_PATH = os.getenv("DB_PATH", str(DATA_DIR / "data.db"))
 db = DBManager(DB_PATH, init_schema=True)
+# Route handlers go through `adb` so queries run off the event loop;
+# ADMIN_DB_WORKERS=0 runs them inline like before.
+adb = AsyncDB(db, max_workers=int(os.getenv("ADMIN_DB_WORKERS", "4")), name="admin-db")
 
 BACKUP_DIR = Path(os.getenv("BACKUP_DIR", str(DATA_DIR / "backups")))
 BACKUP_RETAIN = int(os.getenv("BACKUP_RETAIN", "14"))
@@ -178,9 +182,9 @@ async def _record_backup_stats(archive_path: Path):
     try:
         size = archive_path.stat().st_size if archive_path.exists() else 0
         now_iso = datetime.utcnow().isoformat() + "Z"
-        db.set_config("DB_LAST_BACKUP_AT", now_iso)
-        db.set_config("DB_LAST_BACKUP_FILE", archive_path.name)
-        db.set_config("DB_LAST_BACKUP_SIZE", str(size))
+        await adb.set_config("DB_LAST_BACKUP_AT", now_iso)
+        await adb.set_config("DB_LAST_BACKUP_FILE", archive_path.name)
+        await adb.set_config("DB_LAST_BACKUP_SIZE", str(size))
     except Exception as e:
         LOGGER.exception("Failed writing backup stats: %s", e)
 
@@ -206,6 +210,7 @@ ALLOWED_ENV = [
     "LOG_LEVEL",
     "COPYCORD_AUTOSTART",
     "LOG_MAX_SIZE_MB",
+    "DB_DURABILITY",
 ]
 
 REQUIRED = ["SERVER_TOKEN", "CLIENT_TOKEN"]
@@ -316,6 +321,7 @@ DEFAULTS: Dict[str, Union[bool, str]] = {
     "USER_TOKEN_STICKY_ROLES": False,
     "COPYCORD_AUTOSTART": "false",
     "LOG_MAX_SIZE_MB": "10",
+    "DB_DURABILITY": DEFAULT_DURABILITY,
 }
 
 # Startup/shutdown hooks run in registration order via the lifespan handler
@@ -940,7 +946,7 @@ async def _check_server_token_valid(bot_token: str) -> tuple[bool, Optional[str]
 
                 if ok and uid:
                     try:
-                        db.set_config("BOT_CLIENT_ID", str(uid))
+                        await adb.set_config("BOT_CLIENT_ID", str(uid))
                     except Exception:
                         pass
 
@@ -1673,7 +1679,7 @@ def _bootstrap_legacy_mapping_if_needed() -> dict:
 
 @app.get("/", response_class=None)
 async def index(request: Request):
-    env = _read_env()
+    env = await _read_env()
 
     s_server = await _ws_cmd(SERVER_CTRL_URL, {"cmd": "status"})
     s_client = await _ws_cmd(CLIENT_CTRL_URL, {"cmd": "status"})
@@ -1683,11 +1689,12 @@ async def index(request: Request):
     text_keys = [
         k
         for k in ALLOWED_ENV
-        if k not in ("LOG_LEVEL", "COPYCORD_AUTOSTART", "LOG_MAX_SIZE_MB")
+        if k
+        not in ("LOG_LEVEL", "COPYCORD_AUTOSTART", "LOG_MAX_SIZE_MB", "DB_DURABILITY")
     ]
 
     bool_keys = BOOL_KEYS
-    guild_mappings = db.list_guild_mappings()
+    guild_mappings = await adb.list_guild_mappings()
     mapping_bool_keys = BOOL_KEYS
 
     current_log_level = (env.get("LOG_LEVEL") or "INFO").upper()
@@ -1747,7 +1754,7 @@ async def save(request: Request):
         return PlainTextResponse(pretty_msg, status_code=400)
 
     try:
-        _write_env(values)
+        await _write_env(values)
         LOGGER.info(
             "Config saved successfully",
             extra={"keys": list(values.keys())},
@@ -1760,7 +1767,7 @@ async def save(request: Request):
         )
 
     try:
-        env_after = _read_env()
+        env_after = await _read_env()
         new_level = (env_after.get("LOG_LEVEL") or "INFO").upper()
 
         os.environ["LOG_LEVEL"] = new_level
@@ -1800,7 +1807,7 @@ async def _check_controller(
 @app.post("/start")
 async def start_all():
 
-    errs = _validate(_read_env(), for_start=True)
+    errs = _validate(await _read_env(), for_start=True)
     if errs:
         LOGGER.warning("POST /start blocked | errs=%s", errs)
         return PlainTextResponse(
@@ -1989,7 +1996,7 @@ async def _migrate_legacy_single_mapping():
     to the new multi-guild model used in Copycord v3.
     """
     try:
-        result = _bootstrap_legacy_mapping_if_needed()
+        result = await adb.run(_bootstrap_legacy_mapping_if_needed)
 
         if result.get("created"):
 
@@ -2022,7 +2029,7 @@ async def _shutdown():
 @_on_startup
 async def _apply_db_log_level_and_banner():
     try:
-        env = _read_env()
+        env = await _read_env()
         lvl_name = (env.get("LOG_LEVEL") or "INFO").upper()
         LOGGER.logger.setLevel(getattr(logging, lvl_name, logging.INFO))
     except Exception:
@@ -2051,11 +2058,11 @@ async def _autostart_if_ready():
     await asyncio.sleep(1)
 
     try:
-        autostart = db.get_config("COPYCORD_AUTOSTART", "false")
+        autostart = await adb.get_config("COPYCORD_AUTOSTART", "false")
         if autostart.lower() not in ("1", "true", "yes", "on"):
             return
 
-        env = _read_env()
+        env = await _read_env()
         server_token = (env.get("SERVER_TOKEN") or "").strip()
         client_token = (env.get("CLIENT_TOKEN") or "").strip()
         if not server_token or not client_token:
@@ -2120,6 +2127,11 @@ async def _start_log_pruner():
     asyncio.create_task(_log_prune_loop())
 
 
+@_on_startup
+async def _start_wal_checkpointer():
+    asyncio.create_task(_wal_checkpoint_loop())
+
+
 @_on_startup
 async def _start_watchdog():
     hub.start_watchdog()
@@ -2144,6 +2156,28 @@ async def _suppress_orphaned_dns_errors():
     loop.set_exception_handler(_handler)
 
 
+async def _wal_checkpoint_loop():
+    """Fold the -wal file back into the database periodically.
+
+    SQLite's auto-checkpoint only runs on commit, from whichever writer
+    crosses the threshold, and gives up under reader pressure. A PASSIVE
+    checkpoint from the admin process never blocks the server or client,
+    so it keeps the WAL (and read amplification) bounded between bursts.
+    """
+    interval = int(os.getenv("DB_CHECKPOINT_SECONDS", "60"))
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await adb.journal_mode() != "wal":
+                continue
+            res = await adb.checkpoint("PASSIVE")
+            LOGGER.debug("WAL checkpoint | %s", res)
+        except Exception:
+            LOGGER.debug("WAL checkpoint failed", exc_info=True)
+
+
 async def _log_prune_loop():
     """Periodically check log file sizes and truncate to the configured max.
 
@@ -2155,7 +2189,7 @@ async def _log_prune_loop():
     while True:
         await asyncio.sleep(300)
         try:
-            max_mb_str = db.get_config("LOG_MAX_SIZE_MB", "10")
+            max_mb_str = await adb.get_config("LOG_MAX_SIZE_MB", "10")
             max_bytes = int(max_mb_str) * 1024 * 1024
             if max_bytes <= 0:
                 continue
@@ -2203,7 +2237,7 @@ async def _cleanup_stale_mapping_pairs_on_boot():
     stale mappings that could confuse the server.
     """
     try:
-        stats = db.cleanup_stale_mapping_pairs()
+        stats = await adb.cleanup_stale_mapping_pairs()
         pairs = int(stats.get("pairs_cleared") or 0)
         rb_only = int(stats.get("role_blocks_only") or 0)
 
@@ -2243,13 +2277,18 @@ async def _stop_backup_scheduler():
     await backup_scheduler.stop()
 
 
+@_on_shutdown
+async def _stop_db_pool():
+    adb.shutdown()
+
+
 @app.get("/api/validate-tokens", response_class=JSONResponse)
 async def api_validate_tokens():
     """
     Check whether the saved CLIENT_TOKEN and SERVER_TOKEN are currently valid.
 
     """
-    env = _read_env()
+    env = await _read_env()
     raw_client = (env.get("CLIENT_TOKEN") or "").strip()
     raw_server = (env.get("SERVER_TOKEN") or "").strip()
 
@@ -2267,7 +2306,7 @@ async def api_validate_tokens():
 
     bot_client_id = None
     try:
-        bot_client_id = (db.get_config("BOT_CLIENT_ID", "") or "").strip() or None
+        bot_client_id = (await adb.get_config("BOT_CLIENT_ID", "") or "").strip() or None
     except Exception:
         pass
 
@@ -2294,7 +2333,7 @@ def _mask_token(val: str) -> str:
 async def api_backup_tokens():
     """List backup CLIENT_TOKEN entries (masked) for the Admin UI."""
     try:
-        rows = db.list_backup_tokens()
+        rows = await adb.list_backup_tokens()
         tokens = []
         for r in rows:
             tokens.append(
@@ -2328,7 +2367,7 @@ async def api_backup_tokens_add(
         )
 
     try:
-        for r in db.list_backup_tokens() or []:
+        for r in await adb.list_backup_tokens() or []:
             if (r.get("token_value") or "").strip() == token_value:
                 raise HTTPException(
                     status_code=400, detail="That backup token is already stored."
@@ -2339,7 +2378,7 @@ async def api_backup_tokens_add(
         pass
 
     try:
-        token_id = db.add_backup_token(token_value, (note or "").strip() or None)
+        token_id = await adb.add_backup_token(token_value, (note or "").strip() or None)
         return JSONResponse({"ok": True, "token_id": token_id})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -2355,7 +2394,7 @@ async def api_backup_tokens_delete(token_id: str = Form(...)):
         raise HTTPException(status_code=400, detail="token_id is required")
 
     try:
-        ok = db.delete_backup_token(token_id)
+        ok = await adb.delete_backup_token(token_id)
         if not ok:
             return JSONResponse({"ok": False, "not_found": True})
         return JSONResponse({"ok": True})
@@ -2373,12 +2412,14 @@ async def backup_now():
 
 @app.get("/api/backup/info")
 async def backup_info():
-    def _cfg(k, d=""):
-        return db.get_config(k, d)
-
-    last_at = _cfg("DB_LAST_BACKUP_AT", "")
-    last_file = _cfg("DB_LAST_BACKUP_FILE", "")
-    last_size = int(_cfg("DB_LAST_BACKUP_SIZE", "0") or 0)
+    last_at, last_file, last_size = await adb.run(
+        lambda: (
+            db.get_config("DB_LAST_BACKUP_AT", ""),
+            db.get_config("DB_LAST_BACKUP_FILE", ""),
+            db.get_config("DB_LAST_BACKUP_SIZE", "0"),
+        )
+    )
+    last_size = int(last_size or 0)
     archives = []
     if BACKUP_DIR.exists():
         for p in sorted(
@@ -2474,14 +2515,22 @@ async def backup_restore(
         live = Path(DB_PATH)
         bak = live.with_suffix(".bak")
         try:
-            if live.exists():
-                shutil.copy2(live, bak)
+            if await adb.journal_mode() == "wal":
+                # Copying over a WAL database would leave the old -wal/-shm
+                # next to the new file; go through SQLite's backup API instead.
+                await adb.checkpoint("TRUNCATE")
+                if live.exists():
+                    shutil.copy2(live, bak)
+                await adb.restore_from(str(extracted))
+            else:
+                if live.exists():
+                    shutil.copy2(live, bak)
 
-            shutil.copy2(extracted, live)
+                shutil.copy2(extracted, live)
         except Exception as e:
             return PlainTextResponse(f"restore failed: {e}", status_code=500)
 
-    db.set_config("DB_LAST_RESTORE_AT", datetime.utcnow().isoformat() + "Z")
+    await adb.set_config("DB_LAST_RESTORE_AT", datetime.utcnow().isoformat() + "Z")
     return {"ok": True, "restored_from": arc.name}
 
 
@@ -2512,7 +2561,7 @@ async def event_logs_page(request: Request):
 @app.get("/api/event-log-types")
 async def api_get_event_log_types():
     """Lightweight endpoint that returns only the distinct event types."""
-    types = db.get_event_log_types()
+    types = await adb.get_event_log_types()
     return JSONResponse(
         content={"ok": True, "types": types},
         headers={
@@ -2531,19 +2580,19 @@ async def api_get_event_logs(
     limit: int = Query(200, ge=1, le=10000),
     offset: int = Query(0, ge=0),
 ):
-    logs = db.get_event_logs(
+    logs = await adb.get_event_logs(
         event_type=event_type,
         guild_id=guild_id,
         search=search,
         limit=limit,
         offset=offset,
     )
-    total = db.count_event_logs(
+    total = await adb.count_event_logs(
         event_type=event_type,
         guild_id=guild_id,
         search=search,
     )
-    types = db.get_event_log_types()
+    types = await adb.get_event_log_types()
     return JSONResponse(
         content={"ok": True, "logs": logs, "total": total, "types": types},
         headers={
@@ -2556,7 +2605,7 @@ async def api_get_event_logs(
 
 @app.delete("/api/event-logs/{log_id}")
 async def api_delete_event_log(log_id: str):
-    ok = db.delete_event_log(log_id)
+    ok = await adb.delete_event_log(log_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Log not found")
     return {"ok": True}
@@ -2567,13 +2616,13 @@ async def api_delete_event_logs_bulk(body: dict = Body(...)):
     ids = body.get("ids") or []
     if not ids:
         raise HTTPException(status_code=400, detail="No ids provided")
-    deleted = db.delete_event_logs_bulk(ids)
+    deleted = await adb.delete_event_logs_bulk(ids)
     return {"ok": True, "deleted": deleted}
 
 
 @app.delete("/api/event-logs")
 async def api_clear_event_logs():
-    deleted = db.clear_event_logs()
+    deleted = await adb.clear_event_logs()
     return {"ok": True, "deleted": deleted}
 
 
@@ -2582,7 +2631,7 @@ async def api_add_event_log(body: dict = Body(...)):
     """Receive event log entries from server/client agents."""
     event_type = body.get("event_type") or "unknown"
     details = body.get("details") or ""
-    log_id = db.add_event_log(
+    log_id = await adb.add_event_log(
         event_type=event_type,
         details=details,
         guild_id=body.get("guild_id"),
@@ -2620,7 +2669,7 @@ async def forwarding_page(request: Request):
     """
     Render the Message Forwarding page.
     """
-    env = _read_env()
+    env = await _read_env()
     return templates.TemplateResponse(
         "forwarding.html",
         {
@@ -2854,9 +2903,9 @@ async def api_status_alias():
 
 @app.get("/filters/{mapping_id}")
 async def api_get_filters(mapping_id: str):
-    filters = db.get_filters_for_mapping(mapping_id)
+    filters = await adb.get_filters_for_mapping(mapping_id)
 
-    mapping = db.get_mapping_by_id(mapping_id)
+    mapping = await adb.get_mapping_by_id(mapping_id)
     blocked_role_ids: list[int] = []
     if mapping:
         try:
@@ -2864,9 +2913,9 @@ async def api_get_filters(mapping_id: str):
         except Exception:
             clone_gid = 0
         if clone_gid:
-            blocked_role_ids = db.get_blocked_role_ids(cloned_guild_id=clone_gid)
+            blocked_role_ids = await adb.get_blocked_role_ids(cloned_guild_id=clone_gid)
 
-    user_filters = db.get_user_filters_for_mapping(mapping_id)
+    user_filters = await adb.get_user_filters_for_mapping(mapping_id)
 
     channel_name_blacklist: list[str] = []
     if mapping:
@@ -2874,7 +2923,7 @@ async def api_get_filters(mapping_id: str):
             host_gid = int(mapping["original_guild_id"] or 0)
             clone_gid_val = int(mapping["cloned_guild_id"] or 0)
             if host_gid and clone_gid_val:
-                channel_name_blacklist = db.get_channel_name_blacklist_for_mapping(
+                channel_name_blacklist = await adb.get_channel_name_blacklist_for_mapping(
                     host_gid, clone_gid_val
                 )
         except Exception:
@@ -2931,7 +2980,7 @@ async def api_save_filters(mapping_id: str, request: Request):
     wl_users = _split_csv_ids(form.get("wl_users", ""))
     bl_users = _split_csv_ids(form.get("bl_users", ""))
 
-    db.replace_filters_for_mapping(
+    await adb.replace_filters_for_mapping(
         mapping_id=mapping_id,
         wl_categories=wl_categories,
         wl_channels=wl_channels,
@@ -2939,23 +2988,23 @@ async def api_save_filters(mapping_id: str, request: Request):
         ex_channels=ex_channels,
     )
 
-    db.replace_blocked_keywords_for_mapping(
+    await adb.replace_blocked_keywords_for_mapping(
         mapping_id=mapping_id,
         words=blocked_words,
     )
 
-    db.replace_role_blocks_for_mapping(
+    await adb.replace_role_blocks_for_mapping(
         mapping_id=mapping_id,
         original_role_ids=blocked_role_ids,
     )
 
-    db.replace_user_filters_for_mapping(
+    await adb.replace_user_filters_for_mapping(
         mapping_id=mapping_id,
         whitelist_users=wl_users,
         blacklist_users=bl_users,
     )
 
-    db.replace_channel_name_blacklist_for_mapping(
+    await adb.replace_channel_name_blacklist_for_mapping(
         mapping_id=mapping_id,
         patterns=channel_name_blacklist,
     )
@@ -2979,7 +3028,7 @@ async def api_toggle_mapping_status(mapping_id: str):
     """
     Toggle a mapping between 'active' and 'paused'.
     """
-    row = db.get_mapping_by_id(mapping_id)
+    row = await adb.get_mapping_by_id(mapping_id)
     if not row:
         raise HTTPException(status_code=404, detail="mapping-not-found")
 
@@ -2990,7 +3039,7 @@ async def api_toggle_mapping_status(mapping_id: str):
 
     new_status = "paused" if cur_status == "active" else "active"
 
-    db.update_mapping_status(mapping_id, new_status)
+    await adb.update_mapping_status(mapping_id, new_status)
 
     return JSONResponse(
         {
@@ -3007,7 +3056,7 @@ async def api_mapping_channels(mapping_id: str):
     Fetch categories + channels for the ORIGINAL guild for this mapping
     using the Discord HTTP API and the CLIENT_TOKEN from config.
     """
-    mapping = db.get_mapping_by_id(mapping_id)
+    mapping = await adb.get_mapping_by_id(mapping_id)
     if not mapping:
         raise HTTPException(status_code=404, detail="mapping-not-found")
 
@@ -3019,7 +3068,7 @@ async def api_mapping_channels(mapping_id: str):
     if not orig_id:
         raise HTTPException(status_code=400, detail="original-guild-missing")
 
-    cfg = db.get_all_config()
+    cfg = await adb.get_all_config()
     client_token = (cfg.get("CLIENT_TOKEN") or "").strip()
     if not client_token:
         raise HTTPException(status_code=400, detail="client-token-missing")
@@ -3108,7 +3157,7 @@ async def api_mapping_channels(mapping_id: str):
 
 @app.get("/api/mappings/{mapping_id}/roles", response_class=JSONResponse)
 async def api_mapping_roles(mapping_id: str):
-    mapping = db.get_mapping_by_id(mapping_id)
+    mapping = await adb.get_mapping_by_id(mapping_id)
     if not mapping:
         raise HTTPException(status_code=404, detail="mapping-not-found")
 
@@ -3128,7 +3177,7 @@ async def api_mapping_roles(mapping_id: str):
     if not clone_gid:
         raise HTTPException(status_code=400, detail="clone-guild-missing")
 
-    cfg = db.get_all_config()
+    cfg = await adb.get_all_config()
     client_token = (cfg.get("CLIENT_TOKEN") or "").strip()
     if not client_token:
         raise HTTPException(status_code=400, detail="client-token-missing")
@@ -3225,7 +3274,7 @@ async def api_blacklist_add(payload: dict = Body(...)):
     cloned_guild_id = int(raw_clone) if raw_clone.isdigit() else None
 
     try:
-        db.add_filter(
+        await adb.add_filter(
             "exclude",
             scope,
             obj_id,
@@ -3257,10 +3306,10 @@ async def api_blacklist_add(payload: dict = Body(...)):
     }
 
 
-def _read_env() -> Dict[str, str]:
+async def _read_env() -> Dict[str, str]:
     vals = DEFAULTS.copy()
     try:
-        stored = db.get_all_config()
+        stored = await adb.get_all_config()
         for k, v in stored.items():
             if k in ALLOWED_ENV and v is not None:
                 vals[k] = str(v)
@@ -3272,7 +3321,8 @@ def _read_env() -> Dict[str, str]:
     return vals
 
 
-def _write_env(values: Dict[str, str]) -> None:
+async def _write_env(values: Dict[str, str]) -> None:
+    normalized: Dict[str, str] = {}
     for k in ALLOWED_ENV:
         v = values.get(k, "") or ""
         if k in BOOL_KEYS:
@@ -3287,7 +3337,17 @@ def _write_env(values: Dict[str, str]) -> None:
                 v = str(max(0, int(v)))
             except (ValueError, TypeError):
                 v = "10"
-        db.set_config(k, v)
+        if k == "DB_DURABILITY":
+            v = str(v).strip().lower()
+            if v not in DURABILITY_PROFILES:
+                v = DEFAULT_DURABILITY
+        normalized[k] = v
+
+    def _persist() -> None:
+        for k, v in normalized.items():
+            db.set_config(k, v)
+
+    await adb.run(_persist)
     LOGGER.info("Config saved | %s", _redact_dict(values))
 
 
@@ -3328,8 +3388,8 @@ def _norm_bool_str(v: str) -> str:
 
 @app.get("/channels")
 async def channels_page(request: Request):
-    env = _read_env()
-    guild_mappings = db.list_guild_mappings()
+    env = await _read_env()
+    guild_mappings = await adb.list_guild_mappings()
 
     return templates.TemplateResponse(
         "channels.html",
@@ -3347,11 +3407,11 @@ async def channels_page(request: Request):
 @app.get("/api/channels", response_class=JSONResponse)
 async def api_channels(mapping_id: str | None = Query(default=None)):
 
-    raw_rows = db.get_all_channel_mappings()
-    raw_cat_rows = db.get_all_category_mappings()
+    raw_rows = await adb.get_all_channel_mappings()
+    raw_cat_rows = await adb.get_all_category_mappings()
 
     if mapping_id:
-        mapping_row = db.get_mapping_by_id(mapping_id)
+        mapping_row = await adb.get_mapping_by_id(mapping_id)
         if mapping_row:
             allowed_host = str(mapping_row["original_guild_id"])
             allowed_clone = str(mapping_row["cloned_guild_id"])
@@ -3539,6 +3599,56 @@ async def api_backfills_inflight(mapping_id: Optional[str] = Query(default=None)
     return JSONResponse({"ok": True, "items": items})
 
 
+@app.get("/api/server/registries", response_class=JSONResponse)
+async def api_server_registries():
+    """Size and eviction counters of the server's per-key state registries."""
+    res = await _ws_cmd(SERVER_AGENT_URL, {"type": "registry_stats_query"})
+    regs = (res or {}).get("data", {}).get("registries")
+    if regs is None:
+        return JSONResponse({"ok": False, "error": "server-unreachable"}, status_code=503)
+    return JSONResponse({"ok": True, "registries": regs})
+
+
+@app.get("/api/server/forwarding", response_class=JSONResponse)
+async def api_server_forwarding():
+    """Live forwarding lanes: concurrency, queue totals and the deepest lanes."""
+    res = await _ws_cmd(SERVER_AGENT_URL, {"type": "forward_lanes_query"})
+    data = (res or {}).get("data")
+    if data is None:
+        return JSONResponse({"ok": False, "error": "server-unreachable"}, status_code=503)
+    return JSONResponse({"ok": True, **data})
+
+
+@app.get("/api/mappings/{mapping_id}/structure-plan", response_class=JSONResponse)
+async def api_mapping_structure_plan(mapping_id: str):
+    """
+    Dry run: the category, channel and layout operations a structure sync would
+    apply to this mapping's clone. `unplanned_phases` lists the sync passes the
+    plan does not cover (threads, community, guild metadata, ...).
+    """
+    res = await _ws_cmd(
+        SERVER_AGENT_URL,
+        {"type": "structure_plan_query", "data": {"mapping_id": mapping_id}},
+    )
+    data = (res or {}).get("data")
+    if data is None:
+        return JSONResponse({"ok": False, "error": "server-unreachable"}, status_code=503)
+    if not data.get("ok"):
+        status = 404 if data.get("error") in ("unknown-mapping", "no-sitemap") else 409
+        return JSONResponse(data, status_code=status)
+    return JSONResponse(data)
+
+
+@app.get("/api/sync-queue", response_class=JSONResponse)
+async def api_sync_queue():
+    """Structure syncs running and queued on the server, with queue position and ETA."""
+    res = await _ws_cmd(SERVER_AGENT_URL, {"type": "sync_queue_query", "data": {}})
+    data = (res or {}).get("data")
+    if data is None:
+        return JSONResponse({"ok": False, "error": "server-unreachable"}, status_code=503)
+    return JSONResponse(data)
+
+
 @app.get("/api/backfills/resume-info", response_class=JSONResponse)
 async def api_backfills_resume_info(channel_id: int, mapping_id: str | None = None):
     try:
@@ -3550,7 +3660,7 @@ async def api_backfills_resume_info(channel_id: int, mapping_id: str | None = No
 
     row = None
     if mapping_id:
-        m = db.get_mapping_by_id(mapping_id)
+        m = await adb.get_mapping_by_id(mapping_id)
         if not m:
             return JSONResponse(
                 {"ok": False, "error": "unknown-mapping"}, status_code=404
@@ -3562,11 +3672,11 @@ async def api_backfills_resume_info(channel_id: int, mapping_id: str | None = No
             cloned_gid = None
 
         if cloned_gid is not None:
-            row = db.backfill_get_incomplete_for_channel_in_clone(cid, cloned_gid)
+            row = await adb.backfill_get_incomplete_for_channel_in_clone(cid, cloned_gid)
         else:
             row = None
     else:
-        row = db.backfill_get_incomplete_for_channel(cid)
+        row = await adb.backfill_get_incomplete_for_channel(cid)
 
     def _parse_range(r):
         try:
@@ -3626,7 +3736,7 @@ async def api_backfill_start(payload: dict = Body(...)):
         )
 
     mapping_id = (payload.get("mapping_id") or "").strip()
-    m = db.get_mapping_by_id(mapping_id) if mapping_id else None
+    m = await adb.get_mapping_by_id(mapping_id) if mapping_id else None
     if not m:
         return JSONResponse({"ok": False, "error": "unknown-mapping"}, status_code=404)
     cloned_guild_id = int(m["cloned_guild_id"])
@@ -3707,11 +3817,11 @@ async def api_backfill_start(payload: dict = Body(...)):
 
     if payload.get("ignore_cloned"):
         try:
-            exclude = db.get_cloned_original_ids_for_channel(
+            exclude = await adb.get_cloned_original_ids_packed(
                 channel_id, cloned_guild_id
             )
             if exclude:
-                data["exclude_ids"] = [str(mid) for mid in exclude]
+                data["exclude_ids_packed"] = exclude
         except Exception:
             pass
 
@@ -3729,7 +3839,7 @@ async def api_backfill_start(payload: dict = Body(...)):
 @app.post("/api/backfill/start-batch", response_class=JSONResponse)
 async def api_backfill_start_batch(payload: dict = Body(...)):
     mapping_id = (payload.get("mapping_id") or "").strip()
-    m = db.get_mapping_by_id(mapping_id) if mapping_id else None
+    m = await adb.get_mapping_by_id(mapping_id) if mapping_id else None
     if not m:
         return JSONResponse({"ok": False, "error": "unknown-mapping"}, status_code=404)
     cloned_guild_id = int(m["cloned_guild_id"])
@@ -3766,7 +3876,7 @@ async def api_backfill_start_batch(payload: dict = Body(...)):
     )
     last_n = payload.get("last_n")
 
-    def base_payload_for(cid: int) -> dict:
+    async def base_payload_for(cid: int) -> dict:
         data = {
             "channel_id": cid,
             "mapping_id": mapping_id,
@@ -3798,9 +3908,11 @@ async def api_backfill_start_batch(payload: dict = Body(...)):
                 data["after_iso"] = str(after_ts)
         if payload.get("ignore_cloned"):
             try:
-                exclude = db.get_cloned_original_ids_for_channel(cid, cloned_guild_id)
+                exclude = await adb.get_cloned_original_ids_packed(
+                    cid, cloned_guild_id
+                )
                 if exclude:
-                    data["exclude_ids"] = [str(mid) for mid in exclude]
+                    data["exclude_ids_packed"] = exclude
             except Exception:
                 pass
         return data
@@ -3834,7 +3946,7 @@ async def api_backfill_start_batch(payload: dict = Body(...)):
             locked += 1
             continue
 
-        data = base_payload_for(cid)
+        data = await base_payload_for(cid)
         res = await _ws_cmd(CLIENT_AGENT_URL, {"type": "clone_messages", "data": data})
         if not res or not res.get("ok", True):
             await locks.release(cid, cloned_guild_id)
@@ -3868,7 +3980,7 @@ async def api_backfill_start_batch(payload: dict = Body(...)):
 
 @app.get("/guilds")
 async def guilds_page(request: Request):
-    env = _read_env()
+    env = await _read_env()
     return templates.TemplateResponse(
         "guilds.html",
         {
@@ -3887,7 +3999,7 @@ async def guilds_api():
     Shape:
       { items: [ { id, name, icon_url, member_count }, ... ] }
     """
-    rows = db.get_all_guilds()
+    rows = await adb.get_all_guilds()
     items = []
     for r in rows:
         items.append(
@@ -3907,7 +4019,7 @@ CLIENT_AGENT_TIMEOUT = int(os.getenv("CLIENT_AGENT_TIMEOUT", "10"))
 @app.get("/scraper")
 async def scraper_page(request: Request):
     """Render the standalone scraper page."""
-    env = _read_env()
+    env = await _read_env()
     return templates.TemplateResponse(
         "scraper.html",
         {
@@ -3923,7 +4035,7 @@ async def scraper_page(request: Request):
 async def api_scraper_tokens_list():
     """List all scraper tokens with masked values."""
     try:
-        tokens = db.list_scraper_tokens()
+        tokens = await adb.list_scraper_tokens()
         masked_tokens = []
         for t in tokens:
             masked_tokens.append(
@@ -3959,7 +4071,7 @@ async def api_scraper_tokens_add(
         raise HTTPException(status_code=400, detail="token_value is required")
 
     try:
-        existing = db.list_scraper_tokens()
+        existing = await adb.list_scraper_tokens()
         for t in existing:
             if t["token_value"] == token_value:
                 raise HTTPException(400, detail="Token already exists")
@@ -3988,8 +4100,8 @@ async def api_scraper_tokens_add(
             pass
 
     try:
-        token_id = db.add_scraper_token(token_value, label)
-        db.update_scraper_token(
+        token_id = await adb.add_scraper_token(token_value, label)
+        await adb.update_scraper_token(
             token_id,
             is_valid=is_valid,
             username=username,
@@ -4013,7 +4125,7 @@ async def api_scraper_tokens_add(
 @app.post("/api/scraper/tokens/{token_id}/validate", response_class=JSONResponse)
 async def api_scraper_tokens_validate(token_id: str):
     """Validate a scraper token."""
-    token = db.get_scraper_token(token_id)
+    token = await adb.get_scraper_token(token_id)
     if not token:
         raise HTTPException(404, detail="Token not found")
 
@@ -4036,7 +4148,7 @@ async def api_scraper_tokens_validate(token_id: str):
         except Exception:
             pass
 
-    db.update_scraper_token(
+    await adb.update_scraper_token(
         token_id,
         is_valid=is_valid,
         username=username,
@@ -4056,17 +4168,17 @@ async def api_scraper_tokens_validate(token_id: str):
 @app.post("/api/scraper/tokens/{token_id}/update", response_class=JSONResponse)
 async def api_scraper_tokens_update(token_id: str, label: str = Form(...)):
     """Update a scraper token's label."""
-    if not db.get_scraper_token(token_id):
+    if not await adb.get_scraper_token(token_id):
         raise HTTPException(404, detail="Token not found")
 
-    db.update_scraper_token(token_id, label=label.strip())
+    await adb.update_scraper_token(token_id, label=label.strip())
     return JSONResponse({"ok": True})
 
 
 @app.delete("/api/scraper/tokens/{token_id}", response_class=JSONResponse)
 async def api_scraper_tokens_delete(token_id: str):
     """Delete a scraper token."""
-    if not db.delete_scraper_token(token_id):
+    if not await adb.delete_scraper_token(token_id):
         raise HTTPException(404, detail="Token not found")
     return JSONResponse({"ok": True})
 
@@ -4079,7 +4191,7 @@ async def api_scraper_validate_setup(guild_id: str = Form(...)):
     except ValueError:
         raise HTTPException(400, detail="Invalid guild_id")
 
-    tokens = db.get_valid_scraper_tokens()
+    tokens = await adb.get_valid_scraper_tokens()
     if not tokens:
         return JSONResponse(
             {
@@ -4166,13 +4278,13 @@ async def api_server_proxies_get():
         else:
             lines = []
         enabled = (
-            db.get_config("ENABLE_CLIENT_PROXIES", "") or ""
+            await adb.get_config("ENABLE_CLIENT_PROXIES", "") or ""
         ).strip().lower() in (
             "1",
             "true",
             "yes",
         )
-        interval_raw = (db.get_config("PROXY_ROTATION_INTERVAL", "") or "").strip()
+        interval_raw = (await adb.get_config("PROXY_ROTATION_INTERVAL", "") or "").strip()
         try:
             rotation_interval = int(interval_raw) if interval_raw else 0
         except (ValueError, TypeError):
@@ -4218,7 +4330,7 @@ async def api_server_proxies_toggle(request: Request):
         raise HTTPException(400, detail="Invalid JSON")
     enabled = bool(payload.get("enabled", False))
     try:
-        db.set_config("ENABLE_CLIENT_PROXIES", "true" if enabled else "false")
+        await adb.set_config("ENABLE_CLIENT_PROXIES", "true" if enabled else "false")
         return JSONResponse({"ok": True, "enabled": enabled})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
@@ -4236,7 +4348,7 @@ async def api_server_proxies_rotation_interval(request: Request):
     except (ValueError, TypeError):
         raise HTTPException(400, detail="interval must be an integer")
     try:
-        db.set_config("PROXY_ROTATION_INTERVAL", str(interval))
+        await adb.set_config("PROXY_ROTATION_INTERVAL", str(interval))
         return JSONResponse({"ok": True, "rotation_interval": interval})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
@@ -4255,7 +4367,7 @@ async def api_proxy_settings_get():
     try:
         settings = {}
         for key, default in _PROXY_SETTINGS_KEYS.items():
-            raw = (db.get_config(key, "") or "").strip()
+            raw = (await adb.get_config(key, "") or "").strip()
             try:
                 settings[key] = int(raw) if raw else default
             except (ValueError, TypeError):
@@ -4279,7 +4391,7 @@ async def api_proxy_settings_put(request: Request):
         for key, default in _PROXY_SETTINGS_KEYS.items():
             if key in settings:
                 val = max(1, int(settings[key]))
-                db.set_config(key, str(val))
+                await adb.set_config(key, str(val))
         return JSONResponse({"ok": True})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
@@ -4342,7 +4454,7 @@ async def api_server_proxies_test(request: Request):
         ProxyConnector = None
 
     test_url = "https://discord.com/api/v9/gateway"
-    _batch_raw = (db.get_config("PROXY_TEST_BATCH_SIZE", "") or "").strip()
+    _batch_raw = (await adb.get_config("PROXY_TEST_BATCH_SIZE", "") or "").strip()
     batch_size = int(_batch_raw) if _batch_raw else 50
     _timeout = aiohttp.ClientTimeout(total=5)
 
@@ -4531,7 +4643,7 @@ async def api_sync_settings_get():
     try:
         settings = {}
         for key, default in _SYNC_SETTINGS_KEYS.items():
-            raw = (db.get_config(key, "") or "").strip()
+            raw = (await adb.get_config(key, "") or "").strip()
             try:
                 settings[key] = int(raw) if raw else default
             except (ValueError, TypeError):
@@ -4555,7 +4667,7 @@ async def api_sync_settings_put(request: Request):
         for key, default in _SYNC_SETTINGS_KEYS.items():
             if key in settings:
                 val = max(1, int(settings[key]))
-                db.set_config(key, str(val))
+                await adb.set_config(key, str(val))
         return JSONResponse({"ok": True})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
@@ -4565,10 +4677,10 @@ async def api_sync_settings_put(request: Request):
 async def api_notifications_settings_get():
     """Return webhook notification settings."""
     try:
-        webhook_url = (db.get_config("NOTIFICATION_WEBHOOK_URL", "") or "").strip()
+        webhook_url = (await adb.get_config("NOTIFICATION_WEBHOOK_URL", "") or "").strip()
         events = {}
         for key, meta in NOTIFICATION_EVENTS.items():
-            raw = (db.get_config(f"NOTIFY_{key}", "") or "").strip().lower()
+            raw = (await adb.get_config(f"NOTIFY_{key}", "") or "").strip().lower()
             if raw:
                 events[key] = raw not in ("0", "false", "no")
             else:
@@ -4587,13 +4699,13 @@ async def api_notifications_settings_put(request: Request):
         raise HTTPException(400, detail="Invalid JSON")
     try:
         if "webhook_url" in payload:
-            db.set_config(
+            await adb.set_config(
                 "NOTIFICATION_WEBHOOK_URL", (payload["webhook_url"] or "").strip()
             )
         events = payload.get("events", {})
         for key in NOTIFICATION_EVENTS:
             if key in events:
-                db.set_config(f"NOTIFY_{key}", "true" if events[key] else "false")
+                await adb.set_config(f"NOTIFY_{key}", "true" if events[key] else "false")
         return JSONResponse({"ok": True})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
@@ -4602,7 +4714,7 @@ async def api_notifications_settings_put(request: Request):
 @app.post("/api/notifications/test", response_class=JSONResponse)
 async def api_notifications_test():
     """Send a test notification."""
-    webhook_url = (db.get_config("NOTIFICATION_WEBHOOK_URL", "") or "").strip()
+    webhook_url = (await adb.get_config("NOTIFICATION_WEBHOOK_URL", "") or "").strip()
     if not webhook_url:
         return JSONResponse({"ok": False, "error": "No webhook URL configured"})
     ok = await send_webhook(
@@ -4639,7 +4751,7 @@ async def api_scraper_start(request: Request):
         if isinstance(p, str) and p.strip()
     ]
 
-    tokens = db.get_valid_scraper_tokens()
+    tokens = await adb.get_valid_scraper_tokens()
     if not tokens:
         return JSONResponse(
             {"ok": False, "error": "No valid tokens configured"}, status_code=400
@@ -4649,7 +4761,7 @@ async def api_scraper_start(request: Request):
     for token in tokens:
         if await _selfbot_in_guild(token["token_value"], guild_id):
             accessible_tokens.append(token)
-            db.increment_scraper_token_usage(token["token_id"])
+            await adb.increment_scraper_token_usage(token["token_id"])
 
     if not accessible_tokens:
         return JSONResponse(
@@ -4893,7 +5005,7 @@ async def _run_single_scrape(queue_item: dict):
     include_roles = queue_item.get("include_roles", False)
     proxy_list = queue_item.get("proxies", [])
 
-    tokens = db.get_valid_scraper_tokens()
+    tokens = await adb.get_valid_scraper_tokens()
     if not tokens:
         queue_item["status"] = "error"
         await hub.broadcast(
@@ -4918,7 +5030,7 @@ async def _run_single_scrape(queue_item: dict):
     for token in tokens:
         if await _selfbot_in_guild(token["token_value"], guild_id):
             accessible_tokens.append(token)
-            db.increment_scraper_token_usage(token["token_id"])
+            await adb.increment_scraper_token_usage(token["token_id"])
 
     if not accessible_tokens:
         queue_item["status"] = "error"
@@ -5381,7 +5493,7 @@ async def guild_details(guild_id: str):
       { id, name, icon_url, member_count, ... }
     """
     try:
-        rows = db.get_all_guilds()
+        rows = await adb.get_all_guilds()
         row = next((r for r in rows if str(r.get("guild_id")) == str(guild_id)), None)
         if not row:
             return JSONResponse({"ok": False, "error": "not-found"}, status_code=404)
@@ -5454,14 +5566,14 @@ async def api_channels_customize(payload: dict = Body(...)):
     desired = _discordify(payload.get("clone_channel_name", None))
 
     try:
-        orig = db.get_original_channel_name(ocid)
+        orig = await adb.get_original_channel_name(ocid)
     except Exception:
         orig = None
     if desired is not None and _canon(orig) == desired:
         desired = None
 
     try:
-        current_raw = db.get_clone_channel_name(ocid, cgid)
+        current_raw = await adb.get_clone_channel_name(ocid, cgid)
     except Exception:
         current_raw = None
 
@@ -5474,17 +5586,17 @@ async def api_channels_customize(payload: dict = Body(...)):
         )
 
     try:
-        db.set_channel_clone_name(ocid, cgid, desired)
+        await adb.set_channel_clone_name(ocid, cgid, desired)
     except Exception as e:
         LOGGER.exception("Failed to set clone_channel_name: %s", e)
         return JSONResponse({"ok": False, "error": "db-failure"}, status_code=500)
 
     try:
-        origin_gid = db.get_original_guild_id_for_channel(ocid)
+        origin_gid = await adb.get_original_guild_id_for_channel(ocid)
 
         mapping_id = None
         if origin_gid is not None:
-            row = db.get_mapping_by_original_and_clone(origin_gid, cgid)
+            row = await adb.get_mapping_by_original_and_clone(origin_gid, cgid)
             if row:
                 mapping_id = row["mapping_id"]
 
@@ -5533,7 +5645,7 @@ async def api_categories_customize(payload: dict = Body(...)):
             )
     else:
         name = _norm_display(payload.get("category_name"))
-        ocid = db.resolve_original_category_id_by_name(name) if name else None
+        ocid = await adb.resolve_original_category_id_by_name(name) if name else None
         if not ocid:
             LOGGER.warning(
                 "Customize category | missing/unresolvable category for name=%r, payload=%r",
@@ -5564,7 +5676,7 @@ async def api_categories_customize(payload: dict = Body(...)):
     desired = _norm_display(desired_raw)
 
     try:
-        orig = db.get_original_category_name(ocid)
+        orig = await adb.get_original_category_name(ocid)
         LOGGER.debug(
             "Customize category | original name for ocid=%s: %r",
             ocid,
@@ -5582,7 +5694,7 @@ async def api_categories_customize(payload: dict = Body(...)):
         desired = None
 
     try:
-        current_raw = db.get_clone_category_name(ocid, cgid)
+        current_raw = await adb.get_clone_category_name(ocid, cgid)
     except Exception as e:
         LOGGER.warning(
             "Customize category | failed to load current cloned name for (ocid=%s, cgid=%s): %s",
@@ -5598,7 +5710,7 @@ async def api_categories_customize(payload: dict = Body(...)):
         )
 
     try:
-        db.set_category_clone_name(ocid, cgid, desired)
+        await adb.set_category_clone_name(ocid, cgid, desired)
     except Exception as e:
         LOGGER.exception(
             "Failed to set cloned_category_name for (ocid=%s, cgid=%s): %s",
@@ -5615,11 +5727,11 @@ async def api_categories_customize(payload: dict = Body(...)):
             cgid,
         )
 
-        origin_gid = db.get_original_guild_id_for_category(ocid)
+        origin_gid = await adb.get_original_guild_id_for_category(ocid)
 
         mapping_id = None
         if origin_gid is not None:
-            row = db.get_mapping_by_original_and_clone(origin_gid, cgid)
+            row = await adb.get_mapping_by_original_and_clone(origin_gid, cgid)
             if row:
                 mapping_id = row["mapping_id"]
 
@@ -5685,7 +5797,7 @@ async def _fetch_latest_release(session: aiohttp.ClientSession) -> dict | None:
         "User-Agent": "copycord-app",
     }
 
-    etag = db.get_config("gh_releases_etag", "")
+    etag = await adb.get_config("gh_releases_etag", "")
     if etag:
         headers["If-None-Match"] = etag
 
@@ -5697,7 +5809,7 @@ async def _fetch_latest_release(session: aiohttp.ClientSession) -> dict | None:
         data = await r.json()
         new_etag = r.headers.get("ETag") or ""
         if new_etag and new_etag != etag:
-            db.set_config("gh_releases_etag", new_etag)
+            await adb.set_config("gh_releases_etag", new_etag)
 
     tag = data.get("tag_name")
     html_url = data.get("html_url")
@@ -5714,22 +5826,22 @@ async def _release_watch_loop():
         while not shutdown_event.is_set():
             try:
                 try:
-                    recorded_ver = db.get_version()
+                    recorded_ver = await adb.get_version()
                     if recorded_ver != CURRENT_VERSION:
-                        db.set_version(CURRENT_VERSION)
+                        await adb.set_version(CURRENT_VERSION)
                 except AttributeError:
-                    recorded_ver = db.get_config("current_version", "")
+                    recorded_ver = await adb.get_config("current_version", "")
                     if recorded_ver != CURRENT_VERSION:
-                        db.set_config("current_version", CURRENT_VERSION)
+                        await adb.set_config("current_version", CURRENT_VERSION)
 
                 rel = await _fetch_latest_release(session)
                 if rel:
-                    prev = db.get_config("latest_tag", "")
+                    prev = await adb.get_config("latest_tag", "")
                     if rel["tag"] != prev:
-                        db.set_config("latest_tag", rel["tag"])
-                        db.set_config("latest_url", rel["url"])
+                        await adb.set_config("latest_tag", rel["tag"])
+                        await adb.set_config("latest_url", rel["url"])
                         if rel.get("published_at"):
-                            db.set_config("latest_published_at", rel["published_at"])
+                            await adb.set_config("latest_published_at", rel["published_at"])
 
                         LOGGER.info("Detected new release: %s", rel["tag"])
             except Exception:
@@ -5761,6 +5873,9 @@ async def api_export_messages(request: Request):
         "after_iso": payload.get("after_iso"),
         "before_iso": payload.get("before_iso"),
         "filters": payload.get("filters") or {},
+        "format": payload.get("format") or "json",
+        "compression": payload.get("compression") or "none",
+        "manifest": bool(payload.get("manifest", True)),
     }
 
     try:
@@ -5793,7 +5908,7 @@ async def api_export_messages(request: Request):
 
 @app.get("/api/guild-mappings", response_class=JSONResponse)
 async def api_list_guild_mappings():
-    rows = db.list_guild_mappings()
+    rows = await adb.list_guild_mappings()
     return JSONResponse({"ok": True, "mappings": rows})
 
 
@@ -5819,7 +5934,7 @@ async def api_create_mapping(payload: dict = Body(...)):
 
     settings = payload.get("settings") or {}
 
-    existing_clone = db.get_mapping_by_clone(clone_gid)
+    existing_clone = await adb.get_mapping_by_clone(clone_gid)
     if existing_clone:
         return JSONResponse(
             {
@@ -5830,8 +5945,8 @@ async def api_create_mapping(payload: dict = Body(...)):
             status_code=400,
         )
 
-    client_token = db.get_config("CLIENT_TOKEN", "")
-    server_token = db.get_config("SERVER_TOKEN", "")
+    client_token = await adb.get_config("CLIENT_TOKEN", "")
+    server_token = await adb.get_config("SERVER_TOKEN", "")
 
     in_host = await _selfbot_in_guild(client_token, host_gid)
     if not in_host:
@@ -5856,7 +5971,7 @@ async def api_create_mapping(payload: dict = Body(...)):
         )
 
     try:
-        new_mapping_id = db.upsert_guild_mapping(
+        new_mapping_id = await adb.upsert_guild_mapping(
             mapping_id=None,
             mapping_name=mapping_name,
             original_guild_id=host_gid,
@@ -5885,12 +6000,12 @@ async def api_update_mapping(mapping_id: str, payload: dict = Body(...)):
     cloned_guild_id = int(payload.get("cloned_guild_id") or 0)
     settings = payload.get("settings") or {}
 
-    existing = db.get_mapping_by_id(mapping_id)
+    existing = await adb.get_mapping_by_id(mapping_id)
     old_host_id = int(existing["original_guild_id"] or 0) if existing else 0
     old_clone_id = int(existing["cloned_guild_id"] or 0) if existing else 0
 
-    client_token = db.get_config("CLIENT_TOKEN", "")
-    server_token = db.get_config("SERVER_TOKEN", "")
+    client_token = await adb.get_config("CLIENT_TOKEN", "")
+    server_token = await adb.get_config("SERVER_TOKEN", "")
 
     in_host = await _selfbot_in_guild(client_token, original_guild_id)
     in_clone = await _bot_in_guild(server_token, cloned_guild_id)
@@ -5918,9 +6033,9 @@ async def api_update_mapping(mapping_id: str, payload: dict = Body(...)):
     if existing and (
         old_host_id != original_guild_id or old_clone_id != cloned_guild_id
     ):
-        db.clear_mapping_pair_state(old_host_id, old_clone_id)
+        await adb.clear_mapping_pair_state(old_host_id, old_clone_id)
 
-    db.upsert_guild_mapping(
+    await adb.upsert_guild_mapping(
         mapping_id=mapping_id,
         mapping_name=mapping_name,
         original_guild_id=original_guild_id,
@@ -5936,7 +6051,7 @@ async def api_update_mapping(mapping_id: str, payload: dict = Body(...)):
 
 @app.delete("/api/guild-mappings/{mapping_id}", response_class=JSONResponse)
 async def api_delete_mapping(mapping_id: str):
-    db.delete_guild_mapping(mapping_id)
+    await adb.delete_guild_mapping(mapping_id)
     return JSONResponse({"ok": True})
 
 
@@ -5965,12 +6080,12 @@ def _serialize_mapping_token(row: dict) -> dict:
 
 @app.get("/api/guild-mappings/{mapping_id}/user-tokens", response_class=JSONResponse)
 async def api_list_mapping_tokens(mapping_id: str):
-    m = db.get_mapping_by_id(mapping_id)
+    m = await adb.get_mapping_by_id(mapping_id)
     if not m:
         return JSONResponse(
             {"ok": False, "error": "Mapping not found."}, status_code=404
         )
-    rows = db.list_mapping_tokens(mapping_id)
+    rows = await adb.list_mapping_tokens(mapping_id)
     return JSONResponse(
         {"ok": True, "tokens": [_serialize_mapping_token(r) for r in rows]}
     )
@@ -5978,7 +6093,7 @@ async def api_list_mapping_tokens(mapping_id: str):
 
 @app.post("/api/guild-mappings/{mapping_id}/user-tokens", response_class=JSONResponse)
 async def api_add_mapping_token(mapping_id: str, payload: dict = Body(...)):
-    m = db.get_mapping_by_id(mapping_id)
+    m = await adb.get_mapping_by_id(mapping_id)
     if not m:
         return JSONResponse(
             {"ok": False, "error": "Mapping not found."}, status_code=404
@@ -6009,7 +6124,7 @@ async def api_add_mapping_token(mapping_id: str, payload: dict = Body(...)):
     user_id = (ident or {}).get("id") or None
 
     try:
-        token_id = db.add_mapping_token(
+        token_id = await adb.add_mapping_token(
             mapping_id, token, label=label, username=username, user_id=user_id
         )
     except sqlite3.IntegrityError:
@@ -6018,7 +6133,7 @@ async def api_add_mapping_token(mapping_id: str, payload: dict = Body(...)):
             status_code=400,
         )
 
-    row = db.get_mapping_token(token_id)
+    row = await adb.get_mapping_token(token_id)
     return JSONResponse(
         {"ok": True, "token": _serialize_mapping_token(row)}, status_code=200
     )
@@ -6029,7 +6144,7 @@ async def api_add_mapping_token(mapping_id: str, payload: dict = Body(...)):
     response_class=JSONResponse,
 )
 async def api_bulk_add_mapping_tokens(mapping_id: str, payload: dict = Body(...)):
-    m = db.get_mapping_by_id(mapping_id)
+    m = await adb.get_mapping_by_id(mapping_id)
     if not m:
         return JSONResponse(
             {"ok": False, "error": "Mapping not found."}, status_code=404
@@ -6056,7 +6171,7 @@ async def api_bulk_add_mapping_tokens(mapping_id: str, payload: dict = Body(...)
     except Exception:
         clone_gid = 0
 
-    existing = {r["token_value"] for r in db.list_mapping_tokens(mapping_id)}
+    existing = {r["token_value"] for r in await adb.list_mapping_tokens(mapping_id)}
 
     results = []
     added = 0
@@ -6076,7 +6191,7 @@ async def api_bulk_add_mapping_tokens(mapping_id: str, payload: dict = Body(...)
         username = (ident or {}).get("username") or None
         user_id = (ident or {}).get("id") or None
         try:
-            db.add_mapping_token(mapping_id, t, username=username, user_id=user_id)
+            await adb.add_mapping_token(mapping_id, t, username=username, user_id=user_id)
             existing.add(t)
             added += 1
             results.append({"masked": masked, "status": "added", "username": username})
@@ -6103,7 +6218,7 @@ async def api_verify_mapping_tokens(mapping_id: str):
     """Re-check every attached token: is it still valid AND a member of the
     clone guild? Returns per-token results (with ids) so the UI can offer to
     prune the non-working ones."""
-    m = db.get_mapping_by_id(mapping_id)
+    m = await adb.get_mapping_by_id(mapping_id)
     if not m:
         return JSONResponse(
             {"ok": False, "error": "Mapping not found."}, status_code=404
@@ -6114,7 +6229,7 @@ async def api_verify_mapping_tokens(mapping_id: str):
     except Exception:
         clone_gid = 0
 
-    rows = db.list_mapping_tokens(mapping_id)
+    rows = await adb.list_mapping_tokens(mapping_id)
 
     results = []
     working = 0
@@ -6154,7 +6269,7 @@ async def api_verify_mapping_tokens(mapping_id: str):
 async def api_bulk_delete_mapping_tokens(mapping_id: str, payload: dict = Body(...)):
     """Bulk-remove tokens. Pass ``{"scope": "all"}`` to remove every token, or
     ``{"ids": [...]}`` to remove a specific set (e.g. non-working ones)."""
-    m = db.get_mapping_by_id(mapping_id)
+    m = await adb.get_mapping_by_id(mapping_id)
     if not m:
         return JSONResponse(
             {"ok": False, "error": "Mapping not found."}, status_code=404
@@ -6162,7 +6277,7 @@ async def api_bulk_delete_mapping_tokens(mapping_id: str, payload: dict = Body(.
 
     scope = str(payload.get("scope") or "").strip().lower()
     if scope == "all":
-        deleted = db.delete_all_mapping_tokens(mapping_id)
+        deleted = await adb.delete_all_mapping_tokens(mapping_id)
         return JSONResponse({"ok": True, "deleted": deleted})
 
     ids = payload.get("ids")
@@ -6174,9 +6289,9 @@ async def api_bulk_delete_mapping_tokens(mapping_id: str, payload: dict = Body(.
 
     deleted = 0
     for tid in ids:
-        row = db.get_mapping_token(tid)
+        row = await adb.get_mapping_token(tid)
         if row and str(row.get("mapping_id")) == str(mapping_id):
-            if db.delete_mapping_token(tid):
+            if await adb.delete_mapping_token(tid):
                 deleted += 1
 
     return JSONResponse({"ok": True, "deleted": deleted})
@@ -6189,14 +6304,14 @@ async def api_bulk_delete_mapping_tokens(mapping_id: str, payload: dict = Body(.
 async def api_update_mapping_token(
     mapping_id: str, token_id: str, payload: dict = Body(...)
 ):
-    row = db.get_mapping_token(token_id)
+    row = await adb.get_mapping_token(token_id)
     if not row or str(row.get("mapping_id")) != str(mapping_id):
         return JSONResponse({"ok": False, "error": "Token not found."}, status_code=404)
 
     if "enabled" in payload:
-        db.set_mapping_token_enabled(token_id, bool(payload.get("enabled")))
+        await adb.set_mapping_token_enabled(token_id, bool(payload.get("enabled")))
 
-    updated = db.get_mapping_token(token_id)
+    updated = await adb.get_mapping_token(token_id)
     return JSONResponse({"ok": True, "token": _serialize_mapping_token(updated)})
 
 
@@ -6205,10 +6320,10 @@ async def api_update_mapping_token(
     response_class=JSONResponse,
 )
 async def api_delete_mapping_token(mapping_id: str, token_id: str):
-    row = db.get_mapping_token(token_id)
+    row = await adb.get_mapping_token(token_id)
     if not row or str(row.get("mapping_id")) != str(mapping_id):
         return JSONResponse({"ok": False, "error": "Token not found."}, status_code=404)
-    db.delete_mapping_token(token_id)
+    await adb.delete_mapping_token(token_id)
     return JSONResponse({"ok": True})
 
 
@@ -6219,7 +6334,7 @@ async def api_client_guilds():
 
     """
 
-    cfg = db.get_all_config()
+    cfg = await adb.get_all_config()
     client_token = (cfg.get("CLIENT_TOKEN") or "").strip()
 
     if not client_token:
@@ -6528,7 +6643,7 @@ async def api_list_forwarding(guild_id: str | None = Query(default=None)):
     """
     List message forwarding rules, optionally filtered by guild_id.
     """
-    rows = db.list_message_forwarding_rules(guild_id=guild_id) or []
+    rows = await adb.list_message_forwarding_rules(guild_id=guild_id) or []
 
     for row in rows:
         row_filters = row.get("filters")
@@ -6583,7 +6698,7 @@ async def api_save_forwarding(payload: dict = Body(...)):
         config.pop("url", None)
 
     try:
-        db.upsert_message_forwarding_rule(
+        await adb.upsert_message_forwarding_rule(
             rule_id=rule_id,
             guild_id=guild_id,
             label=label,
@@ -6617,11 +6732,11 @@ async def api_delete_forwarding(rule_id: str):
     """
     Delete a message forwarding rule.
     """
-    existing = db.get_message_forwarding_rule(rule_id)
+    existing = await adb.get_message_forwarding_rule(rule_id)
     if not existing:
         raise HTTPException(status_code=404, detail="fwd-not-found")
 
-    db.delete_message_forward_rule(rule_id)
+    await adb.delete_message_forward_rule(rule_id)
     return JSONResponse({"ok": True, "deleted": rule_id})
 
 
@@ -6632,8 +6747,8 @@ async def api_forwarding_count():
     plus counts grouped by provider.
     """
     try:
-        total = db.count_forwarded_messages()
-        by_provider = db.count_forwarded_by_provider()
+        total = await adb.count_forwarded_messages()
+        by_provider = await adb.count_forwarded_by_provider()
         return JSONResponse({"ok": True, "count": total, "by_provider": by_provider})
     except Exception as e:
         LOGGER.exception("Failed to fetch forwarding count: %s", e)
@@ -6649,7 +6764,7 @@ async def api_forwarding_count_by_rule(include_null: bool = False):
     - include_null (bool): include a bucket for missing/empty rule_id under key "".
     """
     try:
-        by_rule = db.count_forwarded_by_rule(include_null=include_null)
+        by_rule = await adb.count_forwarded_by_rule(include_null=include_null)
         return JSONResponse({"ok": True, "by_rule": by_rule})
     except Exception as e:
         LOGGER.exception("Failed to fetch forwarding count by rule: %s", e)
@@ -25,6 +25,7 @@ from dotenv import load_dotenv
 from discord.errors import ConnectionClosed, LoginFailure
 from common.config import Config, CURRENT_VERSION
 from common.db import DBManager
+from common.keywords import KeywordMatcher
 from client.sitemap import SitemapService
 from client.message_utils import (
     MessageUtils,
@@ -166,13 +167,18 @@ class ClientListener:
         self.bot.event(self.on_guild_emojis_update)
         self.bot.event(self.on_guild_stickers_update)
         self.bus = AdminBus(
-            role="client", logger=logger, admin_ws_url=self.config.ADMIN_WS_URL
+            role="client",
+            logger=logger,
+            admin_ws_url=self.config.ADMIN_WS_URL,
+            persistent=self.config.WS_PERSISTENT,
         )
         self.ws = WebsocketManager(
             send_url=self.config.SERVER_WS_URL,
             listen_host=self.config.CLIENT_WS_HOST,
             listen_port=self.config.CLIENT_WS_PORT,
             logger=logger,
+            persistent=self.config.WS_PERSISTENT,
+            queue_size=self.config.WS_SEND_QUEUE_SIZE,
         )
         
         self.forwarding = ForwardingManager(
@@ -217,6 +223,12 @@ class ClientListener:
         self._bf_worker_task: asyncio.Task | None = None
         self._bf_waiters: dict[int, asyncio.Event] = {}
         self._bf_pull_gate = asyncio.Semaphore(1)
+        self.blocked_keywords_map: dict[int, list[str]] = {}
+        self._blocked_matchers: dict[int, KeywordMatcher] = {}
+        # guild_id -> (version, loaded_at, matcher, triggers by keyword)
+        self._announce_cache: dict[int, tuple] = {}
+        self._announce_version = 0
+        self._announce_ttl = float(os.getenv("ANNOUNCE_CACHE_TTL", "300"))
 
         loop = asyncio.get_event_loop()
         for sig in (signal.SIGINT, signal.SIGTERM):
@@ -320,6 +332,12 @@ class ClientListener:
 
             return {"ok": True}
         
+        elif typ == "announcements_reload":
+            gid = data.get("guild_id") if isinstance(data, dict) else None
+            self._invalidate_announcements(int(gid) if gid else None)
+            logger.debug("[📢] Announcement trigger cache invalidated (guild=%s)", gid)
+            return {"ok": True}
+
         elif typ == "forwarding_reload":
             try:
                 await self.forwarding.reload_config()
@@ -358,6 +376,7 @@ class ClientListener:
             after_id = data.get("after_id")
 
             exclude_ids = data.get("exclude_ids")
+            exclude_ids_packed = data.get("exclude_ids_packed")
 
             params = {
                 "after_iso": after_iso,
@@ -369,6 +388,11 @@ class ClientListener:
                 "cloned_guild_id": data.get("cloned_guild_id"),
                 "original_guild_id": data.get("original_guild_id"),
                 **({"exclude_ids": exclude_ids} if exclude_ids else {}),
+                **(
+                    {"exclude_ids_packed": exclude_ids_packed}
+                    if exclude_ids_packed
+                    else {}
+                ),
             }
             return await self._enqueue_backfill(chan_id, params)
 
@@ -828,13 +852,13 @@ class ClientListener:
 
         After this runs:
         self.blocked_keywords_map[guild_id] = ["badword", "otherword", ...]
-        self._blocked_patterns_map[guild_id] = [(compiled_regex, "badword"), ...]
+        self._blocked_matchers[guild_id] = KeywordMatcher(whole-word, case-insensitive)
         """
         if kw_map is None:
             kw_map = self.db.get_blocked_keywords_by_origin()
 
         normalized_map: dict[int, list[str]] = {}
-        patterns_map: dict[int, list[tuple[re.Pattern, str]]] = {}
+        matchers: dict[int, KeywordMatcher] = {}
 
         for gid_key, words in (kw_map or {}).items():
             try:
@@ -847,19 +871,10 @@ class ClientListener:
             ]
 
             normalized_map[gid_int] = cleaned_words
-
-            pat_list: list[tuple[re.Pattern, str]] = []
-            for w in cleaned_words:
-                regex = re.compile(
-                    rf"(?<!\w){re.escape(w)}(?!\w)",
-                    re.IGNORECASE,
-                )
-                pat_list.append((regex, w))
-
-            patterns_map[gid_int] = pat_list
+            matchers[gid_int] = KeywordMatcher(cleaned_words, whole_word=True)
 
         self.blocked_keywords_map = normalized_map
-        self._blocked_patterns_map = patterns_map
+        self._blocked_matchers = matchers
 
         logger.debug("[⚙️] Block list now: %s", self.blocked_keywords_map)
 
@@ -888,61 +903,86 @@ class ClientListener:
         if not g or not self._is_mapped_origin(g.id):
             return True
 
-    async def maybe_send_announcement(self, message: discord.Message) -> bool:
-        content = message.content
-        lower = content.lower()
-        author = message.author
-        chan_id = message.channel.id
-        guild_id = message.guild.id if message.guild else 0
-        guild_name = message.guild.name if message.guild else "Unknown"
+    def _invalidate_announcements(self, guild_id: int | None = None) -> None:
+        """
+        Drop cached announcement triggers. Guild 0 holds the triggers shared by
+        every guild, so it (like None) invalidates everything by bumping the
+        cache version.
+        """
+        if guild_id:
+            self._announce_cache.pop(guild_id, None)
+        else:
+            self._announce_version += 1
 
-        triggers = self.db.get_effective_announcement_triggers(guild_id)
-        if not triggers:
-            return False
+    def _announcement_triggers(
+        self, guild_id: int
+    ) -> tuple[KeywordMatcher, dict[str, list[tuple[str, list[tuple[int, int]]]]]]:
+        """
+        The guild's effective triggers, grouped by lower-cased keyword in DB
+        order, plus a matcher over those keywords. Loaded once and kept until
+        the server reports a trigger change; the TTL only covers notifications
+        missed while disconnected. A trigger fires when its keyword appears
+        anywhere in the message, case-insensitively (custom emoji names
+        included).
+        """
+        now = time.monotonic()
+        entry = self._announce_cache.get(guild_id)
+        if (
+            entry is not None
+            and entry[0] == self._announce_version
+            and now - entry[1] < self._announce_ttl
+        ):
+            return entry[2], entry[3]
 
-        for kw, entries in triggers.items():
-            key = kw.lower()
-            matched = False
+        groups: dict[str, list[tuple[str, list[tuple[int, int]]]]] = {}
+        for kw, entries in self.db.get_effective_announcement_triggers(guild_id).items():
+            groups.setdefault(kw.lower(), []).append((kw, entries))
+        matcher = KeywordMatcher(groups)
+        self._announce_cache[guild_id] = (self._announce_version, now, matcher, groups)
+        return matcher, groups
 
-            if re.match(r"^\w+$", key) and re.search(rf"\b{re.escape(key)}\b", lower):
-                matched = True
+    async def maybe_send_announcement(self, message: discord.Message) -> bool:
+        guild_id = message.guild.id if message.guild else 0
+        matcher, groups = self._announcement_triggers(guild_id)
+        if not matcher:
+            return False
 
-            if (
-                not matched
-                and re.match(r"^[A-Za-z0-9_]+$", key)
-                and re.search(rf"<a?:{re.escape(key)}:\d+>", content)
-            ):
-                matched = True
+        content = message.content
+        found = matcher.found(content)
+        if not found:
+            return False
 
-            if not matched and key in lower:
-                matched = True
+        author = message.author
+        chan_id = message.channel.id
+        guild_name = message.guild.name if message.guild else "Unknown"
 
-            if not matched:
+        for key in groups:
+            if key not in found:
                 continue
-
-            for filter_id, allowed_chan in entries:
-                if (filter_id == 0 or author.id == filter_id) and (
-                    allowed_chan == 0 or chan_id == allowed_chan
-                ):
-                    payload = {
-                        "type": "announce",
-                        "data": {
-                            "guild_id": guild_id,
-                            "keyword": kw,
-                            "content": content,
-                            "author": author.name,
-                            "channel_id": chan_id,
-                            "channel_name": getattr(
-                                message.channel, "name", str(chan_id)
-                            ),
-                            "timestamp": str(message.created_at),
-                        },
-                    }
-                    await self.ws.send(payload)
-                    logger.info(
-                        f"[📢] Announcement `{kw}` by {author} in {guild_name} ({guild_id})"
-                    )
-                    return True
+            for kw, entries in groups[key]:
+                for filter_id, allowed_chan in entries:
+                    if (filter_id == 0 or author.id == filter_id) and (
+                        allowed_chan == 0 or chan_id == allowed_chan
+                    ):
+                        payload = {
+                            "type": "announce",
+                            "data": {
+                                "guild_id": guild_id,
+                                "keyword": kw,
+                                "content": content,
+                                "author": author.name,
+                                "channel_id": chan_id,
+                                "channel_name": getattr(
+                                    message.channel, "name", str(chan_id)
+                                ),
+                                "timestamp": str(message.created_at),
+                            },
+                        }
+                        await self.ws.send(payload)
+                        logger.info(
+                            f"[📢] Announcement `{kw}` by {author} in {guild_name} ({guild_id})"
+                        )
+                        return True
 
         return False
 
@@ -2428,6 +2468,10 @@ class ClientListener:
             )
         with contextlib.suppress(Exception):
             await self.forwarding.close(drain=False)
+        with contextlib.suppress(Exception):
+            await self.ws.stop()
+        with contextlib.suppress(Exception):
+            await self.bus.stop()
 
         with contextlib.suppress(Exception):
             await self.bot.close()
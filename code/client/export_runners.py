@@ -12,6 +12,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import math
 import os
 import shutil
 import unicodedata
@@ -35,6 +36,14 @@ from typing import (
 )
 from discord import ChannelType, ForumChannel, MessageType, Object as DiscordObject
 from discord.errors import HTTPException, Forbidden
+from common.idset import SortedIdSet
+from client.export_writer import (
+    NDJSONExportWriter,
+    iter_export_rows,
+    ndjson_to_json,
+    write_manifest,
+)
+from client.media_store import MediaStore, attachment_key
 from client.message_utils import (
     _resolve_forward,
     _resolve_forward_via_snapshot,
@@ -55,6 +64,57 @@ def _dt_from_snowflake(snow_id: int | str) -> datetime:
         return None
 
 
+def _snowflake_from_dt(dt: datetime) -> int:
+    return max(0, int(dt.timestamp() * 1000) - DISCORD_EPOCH_MS) << 22
+
+
+class _SentTotalEstimate:
+    """
+    Running estimate of how many messages a single-pass backfill will send.
+
+    Streams are walked one after another (the channel, then each thread).
+    Everything sent by earlier streams is exact; the current stream is
+    extrapolated from how far its cursor has moved between the range bounds,
+    using the timestamps packed into message snowflakes. Streams that were
+    buffered whole (last_n) report their size up front instead.
+    """
+
+    __slots__ = ("_start", "_lo", "_hi", "_at", "_fixed")
+
+    def __init__(self) -> None:
+        self._start = 0
+        self._lo = self._hi = self._at = None
+        self._fixed: Optional[int] = None
+
+    def begin(self, sent: int, lo_id: int, hi_id: int) -> None:
+        """Start an oldest-first stream bounded by two snowflakes."""
+        self._start = sent
+        self._lo, self._hi = int(lo_id) >> 22, int(hi_id) >> 22
+        self._at = None
+        self._fixed = None
+
+    def expect(self, sent: int, count: int) -> None:
+        """Start a stream whose size is already known."""
+        self._start = sent
+        self._lo = self._hi = self._at = None
+        self._fixed = sent + int(count)
+
+    def advance(self, msg_id: int) -> None:
+        self._at = int(msg_id) >> 22
+
+    def total(self, sent: int) -> int:
+        if self._fixed is not None:
+            return max(sent, self._fixed)
+        if self._lo is None or self._at is None:
+            return sent
+        span = self._hi - self._lo
+        frac = (self._at - self._lo) / span if span > 0 else 1.0
+        if frac <= 0:
+            return sent
+        frac = min(frac, 1.0)
+        return max(sent, self._start + math.ceil((sent - self._start) / frac))
+
+
 class ExportMessagesRunner:
     def __init__(
         self,
@@ -66,6 +126,7 @@ class ExportMessagesRunner:
         send_sleep: float = 2.0,
         out_root: str = os.path.join(os.getenv("DATA_DIR", "/data"), "exports"),
         download_concurrency: int = 4,
+        media_store_root: Optional[str] = None,
     ) -> None:
         self.bot = bot
         self.ws = ws
@@ -75,6 +136,7 @@ class ExportMessagesRunner:
         self.send_sleep = float(send_sleep)
         self.out_root = out_root
         self.download_concurrency = max(1, int(download_concurrency))
+        self.media_store_root = media_store_root or os.path.join(out_root, ".media")
 
         self._link_re = re.compile(r"https?://\S+", re.I)
         self._emoji_re = re.compile(r"(<a?:\w+:\d+>)|([\U0001F300-\U0001FAFF])")
@@ -202,6 +264,7 @@ class ExportMessagesRunner:
                     pass
                 return
 
+        writer: Optional[NDJSONExportWriter] = None
         try:
             chan_id_raw = (d.get("channel_id") or "").strip() or None
             user_id_raw = (d.get("user_id") or "").strip() or None
@@ -441,7 +504,20 @@ class ExportMessagesRunner:
             total_scanned = 0
             total_matched = 0
             forwarded = 0
-            buffer_rows: List[DictLike] = []
+
+            # Matched rows stream to NDJSON as channels are scanned; the media
+            # and forwarding phases read that file back instead of holding
+            # the whole export in memory. format=json (the default) rewrites
+            # it as the classic messages.json afterwards.
+            out_format = (d.get("format") or "json").lower()
+            want_manifest = bool(d.get("manifest", True))
+            ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+            gid_str = str(getattr(guild, "id", "unknown"))
+            subdir = os.path.join(self.out_root, gid_str, ts)
+            os.makedirs(subdir, exist_ok=True)
+            writer = await NDJSONExportWriter(
+                subdir, compression=d.get("compression") or "none", logger=self.log
+            ).open()
 
             for ch in scan_targets:
                 cid = getattr(ch, "id", None)
@@ -577,7 +653,7 @@ class ExportMessagesRunner:
                             ),
                         }
 
-                        buffer_rows.append(
+                        await writer.write(
                             {
                                 "guild_id": getattr(guild, "id", None),
                                 "channel_id": getattr(ch, "id", None),
@@ -589,7 +665,7 @@ class ExportMessagesRunner:
                             self.log.info(
                                 f"[export] Progress {('thread' if is_thread else 'ch')}={cid}: "
                                 f"scanned={ch_scanned}, matched={ch_matched}, "
-                                f"total_scanned={total_scanned}, total_matched={total_matched}, buffered={len(buffer_rows)}"
+                                f"total_scanned={total_scanned}, total_matched={total_matched}, written={writer.count}"
                             )
 
                         if self.scan_sleep:
@@ -603,33 +679,58 @@ class ExportMessagesRunner:
                 )
 
             json_file: Optional[str] = None
+            stream_file: Optional[str] = None
             try:
-                ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-                gid_str = str(getattr(guild, "id", "unknown"))
-                subdir = os.path.join(self.out_root, gid_str, ts)
-                os.makedirs(subdir, exist_ok=True)
-
-                json_file = os.path.join(subdir, "messages.json")
+                await writer.close()
+                stream_file = writer.path
                 self.log.info(
-                    f"[export] Writing JSON snapshot ({len(buffer_rows)} messages) → {json_file}"
+                    f"[export] NDJSON saved ({writer.count} messages) → {stream_file}"
                 )
-                with open(json_file, "w", encoding="utf-8") as f:
-                    json.dump(
+            except Exception as e:
+                self.log.warning(f"[export] Failed to write NDJSON: {e}")
+
+            if stream_file and out_format == "json":
+                try:
+                    json_file = os.path.join(subdir, "messages.json")
+                    await asyncio.get_running_loop().run_in_executor(
+                        None,
+                        ndjson_to_json,
+                        stream_file,
+                        json_file,
                         {
                             "guild_id": gid_str,
                             "exported_at": ts + "Z",
-                            "count": len(buffer_rows),
-                            "messages": [row["message"] for row in buffer_rows],
+                            "count": writer.count,
                         },
-                        f,
-                        ensure_ascii=False,
-                        indent=2,
                     )
-                self.log.info(f"[export] JSON saved: {json_file}")
+                    self.log.info(f"[export] JSON saved: {json_file}")
+                except Exception as e:
+                    self.log.warning(f"[export] Failed to write JSON: {e}")
+                    json_file = None
 
-            except Exception as e:
-                self.log.warning(f"[export] Failed to write JSON: {e}")
-                json_file = None
+            manifest_file: Optional[str] = None
+            if stream_file and want_manifest:
+                try:
+                    manifest_file = os.path.join(subdir, "manifest.json")
+                    manifest = writer.manifest(
+                        guild_id=gid_str,
+                        exported_at=ts + "Z",
+                        scanned=total_scanned,
+                        matched=total_matched,
+                        # format=json removes the NDJSON at the end; row N
+                        # there is messages[N] in messages.json.
+                        **(
+                            {"format": "json", "file": "messages.json"}
+                            if json_file
+                            else {}
+                        ),
+                    )
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, write_manifest, manifest_file, manifest
+                    )
+                except Exception as e:
+                    self.log.warning(f"[export] Failed to write manifest: {e}")
+                    manifest_file = None
 
             dl_cfg = F.get("download_media") or {}
             want_any_download = any(
@@ -641,6 +742,8 @@ class ExportMessagesRunner:
                 "audio": 0,
                 "other": 0,
                 "errors": 0,
+                "downloaded": 0,
+                "reused": 0,
             }
 
             if want_any_download and aiohttp is None:
@@ -683,7 +786,7 @@ class ExportMessagesRunner:
                     "other": [],
                 }
 
-                for row in buffer_rows:
+                async for row in self._iter_rows(stream_file):
                     msg_obj = row.get("message") or {}
                     msg_id = str(msg_obj.get("id") or "")
                     if not msg_id:
@@ -717,7 +820,9 @@ class ExportMessagesRunner:
                         else:
                             fname = f"{msg_id}-{total_count}{ext}"
 
-                        candidates_by_kind[kind].append((url, fname, "", msg_id))
+                        candidates_by_kind[kind].append(
+                            (url, fname, attachment_key(att, url), msg_id)
+                        )
 
                 used_kinds = [k for k, items in candidates_by_kind.items() if items]
                 if not used_kinds:
@@ -725,7 +830,7 @@ class ExportMessagesRunner:
                         "[export] No media matches selection; skipping download step."
                     )
                 else:
-                    media_root = os.path.join(os.path.dirname(json_file or ""), "media")
+                    media_root = os.path.join(subdir, "media")
                     os.makedirs(media_root, exist_ok=True)
                     kind_dirs: Dict[str, str] = {
                         k: os.path.join(media_root, k) for k in used_kinds
@@ -733,22 +838,27 @@ class ExportMessagesRunner:
                     for d in kind_dirs.values():
                         os.makedirs(d, exist_ok=True)
 
+                    taken: set[str] = set()
+
                     def _ensure_unique(dest_dir: str, filename: str) -> str:
                         base, ext = os.path.splitext(filename)
                         i = 0
                         candidate = filename
-                        while os.path.exists(os.path.join(dest_dir, candidate)):
+                        while os.path.join(dest_dir, candidate) in taken or os.path.exists(
+                            os.path.join(dest_dir, candidate)
+                        ):
                             i += 1
                             candidate = f"{base}-dup{i}{ext}"
+                        taken.add(os.path.join(dest_dir, candidate))
                         return candidate
 
                     sem = asyncio.Semaphore(self.download_concurrency)
-                    tasks: List[Tuple[str, str, str, str]] = []
+                    tasks: List[Tuple[str, str, str, str, str]] = []
                     for kind in used_kinds:
                         dest_dir = kind_dirs[kind]
-                        for url, fname, _unused, _msgid in candidates_by_kind[kind]:
+                        for url, fname, key, _msgid in candidates_by_kind[kind]:
                             final_name = _ensure_unique(dest_dir, fname)
-                            tasks.append((kind, url, final_name, dest_dir))
+                            tasks.append((kind, url, final_name, dest_dir, key))
 
                     self.log.info(
                         f"[export] Downloading media per selection: "
@@ -756,32 +866,60 @@ class ExportMessagesRunner:
                         f"→ kinds_used={used_kinds} count={len(tasks)}"
                     )
 
-                    async with aiohttp.ClientSession() as session:
-                        results = await asyncio.gather(
-                            *[
-                                self._download_one(session, sem, kind, url, fname, dest)
-                                for (kind, url, fname, dest) in tasks
-                            ],
-                            return_exceptions=False,
-                        )
+                    store = await MediaStore(self.media_store_root, logger=self.log).open()
+                    try:
+                        async with aiohttp.ClientSession() as session:
+                            results = await asyncio.gather(
+                                *[
+                                    self._download_one(
+                                        session, sem, store, url, key, os.path.join(dest, fname)
+                                    )
+                                    for (kind, url, fname, dest, key) in tasks
+                                ],
+                                return_exceptions=False,
+                            )
+                    finally:
+                        store.close()
 
-                    for (kind, url, *_), res in zip(tasks, results):
-                        ok, path, err = res
+                    media_index: List[DictLike] = []
+                    for (kind, url, fname, dest, key), res in zip(tasks, results):
+                        ok, rec, fetched, err = res
                         if ok:
                             media_report[kind] += 1
+                            media_report["downloaded" if fetched else "reused"] += 1
+                            media_index.append(
+                                {
+                                    "file": f"{kind}/{fname}",
+                                    "key": key,
+                                    "sha256": rec["sha256"],
+                                    "size": rec["size"],
+                                }
+                            )
                         else:
                             media_report["errors"] += 1
                             self.log.warning(
                                 f"[export] Download failed kind={kind} url={self._safe(url)} err={err}"
                             )
 
+                    try:
+                        await asyncio.get_running_loop().run_in_executor(
+                            None,
+                            write_manifest,
+                            os.path.join(media_root, "index.json"),
+                            {"store": self.media_store_root, "files": media_index},
+                        )
+                    except Exception as e:
+                        self.log.warning(f"[export] Failed to write media index: {e}")
+
                     self.log.info(f"[export] Media download complete: {media_report}")
 
-            if do_forward and buffer_rows:
+            if do_forward and stream_file and writer.count:
                 self.log.info(
-                    f"[export] Forwarding buffered messages: {len(buffer_rows)} → webhook(…{wh_tail})"
+                    f"[export] Forwarding exported messages: {writer.count} → webhook(…{wh_tail})"
                 )
-                for idx, row in enumerate(buffer_rows, 1):
+                idx = 0
+                async for row in self._iter_rows(stream_file):
+                    idx += 1
                     try:
                         await self._ws_send(
                             {
@@ -805,17 +943,27 @@ class ExportMessagesRunner:
 
                     if idx % 200 == 0:
                         self.log.info(
-                            f"[export] Forwarded {idx}/{len(buffer_rows)} (total_forwarded={forwarded})"
+                            f"[export] Forwarded {idx}/{writer.count} (total_forwarded={forwarded})"
                         )
             else:
                 self.log.info(
                     "[export] No webhook URL provided — skipping forwarding step."
                 )
 
+            if json_file and stream_file:
+                # The NDJSON was only the working copy for the media and
+                # forwarding phases; don't leave both formats on disk.
+                try:
+                    os.remove(stream_file)
+                    stream_file = None
+                except OSError as e:
+                    self.log.debug(f"[export] Could not remove {stream_file}: {e}")
+
+            out_file = json_file or stream_file
             dur = time.perf_counter() - t0
             self.log.info(
                 f"[export] Complete guild={gid_log} ({gname}) scanned={total_scanned}, matched={total_matched}, "
-                f"forwarded={forwarded}, json={'saved '+json_file if json_file else 'none'}, "
+                f"forwarded={forwarded}, output={'saved '+out_file if out_file else 'none'}, "
                 f"media_dl={media_report if want_any_download else 'skipped'}, elapsed={dur:.1f}s"
             )
 
@@ -825,7 +973,9 @@ class ExportMessagesRunner:
                     "forwarded": forwarded,
                     "scanned": total_scanned,
                     "matched": total_matched,
-                    **({"json_path": json_file} if json_file else {}),
+                    **({"json_path": out_file} if out_file else {}),
+                    **({"ndjson_path": stream_file} if stream_file else {}),
+                    **({"manifest_path": manifest_file} if manifest_file else {}),
                 }
                 if want_any_download:
                     done_payload["media_download"] = media_report
@@ -836,11 +986,25 @@ class ExportMessagesRunner:
                 self.log.debug(f"[export] emit export_messages_done failed: {e}")
 
         finally:
+            if writer is not None:
+                # No-op after a normal run; on an error or cancellation
+                # mid-scan it releases the still-open stream file.
+                try:
+                    await writer.close()
+                except Exception:
+                    pass
             await self._end(gid_log)
 
     async def _ws_send(self, payload: DictLike) -> None:
         await self.ws.send(payload)
 
+    @staticmethod
+    async def _iter_rows(path: Optional[str]) -> AsyncIterator[DictLike]:
+        if not path:
+            return
+        async for row in iter_export_rows(path):
+            yield row
+
     @staticmethod
     def _parse_iso(s: Optional[str]) -> Optional[datetime]:
         if not s:
@@ -1051,33 +1215,26 @@ class ExportMessagesRunner:
         self,
         session: Any,
         sem: asyncio.Semaphore,
-        kind: str,
+        store: MediaStore,
         url: str,
-        filename: str,
-        dest_dir: str,
-    ) -> Tuple[bool, str, Optional[str]]:
-        base, ext = os.path.splitext(filename)
-        if not base:
-            base = kind
-        out_path = os.path.join(dest_dir, f"{base}{ext}")
-        i = 0
-        while os.path.exists(out_path):
-            i += 1
-            out_path = os.path.join(dest_dir, f"{base}-{i}{ext}")
-
+        key: str,
+        out_path: str,
+    ) -> Tuple[bool, Optional[DictLike], bool, Optional[str]]:
+        """
+        Resolve one attachment through the media store and link it to
+        `out_path`. Returns (ok, store record, fetched over the network, error).
+        """
         try:
-            async with sem:
-                timeout = aiohttp.ClientTimeout(total=180)
-                async with session.get(url, timeout=timeout) as resp:
-                    if resp.status != 200:
-                        raise RuntimeError(f"HTTP {resp.status}")
-                    with open(out_path, "wb") as f:
-                        async for chunk in resp.content.iter_chunked(1 << 14):
-                            if chunk:
-                                f.write(chunk)
-            return True, out_path, None
+            ext = os.path.splitext(out_path)[1]
+            rec = store.lookup(key)
+            fetched = False
+            if rec is None:
+                async with sem:
+                    rec, fetched = await store.fetch(session, url, key=key, ext=ext)
+            store.link_into(rec, out_path)
+            return True, rec, fetched, None
         except Exception as e:
-            return False, out_path, str(e)
+            return False, None, False, str(e)
 
 
 class DmHistoryExporter:
@@ -1340,10 +1497,20 @@ class BackfillEngine:
         original_guild_id: int | None = None,
         cloned_guild_id: int | None = None,
         exclude_ids: list | None = None,
+        exclude_ids_packed: str | None = None,
     ):
         """
         Primary entry point used by client code to backfill a single channel.
+
+        Messages already cloned are skipped: `exclude_ids_packed` is the
+        compact form sent by the admin (see common.idset); a plain
+        `exclude_ids` list is still accepted.
         """
+        exclude = (
+            SortedIdSet.unpack(exclude_ids_packed)
+            if exclude_ids_packed
+            else SortedIdSet(exclude_ids or ())
+        )
         loop = asyncio.get_event_loop()
         t0 = loop.time()
         sent = 0
@@ -1382,7 +1549,7 @@ class BackfillEngine:
             after_iso,
             before_iso,
             last_n,
-            len(exclude_ids or []),
+            len(exclude),
         )
 
         self.logger.debug(
@@ -1515,13 +1682,21 @@ class BackfillEngine:
                 before_iso,
             )
 
-        _exclude_set = set(str(x) for x in (exclude_ids or []))
         excluded = 0
 
+        # History is walked once; the total shown while it streams is an
+        # estimate, replaced by the exact count when the walk ends.
+        estimate = _SentTotalEstimate()
+        now_id = _snowflake_from_dt(datetime.now(timezone.utc))
+        after_floor_id = initial_after_obj_id or (
+            _snowflake_from_dt(after_dt) if after_dt else None
+        )
+        before_ceil_id = _snowflake_from_dt(before_dt) if before_dt else None
+
         async def _emit_msg(m):
             nonlocal sent, skipped, excluded, last_ping, last_log
 
-            if _exclude_set and str(getattr(m, "id", None)) in _exclude_set:
+            if exclude and getattr(m, "id", None) in exclude:
                 excluded += 1
                 return
 
@@ -1718,6 +1893,8 @@ class BackfillEngine:
                         "data": {
                             "channel_id": original_channel_id,
                             "sent": sent,
+                            "total": estimate.total(sent),
+                            "estimated": True,
                         },
                         "mapping_id": mapping_id,
                         "cloned_guild_id": cloned_guild_id,
@@ -1738,43 +1915,14 @@ class BackfillEngine:
                 )
                 last_log = now
 
-        async def _count_history(
-            obj, *, n: Optional[int], after_dt, before_dt, after_obj_id: Optional[int]
-        ) -> int:
-            total = 0
-            oldest_first = not (n and n > 0)
-            try:
-                if n and n > 0:
-                    cnt = 0
-                    async for m in self._iter_history_resumable(
-                        obj,
-                        n=n,
-                        after_dt=after_dt,
-                        before_dt=before_dt,
-                        oldest_first=False,
-                        after_obj_id=after_obj_id,
-                    ):
-                        if _is_normal(m):
-                            cnt += 1
-                    total = cnt
-                else:
-                    async for m in self._iter_history_resumable(
-                        obj,
-                        n=None,
-                        after_dt=after_dt,
-                        before_dt=before_dt,
-                        oldest_first=True,
-                        after_obj_id=initial_after_obj_id,
-                    ):
-                        if _is_normal(m):
-                            total += 1
-            except Forbidden:
-                pass
-            return total
+        def _bounds(obj) -> tuple[int, int]:
+            lo = after_floor_id or int(getattr(obj, "id", 0) or 0)
+            hi = _coerce_int(getattr(obj, "last_message_id", None)) or now_id
+            if before_ceil_id:
+                hi = min(hi, before_ceil_id)
+            return lo, hi
 
-        async def _stream_history(
-            obj, *, n: Optional[int], after_dt, before_dt, after_obj_id: Optional[int]
-        ):
+        async def _stream_history(obj, *, n: Optional[int]):
             if n and n > 0:
                 tmp = []
                 async for m in self._iter_history_resumable(
@@ -1783,22 +1931,41 @@ class BackfillEngine:
                     after_dt=after_dt,
                     before_dt=before_dt,
                     oldest_first=False,
-                    after_obj_id=after_obj_id,
+                    after_obj_id=initial_after_obj_id,
                 ):
                     tmp.append(m)
+                estimate.expect(sent, sum(1 for m in tmp if _is_normal(m)))
                 for m in reversed(tmp):
                     await _emit_msg(m)
             else:
+                estimate.begin(sent, *_bounds(obj))
                 async for m in self._iter_history_resumable(
                     obj,
                     n=None,
                     after_dt=after_dt,
                     before_dt=before_dt,
                     oldest_first=True,
-                    after_obj_id=after_obj_id,
+                    after_obj_id=initial_after_obj_id,
                 ):
+                    estimate.advance(m.id)
                     await _emit_msg(m)
 
+        async def _stream_threads(n: Optional[int]):
+            async for th in self._iter_all_threads(ch):
+                try:
+                    await _stream_history(th, n=n)
+                except Forbidden:
+                    self.logger.debug(
+                        "[backfill] thread history forbidden | thread=%s",
+                        getattr(th, "id", None),
+                    )
+                except HTTPException as e:
+                    self.logger.warning(
+                        "[backfill] HTTP while streaming thread=%s err=%s",
+                        getattr(th, "id", None),
+                        e,
+                    )
+
         try:
             n = _coerce_int(last_n)
 
@@ -1808,63 +1975,8 @@ class BackfillEngine:
                     getattr(ch, "id", None),
                     getattr(ch, "name", None),
                 )
-
-                total = 0
-                async for th in self._iter_all_threads(ch):
-                    try:
-                        total += await _count_history(
-                            th,
-                            n=n,
-                            after_dt=after_dt,
-                            before_dt=before_dt,
-                            after_obj_id=initial_after_obj_id,
-                        )
-                    except Forbidden:
-                        self.logger.debug(
-                            "[backfill] thread history forbidden | thread=%s",
-                            getattr(th, "id", None),
-                        )
-                    except HTTPException as e:
-                        self.logger.warning(
-                            "[backfill] HTTP while counting thread=%s err=%s",
-                            getattr(th, "id", None),
-                            e,
-                        )
-
-                await self._safe_ws_send(
-                    {
-                        "type": "backfill_progress",
-                        "data": {"channel_id": original_channel_id, "total": total},
-                        "mapping_id": mapping_id,
-                        "cloned_guild_id": cloned_guild_id,
-                        "original_guild_id": original_guild_id,
-                    }
-                )
-
-                async for th in self._iter_all_threads(ch):
-                    try:
-                        await _stream_history(
-                            th,
-                            n=n,
-                            after_dt=after_dt,
-                            before_dt=before_dt,
-                            after_obj_id=initial_after_obj_id,
-                        )
-                    except Forbidden:
-                        self.logger.debug(
-                            "[backfill] thread history forbidden | thread=%s",
-                            getattr(th, "id", None),
-                        )
-                    except HTTPException as e:
-                        self.logger.warning(
-                            "[backfill] HTTP while streaming thread=%s err=%s",
-                            getattr(th, "id", None),
-                            e,
-                        )
-
             else:
                 if n and n > 0:
-                    buf = []
                     self.logger.debug(
                         "[backfill] mode=last_n | n=%d %s",
                         n,
@@ -1874,166 +1986,15 @@ class BackfillEngine:
                             else "(no since bound)"
                         ),
                     )
-                    async for m in self._iter_history_resumable(
-                        ch,
-                        n=n,
-                        after_dt=after_dt,
-                        before_dt=before_dt,
-                        oldest_first=False,
-                        after_obj_id=initial_after_obj_id,
-                    ):
-                        buf.append(m)
-
-                    parent_total = sum(1 for m in buf if _is_normal(m))
-                    self.logger.debug(
-                        "[backfill] fetched buffer | size=%d, total_normal=%d",
-                        len(buf),
-                        parent_total,
-                    )
-
-                    thread_total = 0
-                    async for th in self._iter_all_threads(ch):
-                        try:
-                            thread_total += await _count_history(
-                                th,
-                                n=n,
-                                after_dt=after_dt,
-                                before_dt=before_dt,
-                                after_obj_id=initial_after_obj_id,
-                            )
-                        except Forbidden:
-                            self.logger.debug(
-                                "[backfill] thread history forbidden | thread=%s",
-                                getattr(th, "id", None),
-                            )
-                        except HTTPException as e:
-                            self.logger.warning(
-                                "[backfill] HTTP while counting thread=%s err=%s",
-                                getattr(th, "id", None),
-                                e,
-                            )
-
-                    combined_total = parent_total + thread_total
-                    await self._safe_ws_send(
-                        {
-                            "type": "backfill_progress",
-                            "data": {
-                                "channel_id": original_channel_id,
-                                "total": combined_total,
-                                "mapping_id": mapping_id,
-                                "cloned_guild_id": cloned_guild_id,
-                                "original_guild_id": original_guild_id,
-                            },
-                        }
-                    )
-
-                    for m in reversed(buf):
-                        await _emit_msg(m)
-
-                    async for th in self._iter_all_threads(ch):
-                        try:
-                            await _stream_history(
-                                th,
-                                n=n,
-                                after_dt=after_dt,
-                                before_dt=before_dt,
-                                after_obj_id=initial_after_obj_id,
-                            )
-                        except Forbidden:
-                            self.logger.debug(
-                                "[backfill] thread history forbidden | thread=%s",
-                                getattr(th, "id", None),
-                            )
-                        except HTTPException as e:
-                            self.logger.warning(
-                                "[backfill] HTTP while streaming thread=%s err=%s",
-                                getattr(th, "id", None),
-                                e,
-                            )
-
                 else:
                     self.logger.debug(
                         "[backfill] mode=%s | streaming oldest→newest%s",
                         "since" if after_dt else "all",
                         f" (after {after_dt.isoformat()})" if after_dt else "",
                     )
+                await _stream_history(ch, n=n)
 
-                    parent_buf = []
-                    async for m in self._iter_history_resumable(
-                        ch,
-                        n=None,
-                        after_dt=after_dt,
-                        before_dt=before_dt,
-                        oldest_first=True,
-                        after_obj_id=initial_after_obj_id,
-                    ):
-                        parent_buf.append(m)
-                    parent_total = sum(1 for m in parent_buf if _is_normal(m))
-                    self.logger.debug(
-                        "[backfill] pre-count complete | fetched=%d total_normal=%d",
-                        len(parent_buf),
-                        parent_total,
-                    )
-
-                    thread_total = 0
-                    async for th in self._iter_all_threads(ch):
-                        try:
-                            thread_total += await _count_history(
-                                th,
-                                n=None,
-                                after_dt=after_dt,
-                                before_dt=before_dt,
-                                after_obj_id=initial_after_obj_id,
-                            )
-                        except Forbidden:
-                            self.logger.debug(
-                                "[backfill] thread history forbidden | thread=%s",
-                                getattr(th, "id", None),
-                            )
-                        except HTTPException as e:
-                            self.logger.warning(
-                                "[backfill] HTTP while counting thread=%s err=%s",
-                                getattr(th, "id", None),
-                                e,
-                            )
-
-                    combined_total = parent_total + thread_total
-                    await self._safe_ws_send(
-                        {
-                            "type": "backfill_progress",
-                            "data": {
-                                "channel_id": original_channel_id,
-                                "total": combined_total,
-                                "mapping_id": mapping_id,
-                                "cloned_guild_id": cloned_guild_id,
-                                "original_guild_id": original_guild_id,
-                            },
-                        }
-                    )
-
-                    for m in parent_buf:
-                        await _emit_msg(m)
-
-                    async for th in self._iter_all_threads(ch):
-                        try:
-                            await _stream_history(
-                                th,
-                                n=None,
-                                after_dt=after_dt,
-                                before_dt=before_dt,
-                                after_obj_id=initial_after_obj_id,
-                            )
-                        except Forbidden:
-                            self.logger.debug(
-                                "[backfill] thread history forbidden | thread=%s",
-                                getattr(th, "id", None),
-                            )
-                        except HTTPException as e:
-                            self.logger.warning(
-                                "[backfill] HTTP while streaming thread=%s err=%s",
-                                getattr(th, "id", None),
-                                e,
-                            )
+            await _stream_threads(n)
 
         except Forbidden as e:
             self.logger.debug(
@@ -2068,6 +2029,7 @@ class BackfillEngine:
                         "data": {
                             "channel_id": original_channel_id,
                             "sent": sent,
+                            "total": sent,
                             "mapping_id": mapping_id,
                             "cloned_guild_id": cloned_guild_id,
                             "original_guild_id": original_guild_id,
@@ -0,0 +1,194 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+try:
+    import zstandard as _zstd
+except ImportError:
+    _zstd = None
+
+DictLike = Dict[str, Any]
+
+_SUFFIX = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _open_text(path: str, mode: str):
+    """Open an export file for text I/O, (de)compressing by file suffix."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if path.endswith(".zst"):
+        if _zstd is None:
+            raise RuntimeError("zstandard is not installed")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = _zstd.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        else:
+            stream = _zstd.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class NDJSONExportWriter:
+    """
+    Streams export rows to `messages.ndjson` (optionally .gz / .zst) as they
+    are scanned, one JSON object per line.
+
+    Rows are collected in small batches and each batch is encoded and written
+    on a worker thread, with at most one batch in flight, so the event loop
+    never blocks on disk and memory stays bounded by the batch size. Rows are
+    expected in channel order; the writer records where each channel's rows
+    start for the optional manifest.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        compression: str = "none",
+        batch_size: int = 200,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.log = logger or logging.getLogger("export")
+        compression = (compression or "none").lower()
+        if compression not in _SUFFIX:
+            self.log.warning(
+                "[export] Unknown compression %r; writing plain NDJSON", compression
+            )
+            compression = "none"
+        if compression == "zstd" and _zstd is None:
+            self.log.warning("[export] zstandard not installed; using gzip instead")
+            compression = "gzip"
+        self.compression = compression
+        self.path = os.path.join(directory, "messages.ndjson" + _SUFFIX[compression])
+        self.batch_size = max(1, int(batch_size))
+        self.count = 0
+        self.channels: List[DictLike] = []
+        self._batch: List[DictLike] = []
+        self._pending: Optional[asyncio.Future] = None
+        self._fh = None
+
+    async def open(self) -> "NDJSONExportWriter":
+        loop = asyncio.get_running_loop()
+        self._fh = await loop.run_in_executor(None, _open_text, self.path, "w")
+        return self
+
+    async def write(self, row: DictLike) -> None:
+        cid = row.get("channel_id")
+        if not self.channels or self.channels[-1]["channel_id"] != cid:
+            ctx = (row.get("message") or {}).get("_export_ctx") or {}
+            self.channels.append(
+                {
+                    "channel_id": cid,
+                    "channel_name": ctx.get("channel_name"),
+                    "first_line": self.count,
+                    "count": 0,
+                }
+            )
+        self.channels[-1]["count"] += 1
+        self.count += 1
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if self._pending is not None:
+            await self._pending
+            self._pending = None
+        if self._batch:
+            batch, self._batch = self._batch, []
+            loop = asyncio.get_running_loop()
+            self._pending = loop.run_in_executor(None, self._write_batch, batch)
+
+    def _write_batch(self, batch: List[DictLike]) -> None:
+        self._fh.write(
+            "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch)
+        )
+
+    async def close(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            await self._flush()
+            if self._pending is not None:
+                await self._pending
+                self._pending = None
+        finally:
+            fh, self._fh = self._fh, None
+            await asyncio.get_running_loop().run_in_executor(None, fh.close)
+
+    def manifest(self, **extra: Any) -> DictLike:
+        return {
+            "format": "ndjson",
+            "compression": self.compression,
+            "file": os.path.basename(self.path),
+            "count": self.count,
+            "channels": self.channels,
+            **extra,
+        }
+
+
+async def iter_export_rows(path: str, *, batch: int = 500) -> AsyncIterator[DictLike]:
+    """Read an NDJSON export back, a batch of lines per worker-thread hop."""
+    loop = asyncio.get_running_loop()
+    fh = await loop.run_in_executor(None, _open_text, path, "r")
+    try:
+        while True:
+            lines = await loop.run_in_executor(None, _read_lines, fh, batch)
+            if not lines:
+                return
+            for ln in lines:
+                if ln.strip():
+                    yield json.loads(ln)
+    finally:
+        await loop.run_in_executor(None, fh.close)
+
+
+def _read_lines(fh, n: int) -> List[str]:
+    out = []
+    for ln in fh:
+        out.append(ln)
+        if len(out) >= n:
+            break
+    return out
+
+
+def ndjson_to_json(src: str, dest: str, header: DictLike) -> int:
+    """
+    Rewrite an NDJSON export as the classic single JSON document
+    ({...header, "messages": [...]}), one row at a time. Blocking; run it
+    in an executor. Returns the number of messages.
+    """
+    n = 0
+    with _open_text(src, "r") as fin, open(dest, "w", encoding="utf-8") as fout:
+        fout.write("{\n")
+        for k, v in header.items():
+            fout.write(f"  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)},\n")
+        fout.write('  "messages": [')
+        for ln in fin:
+            if not ln.strip():
+                continue
+            msg = json.loads(ln).get("message")
+            body = json.dumps(msg, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            fout.write(("\n    " if n == 0 else ",\n    ") + body)
+            n += 1
+        fout.write("\n  ]\n}\n" if n else "]\n}\n")
+    return n
+
+
+def write_manifest(path: str, manifest: DictLike) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
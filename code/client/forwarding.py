@@ -24,6 +24,7 @@ import discord
 import re
 import html
 from client.message_utils import _resolve_forward, _resolve_forward_via_snapshot
+from common.keywords import KeywordMatcher
 from common.common_helpers import (
     discord_urls_from_config,
     is_discord_webhook_url,
@@ -250,6 +251,16 @@ class ForwardingFilters:
     include_embeds: bool = False
     has_attachments: bool = False
 
+    _any_kw: KeywordMatcher = field(init=False, repr=False, compare=False)
+    _all_kw: KeywordMatcher = field(init=False, repr=False, compare=False)
+    _excl_kw: KeywordMatcher = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        cs = self.case_sensitive
+        self._any_kw = KeywordMatcher(self.include_keywords, case_sensitive=cs)
+        self._all_kw = KeywordMatcher(self.require_all_keywords, case_sensitive=cs)
+        self._excl_kw = KeywordMatcher(self.exclude_keywords, case_sensitive=cs)
+
     @staticmethod
     def _parse_int_list(val: Any) -> list[int]:
         nums: list[int] = []
@@ -410,8 +421,6 @@ class ForwardingFilters:
             if url:
                 content += f"\n{url}"
 
-        haystack = content if self.case_sensitive else content.lower()
-
         if self.include_channels and channel_id not in self.include_channels:
             return False
         if self.exclude_channels and channel_id in self.exclude_channels:
@@ -427,17 +436,13 @@ class ForwardingFilters:
         if self.exclude_roles and any(r in role_ids for r in self.exclude_roles):
             return False
 
-        if self.include_keywords and not any(
-            k in haystack for k in self.include_keywords
-        ):
+        if self._any_kw and not self._any_kw.search(content):
             return False
 
-        if self.require_all_keywords and not all(
-            k in haystack for k in self.require_all_keywords
-        ):
+        if self._all_kw and not self._all_kw.contains_all(content):
             return False
 
-        if self.exclude_keywords and any(k in haystack for k in self.exclude_keywords):
+        if self._excl_kw and self._excl_kw.search(content):
             return False
 
         return True
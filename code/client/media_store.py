@@ -0,0 +1,180 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+DictLike = Dict[str, Any]
+
+
+def attachment_key(att: DictLike, url: str) -> str:
+    """
+    Stable identity of an attachment across exports: its snowflake when the
+    serializer kept it, else the CDN URL without the query string (Discord
+    re-signs `ex`/`is`/`hm` on every fetch).
+    """
+    aid = att.get("id")
+    if aid:
+        return f"att:{aid}"
+    parts = urlsplit(url)
+    return f"url:{parts.netloc}{parts.path}"
+
+
+def _sha256_file(path: str) -> Tuple[str, int]:
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size
+
+
+class MediaStore:
+    """
+    Content-addressed store shared by every export.
+
+    root/objects/ab/<sha256><ext>   one copy of each distinct file
+    root/partial/<key hash>.part    interrupted downloads, resumed with Range
+    root/journal.ndjson             append-only key -> sha256 records
+
+    `fetch` returns the object for an attachment key, downloading only when
+    the journal has no intact object for it; concurrent fetches of one key
+    share a single download. Export folders get hard links to objects
+    (copies when the filesystem refuses links).
+    """
+
+    def __init__(self, root: str, *, logger: Optional[logging.Logger] = None):
+        self.root = root
+        self.log = logger or logging.getLogger("export")
+        self._journal_path = os.path.join(root, "journal.ndjson")
+        self._by_key: Dict[str, DictLike] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._journal = None
+
+    async def open(self) -> "MediaStore":
+        await asyncio.get_running_loop().run_in_executor(None, self._open_sync)
+        return self
+
+    def _open_sync(self) -> None:
+        for sub in ("objects", "partial"):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+        if os.path.exists(self._journal_path):
+            with open(self._journal_path, encoding="utf-8") as f:
+                for ln in f:
+                    try:
+                        rec = json.loads(ln)
+                        self._by_key[rec["key"]] = rec
+                    except Exception:
+                        continue  # torn last line from a crash
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def object_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], sha256 + ext)
+
+    def lookup(self, key: str) -> Optional[DictLike]:
+        """Journal record for `key` if its object is still on disk."""
+        rec = self._by_key.get(key)
+        if rec and os.path.exists(self.object_path(rec["sha256"], rec.get("ext", ""))):
+            return rec
+        return None
+
+    async def fetch(
+        self, session: Any, url: str, *, key: str, ext: str
+    ) -> Tuple[DictLike, bool]:
+        """(journal record, downloaded now?) for the attachment behind `key`."""
+        rec = self.lookup(key)
+        if rec:
+            return rec, False
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut), False
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            rec = await self._download(session, url, key=key, ext=ext)
+            fut.set_result(rec)
+            return rec, True
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # retrieved here; waiters re-raise it
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _download(self, session: Any, url: str, *, key: str, ext: str) -> DictLike:
+        import aiohttp
+
+        part = os.path.join(
+            self.root, "partial", hashlib.sha1(key.encode()).hexdigest() + ".part"
+        )
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {"Range": f"bytes={have}-"} if have else {}
+        timeout = aiohttp.ClientTimeout(total=180)
+        async with session.get(url, timeout=timeout, headers=headers) as resp:
+            if resp.status == 416 and have:
+                pass  # the partial file is already complete
+            elif resp.status in (200, 206):
+                mode = "ab" if (resp.status == 206 and have) else "wb"
+                if mode == "ab":
+                    self.log.debug("[export] Resuming %s at byte %d", key, have)
+                with open(part, mode) as f:
+                    async for chunk in resp.content.iter_chunked(1 << 14):
+                        if chunk:
+                            f.write(chunk)
+            else:
+                raise RuntimeError(f"HTTP {resp.status}")
+
+        loop = asyncio.get_running_loop()
+        sha256, size = await loop.run_in_executor(None, _sha256_file, part)
+        obj = self.object_path(sha256, ext)
+        rec = {
+            "key": key,
+            "sha256": sha256,
+            "size": size,
+            "ext": ext,
+            "url": url.split("?", 1)[0],
+            "ts": int(time.time()),
+        }
+        await loop.run_in_executor(None, self._commit, part, obj)
+        # Journalled on the loop: concurrent downloads commit from several
+        # executor threads, and the shared journal file is not thread-safe.
+        self._by_key[key] = rec
+        self._journal.write(json.dumps(rec) + "\n")
+        self._journal.flush()
+        return rec
+
+    def _commit(self, part: str, obj: str) -> None:
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        if os.path.exists(obj):
+            os.remove(part)  # same bytes already stored under another key
+        else:
+            os.replace(part, obj)
+
+    def link_into(self, rec: DictLike, dest_path: str) -> str:
+        """Materialise the object for `rec` at `dest_path` (hard link, else copy)."""
+        src = self.object_path(rec["sha256"], rec.get("ext", ""))
+        try:
+            os.link(src, dest_path)
+        except OSError:
+            shutil.copyfile(src, dest_path)
+        return dest_path
@@ -16,6 +16,8 @@ from collections import deque
 from typing import Any, List, Dict, Optional, Set
 import discord
 
+from common.sitemap_delta import SitemapDeltaEncoder
+
 
 class SitemapService:
     def __init__(self, bot, config, db, ws, logger=None):
@@ -28,6 +30,7 @@ class SitemapService:
         self._dirty_guild_ids: Set[int] = set()
         self._dirty_lock = asyncio.Lock()
         self._send_lock = asyncio.Lock()
+        self._delta = SitemapDeltaEncoder()
 
         # ── Smart queue ──
         self._queue: deque[int] = deque()    # ordered guild IDs to process
@@ -38,6 +41,33 @@ class SitemapService:
         self._inter_guild_delay: int = 3     # seconds between guilds
         self._randomize_order: bool = True   # shuffle guild order
 
+    async def _send_sitemap(self, sitemap: Dict) -> str:
+        """
+        Send a sitemap as a delta against the last one the server
+        acknowledged for the same target, or in full when there is none or
+        the server no longer holds that base. Returns "full" or the list of
+        changed sections, for the log line.
+        """
+        msg = self._delta.encode(sitemap)
+        res = await self.ws.request({"type": "sitemap", "data": msg}, timeout=15.0)
+        ack = (res or {}).get("data") or {}
+        if msg.get("delta") and ack.get("need_full"):
+            msg = self._delta.encode(sitemap, full=True)
+            res = await self.ws.request(
+                {"type": "sitemap", "data": msg}, timeout=15.0
+            )
+            ack = (res or {}).get("data") or {}
+
+        if ack.get("version") == msg["sitemap_version"]:
+            self._delta.acknowledge(msg)
+        else:
+            self._delta.forget(msg)
+
+        if not msg.get("delta"):
+            return "full"
+        changed = sorted(msg.get("changed") or ())
+        return "delta: " + (", ".join(changed) if changed else "no changes")
+
     def _pick_guild(self) -> Optional[discord.Guild]:
         return self.bot.guilds[0] if self.bot.guilds else None
 
@@ -153,7 +183,12 @@ class SitemapService:
             self._queue_task = asyncio.create_task(self._process_queue())
 
     async def _process_queue(self) -> None:
-        """Process queued guilds sequentially with delays between each."""
+        """
+        Process queued guilds one at a time, starting each at least
+        `_inter_guild_delay` seconds after the one before. Building and
+        sending count toward that gap; the server queues and parallelizes
+        the syncs themselves.
+        """
         import time as _time
         total = len(self._queue)
         processed = 0
@@ -161,11 +196,12 @@ class SitemapService:
         t_start = _time.monotonic()
 
         self.logger.info(
-            "[sitemap] Processing %d guild(s) (delay=%ds between each)",
+            "[sitemap] Processing %d guild(s) (started %ds apart)",
             total, self._inter_guild_delay,
         )
 
         while self._queue:
+            t_guild = _time.monotonic()
             gid = self._queue.popleft()
             self._queue_set.discard(gid)
             processed += 1
@@ -195,19 +231,20 @@ class SitemapService:
                 processed, total, g.name, clone_count,
             )
 
+            # Serialized once for the guild; each clone only filters it.
+            raw = None
             for cg in clones:
                 clone_id = int(cg) if cg is not None else None
                 try:
                     t0 = _time.monotonic()
-                    if clone_id is None:
-                        sm = await self.build_for_guild(g)
-                    else:
-                        sm = await self.build_for_guild_and_clone(g, clone_id)
+                    if raw is None:
+                        raw = await self.build_raw_for_guild(g)
+                    sm = self.project_sitemap(raw, clone_id)
 
                     build_ms = round((_time.monotonic() - t0) * 1000)
 
                     if sm:
-                        await self.ws.send({"type": "sitemap", "data": sm})
+                        sent_as = await self._send_sitemap(sm)
                         label = self._mapping_label(g.id, g.name, clone_id)
                         ch_count = sum(
                             len(c.get("channels", [])) for c in sm.get("categories", [])
@@ -225,6 +262,7 @@ class SitemapService:
                         if emojis: parts.append(f"{emojis} emoji")
                         if stickers: parts.append(f"{stickers} stickers")
                         parts.append(f"{build_ms}ms")
+                        parts.append(sent_as)
 
                         self.logger.info(
                             "[📩] Sitemap sent for %s (%s)",
@@ -282,9 +320,11 @@ class SitemapService:
                         g.name, clone_id, e,
                     )
 
-            # Delay between guilds if more in queue
+            # Pace guild builds (their REST calls), not the time spent on them
             if self._queue:
-                await asyncio.sleep(self._inter_guild_delay)
+                wait = self._inter_guild_delay - (_time.monotonic() - t_guild)
+                if wait > 0:
+                    await asyncio.sleep(wait)
 
         elapsed = round(_time.monotonic() - t_start, 1)
         self.logger.info(
@@ -366,6 +406,8 @@ class SitemapService:
 
         sem = asyncio.Semaphore(max_concurrency)
         tasks: list[asyncio.Future] = []
+        # One raw build per origin guild, shared by all of its clones.
+        raw_builds: dict[int, asyncio.Future] = {}
 
         async def _handle_mapping(
             g: discord.Guild,
@@ -373,16 +415,17 @@ class SitemapService:
         ) -> None:
             async with sem:
                 try:
-
-                    if clone_id is None:
-                        sm = await self.build_for_guild(g)
-                    else:
-                        sm = await self.build_for_guild_and_clone(g, int(clone_id))
+                    fut = raw_builds.get(g.id)
+                    if fut is None:
+                        fut = raw_builds[g.id] = asyncio.ensure_future(
+                            self.build_raw_for_guild(g)
+                        )
+                    sm = self.project_sitemap(await fut, clone_id)
 
                     if not sm:
                         return
 
-                    await self.ws.send({"type": "sitemap", "data": sm})
+                    sent_as = await self._send_sitemap(sm)
 
                     label = self._mapping_label(
                         g.id,
@@ -390,8 +433,9 @@ class SitemapService:
                         int(clone_id) if clone_id is not None else None,
                     )
                     self.logger.info(
-                        "[📩] Sitemap sent for %s",
+                        "[📩] Sitemap sent for %s (%s)",
                         label,
+                        sent_as,
                     )
                 except Exception as e:
                     self.logger.exception(
@@ -480,14 +524,15 @@ class SitemapService:
                     )
                     return
 
-                await self.ws.send({"type": "sitemap", "data": sitemap})
+                sent_as = await self._send_sitemap(sitemap)
 
                 label = self._mapping_label(ogid, g.name, cgid)
                 self.logger.info(
-                    "[📩] Sent targeted sitemap for %s -> clone %s (mapping_id=%s)",
+                    "[📩] Sent targeted sitemap for %s -> clone %s (mapping_id=%s, %s)",
                     label,
                     cgid,
                     mapping_id,
+                    sent_as,
                 )
             except Exception:
                 self.logger.exception(
@@ -556,6 +601,15 @@ class SitemapService:
                     "public_updates_channel_id": None,
                 },
             }
+        raw = await self.build_raw_for_guild(guild)
+        return self.project_sitemap(raw, cloned_guild_id)
+
+    async def build_raw_for_guild(self, guild: "discord.Guild") -> Dict:
+        """
+        Serialize a guild from the cache, before any filtering. One raw
+        sitemap serves every clone of the guild through project_sitemap,
+        so treat it as read-only.
+        """
 
         def _enum_int(val, default=0):
             if val is None:
@@ -855,6 +909,7 @@ class SitemapService:
                             "id": ch.id,
                             "name": ch.name,
                             "type": ch.type.value,
+                            "position": getattr(ch, "position", None),
                             "nsfw": getattr(ch, "nsfw", False),
                             "topic": getattr(ch, "topic", None),
                             "slowmode_delay": getattr(ch, "slowmode_delay", 0),
@@ -871,6 +926,7 @@ class SitemapService:
                             "id": ch.id,
                             "name": ch.name,
                             "type": ch.type.value,
+                            "position": getattr(ch, "position", None),
                             "nsfw": getattr(ch, "nsfw", False),
                             "slowmode_delay": getattr(ch, "slowmode_delay", 0),
                             "bitrate": getattr(ch, "bitrate", 64000),
@@ -890,6 +946,7 @@ class SitemapService:
                             "id": ch.id,
                             "name": ch.name,
                             "type": ch.type.value,
+                            "position": getattr(ch, "position", None),
                             "nsfw": getattr(ch, "nsfw", False),
                             "slowmode_delay": getattr(ch, "slowmode_delay", 0),
                             "bitrate": getattr(ch, "bitrate", 64000),
@@ -909,6 +966,7 @@ class SitemapService:
                 {
                     "id": cat.id,
                     "name": cat.name,
+                    "position": getattr(cat, "position", None),
                     "channels": channels,
                     **(
                         {"overwrites": self._serialize_role_overwrites(cat)}
@@ -927,6 +985,7 @@ class SitemapService:
                             "id": ch.id,
                             "name": ch.name,
                             "type": ch.type.value,
+                            "position": getattr(ch, "position", None),
                             "nsfw": getattr(ch, "nsfw", False),
                             "topic": getattr(ch, "topic", None),
                             "slowmode_delay": getattr(ch, "slowmode_delay", 0),
@@ -943,6 +1002,7 @@ class SitemapService:
                             "id": ch.id,
                             "name": ch.name,
                             "type": ch.type.value,
+                            "position": getattr(ch, "position", None),
                             "nsfw": getattr(ch, "nsfw", False),
                             "slowmode_delay": getattr(ch, "slowmode_delay", 0),
                             "bitrate": getattr(ch, "bitrate", 64000),
@@ -962,6 +1022,7 @@ class SitemapService:
                             "id": ch.id,
                             "name": ch.name,
                             "type": ch.type.value,
+                            "position": getattr(ch, "position", None),
                             "nsfw": getattr(ch, "nsfw", False),
                             "slowmode_delay": getattr(ch, "slowmode_delay", 0),
                             "bitrate": getattr(ch, "bitrate", 64000),
@@ -981,6 +1042,7 @@ class SitemapService:
             entry = {
                 "id": forum.id,
                 "type": forum.type.value,
+                "position": getattr(forum, "position", None),
                 "name": forum.name,
                 "category_id": forum.category.id if forum.category else None,
                 "nsfw": getattr(forum, "nsfw", False),
@@ -1062,27 +1124,40 @@ class SitemapService:
                 }
             )
 
+        return sitemap
+
+    def project_sitemap(
+        self, raw: Dict, cloned_guild_id: int | None = None
+    ) -> Dict:
+        """
+        One clone's view of a raw sitemap: its mapping's filters applied and,
+        for a clone, the target set. Only the top-level dict and the channel
+        lists are new; the entries themselves are shared with `raw`.
+        """
+        origin_id = int(raw["guild"]["id"])
         if cloned_guild_id is not None:
             filter_view = self._build_filter_view_for_mapping(
-                int(guild.id), int(cloned_guild_id)
+                origin_id, int(cloned_guild_id)
             )
         else:
-            filter_view = self._build_filter_view_for_guild(int(guild.id))
+            filter_view = self._build_filter_view_for_guild(origin_id)
 
-        sitemap = self._filter_sitemap(sitemap, filter_view)
+        # _filter_sitemap assigns fresh lists, so the shallow copy keeps `raw` intact.
+        sitemap = self._filter_sitemap(dict(raw), filter_view)
+        if cloned_guild_id is not None:
+            sitemap["target"] = {
+                "original_guild_id": origin_id,
+                "cloned_guild_id": int(cloned_guild_id),
+            }
         return sitemap
 
     async def build_for_guild_and_clone(
         self, guild: "discord.Guild", cloned_guild_id: int
     ) -> Dict:
-        sm = await self.build_for_guild(guild, cloned_guild_id=int(cloned_guild_id))
-        if not sm:
-            return sm
-        sm["target"] = {
-            "original_guild_id": int(guild.id),
-            "cloned_guild_id": int(cloned_guild_id),
-        }
-        return sm
+        if not guild:
+            return await self.build_for_guild(guild)
+        raw = await self.build_raw_for_guild(guild)
+        return self.project_sitemap(raw, int(cloned_guild_id))
 
     async def build(self) -> Dict:
         """(Legacy) Build for a single guild using _pick_guild()."""
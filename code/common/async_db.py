@@ -0,0 +1,140 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from common.db import DBManager
+
+logger = logging.getLogger(__name__)
+
+# DBManager methods with these prefixes only read (they go through
+# DBManager._read or take db.lock themselves), so they can skip the write lock.
+_READ_PREFIXES = ("get_", "list_", "count_", "is_", "has_", "iter_")
+_READ_METHODS = frozenset({"journal_mode", "read_pool_stats"})
+
+
+def _is_read(name: str) -> bool:
+    return name in _READ_METHODS or name.startswith(_READ_PREFIXES)
+
+
+class AsyncDB:
+    """
+    Awaitable view of a DBManager for code running on an event loop.
+
+    ``await adb.get_event_logs(...)`` runs ``db.get_event_logs(...)`` on a small
+    dedicated thread pool, so a slow query no longer freezes every other
+    coroutine (websockets, SSE streams, bus fan-out) sharing the loop.
+
+    Read accessors (``get_*``, ``list_*``, ...) run concurrently; in WAL mode
+    DBManager serves them from pooled reader connections. Everything else runs
+    under ``db.lock``: many writers open ``with self.conn:`` transactions
+    without taking the lock themselves, and two of those interleaving on the
+    shared connection would commit or roll back each other's half-done work.
+
+    ``max_workers=0`` runs calls inline on the loop (the pre-facade behaviour).
+    """
+
+    def __init__(self, db: DBManager, max_workers: int = 4, *, name: str = "db"):
+        self._db = db
+        self._max_workers = max(0, int(max_workers))
+        self._executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix=f"{name}-io"
+            )
+            if self._max_workers
+            else None
+        )
+        self._stats_lock = threading.Lock()
+        self._calls = 0
+        self._pending = 0
+        self._peak_pending = 0
+        self._slowest_ms = 0.0
+        self._slowest_call = ""
+
+    @property
+    def db(self) -> DBManager:
+        """The wrapped synchronous manager."""
+        return self._db
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        read = _is_read(name)
+
+        async def call(*args, **kwargs):
+            return await self._submit(
+                name, getattr(self._db, name), args, kwargs, read=read
+            )
+
+        call.__name__ = name
+        return call
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run an arbitrary callable on the DB pool. Use it to batch several
+        DBManager calls into one hop: ``await adb.run(lambda: (db.a(), db.b()))``.
+        The callable holds ``db.lock`` for its whole run, so a batch of writes
+        is never interleaved with another thread's transaction.
+        """
+        return await self._submit(getattr(fn, "__name__", "run"), fn, args, kwargs)
+
+    async def _submit(
+        self, label: str, fn: Callable[..., Any], args, kwargs, *, read: bool = False
+    ) -> Any:
+        if self._executor is None:
+            return fn(*args, **kwargs)
+        call = functools.partial(fn, *args, **kwargs)
+        if not read:
+            call = functools.partial(self._locked, call)
+        with self._stats_lock:
+            self._calls += 1
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            with self._stats_lock:
+                self._pending -= 1
+                if ms > self._slowest_ms:
+                    self._slowest_ms = ms
+                    self._slowest_call = label
+
+    def _locked(self, call: Callable[[], Any]) -> Any:
+        with self._db.lock:
+            return call()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, calls made, queued/running now and at peak, slowest call."""
+        with self._stats_lock:
+            return {
+                "workers": self._max_workers,
+                "calls": self._calls,
+                "pending": self._pending,
+                "peak_pending": self._peak_pending,
+                "slowest_ms": round(self._slowest_ms, 2),
+                "slowest_call": self._slowest_call,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads; queued calls still run when wait=True."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -54,6 +54,8 @@ class DailySQLiteBackupScheduler:
       - Repeating runs every `interval_minutes` (multiple times per day)
 
     Robust behavior:
+      - Works against both rollback-journal and WAL databases; archives are
+        always a single self-contained data.db
       - (Re)creates backup_dir if missing
       - Retries archive write once if backup_dir vanished mid-write
       - Prunes by count (`retain`) using newest mtime first
@@ -269,9 +271,19 @@ class DailySQLiteBackupScheduler:
             self._dbg("opening live db for backup: %s", self.cfg.db_path)
             src = sqlite3.connect(str(self.cfg.db_path))
             try:
+                src.execute("PRAGMA busy_timeout = 5000;")
                 self._dbg("creating snapshot db: %s", tmp_db_path)
-                with sqlite3.connect(str(tmp_db_path)) as dest:
+                # The backup API reads through the WAL, so committed rows not
+                # yet checkpointed are included and a concurrent checkpoint
+                # can't tear the snapshot.
+                dest = sqlite3.connect(str(tmp_db_path))
+                try:
                     src.backup(dest)
+                    # A snapshot of a WAL database is flagged WAL too; archive
+                    # it as a self-contained rollback-journal file instead.
+                    dest.execute("PRAGMA journal_mode = DELETE;")
+                finally:
+                    dest.close()
             finally:
                 src.close()
             self._dbg("snapshot completed in %.2fs", time.monotonic() - snap_t0)
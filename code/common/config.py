@@ -69,6 +69,35 @@ class Config:
             "WS_CLIENT_URL", f"ws://{self.CLIENT_WS_HOST}:{self.CLIENT_WS_PORT}"
         )
 
+        # One long-lived, multiplexed websocket per peer instead of a fresh
+        # connection per message. Set WS_PERSISTENT=false to go back to
+        # connect-per-message.
+        self.WS_PERSISTENT = (_str("WS_PERSISTENT", "true") or "").strip().lower() not in (
+            "0",
+            "false",
+            "no",
+            "off",
+        )
+        self.WS_SEND_QUEUE_SIZE = _int("WS_SEND_QUEUE_SIZE", "1000")
+
+        # Message-mapping write-behind: upserts are coalesced and written in
+        # one transaction per batch. MSG_MAPPING_BATCH_ROWS <= 1 writes each
+        # mapping immediately, like before.
+        self.MSG_MAPPING_BATCH_ROWS = _int("MSG_MAPPING_BATCH_ROWS", "256")
+        self.MSG_MAPPING_FLUSH_MS = _int("MSG_MAPPING_FLUSH_MS", "500")
+
+        # Live forwarding: messages from one source channel (or thread) are
+        # sent in order, different channels in parallel, at most
+        # FORWARD_CONCURRENCY sends at once. Past FORWARD_QUEUE_MAX queued
+        # sends, intake waits for room.
+        self.FORWARD_CONCURRENCY = _int("FORWARD_CONCURRENCY", "8")
+        self.FORWARD_QUEUE_MAX = _int("FORWARD_QUEUE_MAX", "5000")
+
+        # Structure syncs for different clone guilds run in parallel, at most
+        # SYNC_CONCURRENCY at once; the rest wait in a queue that serves
+        # clones with live messages waiting on structure first.
+        self.SYNC_CONCURRENCY = _int("SYNC_CONCURRENCY", "4")
+
         self.SYNC_INTERVAL_SECONDS = _int("SYNC_INTERVAL_SECONDS", "3600")
 
         cmd_users_raw = _str("COMMAND_USERS", os.getenv("COMMAND_USERS", "")) or ""
@@ -10,30 +10,248 @@
 
 from datetime import datetime
 import json
+import queue
 import sqlite3, threading
 import time
 from typing import Dict, List, Optional
+import os
 import uuid
 import secrets
 
+from common.idset import pack_deltas
+
+
+# Durability profiles, selected with DB_DURABILITY (app_config row first, then
+# the environment, like every other setting).
+#   safe         rollback journal + fsync on every commit (the historic default)
+#   performance  WAL + synchronous=NORMAL: a commit is an append to the -wal
+#                file and is fsynced at checkpoint time, so a power cut can
+#                lose the last few commits but never corrupts the database
+DURABILITY_PROFILES: Dict[str, Dict[str, object]] = {
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,  # KiB, i.e. ~64 MB of page cache
+        "wal_autocheckpoint": 1000,
+    },
+}
+DEFAULT_DURABILITY = "safe"
+
+
+class _Rows(list):
+    """
+    Fully fetched result of a read. Quacks like the cursor it replaces
+    (fetchone/fetchall/iteration/description) so accessors didn't change
+    shape when reads moved off the writer connection.
+    """
+
+    def __init__(self, cur: sqlite3.Cursor):
+        super().__init__(cur.fetchall())
+        self.description = cur.description
+
+    def fetchall(self):
+        return self
+
+    def fetchone(self):
+        return self[0] if self else None
+
 
 class DBManager:
-    def __init__(self, db_path: str, init_schema: bool = False):
+    def __init__(
+        self,
+        db_path: str,
+        init_schema: bool = False,
+        durability: Optional[str] = None,
+        read_pool_size: Optional[int] = None,
+    ):
         self.path = db_path
         self.conn = sqlite3.connect(self.path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
 
         self.conn.execute("PRAGMA foreign_keys = ON;")
-
-        self.conn.execute("PRAGMA wal_checkpoint(FULL);")
-        self.conn.execute("PRAGMA journal_mode = DELETE;")
-
-        self.conn.execute("PRAGMA synchronous = FULL;")
         self.conn.execute("PRAGMA busy_timeout = 5000;")
         self.lock = threading.RLock()
+
+        # Write-behind buffer for message mappings (off until
+        # enable_message_write_behind() is called): original_message_id ->
+        # {cloned_guild_id: row}, plus a cloned_message_id index for reads.
+        self._msg_buffer: Dict[int, Dict[int, dict]] = {}
+        self._msg_buffer_by_cloned: Dict[int, tuple[int, int]] = {}
+        self._msg_buffer_rows = 0
+        self._msg_buffer_since = 0.0
+        self._msg_buffer_max_rows = 0
+        self._msg_buffer_max_delay = 0.0
+
+        self.durability = self._resolve_durability(durability)
+        self._apply_durability(self.durability)
+
+        # In WAL mode readers never block the writer (or each other), so
+        # read-only accessors run on a small pool of query_only connections
+        # and only writes go through self.conn + self.lock. Outside WAL a
+        # reader would hold a SHARED lock against writers anyway, so reads
+        # stay on the single connection as before.
+        if read_pool_size is None:
+            try:
+                read_pool_size = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+            except ValueError:
+                read_pool_size = 4
+        self._read_pool: Optional[queue.SimpleQueue] = None
+        self._read_pool_size = max(0, int(read_pool_size))
+        self._read_pool_open = 0
+        self._read_pool_lock = threading.Lock()
+        if (
+            self._read_pool_size
+            and self.path != ":memory:"
+            and self.journal_mode() == "wal"
+        ):
+            self._read_pool = queue.SimpleQueue()
+
         if init_schema:
             self._init_schema()
 
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 5000;")
+        conn.execute("PRAGMA query_only = 1;")
+        prof = DURABILITY_PROFILES[self.durability]
+        for pragma in ("mmap_size", "cache_size"):
+            if pragma in prof:
+                conn.execute(f"PRAGMA {pragma} = {prof[pragma]};")
+        return conn
+
+    def _checkout_reader(self) -> Optional[sqlite3.Connection]:
+        pool = self._read_pool
+        try:
+            return pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._read_pool_lock:
+            if self._read_pool_open < self._read_pool_size:
+                try:
+                    conn = self._open_reader()
+                except sqlite3.Error:
+                    # Can't open readers (e.g. read-only mount quirks): fall
+                    # back to reading on the writer connection for good.
+                    if not self._read_pool_open:
+                        self._read_pool = None
+                    return None
+                self._read_pool_open += 1
+                return conn
+        return pool.get()
+
+    def _read(self, sql: str, params=()) -> _Rows:
+        """
+        Run a read-only query on a pooled reader (WAL) or the main connection.
+        While a write transaction is open the read stays on the main
+        connection: a pooled reader's snapshot cannot see its uncommitted rows.
+        """
+        if self._read_pool is not None and not self.conn.in_transaction:
+            conn = self._checkout_reader()
+            if conn is not None:
+                try:
+                    return _Rows(conn.execute(sql, params))
+                finally:
+                    self._read_pool.put(conn)
+        with self.lock:
+            return _Rows(self.conn.execute(sql, params))
+
+    def read_pool_stats(self) -> Dict[str, int]:
+        """Reader connections opened / allowed (both 0 when not pooling)."""
+        if self._read_pool is None:
+            return {"open": 0, "size": 0}
+        return {"open": self._read_pool_open, "size": self._read_pool_size}
+
+    def _resolve_durability(self, explicit: Optional[str]) -> str:
+        """
+        Pick the durability profile: explicit arg, then the DB_DURABILITY
+        app_config row, then the DB_DURABILITY env var. Every process opening
+        the shared database reads the same row, so they agree on the mode.
+        """
+        name = explicit
+        if not name:
+            try:
+                row = self.conn.execute(
+                    "SELECT value FROM app_config WHERE key = 'DB_DURABILITY'"
+                ).fetchone()
+                name = row[0] if row else None
+            except sqlite3.OperationalError:
+                name = None
+        if not name or not str(name).strip():
+            name = os.getenv("DB_DURABILITY", DEFAULT_DURABILITY)
+        name = str(name).strip().lower()
+        return name if name in DURABILITY_PROFILES else DEFAULT_DURABILITY
+
+    def _apply_durability(self, name: str) -> None:
+        """
+        Apply a durability profile to this connection.
+
+        journal_mode is persistent in the file, so this is also the migration
+        path: an existing DELETE-mode database switches to WAL the first time
+        it is opened with the performance profile, and a WAL database is
+        checkpointed and switched back when opened with the safe profile.
+        Leaving WAL needs every other connection closed; if one is still open
+        the file stays in WAL (still fully consistent) until the next attempt.
+        """
+        prof = DURABILITY_PROFILES[name]
+        with self.lock:
+            want = str(prof["journal_mode"]).lower()
+            current = self.journal_mode()
+            if current != want:
+                # Don't sit out the full busy_timeout if another process holds
+                # the file; a later open gets another go.
+                self.conn.execute("PRAGMA busy_timeout = 250;")
+                try:
+                    if current == "wal":
+                        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+                    self.conn.execute(f"PRAGMA journal_mode = {want.upper()};")
+                except sqlite3.OperationalError:
+                    pass
+                finally:
+                    self.conn.execute("PRAGMA busy_timeout = 5000;")
+            for pragma in ("synchronous", "mmap_size", "cache_size", "wal_autocheckpoint"):
+                if pragma in prof:
+                    self.conn.execute(f"PRAGMA {pragma} = {prof[pragma]};")
+
+    def journal_mode(self) -> str:
+        """The journal mode currently in effect for the database file."""
+        row = self.conn.execute("PRAGMA journal_mode;").fetchone()
+        return str(row[0]).lower() if row else ""
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Dict[str, int]:
+        """
+        Run a WAL checkpoint. PASSIVE never blocks readers or writers and is
+        what the periodic checkpointer uses; TRUNCATE also resets the -wal
+        file to zero bytes. A no-op (all zeros) outside WAL mode.
+        """
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"bad checkpoint mode: {mode}")
+        with self.lock:
+            row = self.conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+        busy, log, done = (int(x) for x in row) if row else (0, 0, 0)
+        return {"busy": busy, "wal_pages": log, "checkpointed": done}
+
+    def restore_from(self, src_path: str) -> None:
+        """
+        Replace the live database contents with `src_path` through SQLite's
+        backup API. Unlike copying files this is safe while this connection
+        (or a -wal file) is open, and keeps the live journal mode.
+        """
+        src = sqlite3.connect(str(src_path))
+        try:
+            with self.lock:
+                src.backup(self.conn)
+        finally:
+            src.close()
+
     def _init_schema(self):
         """
         Initializes the database schema by creating necessary tables, adding columns if they
@@ -596,6 +814,37 @@ class DBManager:
             },
         )
 
+        self._ensure_table(
+            name="sync_phase_state",
+            create_sql_template="""
+                CREATE TABLE {table} (
+                    original_guild_id INTEGER NOT NULL,
+                    cloned_guild_id   INTEGER NOT NULL,
+                    phase             TEXT    NOT NULL,
+                    source_hash       TEXT    NOT NULL DEFAULT '',
+                    clone_hash        TEXT    NOT NULL DEFAULT '',
+                    last_updated      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (original_guild_id, cloned_guild_id, phase)
+                );
+            """,
+            required_columns={
+                "original_guild_id",
+                "cloned_guild_id",
+                "phase",
+                "source_hash",
+                "clone_hash",
+                "last_updated",
+            },
+            copy_map={
+                "original_guild_id": "original_guild_id",
+                "cloned_guild_id": "cloned_guild_id",
+                "phase": "phase",
+                "source_hash": "source_hash",
+                "clone_hash": "clone_hash",
+                "last_updated": "COALESCE(last_updated, CURRENT_TIMESTAMP)",
+            },
+        )
+
         self._ensure_table(
             name="role_blocks",
             create_sql_template="""
@@ -670,7 +919,11 @@ class DBManager:
             },
             post_sql=[
                 "CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);",
-                "CREATE INDEX IF NOT EXISTS idx_messages_orig_chan ON messages(original_channel_id);",
+                # Covers "everything cloned from this channel into this clone,
+                # in id order" (resumable backfills) and still serves lookups
+                # by channel alone; replaces the single-column index.
+                "DROP INDEX IF EXISTS idx_messages_orig_chan;",
+                "CREATE INDEX IF NOT EXISTS idx_messages_orig_chan_clone ON messages(original_channel_id, cloned_guild_id, original_message_id);",
                 "CREATE INDEX IF NOT EXISTS idx_messages_clone_msg ON messages(cloned_message_id);",
                 "CREATE INDEX IF NOT EXISTS idx_messages_orig_guild ON messages(original_guild_id);",
                 "CREATE INDEX IF NOT EXISTS idx_messages_clone_guild ON messages(cloned_guild_id);",
@@ -1186,6 +1439,35 @@ class DBManager:
             ],
         )
 
+        # Live edit/delete/thread events that arrived while a channel was
+        # backfilling and outgrew the in-memory buffer; one row per collapsed
+        # event (ev_key), replayed in seq order once the backfill is over or
+        # after a restart.
+        self._ensure_table(
+            name="backfill_event_journal",
+            create_sql_template="""
+                CREATE TABLE {table} (
+                    channel_id INTEGER NOT NULL,
+                    ev_key     TEXT NOT NULL,
+                    seq        INTEGER NOT NULL,
+                    ev_type    TEXT NOT NULL,
+                    payload    TEXT NOT NULL,
+                    PRIMARY KEY (channel_id, ev_key)
+                );
+            """,
+            required_columns={"channel_id", "ev_key", "seq", "ev_type", "payload"},
+            copy_map={
+                "channel_id": "channel_id",
+                "ev_key": "ev_key",
+                "seq": "seq",
+                "ev_type": "ev_type",
+                "payload": "payload",
+            },
+            post_sql=[
+                "CREATE INDEX IF NOT EXISTS idx_backfill_event_journal_seq ON backfill_event_journal(channel_id, seq);",
+            ],
+        )
+
     def _table_exists(self, name: str) -> bool:
         row = self.conn.execute(
             "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
@@ -1299,7 +1581,7 @@ class DBManager:
             )
 
     def get_config(self, key: str, default: str = "") -> str:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT value FROM app_config WHERE key=?", (key,)
         ).fetchone()
         return row["value"] if row else default
@@ -1307,7 +1589,7 @@ class DBManager:
     def get_all_config(self) -> dict[str, str]:
         return {
             r["key"]: r["value"]
-            for r in self.conn.execute("SELECT key, value FROM app_config")
+            for r in self._read("SELECT key, value FROM app_config")
         }
 
     def get_applied_asset_hash(self, cloned_guild_id: int, kind: str) -> str:
@@ -1315,7 +1597,7 @@ class DBManager:
         Last host asset hash applied to a clone guild's icon/banner/splash/
         discovery_splash. Empty string when never applied (or cleared).
         """
-        row = self.conn.execute(
+        row = self._read(
             "SELECT applied_hash FROM guild_asset_state "
             "WHERE cloned_guild_id=? AND kind=?",
             (int(cloned_guild_id), kind),
@@ -1334,11 +1616,54 @@ class DBManager:
                 (int(cloned_guild_id), kind, applied_hash or ""),
             )
 
+    def get_sync_phase_state(
+        self, original_guild_id: int, cloned_guild_id: int
+    ) -> dict[str, tuple[str, str]]:
+        """
+        What each structure-sync phase last applied to a mapping:
+        {phase: (hash of the sitemap sections and settings it read,
+        hash of the clone state it left)}.
+        """
+        rows = self._read(
+            "SELECT phase, source_hash, clone_hash FROM sync_phase_state "
+            "WHERE original_guild_id=? AND cloned_guild_id=?",
+            (int(original_guild_id), int(cloned_guild_id)),
+        ).fetchall()
+        return {r["phase"]: (r["source_hash"], r["clone_hash"]) for r in rows}
+
+    def set_sync_phase_state(
+        self,
+        original_guild_id: int,
+        cloned_guild_id: int,
+        states: dict[str, tuple[str, str]],
+    ) -> None:
+        if not states:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO sync_phase_state(original_guild_id, cloned_guild_id, phase, "
+                "source_hash, clone_hash, last_updated) VALUES(?,?,?,?,?,CURRENT_TIMESTAMP) "
+                "ON CONFLICT(original_guild_id, cloned_guild_id, phase) DO UPDATE SET "
+                "source_hash=excluded.source_hash, clone_hash=excluded.clone_hash, "
+                "last_updated=excluded.last_updated",
+                [
+                    (int(original_guild_id), int(cloned_guild_id), phase, src, clone)
+                    for phase, (src, clone) in states.items()
+                ],
+            )
+
+    def clear_sync_phase_state(self, cloned_guild_id: int) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM sync_phase_state WHERE cloned_guild_id=?",
+                (int(cloned_guild_id),),
+            )
+
     def get_version(self) -> str:
         """
         Retrieves the version information from the settings table in the database.
         """
-        row = self.conn.execute("SELECT version FROM settings WHERE id = 1").fetchone()
+        row = self._read("SELECT version FROM settings WHERE id = 1").fetchone()
         return row[0] if row else ""
 
     def set_version(self, version: str):
@@ -1355,7 +1680,7 @@ class DBManager:
         """
         Retrieves the notified version from the settings table in the database.
         """
-        row = self.conn.execute(
+        row = self._read(
             "SELECT notified_version FROM settings WHERE id = 1"
         ).fetchone()
         return row[0] if row else ""
@@ -1374,7 +1699,7 @@ class DBManager:
         """
         Retrieves all category mappings from the database.
         """
-        return self.conn.execute("SELECT * FROM category_mappings").fetchall()
+        return self._read("SELECT * FROM category_mappings").fetchall()
 
     def upsert_category_mapping(
         self,
@@ -1486,13 +1811,13 @@ class DBManager:
         """
         Counts the total number of categories in the 'category_mappings' table.
         """
-        return self.conn.execute("SELECT COUNT(*) FROM category_mappings").fetchone()[0]
+        return self._read("SELECT COUNT(*) FROM category_mappings").fetchone()[0]
 
     def get_all_channel_mappings(self) -> List[sqlite3.Row]:
         """
         Retrieves all channel mappings from the database.
         """
-        return self.conn.execute("SELECT * FROM channel_mappings").fetchall()
+        return self._read("SELECT * FROM channel_mappings").fetchall()
 
     def get_channel_mapping_by_clone_id(
         self, cloned_channel_id: int
@@ -1504,7 +1829,7 @@ class DBManager:
             sqlite3.Row with columns from `channel_mappings` (e.g., original_channel_id,
             cloned_channel_id, etc.), or None if not found.
         """
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM channel_mappings WHERE cloned_channel_id = ? LIMIT 1",
             (cloned_channel_id,),
         ).fetchone()
@@ -1519,7 +1844,7 @@ class DBManager:
         """
         Look up a single channel mapping by the original (source) channel id.
         """
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM channel_mappings WHERE original_channel_id = ? LIMIT 1",
             (original_channel_id,),
         ).fetchone()
@@ -1557,7 +1882,7 @@ class DBManager:
         """
         Retrieves all rows from the 'threads' table in the database.
         """
-        return self.conn.execute("SELECT * FROM threads").fetchall()
+        return self._read("SELECT * FROM threads").fetchall()
 
     def upsert_forum_thread_mapping(
         self,
@@ -1715,7 +2040,7 @@ class DBManager:
         """
         Counts the total number of channels in the 'channel_mappings' table.
         """
-        return self.conn.execute("SELECT COUNT(*) FROM channel_mappings").fetchone()[0]
+        return self._read("SELECT COUNT(*) FROM channel_mappings").fetchone()[0]
 
     def add_blocked_keyword(
         self,
@@ -1792,7 +2117,7 @@ class DBManager:
         """
         Retrieves all emoji mappings from the database.
         """
-        return self.conn.execute("SELECT * FROM emoji_mappings").fetchall()
+        return self._read("SELECT * FROM emoji_mappings").fetchall()
 
     def upsert_emoji_mapping(
         self,
@@ -1838,7 +2163,7 @@ class DBManager:
         Returns the row for this original emoji ID, or None if we never
         cloned that emoji.
         """
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM emoji_mappings WHERE original_emoji_id = ?", (original_id,)
         ).fetchone()
 
@@ -1866,7 +2191,7 @@ class DBManager:
         - '*' in this guild (all keywords), and
         - if you support cross-guild global subs: guild_id=0 records.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT user_id FROM announcement_subscriptions "
             "WHERE (guild_id = ? AND (keyword = ? OR keyword = '*')) "
             "   OR (guild_id = 0 AND (keyword = ? OR keyword = '*'))",
@@ -1886,7 +2211,7 @@ class DBManager:
         return cur.rowcount > 0
 
     def get_announcement_keywords(self, guild_id: int) -> list[str]:
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT DISTINCT keyword FROM announcement_subscriptions WHERE guild_id IN (?, 0)",
             (guild_id,),
         ).fetchall()
@@ -1906,7 +2231,7 @@ class DBManager:
     def get_announcement_triggers(
         self, guild_id: int
     ) -> dict[str, list[tuple[int, int]]]:
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT keyword, filter_user_id, channel_id FROM announcement_triggers WHERE guild_id = ?",
             (guild_id,),
         ).fetchall()
@@ -1922,7 +2247,7 @@ class DBManager:
         Returns every row in announcement_triggers with no grouping.
         Columns: guild_id, keyword, filter_user_id, channel_id, last_updated
         """
-        return self.conn.execute(
+        return self._read(
             """
             SELECT guild_id, keyword, filter_user_id, channel_id, last_updated
             FROM announcement_triggers
@@ -1935,7 +2260,7 @@ class DBManager:
         Returns every row in announcement_subscriptions with no grouping.
         Columns: guild_id, keyword, user_id, last_updated
         """
-        return self.conn.execute(
+        return self._read(
             """
             SELECT guild_id, keyword, user_id, last_updated
             FROM announcement_subscriptions
@@ -1950,7 +2275,7 @@ class DBManager:
         Triggers that apply to this guild: rows where guild_id IN (guild_id, 0).
         Returns {keyword: [(filter_user_id, channel_id), ...]} with duplicates removed.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT keyword, filter_user_id, channel_id
             FROM announcement_triggers
@@ -1983,31 +2308,31 @@ class DBManager:
         return cur.rowcount > 0
 
     def has_onjoin_subscription(self, guild_id: int, user_id: int) -> bool:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT 1 FROM join_dm_subscriptions WHERE guild_id = ? AND user_id = ?",
             (guild_id, user_id),
         ).fetchone()
         return bool(row)
 
     def get_onjoin_users(self, guild_id: int) -> list[int]:
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT user_id FROM join_dm_subscriptions WHERE guild_id = ?",
             (guild_id,),
         ).fetchall()
         return [r["user_id"] for r in rows]
 
     def get_onjoin_guilds_for_user(self, user_id: int) -> list[int]:
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT guild_id FROM join_dm_subscriptions WHERE user_id = ?",
             (user_id,),
         ).fetchall()
         return [r["guild_id"] for r in rows]
 
     def get_all_sticker_mappings(self) -> list[sqlite3.Row]:
-        return self.conn.execute("SELECT * FROM sticker_mappings").fetchall()
+        return self._read("SELECT * FROM sticker_mappings").fetchall()
 
     def get_sticker_mapping(self, original_id: int) -> sqlite3.Row | None:
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM sticker_mappings WHERE original_sticker_id = ?",
             (original_id,),
         ).fetchone()
@@ -2058,7 +2383,7 @@ class DBManager:
         self.conn.commit()
 
     def get_all_role_mappings(self) -> List[sqlite3.Row]:
-        return self.conn.execute("SELECT * FROM role_mappings").fetchall()
+        return self._read("SELECT * FROM role_mappings").fetchall()
 
     def upsert_role_mapping(
         self,
@@ -2106,7 +2431,7 @@ class DBManager:
         self.conn.commit()
 
     def get_role_mapping(self, orig_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM role_mappings WHERE original_role_id = ?", (orig_id,)
         ).fetchone()
 
@@ -2121,7 +2446,7 @@ class DBManager:
             "exclude": {"category": set(), "channel": set()},
         }
 
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT kind, scope, obj_id, original_guild_id, cloned_guild_id
             FROM filters
@@ -2296,11 +2621,11 @@ class DBManager:
             self.conn.execute("DELETE FROM guilds WHERE guild_id = ?", (int(guild_id),))
 
     def get_all_guild_ids(self) -> list[int]:
-        rows = self.conn.execute("SELECT guild_id FROM guilds").fetchall()
+        rows = self._read("SELECT guild_id FROM guilds").fetchall()
         return [int(r[0]) for r in rows]
 
     def get_guild(self, guild_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM guilds WHERE guild_id = ?", (int(guild_id),)
         ).fetchone()
 
@@ -2309,19 +2634,18 @@ class DBManager:
         Returns all guilds as a list of dicts with keys:
         guild_id, name, icon_url, owner_id, member_count, description, last_seen, last_updated
         """
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT guild_id, name, icon_url, owner_id, member_count, description, last_seen, last_updated
-                FROM guilds
-                ORDER BY LOWER(name) ASC
+        cur = self._read(
             """
-            )
-            cols = [c[0] for c in cur.description]
-            return [dict(zip(cols, row)) for row in cur.fetchall()]
+            SELECT guild_id, name, icon_url, owner_id, member_count, description, last_seen, last_updated
+            FROM guilds
+            ORDER BY LOWER(name) ASC
+        """
+        )
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, row)) for row in cur.fetchall()]
 
     def get_original_channel_name(self, original_channel_id: int) -> str | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT original_channel_name FROM channel_mappings WHERE original_channel_id = ?",
             (int(original_channel_id),),
         ).fetchone()
@@ -2330,7 +2654,7 @@ class DBManager:
     def get_clone_channel_name(
         self, original_channel_id: int, cloned_guild_id: int
     ) -> str | None:
-        row = self.conn.execute(
+        row = self._read(
             """
             SELECT clone_channel_name
             FROM channel_mappings
@@ -2359,7 +2683,7 @@ class DBManager:
             )
 
     def get_original_category_name(self, original_category_id: int) -> str | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT original_category_name FROM category_mappings WHERE original_category_id = ?",
             (int(original_category_id),),
         ).fetchone()
@@ -2368,7 +2692,7 @@ class DBManager:
     def get_clone_category_name(
         self, original_category_id: int, cloned_guild_id: int
     ) -> str | None:
-        row = self.conn.execute(
+        row = self._read(
             """
             SELECT cloned_category_name
             FROM category_mappings
@@ -2405,13 +2729,13 @@ class DBManager:
         n = name.strip()
         if not n:
             return None
-        row = self.conn.execute(
+        row = self._read(
             "SELECT original_category_id FROM category_mappings WHERE LOWER(original_category_name)=LOWER(?) LIMIT 1",
             (n,),
         ).fetchone()
         if row:
             return int(row[0])
-        row = self.conn.execute(
+        row = self._read(
             "SELECT original_category_id FROM category_mappings WHERE cloned_category_name IS NOT NULL AND LOWER(cloned_category_name)=LOWER(?) LIMIT 1",
             (n,),
         ).fetchone()
@@ -2462,12 +2786,12 @@ class DBManager:
         If not, it checks for any block for this original role.
         """
         if cloned_guild_id is None:
-            row = self.conn.execute(
+            row = self._read(
                 "SELECT 1 FROM role_blocks WHERE original_role_id = ?",
                 (int(original_role_id),),
             ).fetchone()
         else:
-            row = self.conn.execute(
+            row = self._read(
                 """
                 SELECT 1
                 FROM role_blocks
@@ -2484,11 +2808,11 @@ class DBManager:
         If cloned_guild_id is provided, only blocks for that clone are returned.
         """
         if cloned_guild_id is None:
-            rows = self.conn.execute(
+            rows = self._read(
                 "SELECT original_role_id FROM role_blocks"
             ).fetchall()
         else:
-            rows = self.conn.execute(
+            rows = self._read(
                 "SELECT original_role_id FROM role_blocks WHERE cloned_guild_id = ?",
                 (int(cloned_guild_id),),
             ).fetchall()
@@ -2520,6 +2844,62 @@ class DBManager:
                 )
             return count
 
+    _MESSAGE_UPSERT_SQL = """
+        INSERT INTO messages (
+            original_guild_id,
+            original_channel_id,
+            original_message_id,
+            cloned_guild_id,
+            cloned_channel_id,
+            cloned_message_id,
+            webhook_url,
+            sent_token_id,
+            created_at,
+            updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(original_message_id, cloned_guild_id) DO UPDATE SET
+            -- never overwrite with NULL; keep existing when excluded is NULL
+            original_guild_id   = COALESCE(excluded.original_guild_id, messages.original_guild_id),
+            original_channel_id = COALESCE(excluded.original_channel_id, messages.original_channel_id),
+            cloned_guild_id     = COALESCE(excluded.cloned_guild_id,     messages.cloned_guild_id),
+            cloned_channel_id   = COALESCE(excluded.cloned_channel_id,   messages.cloned_channel_id),
+            cloned_message_id   = COALESCE(excluded.cloned_message_id,   messages.cloned_message_id),
+            webhook_url         = COALESCE(excluded.webhook_url,         messages.webhook_url),
+            sent_token_id       = COALESCE(excluded.sent_token_id,       messages.sent_token_id),
+            -- preserve created_at from first insert
+            created_at          = messages.created_at,
+            updated_at          = excluded.updated_at
+    """
+    _MESSAGE_COLUMNS = (
+        "original_guild_id",
+        "original_channel_id",
+        "original_message_id",
+        "cloned_guild_id",
+        "cloned_channel_id",
+        "cloned_message_id",
+        "webhook_url",
+        "sent_token_id",
+        "created_at",
+        "updated_at",
+    )
+
+    def enable_message_write_behind(
+        self, max_rows: int = 256, max_delay: float = 0.5
+    ) -> None:
+        """
+        Buffer message-mapping upserts and write them as one executemany
+        transaction once `max_rows` are pending or the oldest is `max_delay`
+        seconds old. The owner must call flush_message_mappings()
+        periodically (for the time threshold when traffic stops) and on
+        shutdown. max_rows <= 1 keeps the historic write-through behaviour.
+        """
+        with self.lock:
+            self._msg_buffer_max_rows = max(0, int(max_rows))
+            self._msg_buffer_max_delay = max(0.0, float(max_delay))
+            if self._msg_buffer_max_rows <= 1:
+                self.flush_message_mappings()
+
     def upsert_message_mapping(
         self,
         original_guild_id: int,
@@ -2532,49 +2912,102 @@ class DBManager:
         cloned_guild_id: int | None = None,
         sent_token_id: str | None = None,
     ) -> None:
-        with self.lock, self.conn:
-            self.conn.execute(
-                """
-                INSERT INTO messages (
-                    original_guild_id,
-                    original_channel_id,
-                    original_message_id,
-                    cloned_guild_id,
-                    cloned_channel_id,
-                    cloned_message_id,
-                    webhook_url,
-                    sent_token_id,
-                    created_at,
-                    updated_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, strftime('%s','now'), strftime('%s','now'))
-                ON CONFLICT(original_message_id, cloned_guild_id) DO UPDATE SET
-                    -- never overwrite with NULL; keep existing when excluded is NULL
-                    original_guild_id   = COALESCE(excluded.original_guild_id, messages.original_guild_id),
-                    original_channel_id = COALESCE(excluded.original_channel_id, messages.original_channel_id),
-                    cloned_guild_id     = COALESCE(excluded.cloned_guild_id,     messages.cloned_guild_id),
-                    cloned_channel_id   = COALESCE(excluded.cloned_channel_id,   messages.cloned_channel_id),
-                    cloned_message_id   = COALESCE(excluded.cloned_message_id,   messages.cloned_message_id),
-                    webhook_url         = COALESCE(excluded.webhook_url,         messages.webhook_url),
-                    sent_token_id       = COALESCE(excluded.sent_token_id,       messages.sent_token_id),
-                    -- preserve created_at from first insert
-                    created_at          = messages.created_at,
-                    updated_at          = strftime('%s','now')
-                """,
-                (
-                    int(original_guild_id),
-                    int(original_channel_id),
-                    int(original_message_id),
-                    int(cloned_guild_id) if cloned_guild_id is not None else None,
-                    int(cloned_channel_id) if cloned_channel_id is not None else None,
-                    int(cloned_message_id) if cloned_message_id is not None else None,
-                    str(webhook_url) if webhook_url else None,
-                    str(sent_token_id) if sent_token_id else None,
-                ),
-            )
+        now = int(time.time())
+        row = {
+            "original_guild_id": int(original_guild_id),
+            "original_channel_id": int(original_channel_id),
+            "original_message_id": int(original_message_id),
+            "cloned_guild_id": int(cloned_guild_id) if cloned_guild_id is not None else None,
+            "cloned_channel_id": int(cloned_channel_id) if cloned_channel_id is not None else None,
+            "cloned_message_id": int(cloned_message_id) if cloned_message_id is not None else None,
+            "webhook_url": str(webhook_url) if webhook_url else None,
+            "sent_token_id": str(sent_token_id) if sent_token_id else None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self.lock:
+            # A NULL cloned_guild_id never conflicts (NULLs are distinct in a
+            # UNIQUE key), so it can't be coalesced in memory either.
+            if self._msg_buffer_max_rows <= 1 or row["cloned_guild_id"] is None:
+                with self.conn:
+                    self.conn.execute(
+                        self._MESSAGE_UPSERT_SQL,
+                        tuple(row[c] for c in self._MESSAGE_COLUMNS),
+                    )
+                return
+
+            mid, cg = row["original_message_id"], row["cloned_guild_id"]
+            per_clone = self._msg_buffer.setdefault(mid, {})
+            cur = per_clone.get(cg)
+            if cur is None:
+                per_clone[cg] = row
+                if not self._msg_buffer_rows:
+                    self._msg_buffer_since = time.monotonic()
+                self._msg_buffer_rows += 1
+            else:
+                # Same COALESCE rule the SQL applies: NULL never overwrites.
+                for k, v in row.items():
+                    if v is not None and k != "created_at":
+                        cur[k] = v
+                row = cur
+            if row["cloned_message_id"] is not None:
+                self._msg_buffer_by_cloned[row["cloned_message_id"]] = (mid, cg)
+
+            if self._msg_buffer_rows >= self._msg_buffer_max_rows or (
+                time.monotonic() - self._msg_buffer_since >= self._msg_buffer_max_delay
+            ):
+                self.flush_message_mappings()
+
+    def flush_message_mappings(self, *, only_if_due: bool = False) -> int:
+        """
+        Write all buffered message mappings in a single transaction.
+        `only_if_due` skips the flush until the time threshold has passed.
+        Returns the number of rows written.
+        """
+        with self.lock:
+            if not self._msg_buffer_rows:
+                return 0
+            if only_if_due and (
+                time.monotonic() - self._msg_buffer_since < self._msg_buffer_max_delay
+            ):
+                return 0
+            buf, self._msg_buffer = self._msg_buffer, {}
+            by_cloned, self._msg_buffer_by_cloned = self._msg_buffer_by_cloned, {}
+            count, self._msg_buffer_rows = self._msg_buffer_rows, 0
+            params = [
+                tuple(r[c] for c in self._MESSAGE_COLUMNS)
+                for per_clone in buf.values()
+                for r in per_clone.values()
+            ]
+            try:
+                with self.conn:
+                    self.conn.executemany(self._MESSAGE_UPSERT_SQL, params)
+            except Exception:
+                # Keep the rows so a later flush can retry them.
+                self._msg_buffer, self._msg_buffer_by_cloned = buf, by_cloned
+                self._msg_buffer_rows = count
+                raise
+            return count
+
+    def pending_message_mappings(self) -> int:
+        """Number of message mappings buffered but not yet written."""
+        return self._msg_buffer_rows
+
+    def _overlay_buffered(self, db_row, pending: dict) -> dict:
+        """Merge a buffered upsert over the stored row like the SQL would."""
+        if db_row is None:
+            return dict(pending)
+        out = dict(db_row)
+        for k, v in pending.items():
+            if v is not None and k != "created_at":
+                out[k] = v
+        return out
 
     def get_mapping_by_cloned(self, cloned_message_id: int):
-        return self.conn.execute(
+        key = self._msg_buffer_by_cloned.get(int(cloned_message_id))
+        if key is not None:
+            return self.get_message_mapping_pair(*key)
+        return self._read(
             "SELECT * FROM messages WHERE cloned_message_id = ?",
             (int(cloned_message_id),),
         ).fetchone()
@@ -2582,20 +3015,37 @@ class DBManager:
     def get_message_mappings_for_original(self, original_message_id: int):
         """
         Return ALL message-mapping rows for this original message id (one per clone).
+        Includes buffered rows that have not been flushed yet.
         """
-        return self.conn.execute(
+        mid = int(original_message_id)
+        rows = self._read(
             "SELECT * FROM messages WHERE original_message_id = ? ORDER BY cloned_guild_id",
-            (int(original_message_id),),
+            (mid,),
         ).fetchall()
+        pending = self._msg_buffer.get(mid)
+        if not pending:
+            return rows
+        pending = dict(pending)
+        merged = []
+        for r in rows:
+            p = pending.pop(r["cloned_guild_id"], None)
+            merged.append(self._overlay_buffered(r, p) if p else r)
+        merged.extend(dict(p) for p in pending.values())
+        merged.sort(key=lambda r: r["cloned_guild_id"] or 0)
+        return merged
 
     def get_message_mapping_pair(self, original_message_id: int, cloned_guild_id: int):
         """
         Return the single mapping row for (original_message_id, cloned_guild_id).
         """
-        return self.conn.execute(
+        row = self._read(
             "SELECT * FROM messages WHERE original_message_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_message_id), int(cloned_guild_id)),
         ).fetchone()
+        pending = self._msg_buffer.get(int(original_message_id), {}).get(
+            int(cloned_guild_id)
+        )
+        return self._overlay_buffered(row, pending) if pending else row
 
     def get_cloned_original_ids_for_channel(
         self, original_channel_id: int, cloned_guild_id: int
@@ -2604,6 +3054,7 @@ class DBManager:
         Return all original_message_id values that have already been cloned
         for the given original channel into the given clone guild.
         """
+        self.flush_message_mappings()
         rows = self.conn.execute(
             "SELECT original_message_id FROM messages "
             "WHERE original_channel_id = ? AND cloned_guild_id = ?",
@@ -2611,6 +3062,29 @@ class DBManager:
         ).fetchall()
         return [r["original_message_id"] if isinstance(r, dict) else r[0] for r in rows]
 
+    def get_cloned_original_ids_packed(
+        self, original_channel_id: int, cloned_guild_id: int
+    ) -> str:
+        """
+        Same ids as get_cloned_original_ids_for_channel(), in
+        common.idset.pack_deltas() form. The ascending walk comes straight off
+        idx_messages_orig_chan_clone, so there is no sort; the gaps are taken
+        here (a LAG() window over the same rows is several times slower).
+        """
+        self.flush_message_mappings()
+        rows = self._read(
+            "SELECT original_message_id FROM messages "
+            "WHERE original_channel_id = ? AND cloned_guild_id = ? "
+            "ORDER BY original_message_id",
+            (int(original_channel_id), int(cloned_guild_id)),
+        ).fetchall()
+        prev = 0
+        deltas = []
+        for (mid,) in rows:
+            deltas.append(mid - prev)
+            prev = mid
+        return pack_deltas(deltas)
+
     def delete_old_messages(
         self,
         older_than_seconds: int = 7 * 24 * 3600,
@@ -2623,6 +3097,7 @@ class DBManager:
         pairs for which no rows will be deleted (used for per-mapping DB_CLEANUP_MSG=False).
         Returns the number of rows deleted.
         """
+        self.flush_message_mappings()
         with self.lock, self.conn:
             before = self.conn.total_changes
 
@@ -2669,6 +3144,7 @@ class DBManager:
         Returns the number of rows deleted (0 or 1).
         """
         try:
+            self.flush_message_mappings()
             cur = self.conn.cursor()
             cur.execute(
                 "DELETE FROM messages WHERE original_message_id = ?",
@@ -2679,15 +3155,57 @@ class DBManager:
         except Exception:
             return 0
 
+    def bf_journal_put(
+        self, channel_id: int, events: list[tuple[str, int, str, str]]
+    ) -> None:
+        """Upsert journaled backfill events as (ev_key, seq, ev_type, payload)."""
+        if not events:
+            return
+        cid = int(channel_id)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO backfill_event_journal(channel_id, ev_key, seq, ev_type, payload) "
+                "VALUES (?,?,?,?,?) "
+                "ON CONFLICT(channel_id, ev_key) DO UPDATE SET "
+                "seq=excluded.seq, ev_type=excluded.ev_type, payload=excluded.payload",
+                [(cid, k, int(seq), t, p) for k, seq, t, p in events],
+            )
+
+    def bf_journal_load(self, channel_id: int) -> list[tuple[str, int, str, str]]:
+        """All journaled events for a channel as (ev_key, seq, ev_type, payload), oldest first."""
+        rows = self._read(
+            "SELECT ev_key, seq, ev_type, payload FROM backfill_event_journal "
+            "WHERE channel_id = ? ORDER BY seq",
+            (int(channel_id),),
+        ).fetchall()
+        return [(r[0], int(r[1]), r[2], r[3]) for r in rows]
+
+    def bf_journal_channels(self) -> list[int]:
+        rows = self._read(
+            "SELECT DISTINCT channel_id FROM backfill_event_journal"
+        ).fetchall()
+        return [int(r[0]) for r in rows]
+
+    def bf_journal_max_seq(self) -> int:
+        row = self._read("SELECT MAX(seq) FROM backfill_event_journal").fetchone()
+        return int(row[0] or 0) if row else 0
+
+    def bf_journal_clear(self, channel_id: int) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM backfill_event_journal WHERE channel_id = ?",
+                (int(channel_id),),
+            )
+
     def get_onjoin_roles(self, guild_id: int) -> list[int]:
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT role_id FROM onjoin_roles WHERE guild_id=? ORDER BY role_id ASC",
             (int(guild_id),),
         ).fetchall()
         return [int(r[0]) for r in rows]
 
     def has_onjoin_role(self, guild_id: int, role_id: int) -> bool:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT 1 FROM onjoin_roles WHERE guild_id=? AND role_id=?",
             (int(guild_id), int(role_id)),
         ).fetchone()
@@ -2828,7 +3346,7 @@ class DBManager:
         self.conn.commit()
 
     def backfill_get_incomplete_for_channel(self, original_channel_id: int):
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT
                 run_id,
@@ -2983,6 +3501,7 @@ class DBManager:
         Hard-delete a mapping AND all data tied to that mapping's
         (original_guild_id, cloned_guild_id) pair across the DB.
         """
+        self.flush_message_mappings()
 
         m = self.get_mapping_by_id(mapping_id)
         if not m:
@@ -3003,6 +3522,7 @@ class DBManager:
             "role_mappings",
             "emoji_mappings",
             "sticker_mappings",
+            "sync_phase_state",
         ]
 
         with self.conn:
@@ -3052,7 +3572,7 @@ class DBManager:
             )
 
     def get_mapping_by_original(self, original_guild_id: int) -> dict | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT * FROM guild_mappings WHERE original_guild_id = ? LIMIT 1",
             (int(original_guild_id),),
         ).fetchone()
@@ -3066,7 +3586,7 @@ class DBManager:
         return d
 
     def get_mapping_by_clone(self, cloned_guild_id: int) -> dict | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT * FROM guild_mappings WHERE cloned_guild_id = ? LIMIT 1",
             (int(cloned_guild_id),),
         ).fetchone()
@@ -3084,7 +3604,7 @@ class DBManager:
         return d
 
     def list_guild_mappings(self) -> List[dict]:
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT
                 mapping_id,
@@ -3127,7 +3647,7 @@ class DBManager:
         return out
 
     def get_all_original_guild_ids(self) -> list[int]:
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT DISTINCT original_guild_id
             FROM guild_mappings
@@ -3139,7 +3659,7 @@ class DBManager:
         return [int(r[0]) for r in rows]
 
     def get_all_clone_guild_ids(self) -> list[int]:
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT DISTINCT cloned_guild_id
             FROM guild_mappings
@@ -3151,7 +3671,7 @@ class DBManager:
         return [int(r[0]) for r in rows]
 
     def is_clone_guild_id(self, guild_id: int) -> bool:
-        row = self.conn.execute(
+        row = self._read(
             """
             SELECT 1
             FROM guild_mappings
@@ -3170,6 +3690,7 @@ class DBManager:
         - Bumps last_updated where a change is made
         Returns a dict of changed-row counts per table.
         """
+        self.flush_message_mappings()
         host = int(host_guild_id)
         clone = int(clone_guild_id)
         out = {}
@@ -3463,7 +3984,7 @@ class DBManager:
         Return a single guild_mappings row (plus parsed settings) for a mapping_id.
         Keys match list_guild_mappings() output.
         """
-        row = self.conn.execute(
+        row = self._read(
             """
             SELECT
                 mapping_id,
@@ -3507,23 +4028,22 @@ class DBManager:
     def get_channel_mapping_for_mapping(
         self, original_channel_id: int, mapping_id: str
     ):
-        with self.conn:
-            return self.conn.execute(
-                """
-                SELECT cm.*
-                FROM channel_mappings cm
-                JOIN guild_mappings gm ON gm.cloned_guild_id = cm.cloned_guild_id
-                WHERE cm.original_channel_id = ?
-                AND gm.mapping_id = ?
-                LIMIT 1
-                """,
-                (int(original_channel_id), str(mapping_id)),
-            ).fetchone()
+        return self._read(
+            """
+            SELECT cm.*
+            FROM channel_mappings cm
+            JOIN guild_mappings gm ON gm.cloned_guild_id = cm.cloned_guild_id
+            WHERE cm.original_channel_id = ?
+            AND gm.mapping_id = ?
+            LIMIT 1
+            """,
+            (int(original_channel_id), str(mapping_id)),
+        ).fetchone()
 
     def backfill_get_incomplete_for_channel_in_clone(
         self, original_channel_id: int, cloned_guild_id: int
     ):
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT
                 run_id,
@@ -3588,7 +4108,7 @@ class DBManager:
         Expected columns in guild_mappings:
         mapping_id, original_guild_id, cloned_guild_id, ...
         """
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM guild_mappings WHERE cloned_guild_id = ? LIMIT 1",
             (int(cloned_guild_id),),
         ).fetchone()
@@ -3598,7 +4118,7 @@ class DBManager:
         Returns { original_guild_id(int or 0 for global): [ 'word', 'word2', ... ], ... }
         Rows with original_guild_id NULL are treated as global (key 0).
         """
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT original_guild_id, keyword FROM blocked_keywords"
         ).fetchall()
 
@@ -3615,7 +4135,7 @@ class DBManager:
         All keywords that apply to this origin guild, plus any global NULL/NULL ones.
         Deduped, lowercased, sorted.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT keyword
             FROM blocked_keywords
@@ -3688,9 +4208,7 @@ class DBManager:
         ex_cats: list[str] = []
         ex_chans: list[str] = []
 
-        cur = self.conn.cursor()
-
-        cur.execute(
+        cur = self._read(
             """
             SELECT kind, scope, obj_id
             FROM filters
@@ -3788,7 +4306,7 @@ class DBManager:
             bulk_insert("exclude", "channel", ex_channels)
 
     def get_mapping_name_for_original(self, original_guild_id: int) -> str | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT mapping_name FROM guild_mappings WHERE original_guild_id = ? LIMIT 1",
             (int(original_guild_id),),
         ).fetchone()
@@ -3797,7 +4315,7 @@ class DBManager:
         return None
 
     def get_mapping_name_for_clone(self, cloned_guild_id: int) -> str | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT mapping_name FROM guild_mappings WHERE cloned_guild_id = ? LIMIT 1",
             (int(cloned_guild_id),),
         ).fetchone()
@@ -3860,7 +4378,7 @@ class DBManager:
     def get_channel_name_blacklist_for_mapping(
         self, original_guild_id: int, cloned_guild_id: int
     ) -> list[str]:
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT pattern
             FROM channel_name_blacklist
@@ -3921,7 +4439,7 @@ class DBManager:
                 )
 
     def get_clone_guild_ids_for_origin(self, original_guild_id: int) -> list[int]:
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT DISTINCT cloned_guild_id
             FROM guild_mappings
@@ -3935,7 +4453,7 @@ class DBManager:
         return [int(r[0]) for r in rows]
 
     def list_mappings_by_origin(self, original_guild_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM guild_mappings WHERE original_guild_id=?",
             (int(original_guild_id),),
         ).fetchall()
@@ -3943,13 +4461,13 @@ class DBManager:
     def get_mapping_by_original_and_clone(
         self, original_guild_id: int, cloned_guild_id: int
     ):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM guild_mappings WHERE original_guild_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_guild_id), int(cloned_guild_id)),
         ).fetchone()
 
     def get_channel_mappings_for_original(self, original_channel_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM channel_mappings WHERE original_channel_id=? ORDER BY cloned_guild_id",
             (int(original_channel_id),),
         ).fetchall()
@@ -3957,7 +4475,7 @@ class DBManager:
     def get_thread_mapping_by_original_and_clone(
         self, original_thread_id: int, cloned_guild_id: int
     ) -> sqlite3.Row | None:
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM threads WHERE original_thread_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_thread_id), int(cloned_guild_id)),
         ).fetchone()
@@ -3965,7 +4483,7 @@ class DBManager:
     def get_channel_mapping_by_original_and_clone(
         self, original_channel_id: int, cloned_guild_id: int
     ):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM channel_mappings WHERE original_channel_id=? AND cloned_guild_id=? LIMIT 1",
             (int(original_channel_id), int(cloned_guild_id)),
         ).fetchone()
@@ -3980,7 +4498,7 @@ class DBManager:
             )
 
     def get_thread_mappings_for_original(self, original_thread_id: int) -> list[dict]:
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT *
             FROM threads
@@ -3998,11 +4516,21 @@ class DBManager:
         """
         Return the single row for (original_thread_id, cloned_guild_id).
         """
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM threads WHERE original_thread_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_thread_id), int(cloned_guild_id)),
         ).fetchone()
 
+    def get_cloned_thread_ids(self, cloned_guild_id: int) -> set[int]:
+        """
+        Return the clone thread ids mapped into one clone guild.
+        """
+        rows = self._read(
+            "SELECT cloned_thread_id FROM threads WHERE cloned_guild_id = ? AND cloned_thread_id IS NOT NULL",
+            (int(cloned_guild_id),),
+        ).fetchall()
+        return {int(r[0]) for r in rows}
+
     def delete_forum_thread_mapping_for_clone(
         self, original_thread_id: int, cloned_guild_id: int
     ) -> None:
@@ -4019,6 +4547,7 @@ class DBManager:
     def delete_message_mapping_pair(
         self, original_message_id: int, cloned_guild_id: int
     ) -> int:
+        self.flush_message_mappings()
         with self.lock, self.conn:
             cur = self.conn.execute(
                 "DELETE FROM messages WHERE original_message_id=? AND cloned_guild_id=?",
@@ -4027,7 +4556,7 @@ class DBManager:
             return cur.rowcount or 0
 
     def get_emoji_mapping_for_clone(self, original_id: int, cloned_guild_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM emoji_mappings WHERE original_emoji_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_id), int(cloned_guild_id)),
         ).fetchone()
@@ -4038,7 +4567,7 @@ class DBManager:
         A member can use their own guild's static emoji without Nitro, so this
         is the set a non-Nitro account may keep in a message.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT cloned_emoji_id FROM emoji_mappings "
             "WHERE cloned_guild_id = ? AND cloned_emoji_id IS NOT NULL",
             (int(cloned_guild_id),),
@@ -4052,7 +4581,7 @@ class DBManager:
         return out
 
     def get_emoji_mappings_for_original(self, original_id: int) -> list:
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM emoji_mappings WHERE original_emoji_id = ? ORDER BY cloned_guild_id",
             (int(original_id),),
         ).fetchall()
@@ -4074,13 +4603,13 @@ class DBManager:
         self.conn.commit()
 
     def get_sticker_mapping_for_clone(self, original_id: int, cloned_guild_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM sticker_mappings WHERE original_sticker_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_id), int(cloned_guild_id)),
         ).fetchone()
 
     def get_sticker_mappings_for_original(self, original_id: int) -> list:
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM sticker_mappings WHERE original_sticker_id = ? ORDER BY cloned_guild_id",
             (int(original_id),),
         ).fetchall()
@@ -4095,19 +4624,19 @@ class DBManager:
         self.conn.commit()
 
     def get_role_mapping_for_clone(self, original_id: int, cloned_guild_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM role_mappings WHERE original_role_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_id), int(cloned_guild_id)),
         ).fetchone()
 
     def get_role_mapping_by_cloned_id(self, cloned_role_id: int):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM role_mappings WHERE cloned_role_id = ?",
             (int(cloned_role_id),),
         ).fetchone()
 
     def get_role_mappings_for_original(self, original_id: int) -> list:
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM role_mappings WHERE original_role_id = ? ORDER BY cloned_guild_id",
             (int(original_id),),
         ).fetchall()
@@ -4124,7 +4653,7 @@ class DBManager:
     def get_category_mapping_by_original_and_clone(
         self, original_category_id: int, cloned_guild_id: int
     ):
-        return self.conn.execute(
+        return self._read(
             "SELECT * FROM category_mappings WHERE original_category_id = ? AND cloned_guild_id = ? LIMIT 1",
             (int(original_category_id), int(cloned_guild_id)),
         ).fetchone()
@@ -4255,7 +4784,7 @@ class DBManager:
     def get_original_guild_id_for_category(
         self, original_category_id: int
     ) -> int | None:
-        row = self.conn.execute(
+        row = self._read(
             "SELECT original_guild_id FROM category_mappings WHERE original_category_id=? LIMIT 1",
             (original_category_id,),
         ).fetchone()
@@ -4265,7 +4794,7 @@ class DBManager:
         """
         Resolve the original_guild_id for a given original_channel_id.
         """
-        row = self.conn.execute(
+        row = self._read(
             "SELECT original_guild_id FROM channel_mappings WHERE original_channel_id=? LIMIT 1",
             (int(original_channel_id),),
         ).fetchone()
@@ -4326,7 +4855,7 @@ class DBManager:
         host_gid = int(mapping_row["original_guild_id"])
         clone_gid = int(mapping_row["cloned_guild_id"])
 
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT filter_type, user_id
             FROM user_filters
@@ -4422,7 +4951,7 @@ class DBManager:
         - If user in blacklist -> filtered
         - Otherwise -> not filtered
         """
-        whitelist_count = self.conn.execute(
+        whitelist_count = self._read(
             """
             SELECT COUNT(*) FROM user_filters
             WHERE filter_type = 'whitelist'
@@ -4436,7 +4965,7 @@ class DBManager:
 
         if has_whitelist:
 
-            in_whitelist = self.conn.execute(
+            in_whitelist = self._read(
                 """
                 SELECT 1 FROM user_filters
                 WHERE filter_type = 'whitelist'
@@ -4451,7 +4980,7 @@ class DBManager:
             if not in_whitelist:
                 return (True, "user_not_in_whitelist")
 
-        in_blacklist = self.conn.execute(
+        in_blacklist = self._read(
             """
             SELECT 1 FROM user_filters
             WHERE filter_type = 'blacklist'
@@ -4568,7 +5097,7 @@ class DBManager:
         """
         if cloned_channel_id is None:
 
-            rows = self.conn.execute(
+            rows = self._read(
                 """
                 SELECT cloned_role_id
                 FROM role_mentions
@@ -4581,7 +5110,7 @@ class DBManager:
             ).fetchall()
         else:
 
-            rows = self.conn.execute(
+            rows = self._read(
                 """
                 SELECT cloned_role_id
                 FROM role_mentions
@@ -4605,7 +5134,7 @@ class DBManager:
         """
         List all role mention configurations for a mapping.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT role_mention_id, cloned_channel_id, cloned_role_id, added_at
             FROM role_mentions
@@ -4668,7 +5197,7 @@ class DBManager:
         Get custom webhook profile for a cloned channel.
         Returns dict with 'webhook_name' and 'webhook_avatar_url', or None.
         """
-        row = self.conn.execute(
+        row = self._read(
             """
             SELECT webhook_name, webhook_avatar_url, created_at, last_updated
             FROM channel_webhook_profiles
@@ -4716,7 +5245,7 @@ class DBManager:
         """
         List all channel webhook profiles for a clone guild.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             """
             SELECT 
                 cloned_channel_id,
@@ -4774,6 +5303,7 @@ class DBManager:
         Used when repointing an existing mapping to a new clone guild
         so we don't leave stale rows for the old pair.
         """
+        self.flush_message_mappings()
         ogid = int(original_guild_id or 0)
         cgid = int(cloned_guild_id or 0)
         if not ogid and not cgid:
@@ -4825,6 +5355,7 @@ class DBManager:
 
         Returns a small stats dict for logging.
         """
+        self.flush_message_mappings()
         with self.lock:
 
             try:
@@ -5012,7 +5543,7 @@ class DBManager:
         """
         All rewrites for a given mapping, oldest first.
         """
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT
                 id,
@@ -5037,7 +5568,7 @@ class DBManager:
         """
         Flat list of all rewrites; used by the server to build its cache.
         """
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT
                 original_guild_id,
@@ -5055,16 +5586,15 @@ class DBManager:
         """
         List stored message forwarding rules, optionally scoped to a guild_id.
         """
-        with self.lock:
-            cur = self.conn.cursor()
-            if guild_id:
-                cur.execute(
-                    "SELECT * FROM message_forwarding WHERE guild_id = ? ORDER BY created_at DESC",
-                    (str(guild_id),),
-                )
-            else:
-                cur.execute("SELECT * FROM message_forwarding ORDER BY created_at DESC")
-            rows = cur.fetchall()
+        if guild_id:
+            rows = self._read(
+                "SELECT * FROM message_forwarding WHERE guild_id = ? ORDER BY created_at DESC",
+                (str(guild_id),),
+            ).fetchall()
+        else:
+            rows = self._read(
+                "SELECT * FROM message_forwarding ORDER BY created_at DESC"
+            ).fetchall()
 
         out: list[dict] = []
         for row in rows or []:
@@ -5094,13 +5624,10 @@ class DBManager:
         return out
 
     def get_message_forwarding_rule(self, rule_id: str) -> dict | None:
-        with self.lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                "SELECT * FROM message_forwarding WHERE rule_id = ?",
-                (str(rule_id),),
-            )
-            row = cur.fetchone()
+        row = self._read(
+            "SELECT * FROM message_forwarding WHERE rule_id = ?",
+            (str(rule_id),),
+        ).fetchone()
         if not row:
             return None
 
@@ -5239,25 +5766,24 @@ class DBManager:
         source_message_id: int,
     ) -> bool:
         """Check whether a forwarding event already exists for this rule + message."""
-        with self.lock:
-            row = self.conn.execute(
-                "SELECT 1 FROM forwarding_events WHERE rule_id=? AND source_message_id=? LIMIT 1",
-                (rule_id, int(source_message_id)),
-            ).fetchone()
+        row = self._read(
+            "SELECT 1 FROM forwarding_events WHERE rule_id=? AND source_message_id=? LIMIT 1",
+            (rule_id, int(source_message_id)),
+        ).fetchone()
         return row is not None
 
     def count_forwarded_messages(self) -> int:
         """
         Total number of forwarded messages recorded (each sent payload counted once).
         """
-        row = self.conn.execute("SELECT COUNT(*) FROM forwarding_events").fetchone()
+        row = self._read("SELECT COUNT(*) FROM forwarding_events").fetchone()
         return int(row[0] if row and row[0] is not None else 0)
 
     def count_forwarded_by_provider(self) -> dict:
         """
         Count forwarded messages grouped by provider.
         """
-        rows = self.conn.execute(
+        rows = self._read(
             "SELECT provider, COUNT(*) AS cnt FROM forwarding_events GROUP BY provider"
         ).fetchall()
         return {str(r["provider"]): int(r["cnt"]) for r in rows}
@@ -5270,7 +5796,7 @@ class DBManager:
         - When include_null=True, groups missing rule_id under the empty string "".
         """
         if include_null:
-            rows = self.conn.execute(
+            rows = self._read(
                 """
                 SELECT COALESCE(NULLIF(TRIM(rule_id), ''), '') AS rule_id, COUNT(*) AS cnt
                 FROM forwarding_events
@@ -5279,7 +5805,7 @@ class DBManager:
             ).fetchall()
             return {str(r["rule_id"]): int(r["cnt"]) for r in rows}
         else:
-            rows = self.conn.execute(
+            rows = self._read(
                 """
                 SELECT rule_id, COUNT(*) AS cnt
                 FROM forwarding_events
@@ -5290,7 +5816,7 @@ class DBManager:
             return {str(r["rule_id"]): int(r["cnt"]) for r in rows}
 
     def get_backup_tokens(self) -> list[dict]:
-        cur = self.conn.execute(
+        cur = self._read(
             "SELECT token_id, token_value FROM backup_tokens ORDER BY added_at DESC"
         )
         return [dict(row) for row in cur.fetchall()]
@@ -5301,7 +5827,7 @@ class DBManager:
 
         Note: Includes token_value so the API layer can mask it.
         """
-        cur = self.conn.execute(
+        cur = self._read(
             """
             SELECT token_id, token_value, note, added_at, last_used
             FROM backup_tokens
@@ -5326,31 +5852,29 @@ class DBManager:
 
     def list_scraper_tokens(self) -> list[dict]:
         """Return all scraper tokens with metadata."""
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT token_id, token_value, label, is_valid, last_validated,
-                       username, user_id, added_at, last_used, use_count
-                FROM scraper_tokens
-                ORDER BY added_at DESC
-                """
-            )
-            return [dict(row) for row in cur.fetchall()]
+        cur = self._read(
+            """
+            SELECT token_id, token_value, label, is_valid, last_validated,
+                   username, user_id, added_at, last_used, use_count
+            FROM scraper_tokens
+            ORDER BY added_at DESC
+            """
+        )
+        return [dict(row) for row in cur.fetchall()]
 
     def get_scraper_token(self, token_id: str) -> dict | None:
         """Get a single scraper token by ID."""
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT token_id, token_value, label, is_valid, last_validated,
-                       username, user_id, added_at, last_used, use_count
-                FROM scraper_tokens
-                WHERE token_id = ?
-                """,
-                (token_id,),
-            )
-            row = cur.fetchone()
-            return dict(row) if row else None
+        cur = self._read(
+            """
+            SELECT token_id, token_value, label, is_valid, last_validated,
+                   username, user_id, added_at, last_used, use_count
+            FROM scraper_tokens
+            WHERE token_id = ?
+            """,
+            (token_id,),
+        )
+        row = cur.fetchone()
+        return dict(row) if row else None
 
     def update_scraper_token(
         self,
@@ -5443,33 +5967,31 @@ class DBManager:
 
     def list_mapping_tokens(self, mapping_id: str) -> list[dict]:
         """Return all user tokens attached to a mapping (includes token_value)."""
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT token_id, mapping_id, token_value, label, username, user_id,
-                       enabled, added_at, last_used, use_count
-                FROM mapping_user_tokens
-                WHERE mapping_id = ?
-                ORDER BY added_at ASC, token_id ASC
-                """,
-                (mapping_id,),
-            )
-            return [dict(row) for row in cur.fetchall()]
+        cur = self._read(
+            """
+            SELECT token_id, mapping_id, token_value, label, username, user_id,
+                   enabled, added_at, last_used, use_count
+            FROM mapping_user_tokens
+            WHERE mapping_id = ?
+            ORDER BY added_at ASC, token_id ASC
+            """,
+            (mapping_id,),
+        )
+        return [dict(row) for row in cur.fetchall()]
 
     def get_mapping_token(self, token_id: str) -> dict | None:
         """Get a single mapping user token by ID."""
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT token_id, mapping_id, token_value, label, username, user_id,
-                       enabled, added_at, last_used, use_count
-                FROM mapping_user_tokens
-                WHERE token_id = ?
-                """,
-                (token_id,),
-            )
-            row = cur.fetchone()
-            return dict(row) if row else None
+        cur = self._read(
+            """
+            SELECT token_id, mapping_id, token_value, label, username, user_id,
+                   enabled, added_at, last_used, use_count
+            FROM mapping_user_tokens
+            WHERE token_id = ?
+            """,
+            (token_id,),
+        )
+        row = cur.fetchone()
+        return dict(row) if row else None
 
     def get_enabled_mapping_tokens(self, mapping_id: str) -> list[dict]:
         """Return {token_id, token_value, username, user_id} for each enabled token.
@@ -5477,17 +5999,16 @@ class DBManager:
         ``user_id`` is required by the identity manager to resolve the token
         account's member object in the clone guild.
         """
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT token_id, token_value, username, user_id
-                FROM mapping_user_tokens
-                WHERE mapping_id = ? AND enabled = 1
-                ORDER BY added_at ASC, token_id ASC
-                """,
-                (mapping_id,),
-            )
-            return [dict(row) for row in cur.fetchall() if row["token_value"]]
+        cur = self._read(
+            """
+            SELECT token_id, token_value, username, user_id
+            FROM mapping_user_tokens
+            WHERE mapping_id = ? AND enabled = 1
+            ORDER BY added_at ASC, token_id ASC
+            """,
+            (mapping_id,),
+        )
+        return [dict(row) for row in cur.fetchall() if row["token_value"]]
 
     def set_mapping_token_enabled(self, token_id: str, enabled: bool) -> bool:
         """Enable or disable a single mapping user token."""
@@ -5585,21 +6106,19 @@ class DBManager:
 
     def get_token_identity(self, mapping_id: str, author_id: str) -> dict | None:
         """Return the identity assignment for a (mapping, author), or None."""
-        with self.lock:
-            row = self.conn.execute(
-                "SELECT * FROM mapping_token_identities WHERE mapping_id = ? AND author_id = ?",
-                (str(mapping_id), str(author_id)),
-            ).fetchone()
-            return self._row_to_identity(row) if row else None
+        row = self._read(
+            "SELECT * FROM mapping_token_identities WHERE mapping_id = ? AND author_id = ?",
+            (str(mapping_id), str(author_id)),
+        ).fetchone()
+        return self._row_to_identity(row) if row else None
 
     def list_token_identities(self, mapping_id: str) -> list[dict]:
         """Return all identity assignments for a mapping."""
-        with self.lock:
-            rows = self.conn.execute(
-                "SELECT * FROM mapping_token_identities WHERE mapping_id = ?",
-                (str(mapping_id),),
-            ).fetchall()
-            return [self._row_to_identity(r) for r in rows]
+        rows = self._read(
+            "SELECT * FROM mapping_token_identities WHERE mapping_id = ?",
+            (str(mapping_id),),
+        ).fetchall()
+        return [self._row_to_identity(r) for r in rows]
 
     def delete_token_identity(self, mapping_id: str, author_id: str) -> bool:
         """Remove a single identity assignment."""
@@ -5691,8 +6210,7 @@ class DBManager:
         sql = f"SELECT * FROM event_logs{where} ORDER BY created_at DESC, log_id DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
 
-        with self.lock:
-            rows = self.conn.execute(sql, params).fetchall()
+        rows = self._read(sql, params).fetchall()
         return [dict(r) for r in rows]
 
     def count_event_logs(
@@ -5721,16 +6239,14 @@ class DBManager:
         where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
         sql = f"SELECT COUNT(*) FROM event_logs{where}"
 
-        with self.lock:
-            row = self.conn.execute(sql, params).fetchone()
+        row = self._read(sql, params).fetchone()
         return row[0] if row else 0
 
     def get_event_log_types(self) -> List[str]:
         """Return distinct event types present in the log."""
-        with self.lock:
-            rows = self.conn.execute(
-                "SELECT DISTINCT event_type FROM event_logs ORDER BY event_type"
-            ).fetchall()
+        rows = self._read(
+            "SELECT DISTINCT event_type FROM event_logs ORDER BY event_type"
+        ).fetchall()
         return [r[0] for r in rows]
 
     def delete_event_log(self, log_id: str) -> bool:
@@ -5764,16 +6280,15 @@ class DBManager:
 
     def get_valid_scraper_tokens(self) -> list[dict]:
         """Return only validated scraper tokens."""
-        with self.lock:
-            cur = self.conn.execute(
-                """
-                SELECT token_id, token_value, label, username, user_id
-                FROM scraper_tokens
-                WHERE is_valid = 1
-                ORDER BY use_count ASC, added_at ASC
-                """
-            )
-            return [dict(row) for row in cur.fetchall()]
+        cur = self._read(
+            """
+            SELECT token_id, token_value, label, username, user_id
+            FROM scraper_tokens
+            WHERE is_valid = 1
+            ORDER BY use_count ASC, added_at ASC
+            """
+        )
+        return [dict(row) for row in cur.fetchall()]
 
     def add_backup_token(self, token_value: str, note: Optional[str] = None) -> str:
         """Insert a new backup token and return its token_id."""
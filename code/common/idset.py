@@ -0,0 +1,72 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, repeat
+from typing import Iterable, Iterator
+
+
+def pack_deltas(deltas: Iterable[int]) -> str:
+    """
+    Wire form of a sorted id list given as gaps from the previous id (the
+    first gap is from 0): comma-separated hex. Messages in one channel are
+    close in time, so a gap is ~10 hex digits where the id itself is 19
+    decimal digits plus JSON quoting.
+    """
+    return ",".join(map("{:x}".format, deltas))
+
+
+class SortedIdSet:
+    """
+    Read-only set of snowflakes kept as a sorted array of unsigned 64-bit
+    ints (8 bytes per id) and probed with bisect, for id lists too large to
+    hold as a Python set of strings.
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._ids = array("Q", sorted({int(i) for i in ids}))
+
+    @classmethod
+    def unpack(cls, packed: str | None) -> "SortedIdSet":
+        """Inverse of pack_deltas() over ascending ids."""
+        out = cls.__new__(cls)
+        out._ids = array(
+            "Q", accumulate(map(int, packed.split(","), repeat(16))) if packed else ()
+        )
+        return out
+
+    def pack(self) -> str:
+        ids = self._ids
+        return pack_deltas(b - a for a, b in zip((0, *ids), ids))
+
+    def __contains__(self, snowflake: object) -> bool:
+        try:
+            x = int(snowflake)
+        except (TypeError, ValueError):
+            return False
+        ids = self._ids
+        i = bisect_left(ids, x)
+        return i < len(ids) and ids[i] == x
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __bool__(self) -> bool:
+        return bool(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self._ids.itemsize * len(self._ids)
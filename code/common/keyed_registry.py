@@ -0,0 +1,209 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Iterator, List, Optional, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+_ALL: "weakref.WeakSet[KeyedRegistry]" = weakref.WeakSet()
+
+
+def _default_busy(value: Any) -> bool:
+    # A lock that was just released still has the woken waiter queued until
+    # it re-acquires; evicting it then would hand the next caller a second lock.
+    if getattr(value, "_waiters", None):
+        return True
+    locked = getattr(value, "locked", None)
+    return bool(locked()) if callable(locked) else False
+
+
+class KeyedRegistry(Generic[V]):
+    """
+    Per-key state (locks, events, small caches) that forgets idle keys.
+
+    Entries are kept in least-recently-used order. Every insert first drops
+    entries idle for longer than `ttl`, then the least recently used ones
+    while the registry holds more than `max_size`. Entries for which
+    `is_busy(value)` is true are never evicted; by default that means a
+    held lock (anything with a truthy `.locked()`) or one with tasks still
+    queued on it, so a task waiting on or holding a lock always sees the
+    same object.
+
+    Dict-like enough to replace a plain dict at its call sites; `stats()`
+    reports size and eviction counts, and `registry_stats()` collects them
+    for every live registry.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Optional[Callable[[], V]] = None,
+        *,
+        max_size: int = 10_000,
+        ttl: Optional[float] = None,
+        is_busy: Callable[[V], bool] = _default_busy,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.is_busy = is_busy
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+        self.busy_skips = 0
+        self.peak = 0
+        _ALL.add(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._live(key) is not None
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data))
+
+    def __getitem__(self, key: Hashable) -> V:
+        v = self.get(key, _MISSING)
+        if v is _MISSING:
+            raise KeyError(key)
+        return v
+
+    def __setitem__(self, key: Hashable, value: V) -> None:
+        self._data[key] = [value, self._clock()]
+        self._data.move_to_end(key)
+        self._evict()
+
+    def _live(self, key: Hashable) -> Optional[list]:
+        ent = self._data.get(key)
+        if ent is None:
+            return None
+        if self._expired(ent, self._clock()) and not self.is_busy(ent[0]):
+            del self._data[key]
+            self.evicted_ttl += 1
+            return None
+        return ent
+
+    def _expired(self, ent: list, now: float) -> bool:
+        return self.ttl is not None and now - ent[1] >= self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        ent = self._live(key)
+        if ent is None:
+            return default
+        ent[1] = self._clock()
+        self._data.move_to_end(key)
+        return ent[0]
+
+    def setdefault(self, key: Hashable, value: V) -> V:
+        cur = self.get(key, _MISSING)
+        if cur is not _MISSING:
+            return cur
+        self[key] = value
+        return value
+
+    def get_or_create(self, key: Hashable) -> V:
+        """The value for `key`, built with the registry's factory if absent."""
+        cur = self.get(key, _MISSING)
+        if cur is not _MISSING:
+            return cur
+        if self.factory is None:
+            raise KeyError(key)
+        value = self.factory()
+        self[key] = value
+        return value
+
+    def add(self, key: Hashable) -> None:
+        """Set-style insert (value True), for registries used as bounded sets."""
+        self[key] = True
+
+    def discard(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def pop(self, key: Hashable, default: Any = _MISSING) -> Any:
+        ent = self._live(key)
+        if ent is None:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        del self._data[key]
+        return ent[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def sweep(self) -> int:
+        """Drop every idle-expired entry now; returns how many went."""
+        before = len(self._data)
+        self._evict(full=True)
+        return before - len(self._data)
+
+    def _evict(self, *, full: bool = False) -> None:
+        now = self._clock()
+        self.peak = max(self.peak, len(self._data))
+        if self.ttl is not None:
+            # Oldest first: stop at the first entry that is still fresh,
+            # unless a full sweep was asked for. Keys are only copied out
+            # when something is actually going.
+            doomed: Optional[List[Hashable]] = None
+            for key, ent in self._data.items():
+                if not self._expired(ent, now):
+                    if not full:
+                        break
+                    continue
+                if self.is_busy(ent[0]):
+                    self.busy_skips += 1
+                    continue
+                if doomed is None:
+                    doomed = []
+                doomed.append(key)
+            if doomed:
+                for key in doomed:
+                    del self._data[key]
+                self.evicted_ttl += len(doomed)
+
+        over = len(self._data) - self.max_size
+        if over <= 0:
+            return
+        doomed = []
+        for key, ent in self._data.items():
+            if len(doomed) >= over:
+                break
+            if self.is_busy(ent[0]):
+                self.busy_skips += 1
+                continue
+            doomed.append(key)
+        for key in doomed:
+            del self._data[key]
+        self.evicted_lru += len(doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "peak": self.peak,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_lru": self.evicted_lru,
+            "busy_skips": self.busy_skips,
+        }
+
+
+def registry_stats() -> List[Dict[str, Any]]:
+    """Stats for every live registry, sorted by name."""
+    return sorted((r.stats() for r in list(_ALL)), key=lambda s: s["name"])
@@ -0,0 +1,128 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import re
+from typing import Iterable, Optional
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex source matching any of `words`, factored into a prefix trie so the
+    engine walks one branch per input character instead of trying every word
+    at every position. Longer words win over their own prefixes.
+    """
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        if len(alts) == 1 and "" not in node:
+            return alts[0]
+        body = "(?:" + "|".join(alts) + ")"
+        return body + "?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Match a whole keyword list against a text in one regex scan.
+
+    The keywords are compiled once into a prefix-trie alternation, so the cost
+    of a lookup grows with the text rather than with keywords x rules.
+
+    whole_word=True only counts a keyword that is not glued to other word
+    characters (the blocked-keyword rule, `(?<!\\w)kw(?!\\w)`); False is a
+    plain substring test (`kw in text`). Unless case_sensitive, keywords and
+    text are lower-cased, and results are reported lower-cased.
+    """
+
+    __slots__ = ("keywords", "whole_word", "case_sensitive", "_search", "_scan")
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        *,
+        whole_word: bool = False,
+        case_sensitive: bool = False,
+    ):
+        words: dict[str, None] = {}
+        for k in keywords:
+            if not k:
+                continue
+            words[k if case_sensitive else k.lower()] = None
+        self.keywords: frozenset[str] = frozenset(words)
+        self.whole_word = whole_word
+        self.case_sensitive = case_sensitive
+        self._search: Optional[re.Pattern] = None
+        self._scan: Optional[re.Pattern] = None
+        if words:
+            body = trie_pattern(words)
+            if whole_word:
+                self._search = re.compile(rf"(?<!\w)(?:{body})(?!\w)")
+                self._scan = re.compile(rf"(?<!\w)(?=({body})(?!\w))")
+            else:
+                self._search = re.compile(body)
+                self._scan = re.compile(rf"(?=({body}))")
+
+    def __bool__(self) -> bool:
+        return self._search is not None
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _prep(self, text: str | None) -> str:
+        text = text or ""
+        return text if self.case_sensitive else text.lower()
+
+    def first(self, text: str | None) -> Optional[str]:
+        """The leftmost keyword found in `text`, or None."""
+        if self._search is None:
+            return None
+        m = self._search.search(self._prep(text))
+        return m.group(0) if m else None
+
+    def search(self, text: str | None) -> bool:
+        return self.first(text) is not None
+
+    def found(self, text: str | None) -> set[str]:
+        """
+        Every keyword present in `text`, overlaps included ("new" and
+        "new york" both count in "new york").
+        """
+        if self._scan is None:
+            return set()
+        text = self._prep(text)
+        keywords = self.keywords
+        out: set[str] = set()
+        for m in self._scan.finditer(text):
+            # The scan reports the longest keyword starting here; any other
+            # keyword starting at the same offset is one of its prefixes.
+            hit = m.group(1)
+            start = m.start()
+            for n in range(1, len(hit) + 1):
+                cand = hit[:n]
+                if cand not in keywords:
+                    continue
+                if self.whole_word and n < len(hit) and _WORD_CHAR.match(text, start + n):
+                    continue
+                out.add(cand)
+        return out
+
+    def contains_all(self, text: str | None) -> bool:
+        return self.keywords <= self.found(text) if self.keywords else True
@@ -0,0 +1,181 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Top-level keys that describe the message rather than the guild.
+META_KEYS = frozenset(
+    {
+        "target",
+        "delta",
+        "sitemap_version",
+        "base_version",
+        "section_hashes",
+        "changed",
+        "removed",
+    }
+)
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def section_hashes(sitemap: Dict[str, Any]) -> Dict[str, str]:
+    """Content hash of every section (categories, roles, emojis, ...)."""
+    return {
+        k: hashlib.sha1(_canonical(v)).hexdigest()
+        for k, v in sitemap.items()
+        if k not in META_KEYS
+    }
+
+
+def combined_hash(hashes: Dict[str, str], sections: Iterable[str], *extra: str) -> str:
+    """One hash over the given sections' hashes (missing sections count too)."""
+    h = hashlib.sha1()
+    for s in sections:
+        h.update(f"{s}={hashes.get(s, '-')};".encode())
+    for e in extra:
+        h.update(e.encode())
+    return h.hexdigest()
+
+
+def target_key(sitemap: Dict[str, Any]) -> Tuple[int, int]:
+    """(origin guild id, clone guild id or 0) the sitemap is meant for."""
+    tgt = sitemap.get("target") or {}
+    try:
+        origin = int((sitemap.get("guild") or {}).get("id") or 0)
+    except (TypeError, ValueError):
+        origin = 0
+    try:
+        clone = int(tgt.get("cloned_guild_id") or 0)
+    except (TypeError, ValueError):
+        clone = 0
+    return origin, clone
+
+
+class SitemapDeltaEncoder:
+    """
+    Client side: turns each built sitemap into a full or delta message.
+
+    A delta carries only the sections whose hash changed since the last
+    version the server acknowledged for that target, plus `guild` and
+    `target` so the server can label and route it before decoding. Versions
+    are "<epoch>.<n>" with a per-process epoch, so a restarted client never
+    builds on a base the server kept from its predecessor.
+    """
+
+    def __init__(self) -> None:
+        self._epoch = os.urandom(4).hex()
+        self._n = 0
+        # target -> (acknowledged version, section hashes)
+        self._acked: Dict[Tuple[int, int], Tuple[str, Dict[str, str]]] = {}
+
+    def encode(self, sitemap: Dict[str, Any], *, full: bool = False) -> Dict[str, Any]:
+        self._n += 1
+        version = f"{self._epoch}.{self._n}"
+        hashes = section_hashes(sitemap)
+        base = None if full else self._acked.get(target_key(sitemap))
+
+        if base is None:
+            out = dict(sitemap)
+            out["sitemap_version"] = version
+            out["section_hashes"] = hashes
+            return out
+
+        base_version, base_hashes = base
+        changed = {k: sitemap[k] for k, h in hashes.items() if base_hashes.get(k) != h}
+        out = {
+            "delta": True,
+            "sitemap_version": version,
+            "base_version": base_version,
+            "section_hashes": hashes,
+            "guild": sitemap.get("guild"),
+            "changed": changed,
+            "removed": sorted(k for k in base_hashes if k not in hashes),
+        }
+        if "target" in sitemap:
+            out["target"] = sitemap["target"]
+        return out
+
+    def acknowledge(self, message: Dict[str, Any]) -> None:
+        """The server now holds `message`'s version as the base for its target."""
+        self._acked[target_key(message)] = (
+            message["sitemap_version"],
+            dict(message["section_hashes"]),
+        )
+
+    def forget(self, message: Dict[str, Any]) -> None:
+        """Send the next sitemap for this target in full."""
+        self._acked.pop(target_key(message), None)
+
+
+class SitemapDeltaDecoder:
+    """
+    Server side: keeps the last full sitemap per target and rebuilds full
+    sitemaps from deltas. `apply` returns None when a delta's base is not
+    the one held (server restarted, or an update went missing); the client
+    then sends that sitemap in full.
+    """
+
+    def __init__(self) -> None:
+        self._bases: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self.full = 0
+        self.deltas = 0
+        self.misses = 0
+
+    def apply(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = target_key(message)
+        if not message.get("delta"):
+            sitemap = dict(message)
+            if "section_hashes" not in sitemap:
+                sitemap["section_hashes"] = section_hashes(sitemap)
+            self._bases[key] = sitemap
+            self.full += 1
+            return dict(sitemap)
+
+        base = self._bases.get(key)
+        if base is None or base.get("sitemap_version") != message.get("base_version"):
+            self.misses += 1
+            return None
+
+        sitemap = {k: v for k, v in base.items() if k not in META_KEYS}
+        for k in message.get("removed") or ():
+            sitemap.pop(k, None)
+        sitemap.update(message.get("changed") or {})
+        sitemap["guild"] = message.get("guild") or sitemap.get("guild")
+        if "target" in message:
+            sitemap["target"] = message["target"]
+        sitemap["sitemap_version"] = message.get("sitemap_version")
+        sitemap["section_hashes"] = dict(message.get("section_hashes") or {})
+        self._bases[key] = sitemap
+        self.deltas += 1
+        return dict(sitemap)
+
+    def latest(
+        self, origin_guild_id: int, cloned_guild_id: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """The last full sitemap received for a target, if any."""
+        base = self._bases.get((int(origin_guild_id), int(cloned_guild_id)))
+        return dict(base) if base is not None else None
+
+    def forget(self, origin_guild_id: int, cloned_guild_id: int = 0) -> None:
+        self._bases.pop((int(origin_guild_id), int(cloned_guild_id)), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "targets": len(self._bases),
+            "full": self.full,
+            "deltas": self.deltas,
+            "misses": self.misses,
+        }
@@ -54,9 +54,275 @@ def _bytes_len(s: str | bytes) -> int:
         return len(s)
 
 
+class _PersistentChannel:
+    """
+    Long-lived outbound connection shared by `send()` and `request()`.
+
+    - One socket per peer, re-dialled with backoff whenever it drops
+    - Outbound frames go through a bounded queue; `put()` waits when full,
+      which is the backpressure senders feel under a burst. It only gives
+      up once the peer is known-down, after the queue has been emptied, so
+      a caller that then dials directly never overtakes a queued frame
+    - Replies are matched back to the waiting `request()` by `rid`;
+      replies nobody waits for (acks to plain sends) are dropped
+    - When the peer is marked down, queued requests are failed back to
+      their callers and queued plain sends are dropped, as the per-message
+      path gives up on them; the writer then keeps probing in the
+      background, so the channel becomes usable again once it is back
+    - Bound to the loop that created it; other loops use the one-shot path
+    """
+
+    # Consecutive dial failures before callers stop queueing and fall back
+    # to connect-per-message until the writer gets through again.
+    DOWN_AFTER_FAILURES = 3
+    # Re-dial backoff: REDIAL_BASE * 2**(attempt-1), capped at REDIAL_MAX.
+    REDIAL_BASE = 0.5
+    REDIAL_MAX = 8.0
+
+    def __init__(
+        self,
+        url: str,
+        logger: logging.Logger,
+        *,
+        queue_size: int = 1000,
+        connect_timeout: float = 5.0,
+    ):
+        self.url = url
+        self.logger = logger
+        self.connect_timeout = connect_timeout
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(
+            maxsize=max(1, int(queue_size))
+        )
+        self._room = asyncio.Event()
+        self._waiters: dict[str, asyncio.Future] = {}
+        self._ws = None
+        self._conn_rids: set[str] = set()
+        self._reader_task: asyncio.Task | None = None
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        self._dial_failures = 0
+        self._closed = False
+        self.stats = {"sent": 0, "replies": 0, "connects": 0, "dial_errors": 0}
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    def usable(self) -> bool:
+        """True when this loop owns the channel and the peer is not known-down."""
+        if self._closed:
+            return False
+        try:
+            if asyncio.get_running_loop() is not self._loop:
+                return False
+        except RuntimeError:
+            return False
+        return self.connected or self._dial_failures < self.DOWN_AFTER_FAILURES
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, rid: str, raw: str) -> bool:
+        """Enqueue a frame, waiting for room; False once the channel is unusable."""
+        while self.usable():
+            try:
+                self._queue.put_nowait((rid, raw))
+                return True
+            except asyncio.QueueFull:
+                self._room.clear()
+                await self._room.wait()
+        return False
+
+    def expect_reply(self, rid: str) -> asyncio.Future:
+        fut = self._loop.create_future()
+        self._waiters[rid] = fut
+        return fut
+
+    def forget(self, rid: str) -> None:
+        self._waiters.pop(rid, None)
+
+    async def _dial(self):
+        ws = await asyncio.wait_for(
+            websockets.connect(self.url, max_size=None, ping_interval=20),
+            self.connect_timeout,
+        )
+        self.stats["connects"] += 1
+        self._ws = ws
+        self._conn_rids = set()
+        self._dial_failures = 0
+        self._reader_task = asyncio.create_task(self._reader_loop(ws, self._conn_rids))
+        self.logger.debug("[ws] persistent channel connected → %s", self.url)
+        return ws
+
+    def _down(self) -> bool:
+        return not self.connected and self._dial_failures >= self.DOWN_AFTER_FAILURES
+
+    def _redial_delay(self, attempt: int) -> float:
+        delay = min(self.REDIAL_MAX, self.REDIAL_BASE * (2 ** (max(1, attempt) - 1)))
+        return delay * (1 + random.random() * 0.2)
+
+    async def _writer_loop(self) -> None:
+        item: tuple[str, str] | None = None
+        attempt = 0
+        while not self._closed:
+            if item is None:
+                if self._down():
+                    # Callers stopped queueing, so nothing would trigger a
+                    # dial: probe on our own until the peer answers again.
+                    await asyncio.sleep(self._redial_delay(attempt))
+                    try:
+                        await self._dial()
+                        attempt = 0
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        attempt += 1
+                        self._dial_failures += 1
+                        self.stats["dial_errors"] += 1
+                        self.logger.debug(
+                            "[ws] persistent probe dial failed (%d) → %s: %s",
+                            attempt,
+                            self.url,
+                            e,
+                        )
+                    continue
+                item = await self._queue.get()
+                self._room.set()
+            ws = self._ws
+            if ws is None or ws.closed:
+                try:
+                    ws = await self._dial()
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    attempt += 1
+                    self._dial_failures += 1
+                    self.stats["dial_errors"] += 1
+                    self.logger.debug(
+                        "[ws] persistent dial failed (%d) → %s: %s",
+                        attempt,
+                        self.url,
+                        e,
+                    )
+                    if self._dial_failures >= self.DOWN_AFTER_FAILURES:
+                        self._fail_queued(item)
+                        item = None
+                        continue
+                    await asyncio.sleep(self._redial_delay(attempt))
+                    continue
+
+            rid, raw = item
+            try:
+                await ws.send(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The frame never made it out; re-dial and resend the same item.
+                self.logger.debug("[ws] persistent send failed, re-dialling: %s", e)
+                await self._drop(ws)
+                continue
+            if rid in self._waiters:
+                self._conn_rids.add(rid)
+            self.stats["sent"] += 1
+            self._queue.task_done()
+            item = None
+
+    def _fail_request(self, rid: str) -> None:
+        fut = self._waiters.pop(rid, None)
+        if fut is not None and not fut.done():
+            fut.set_exception(ConnectionError("persistent channel down"))
+
+    def _fail_queued(self, item: tuple[str, str]) -> None:
+        """
+        Peer looks down: empty the queue before callers start dialling
+        directly, so nothing they send can overtake a queued frame. Requests
+        go back to their callers (they retry directly and give up like
+        before); plain sends are dropped, as the per-message path would
+        have done after its retries.
+        """
+        items = [item]
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        dropped = 0
+        for rid, _raw in items:
+            self._queue.task_done()
+            if rid in self._waiters:
+                self._fail_request(rid)
+            else:
+                dropped += 1
+        if dropped:
+            self.logger.warning(
+                "[ws] peer %s unreachable; dropped %d queued message(s)",
+                self.url,
+                dropped,
+            )
+        # Wake blocked put()s: they see the channel down and dial directly.
+        self._room.set()
+
+    async def _reader_loop(self, ws, conn_rids: set[str]) -> None:
+        try:
+            async for raw in ws:
+                try:
+                    data = json.loads(raw)
+                except Exception:
+                    continue
+                rid = data.get("rid") if isinstance(data, dict) else None
+                fut = self._waiters.pop(rid, None) if rid else None
+                conn_rids.discard(rid)
+                self.stats["replies"] += 1
+                if fut is not None and not fut.done():
+                    fut.set_result(data)
+        except (ConnectionClosedOK, ConnectionClosedError, ProtocolError, OSError):
+            pass
+        finally:
+            if self._ws is ws:
+                self._ws = None
+            # Only requests already on this socket lost their reply; queued
+            # ones will go out on the next connection.
+            for rid in list(conn_rids):
+                fut = self._waiters.pop(rid, None)
+                if fut is not None and not fut.done():
+                    fut.set_exception(ConnectionError("persistent channel closed"))
+            conn_rids.clear()
+
+    async def _drop(self, ws) -> None:
+        if self._ws is ws:
+            self._ws = None
+        with contextlib.suppress(Exception):
+            await ws.close()
+
+    async def close(self, drain_timeout: float = 0.5) -> None:
+        """Give queued frames a short window to go out, then tear down."""
+        if self._closed:
+            return
+        if self.connected and drain_timeout > 0 and not self._queue.empty():
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._queue.join(), drain_timeout)
+        self._closed = True
+        self._room.set()
+        for t in (self._writer_task, self._reader_task):
+            if t is not None and not t.done():
+                t.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await t
+        if self._ws is not None:
+            await self._drop(self._ws)
+        for fut in self._waiters.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("persistent channel closed"))
+        self._waiters.clear()
+
+
 class WebsocketManager:
     """
-    - Outbound: fire-and-forget `send()` and request/response `request()`
+    - Outbound: fire-and-forget `send()` and request/response `request()`,
+      multiplexed over one persistent connection (`persistent=True`) or
+      dialled per message (`persistent=False`, and the automatic fallback
+      while the persistent connection cannot be established)
     - Inbound: simple server (`start_server`) with per-message handler
     - Fast shutdown: call `begin_shutdown()` or `await stop()`
       to collapse retries and lower timeouts so the process exits quickly.
@@ -68,12 +334,18 @@ class WebsocketManager:
         listen_host: Optional[str] = None,
         listen_port: Optional[int] = None,
         logger: Optional[logging.Logger] = None,
+        *,
+        persistent: bool = True,
+        queue_size: int = 1000,
     ):
         self.send_url = send_url
         self.listen_host = listen_host
         self.listen_port = listen_port
         self.logger = logger or logging.getLogger("WebsocketManager")
         self._shutting_down = False
+        self.persistent = bool(persistent)
+        self.queue_size = queue_size
+        self._channel: _PersistentChannel | None = None
 
     def begin_shutdown(self) -> None:
         """Mark the manager as shutting down; short-circuit retries/timeouts."""
@@ -82,6 +354,37 @@ class WebsocketManager:
     async def stop(self) -> None:
         """Coroutine alias so callers can `await ws.stop()` during teardown."""
         self.begin_shutdown()
+        ch, self._channel = self._channel, None
+        if ch is not None:
+            with contextlib.suppress(Exception):
+                await ch.close()
+
+    def _get_channel(self) -> _PersistentChannel | None:
+        """The persistent channel for this loop, or None to dial per message."""
+        if not self.persistent or not self.send_url:
+            return None
+        ch = self._channel
+        if ch is None or ch._closed:
+            if self._shutting_down:
+                return None
+            try:
+                ch = self._channel = _PersistentChannel(
+                    self.send_url, self.logger, queue_size=self.queue_size
+                )
+            except RuntimeError:
+                return None
+        return ch if ch.usable() else None
+
+    def channel_stats(self) -> dict:
+        """Counters for the persistent channel (empty when not in use)."""
+        ch = self._channel
+        if ch is None:
+            return {}
+        return {
+            **ch.stats,
+            "connected": ch.connected,
+            "queue_depth": ch.queue_depth(),
+        }
 
     async def start_server(
         self,
@@ -121,11 +424,17 @@ class WebsocketManager:
         - logs unexpected exceptions, but never blocks shutdown
         """
         peer = getattr(ws, "remote_address", None)
-        # Deliberately no open/close logging: senders dial a fresh connection
-        # per message and hang up immediately, so "connection open", "peer
-        # closed (OK)" and "connection closed" fire once PER MESSAGE and say
-        # nothing the per-request line below doesn't already say. Abnormal
-        # closes still log (see ConnectionClosedError).
+        # Deliberately no open/close logging: one-shot senders (admin commands,
+        # the non-persistent fallback) dial a fresh connection per message and
+        # hang up immediately, so "connection open", "peer closed (OK)" and
+        # "connection closed" would fire once PER MESSAGE. Abnormal closes
+        # still log (see ConnectionClosedError).
+        #
+        # Each request runs as its own task so one slow handler doesn't stall
+        # everything behind it on a persistent connection. Tasks start in
+        # arrival order and are not cancelled when the peer hangs up.
+        send_lock = asyncio.Lock()
+        tasks: set[asyncio.Task] = set()
         try:
             while True:
                 try:
@@ -148,43 +457,56 @@ class WebsocketManager:
                         break
                     continue
 
-                rid = req.get("rid") or str(uuid.uuid4())
-                req["rid"] = rid
-                ptype = _ptype(req)
-
-                dt = 0.0
-                try:
-                    t1 = time.monotonic()
-                    response = await handler(req)
-                    if response is None:
-                        response = {"ok": True}
-                    if isinstance(response, dict):
-                        response.setdefault("rid", rid)
-                    dt = (time.monotonic() - t1) * 1000
-                except Exception:
-                    self.logger.exception(
-                        "Error in WS handler type=%s rid=%s", ptype, rid
-                    )
-                    response = {"ok": False, "error": "handler-failed", "rid": rid}
-
-                payload = _json(response)
-                ok = await self._safe_send(ws, payload)
-                # One line per request rather than five (recv/handle/done/
-                # reply/sent) — same information, a fifth of the volume.
-                self.logger.debug(
-                    "[ws] type=%s rid=%s in=%dB out=%dB %.1fms ok=%s",
-                    ptype,
-                    rid,
-                    _bytes_len(raw),
-                    _bytes_len(payload),
-                    dt,
-                    ok,
+                if not isinstance(req, dict):
+                    req = {"type": "(none)", "data": req}
+                t = asyncio.create_task(
+                    self._handle_one(ws, req, raw, handler, send_lock)
                 )
-                if not ok:
-                    break
+                tasks.add(t)
+                t.add_done_callback(tasks.discard)
         finally:
             await self._close_quietly(ws)
 
+    async def _handle_one(
+        self,
+        ws: WebSocketServerProtocol,
+        req: dict,
+        raw: str | bytes,
+        handler: Callable[[dict], Awaitable[dict | None]],
+        send_lock: asyncio.Lock,
+    ) -> None:
+        rid = req.get("rid") or str(uuid.uuid4())
+        req["rid"] = rid
+        ptype = _ptype(req)
+
+        dt = 0.0
+        try:
+            t1 = time.monotonic()
+            response = await handler(req)
+            if response is None:
+                response = {"ok": True}
+            if isinstance(response, dict):
+                response.setdefault("rid", rid)
+            dt = (time.monotonic() - t1) * 1000
+        except Exception:
+            self.logger.exception("Error in WS handler type=%s rid=%s", ptype, rid)
+            response = {"ok": False, "error": "handler-failed", "rid": rid}
+
+        payload = _json(response)
+        async with send_lock:
+            ok = await self._safe_send(ws, payload)
+        # One line per request rather than five (recv/handle/done/
+        # reply/sent) — same information, a fifth of the volume.
+        self.logger.debug(
+            "[ws] type=%s rid=%s in=%dB out=%dB %.1fms ok=%s",
+            ptype,
+            rid,
+            _bytes_len(raw),
+            _bytes_len(payload),
+            dt,
+            ok,
+        )
+
     async def _safe_send(self, ws, payload: str) -> bool:
         if ws.closed:
             self.logger.debug("[ws→] not sending: connection already closed")
@@ -255,7 +577,9 @@ class WebsocketManager:
         send_timeout: float | None = 5.0,
     ) -> None:
         """
-        Fire-and-forget: connect, send JSON, close.
+        Fire-and-forget. On the persistent channel this enqueues the frame,
+        waiting for room in the queue for as long as the channel is up
+        (backpressure); otherwise connect, send JSON, close.
         Retries on OSError/Timeout with exponential backoff.
         During shutdown, retries/timeouts collapse to a single quick attempt.
         """
@@ -278,6 +602,42 @@ class WebsocketManager:
             if send_timeout is None or send_timeout > 0.25:
                 send_timeout = 0.25
 
+        ch = self._get_channel()
+        if ch is not None:
+            if await ch.put(rid, _json(payload)):
+                return
+            self.logger.debug(
+                "[ws] persistent channel down, dialling directly rid=%s type=%s",
+                rid,
+                ptype,
+            )
+
+        await self._send_oneshot(
+            payload,
+            rid,
+            ptype,
+            max_attempts=max_attempts,
+            base_backoff=base_backoff,
+            backoff_cap=backoff_cap,
+            jitter=jitter,
+            connect_timeout=connect_timeout,
+            send_timeout=send_timeout,
+        )
+
+    async def _send_oneshot(
+        self,
+        payload: dict,
+        rid: str,
+        ptype: str,
+        *,
+        max_attempts: int,
+        base_backoff: float,
+        backoff_cap: float,
+        jitter: float,
+        connect_timeout: float | None,
+        send_timeout: float | None,
+    ) -> None:
+        """Connect-per-message send; the pre-persistent behaviour."""
         for attempt in range(1, max_attempts + 1):
             try:
                 # Only announce retries. The first attempt is the boring case
@@ -390,6 +750,75 @@ class WebsocketManager:
             max_attempts,
         )
 
+        ch = self._get_channel()
+        if ch is not None:
+            fut = ch.expect_reply(rid)
+            raw_out = _json(payload)
+            if await ch.put(rid, raw_out):
+                t1 = time.monotonic()
+                try:
+                    if timeout is not None:
+                        data = await asyncio.wait_for(fut, timeout)
+                    else:
+                        data = await fut
+                    self.logger.debug(
+                        "[ws] request type=%s rid=%s out=%dB %.1fms (persistent)",
+                        ptype,
+                        rid,
+                        _bytes_len(raw_out),
+                        (time.monotonic() - t1) * 1000,
+                    )
+                    return data
+                except asyncio.TimeoutError:
+                    ch.forget(rid)
+                    self.logger.info(
+                        "[WS] request timed out rid=%s type=%s", rid, ptype
+                    )
+                    if not retry_on_timeout:
+                        return None
+                except ConnectionError as e:
+                    self.logger.debug(
+                        "[ws] persistent channel lost rid=%s type=%s: %s; "
+                        "retrying directly",
+                        rid,
+                        ptype,
+                        e,
+                    )
+                except asyncio.CancelledError:
+                    ch.forget(rid)
+                    self.logger.info(
+                        "WS request cancelled (shutdown) rid=%s type=%s", rid, ptype
+                    )
+                    return None
+            else:
+                ch.forget(rid)
+
+        return await self._request_oneshot(
+            payload,
+            rid,
+            ptype,
+            timeout=timeout,
+            max_attempts=max_attempts,
+            base_backoff=base_backoff,
+            backoff_cap=backoff_cap,
+            jitter=jitter,
+            connect_timeout=connect_timeout,
+        )
+
+    async def _request_oneshot(
+        self,
+        payload: dict,
+        rid: str,
+        ptype: str,
+        *,
+        timeout: float | None,
+        max_attempts: int,
+        base_backoff: float,
+        backoff_cap: float,
+        jitter: float,
+        connect_timeout: float | None,
+    ) -> dict | None:
+        """Connect-per-request round trip; the pre-persistent behaviour."""
         for attempt in range(1, max_attempts + 1):
             try:
                 if connect_timeout is not None:
@@ -496,10 +925,13 @@ class AdminBus:
         role: str,
         logger: Optional[logging.Logger] = None,
         admin_ws_url: Optional[str] = None,
+        persistent: bool = True,
     ):
         self.role = role
         self.logger = logger or logging.getLogger(f"AdminBus[{role}]")
-        self.ws = WebsocketManager(send_url=admin_ws_url, logger=self.logger)
+        self.ws = WebsocketManager(
+            send_url=admin_ws_url, logger=self.logger, persistent=persistent
+        )
 
     def begin_shutdown(self) -> None:
         """Propagate shutdown to internal manager so outbound sends don't retry."""
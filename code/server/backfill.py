@@ -492,8 +492,17 @@ class BackfillManager:
                 last_orig_timestamp=st.get("last_ts"),
             )
 
-    def update_expected_total(self, channel_id: int, total: int) -> None:
-        """Set/raise expected total (from client precount) and short-circuit if zero."""
+    def update_expected_total(
+        self, channel_id: int, total: int, *, estimated: bool = False
+    ) -> None:
+        """
+        Set/raise expected total reported by the client and short-circuit if zero.
+
+        Estimated totals (streamed while the client is still paging history)
+        replace the previous estimate, never drop below what was delivered and
+        never end the run; the exact total that follows them replaces the last
+        estimate.
+        """
         cid = int(channel_id)
         st = self._progress.get(cid)
         if not st:
@@ -504,6 +513,17 @@ class BackfillManager:
         except Exception:
             return
 
+        if estimated:
+            st["total_estimated"] = True
+            st["expected_total"] = max(
+                t + int(st.get("extra_total") or 0), int(st.get("delivered") or 0)
+            )
+            return
+
+        if st.pop("total_estimated", False):
+            st["expected_total"] = None
+            t += int(st.get("extra_total") or 0)
+
         if t == 0:
             st["expected_total"] = 0
             st["no_work"] = True
@@ -548,6 +568,7 @@ class BackfillManager:
             return
         curr = int(st.get("expected_total") or 0)
         st["expected_total"] = curr + int(delta)
+        st["extra_total"] = int(st.get("extra_total") or 0) + int(delta)
 
     def get_progress(self, channel_id: int) -> tuple[int | None, int | None]:
         cid = int(channel_id)
@@ -0,0 +1,180 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("server")
+
+_DELETES = ("message_delete", "thread_message_delete", "thread_delete")
+
+
+def event_key(typ: str, data: dict, seq: int) -> str:
+    """
+    What an event collapses on: edits and deletes of one message share a
+    key, as do renames and the delete of one thread. Anything else is
+    keyed by its sequence number and never collapses.
+    """
+    data = data or {}
+    try:
+        if typ in ("thread_rename", "thread_delete"):
+            tid = int(data.get("thread_id") or 0)
+            if tid:
+                return f"t:{tid}"
+        else:
+            mid = int(data.get("message_id") or 0)
+            if mid:
+                return f"m:{mid}"
+    except (TypeError, ValueError):
+        pass
+    return f"s:{seq}"
+
+
+class _Channel:
+    __slots__ = ("events", "spilled")
+
+    def __init__(self):
+        # ev_key -> (ev_type, payload); payload is None once spilled to disk
+        self.events: "OrderedDict[str, Tuple[str, Optional[dict]]]" = OrderedDict()
+        self.spilled = False
+
+
+class BackfillEventBuffer:
+    """
+    Live edit/delete/thread events held back while a channel backfills.
+
+    Events are indexed by what they touch, so a newer edit replaces the
+    older one and a delete replaces any edits in O(1); an edit after a
+    delete is dropped. Arrival order is kept: a replaced event moves to
+    the back, as if only the surviving one had arrived.
+
+    Once more than `spill_after` payloads are held in memory, the largest
+    channel moves to the `backfill_event_journal` table and keeps only its
+    keys in memory from then on. Journaled channels survive a restart and
+    are picked up again by `journaled_channels()` / `drain()`.
+    """
+
+    def __init__(self, db, *, spill_after: int = 1000):
+        self.db = db
+        self.spill_after = max(1, int(spill_after))
+        self._channels: Dict[int, _Channel] = {}
+        self._in_memory = 0
+        self.collapsed = 0
+        self.spills = 0
+        try:
+            start = int(db.bf_journal_max_seq()) + 1
+        except Exception:
+            start = 1
+        self._seq = itertools.count(start)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return int(channel_id) in self._channels
+
+    def add(self, channel_id: int, typ: str, data: dict) -> None:
+        cid = int(channel_id)
+        ch = self._channels.get(cid)
+        if ch is None:
+            ch = self._channels[cid] = self._load(cid)
+
+        seq = next(self._seq)
+        key = event_key(typ, data, seq)
+        prev = ch.events.pop(key, None)
+        if prev is not None:
+            if prev[0] in _DELETES and typ not in _DELETES:
+                # already gone: an edit or rename no longer matters
+                ch.events[key] = prev
+                self.collapsed += 1
+                return
+            self.collapsed += 1
+            if prev[1] is not None:
+                self._in_memory -= 1
+
+        if ch.spilled:
+            ch.events[key] = (typ, None)
+            self.db.bf_journal_put(cid, [(key, seq, typ, json.dumps(data))])
+            return
+
+        ch.events[key] = (typ, data)
+        self._in_memory += 1
+        if self._in_memory > self.spill_after:
+            self._spill_largest()
+
+    def _load(self, cid: int) -> _Channel:
+        """A channel's buffer, re-indexed from the journal if one survived."""
+        ch = _Channel()
+        try:
+            rows = self.db.bf_journal_load(cid)
+        except Exception:
+            logger.debug("[bf] journal load failed for #%s", cid, exc_info=True)
+            rows = []
+        for key, _seq, typ, _payload in rows:
+            ch.events[key] = (typ, None)
+        ch.spilled = bool(rows)
+        return ch
+
+    def _spill_largest(self) -> None:
+        cid, ch = max(
+            ((c, ch) for c, ch in self._channels.items() if not ch.spilled),
+            key=lambda kv: len(kv[1].events),
+        )
+        batch = []
+        for key, (typ, data) in ch.events.items():
+            batch.append((key, next(self._seq), typ, json.dumps(data)))
+        self.db.bf_journal_put(cid, batch)
+        ch.events = OrderedDict((k, (t, None)) for k, (t, _d) in ch.events.items())
+        ch.spilled = True
+        self._in_memory -= len(batch)
+        self.spills += 1
+        logger.info(
+            "[bf] Event buffer for #%s spilled to disk (%d events)", cid, len(batch)
+        )
+
+    def drain(self, channel_id: int) -> List[Tuple[str, dict]]:
+        """Remove and return a channel's events, oldest first."""
+        cid = int(channel_id)
+        ch = self._channels.pop(cid, None)
+        if ch is None:
+            ch = self._load(cid)
+        if not ch.spilled:
+            self._in_memory -= len(ch.events)
+            return [(t, d) for t, d in ch.events.values()]
+
+        out = []
+        for _key, _seq, typ, payload in self.db.bf_journal_load(cid):
+            try:
+                out.append((typ, json.loads(payload)))
+            except ValueError:
+                logger.warning("[bf] Dropping unreadable journaled %s for #%s", typ, cid)
+        self.db.bf_journal_clear(cid)
+        return out
+
+    def journaled_channels(self) -> List[int]:
+        """Channels with events on disk, e.g. left over from before a restart."""
+        try:
+            return self.db.bf_journal_channels()
+        except Exception:
+            return []
+
+    def depth(self, channel_id: int) -> int:
+        ch = self._channels.get(int(channel_id))
+        return len(ch.events) if ch else 0
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "events": sum(len(ch.events) for ch in self._channels.values()),
+            "in_memory": self._in_memory,
+            "spilled_channels": sum(1 for ch in self._channels.values() if ch.spilled),
+            "collapsed": self.collapsed,
+            "spills": self.spills,
+        }
@@ -354,6 +354,19 @@ class CloneCommands(commands.Cog):
             timestamp=datetime.now(timezone.utc),
         )
 
+    async def _announcements_changed(self, guild_id: int) -> None:
+        """Tell the client to drop its cached announcement triggers."""
+        try:
+            await self.bot.ws_manager.send(
+                {"type": "announcements_reload", "data": {"guild_id": guild_id}}
+            )
+        except Exception:
+            logger.warning(
+                "[📢] Failed to notify client of trigger change for %s",
+                guild_id,
+                exc_info=True,
+            )
+
     @guild_scoped_slash_command(
         name="ping_server",
         description="Show server latency and server information.",
@@ -749,6 +762,7 @@ class CloneCommands(commands.Cog):
             )
 
         added = self.db.add_announcement_trigger(gid, keyword, filter_id, chan_id)
+        await self._announcements_changed(gid)
         who = "any user" if filter_id == 0 else f"user `{filter_id}`"
         where = "any channel" if chan_id == 0 else f"channel `#{chan_id}`"
 
@@ -872,6 +886,7 @@ class CloneCommands(commands.Cog):
             self.db.conn.commit()
 
             if removed:
+                await self._announcements_changed(gid)
                 who = "any user" if fuid == 0 else f"user `{fuid}`"
                 where = "any channel" if cid == 0 else f"`#{cid}`"
                 return await ctx.respond(
@@ -1650,6 +1665,9 @@ class CloneCommands(commands.Cog):
                     )
 
         self.db.delete_role_mapping_for_clone(original_role_id, clone_gid)
+        server = getattr(self.bot, "server", None)
+        if server and hasattr(server, "_invalidate_role_index"):
+            server._invalidate_role_index(clone_gid)
 
         if newly_added:
             title = "Role Blocked"
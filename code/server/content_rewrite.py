@@ -0,0 +1,130 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, Optional
+
+from common.keywords import trie_pattern
+
+# Custom emoji, channel mentions and role mentions all open with "<", so one
+# pattern anchored on that literal finds every kind in a single scan (and
+# keeps the regex engine's fast literal-prefix search). Dispatch is on
+# m.lastindex: 1-2 emoji, 3 channel, 4 role.
+MENTION_RE = re.compile(
+    r"<(?::(?P<ename>\w+):(?P<eid>\d+)?>|#(?P<chan>\d+)>|@&(?P<role>\d+)>)"
+)
+MESSAGE_LINK_RE = re.compile(
+    r"(?P<base>https?://(?:ptb\.|canary\.)?discord(?:app)?\.com/channels/)"
+    r"(?P<gid>\d+|@me)/(?P<cid>\d+)/(?P<mid>\d+)"
+)
+_LINK_MARKER = "/channels/"
+
+LinkRewriter = Callable[[re.Match], str]
+
+
+class RewriteProgram:
+    """
+    Everything needed to rewrite text for one (original guild, clone guild)
+    pair, resolved up front:
+
+    - emoji and role id maps with the clone's own mappings already layered
+      over the "any clone" fallback, so each token is one dict lookup;
+    - the mapping's word rewrites compiled into one case-insensitive trie
+      regex. Sources are given in priority order (mapping scope, host,
+      global); the first spelling of a source wins.
+
+    Channel maps are passed per call because the receiver updates them in
+    place as channels are created; message links go through a callback since
+    they may need message-mapping lookups.
+    """
+
+    __slots__ = ("emojis", "roles", "_words_re", "_word_repl")
+
+    def __init__(
+        self,
+        *,
+        emojis: dict[int, int],
+        roles: dict[int, int],
+        words: Iterable[tuple[str, str]] = (),
+    ):
+        self.emojis = emojis
+        self.roles = roles
+        self._word_repl: dict[str, str] = {}
+        for source, repl in words:
+            self._word_repl.setdefault(source.lower(), repl)
+        self._words_re: Optional[re.Pattern] = (
+            re.compile(trie_pattern(self._word_repl), re.IGNORECASE)
+            if self._word_repl
+            else None
+        )
+
+    @property
+    def has_words(self) -> bool:
+        return self._words_re is not None
+
+    def rewrite_tokens(
+        self,
+        s: str,
+        *,
+        channels: Optional[dict[int, dict]],
+        channels_fallback: dict[int, dict],
+        link: LinkRewriter,
+    ) -> str:
+        """Rewrite emoji, channel mentions, role mentions and message links."""
+        if "<" in s:
+            emojis = self.emojis
+            roles = self.roles
+            channels = channels or {}
+
+            def repl(m: re.Match) -> str:
+                kind = m.lastindex
+                if kind == 4:
+                    cloned = roles.get(int(m.group(4)))
+                    return m.group(0) if cloned is None else f"<@&{cloned}>"
+                if kind == 3:
+                    cid = int(m.group(3))
+                    row = channels.get(cid) or channels_fallback.get(cid)
+                    if not row:
+                        return m.group(0)
+                    try:
+                        return f"<#{int(row.get('cloned_channel_id') or cid)}>"
+                    except Exception:
+                        return m.group(0)
+                if kind == 2:
+                    cloned = emojis.get(int(m.group(2)))
+                    if cloned is not None:
+                        return f"<:{m.group(1)}:{cloned}>"
+                return m.group(0)
+
+            s = MENTION_RE.sub(repl, s)
+
+        if _LINK_MARKER in s:
+            s = MESSAGE_LINK_RE.sub(link, s)
+        return s
+
+    def rewrite_words(self, s: Optional[str]) -> Optional[str]:
+        """Apply every configured word rewrite in one pass."""
+        if not s or self._words_re is None:
+            return s
+        word_repl = self._word_repl
+
+        def repl(m: re.Match) -> str:
+            hit = m.group(0)
+            out = word_repl.get(hit.lower())
+            if out is None:
+                # Unicode case folds that change length ("İ") can match the
+                # pattern without lowering back to the stored key.
+                for source, candidate in word_repl.items():
+                    if re.fullmatch(re.escape(source), hit, re.IGNORECASE):
+                        return candidate
+                return hit
+            return out
+
+        return self._words_re.sub(repl, s)
@@ -7,106 +7,75 @@
 #  https://www.gnu.org/licenses/agpl-3.0.en.html
 # =============================================================================
 
-import logging, re
-from typing import Optional, Tuple
-from server.rate_limiter import ActionType
+import functools, logging
 
 log = logging.getLogger("discord_hooks")
 
-_ROUTE_MAP: Tuple[Tuple[re.Pattern, ActionType], ...] = (
-    (re.compile(r"/channels/\{channel_id\}/webhooks"), ActionType.WEBHOOK_CREATE),
-    (re.compile(r"/webhooks/\{webhook_id\}"),         ActionType.WEBHOOK_DELETE),
-    (re.compile(r"/guilds/\{guild_id\}/emojis"), ActionType.EMOJI),
-    (re.compile(r"/guilds/\{guild_id\}/stickers"), ActionType.STICKER_CREATE),
-    (re.compile(r"/guilds/\{guild_id\}/channels"), ActionType.CREATE_CHANNEL),
-    (
-        re.compile(
-            r"^/(?:api/v\d+/)?guilds/(?:\d+|\{guild_id\})/roles(?:/(?:\d+|\{role_id\}))?(?:\?.*)?$"
-        ),
-        ActionType.ROLE,
-    ),
-    (re.compile(r"/channels/\{channel_id\}"), ActionType.EDIT_CHANNEL),
-    (re.compile(r"/channels/\{channel_id\}/messages"), ActionType.WEBHOOK_MESSAGE),
-    (re.compile(r"/channels/\{channel_id\}/threads"), ActionType.THREAD),
-    (
-        re.compile(r"/channels/\{channel_id\}/messages/\{message_id\}"),
-        ActionType.DELETE_CHANNEL,
-    ),
-)
-
-
-def _pick_major(parts: list[str]) -> str | None:
-    for p in parts:
-        if p and p.isdigit():
-            return p
-    return None
-
-
-class DiscordHTTPRLHandler(logging.Handler):
-    _rx = re.compile(r"Retrying in ([\d.]+) seconds.*bucket \"([^\"]+)\"")
-
-    def __init__(self, ratelimit_mgr):
-        super().__init__(level=logging.WARNING)
-        self.rlm = ratelimit_mgr
-
-    def _map_bucket(
-        self, bucket: str
-    ) -> tuple[Optional[ActionType], Optional[str], str]:
-        parts = bucket.split(":")
-        major = _pick_major(parts)
-        route = parts[-1]
-
-        action = None
-        for pat, act in _ROUTE_MAP:
-            if pat.search(route):
-                action = act
-                break
-
-        key = None
-        if action == ActionType.WEBHOOK_CREATE:
-            key = None
-        elif action == ActionType.WEBHOOK_MESSAGE and major:
-            key = major
-
-        log.debug(
-            "Bucket map: route=%s parts=%s -> action=%s key=%s",
-            route,
-            parts,
-            getattr(action, "name", None),
-            key,
-        )
-        return action, key, route
-
-    def emit(self, record: logging.LogRecord):
+_SESSION_ATTR = "_HTTPClient__session"
+
+
+def _attach(http, trace_config) -> bool:
+    sess = getattr(http, _SESSION_ATTR, None)
+    configs = getattr(sess, "_trace_configs", None)
+    if not isinstance(configs, list):
+        return False
+    if trace_config not in configs:
+        configs.append(trace_config)
+    return True
+
+
+def _attach_or_warn(http, trace_config) -> None:
+    """Attach after the session was (re)built; warn once if that is impossible."""
+    if _attach(http, trace_config) or getattr(http, "_cc_rl_probe_warned", False):
+        return
+    http._cc_rl_probe_warned = True
+    log.warning(
+        "Could not attach the REST rate-limit probe: %s has no %s with "
+        "_trace_configs. Bot REST calls will not be paced by Discord's "
+        "rate-limit headers, only by the per-action defaults.",
+        type(http).__name__,
+        _SESSION_ATTR,
+    )
+
+
+def install_discord_rl_probe(ratelimit_mgr, http):
+    """
+    Feed the bot's REST responses into ``ratelimit_mgr.rest``.
+
+    discord.py builds its aiohttp session inside ``static_login`` (and again
+    in ``recreate``) without a way to pass trace configs, so the manager's
+    TraceConfig is appended to that session each time it is (re)created.
+    aiohttp reads the list per request, so later requests are paced by the
+    bucket headers; the login request itself goes out unobserved. The
+    session is a private attribute, so if it cannot be reached a warning is
+    logged once instead of silently losing the pacing.
+    """
+    if getattr(http, "_cc_rl_probe", False):
+        log.debug("REST rate-limit probe already installed")
+        return
+    tc = ratelimit_mgr.trace_config
+
+    orig_login = http.static_login
+    orig_recreate = http.recreate
+
+    @functools.wraps(orig_login)
+    async def static_login(*args, **kwargs):
+        login = orig_login(*args, **kwargs)
         try:
-            m = self._rx.search(record.getMessage())
-            if not m:
-                return
-
-            bucket = m.group(2)
-            action, key, route = self._map_bucket(bucket)
-            if not action or action == ActionType.WEBHOOK_MESSAGE:
-                return
-
-            try:
-                retry = float(m.group(1))
-            except Exception:
-                retry = 5.0
-
-            delay = max(1.0, min(retry * 1.1 + 0.25, 600.0))
-            self.rlm.penalize(action, delay, key=key)
-            log.warning(
-                "[❗] Discord rate limit detected; applying %.2fs cooldown before next %s action",
-                delay, action.name
-            )
-        except Exception as e:
-            log.exception("[⛔] Error in DiscordHTTPRLHandler.emit: %s", e)
-
-
-def install_discord_rl_probe(ratelimit_mgr):
-    http_log = logging.getLogger("discord.http")
-    if not any(isinstance(h, DiscordHTTPRLHandler) for h in http_log.handlers):
-        http_log.addHandler(DiscordHTTPRLHandler(ratelimit_mgr))
-        log.debug("Installed DiscordHTTPRLHandler on 'discord.http' logger")
+            return await login
+        finally:
+            _attach_or_warn(http, tc)
+
+    @functools.wraps(orig_recreate)
+    def recreate(*args, **kwargs):
+        out = orig_recreate(*args, **kwargs)
+        _attach_or_warn(http, tc)
+        return out
+
+    http.static_login = static_login
+    http.recreate = recreate
+    http._cc_rl_probe = True
+    if _attach(http, tc):
+        log.debug("Attached REST rate-limit probe to the live discord.py session")
     else:
-        log.debug("DiscordHTTPRLHandler already installed on 'discord.http'")
+        log.debug("REST rate-limit probe will attach at login")
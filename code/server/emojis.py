@@ -28,6 +28,7 @@ class EmojiManager:
         clone_guild_id: int | None = None,
         session=None,
         emit_event_log=None,
+        on_mappings_changed=None,
     ):
         self.bot = bot
         self.db = db
@@ -36,6 +37,7 @@ class EmojiManager:
         self.session = session
         self.guild_resolver = guild_resolver
         self._emit_event_log = emit_event_log
+        self._on_mappings_changed = on_mappings_changed
 
         self._tasks: dict[int, asyncio.Task] = {}
 
@@ -85,6 +87,38 @@ class EmojiManager:
     def set_session(self, session: aiohttp.ClientSession | None):
         self.session = session
 
+    def _mappings_changed(self, cloned_guild_id) -> None:
+        """Tell the owner its in-memory emoji lookups are stale."""
+        if self._on_mappings_changed:
+            try:
+                self._on_mappings_changed(cloned_guild_id)
+            except Exception:
+                logger.debug("on_mappings_changed callback failed", exc_info=True)
+
+    def _upsert_mapping(
+        self,
+        orig_id: int,
+        orig_name: str,
+        clone_id: int | None,
+        clone_name: str | None,
+        *,
+        original_guild_id: int | None = None,
+        cloned_guild_id: int | None = None,
+    ) -> None:
+        self.db.upsert_emoji_mapping(
+            orig_id,
+            orig_name,
+            clone_id,
+            clone_name,
+            original_guild_id=original_guild_id,
+            cloned_guild_id=cloned_guild_id,
+        )
+        self._mappings_changed(cloned_guild_id)
+
+    def _delete_mapping(self, orig_id: int, cloned_guild_id: int) -> None:
+        self.db.delete_emoji_mapping_for_clone(orig_id, cloned_guild_id)
+        self._mappings_changed(cloned_guild_id)
+
     def _get_lock_for_clone(self, clone_gid: int) -> asyncio.Lock:
         """
         Return (and cache) the lock for this clone guild.
@@ -280,7 +314,7 @@ class EmojiManager:
                         "[⛔] Error deleting emoji: %s",
                         e,
                     )
-            self.db.delete_emoji_mapping_for_clone(orig_id, cloned_guild_id=guild.id)
+            self._delete_mapping(orig_id, cloned_guild_id=guild.id)
 
         for orig_id, info in incoming.items():
             name = info["name"]
@@ -297,7 +331,7 @@ class EmojiManager:
                     "[⚠️] Emoji %s missing in clone; will recreate",
                     mapping["original_emoji_name"],
                 )
-                self.db.delete_emoji_mapping_for_clone(orig_id, cloned_guild_id=guild.id)
+                self._delete_mapping(orig_id, cloned_guild_id=guild.id)
                 mapping = cloned = None
 
             if mapping and cloned and cloned.name != name:
@@ -318,7 +352,7 @@ class EmojiManager:
                         guild_name=getattr(guild, "name", None),
                         extra={"original_emoji_id": int(orig_id), "clone_emoji_id": int(cloned.id)},
                     )
-                    self.db.upsert_emoji_mapping(
+                    self._upsert_mapping(
                         orig_id,
                         name,
                         cloned.id,
@@ -353,7 +387,7 @@ class EmojiManager:
                         guild_name=getattr(guild, "name", None),
                         extra={"original_emoji_id": int(orig_id), "clone_emoji_id": int(cloned.id)},
                     )
-                    self.db.upsert_emoji_mapping(
+                    self._upsert_mapping(
                         orig_id,
                         name,
                         cloned.id,
@@ -382,7 +416,9 @@ class EmojiManager:
 
             try:
                 if self.session is None or self.session.closed:
-                    self.session = aiohttp.ClientSession()
+                    self.session = aiohttp.ClientSession(
+                        trace_configs=[self.ratelimit.trace_config]
+                    )
                 async with self.session.get(url) as resp:
                     raw = await resp.read()
             except Exception as e:
@@ -423,7 +459,7 @@ class EmojiManager:
                     guild_name=getattr(guild, "name", None),
                     extra={"original_emoji_id": int(orig_id), "clone_emoji_id": int(created_emo.id)},
                 )
-                self.db.upsert_emoji_mapping(
+                self._upsert_mapping(
                     orig_id,
                     name,
                     created_emo.id,
@@ -0,0 +1,203 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+logger = logging.getLogger("server")
+
+SendFactory = Callable[[], Awaitable[Any]]
+
+
+class _Slot:
+    """The concurrency slot a lane worker holds while its send runs."""
+
+    __slots__ = ("lanes", "task", "held")
+
+    def __init__(self, lanes: "ForwardLanes", task: Optional[asyncio.Task]):
+        self.lanes = lanes
+        self.task = task
+        self.held = False
+
+
+_current_slot: ContextVar[Optional[_Slot]] = ContextVar(
+    "forward_lane_slot", default=None
+)
+
+
+class ForwardLanes:
+    """
+    Ordered, bounded scheduling for live sends.
+
+    Each key (a source channel or thread) gets a FIFO lane drained by one
+    worker, so its messages go out in arrival order; different lanes run in
+    parallel, at most `concurrency` sends at a time overall. A lane and its
+    worker exist only while it has work.
+
+    `submit` enqueues without suspending while fewer than `max_queued` sends
+    are waiting, which is what keeps arrival order when the caller has not
+    awaited anything before it. Past that it waits, first come first served,
+    for room, pushing back on whoever is producing the sends.
+
+    A send that has to wait for one queued in another lane (a thread reply
+    waiting for its starter message) does so inside `released()`, so the
+    lane it waits on can get a slot even when every slot is taken.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 8,
+        max_queued: int = 5000,
+        spawn: Optional[Callable[..., asyncio.Task]] = None,
+    ) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.max_queued = max(1, int(max_queued))
+        self._spawn = spawn or (
+            lambda coro, name=None: asyncio.create_task(coro, name=name)
+        )
+        self._sem = asyncio.Semaphore(self.concurrency)
+        # A lane exists exactly as long as its worker does.
+        self._lanes: Dict[Hashable, Deque[SendFactory]] = {}
+        self._sending: Dict[Hashable, int] = {}
+        self._admission: Deque[asyncio.Future] = deque()
+        self._admitted = 0  # woken from admission, not yet enqueued
+        self.queued = 0
+        self.running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def submit(self, key: Hashable, factory: SendFactory) -> None:
+        """Queue `factory()` behind everything already queued for `key`."""
+        if self._admission or self._admitted or self.queued >= self.max_queued:
+            fut = asyncio.get_running_loop().create_future()
+            self._admission.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut in self._admission:
+                    self._admission.remove(fut)
+                elif fut.done() and not fut.cancelled():
+                    self._admitted -= 1
+                    self._admit()
+                raise
+            self._admitted -= 1
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            self._spawn(self._drain(key, lane), name=f"lane-{key}")
+        lane.append(factory)
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        self._admit()
+
+    def _admit(self) -> None:
+        while (
+            self._admission
+            and not self._admitted
+            and self.queued < self.max_queued
+        ):
+            fut = self._admission.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                self._admitted += 1
+                return
+
+    async def _drain(self, key: Hashable, lane: Deque[SendFactory]) -> None:
+        # Runs as its own task, so the slot is visible to this worker's sends only.
+        slot = _Slot(self, asyncio.current_task())
+        _current_slot.set(slot)
+        try:
+            while lane:
+                await self._sem.acquire()
+                slot.held = True
+                try:
+                    factory = lane.popleft()
+                    self.queued -= 1
+                    self._admit()
+                    self.running += 1
+                    self._sending[key] = 1
+                    try:
+                        await factory()
+                        self.completed += 1
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        self.failed += 1
+                        logger.exception("[lanes] send failed in lane %s", key)
+                    finally:
+                        self.running -= 1
+                        self._sending.pop(key, None)
+                finally:
+                    if slot.held:
+                        slot.held = False
+                        self._sem.release()
+        finally:
+            # Only non-empty when cancelled (shutdown): those sends are dropped.
+            self.queued -= len(lane)
+            lane.clear()
+            self._lanes.pop(key, None)
+            self._admit()
+
+    @contextlib.asynccontextmanager
+    async def released(self):
+        """
+        Give the calling send's slot back for the duration of the block and
+        take it back afterwards. A no-op outside this instance's workers.
+        """
+        slot = _current_slot.get()
+        if (
+            slot is None
+            or slot.lanes is not self
+            or not slot.held
+            or slot.task is not asyncio.current_task()
+        ):
+            yield
+            return
+        slot.held = False
+        self.running -= 1
+        self._sem.release()
+        try:
+            yield
+        finally:
+            try:
+                await self._sem.acquire()
+                slot.held = True
+            finally:
+                self.running += 1
+
+    def depth(self, key: Hashable) -> int:
+        """Sends queued for `key`, counting the one in progress."""
+        return len(self._lanes.get(key) or ()) + self._sending.get(key, 0)
+
+    def stats(self, top: int = 50) -> Dict[str, Any]:
+        """Totals plus the `top` deepest lanes."""
+        depths = sorted(
+            ((k, self.depth(k)) for k in list(self._lanes)),
+            key=lambda kv: kv[1],
+            reverse=True,
+        )[: max(0, int(top))]
+        return {
+            "concurrency": self.concurrency,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "waiting_admission": len(self._admission),
+            "completed": self.completed,
+            "failed": self.failed,
+            "lanes": {str(k): d for k, d in depths},
+        }
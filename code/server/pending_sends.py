@@ -0,0 +1,118 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Optional
+
+from common.keyed_registry import KeyedRegistry
+
+
+class _PendingSend:
+    __slots__ = ("event", "rows", "done")
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.rows: Dict[int, dict] = {}
+        self.done = False
+
+
+class PendingSends:
+    """
+    Sends of original messages, keyed by original message id.
+
+    `begin` is called when a message is dispatched, `record` each time one
+    of its clones is stored, and `finish` when the whole fan-out is over.
+    Edits and deletes that race the send `wait` for exactly that completion
+    and get the mapping rows from memory; ids this registry never saw (sent
+    before a restart, or long since evicted) return None so callers fall
+    back to the database.
+
+    Entries expire `ttl` seconds after they were last touched, finished or
+    not: a send that never reports back (a buffered message whose channel is
+    never created) must not pin memory, and its waiters time out anyway.
+    """
+
+    def __init__(self, *, ttl: float = 600, max_size: int = 50_000):
+        self._entries: KeyedRegistry[_PendingSend] = KeyedRegistry(
+            "pending_sends",
+            max_size=max_size,
+            ttl=ttl,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sweep(self) -> int:
+        return self._entries.sweep()
+
+    def begin(self, mid: int) -> None:
+        """Mark `mid` in flight; a finished entry is reopened (e.g. a resend)."""
+        if not mid:
+            return
+        e = self._entries.get(mid)
+        if e is None:
+            self._entries[mid] = _PendingSend()
+        elif e.done:
+            e.done = False
+            e.event = asyncio.Event()
+
+    def record(self, row: dict) -> None:
+        """
+        Remember a stored mapping row, one per clone guild. Like the upsert
+        itself, a later row's None fields never overwrite earlier values.
+        """
+        mid = int(row.get("original_message_id") or 0)
+        if not mid:
+            return
+        e = self._entries.get(mid)
+        if e is None:
+            e = self._entries[mid] = _PendingSend()
+            e.done = True
+            e.event.set()
+        cur = e.rows.setdefault(int(row.get("cloned_guild_id") or 0), {})
+        for k, v in row.items():
+            if v is not None or k not in cur:
+                cur[k] = v
+
+    def finish(self, mid: int) -> None:
+        e = self._entries.get(mid) if mid else None
+        if e is not None and not e.done:
+            e.done = True
+            e.event.set()
+
+    def forget(self, mid: int) -> None:
+        """Drop `mid` once its clones and their mappings are deleted."""
+        self._entries.discard(mid)
+
+    def is_pending(self, mid: int) -> bool:
+        e = self._entries.get(mid) if mid else None
+        return e is not None and not e.done
+
+    def rows(self, mid: int) -> Optional[List[dict]]:
+        """Rows recorded for `mid` (possibly []), or None if it is unknown."""
+        e = self._entries.get(mid) if mid else None
+        if e is None:
+            return None
+        return [dict(r) for _, r in sorted(e.rows.items())]
+
+    async def wait(self, mid: int, timeout: float) -> Optional[List[dict]]:
+        """
+        Rows for `mid` once its send has finished. None if the id is unknown
+        or the send did not finish within `timeout`.
+        """
+        e = self._entries.get(mid) if mid else None
+        if e is None:
+            return None
+        if not e.done:
+            try:
+                await asyncio.wait_for(e.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.rows(mid)
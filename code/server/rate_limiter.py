@@ -7,9 +7,16 @@
 #  https://www.gnu.org/licenses/agpl-3.0.en.html
 # =============================================================================
 
-import asyncio, time
+import asyncio, hashlib, re, time
+from collections import deque
 from enum import Enum
-from typing import Tuple, Dict, Optional
+from types import SimpleNamespace
+from typing import Any, Callable, Tuple, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from common.keyed_registry import KeyedRegistry
 
 
 class ActionType(Enum):
@@ -81,9 +88,325 @@ class RateLimiter:
     def remaining_cooldown(self) -> float:
         return max(0.0, self._cooldown_until - time.monotonic())
 
+    def busy(self) -> bool:
+        """Holding state worth keeping: mid-acquire or cooling down."""
+        return self._lock.locked() or self.remaining_cooldown() > 0
+
+    async def wait_cooldown(self):
+        delay = self.remaining_cooldown()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Path segment after which a snowflake is a "major parameter" (its own bucket).
+_MAJOR = {"channels": "channel_id", "guilds": "guild_id", "webhooks": "webhook_id"}
+_MINOR = {
+    "messages": "message_id",
+    "roles": "role_id",
+    "emojis": "emoji_id",
+    "stickers": "sticker_id",
+    "members": "user_id",
+    "threads": "thread_id",
+}
+_API_PREFIX = re.compile(r"^/api(?:/v\d+)?")
+
+_ROUTE_ACTIONS: Tuple[Tuple[Optional[str], re.Pattern, ActionType], ...] = (
+    (None, re.compile(r"^/webhooks/\{webhook_id\}/\{webhook_token\}"), ActionType.WEBHOOK_MESSAGE),
+    ("DELETE", re.compile(r"^/webhooks/\{webhook_id\}$"), ActionType.WEBHOOK_DELETE),
+    ("POST", re.compile(r"^/channels/\{channel_id\}/webhooks$"), ActionType.WEBHOOK_CREATE),
+    (None, re.compile(r"^/channels/\{channel_id\}(?:/messages/\{message_id\})?/threads"), ActionType.THREAD),
+    ("POST", re.compile(r"^/channels/\{channel_id\}/messages$"), ActionType.USER_MESSAGE),
+    ("PATCH", re.compile(r"^/channels/\{channel_id\}$"), ActionType.EDIT_CHANNEL),
+    ("DELETE", re.compile(r"^/channels/\{channel_id\}$"), ActionType.DELETE_CHANNEL),
+    ("POST", re.compile(r"^/guilds/\{guild_id\}/channels$"), ActionType.CREATE_CHANNEL),
+    ("PATCH", re.compile(r"^/guilds/\{guild_id\}/channels$"), ActionType.EDIT_CHANNEL),
+    (None, re.compile(r"^/guilds/\{guild_id\}/roles"), ActionType.ROLE),
+    (None, re.compile(r"^/guilds/\{guild_id\}/emojis"), ActionType.EMOJI),
+    (None, re.compile(r"^/guilds/\{guild_id\}/stickers"), ActionType.STICKER_CREATE),
+)
+
+
+def route_of(method: str, path: str) -> Tuple[str, str]:
+    """
+    (route template, major parameter) for a REST path, e.g.
+    POST /api/v10/channels/1/messages -> ("/channels/{channel_id}/messages", "1").
+    Webhook routes keep the token in the major, as Discord buckets them.
+    """
+    parts = [p for p in _API_PREFIX.sub("", path).split("/") if p]
+    out, major = [], ""
+    for i, seg in enumerate(parts):
+        prev = parts[i - 1] if i else ""
+        if prev in _MAJOR and seg.isdigit():
+            out.append("{%s}" % _MAJOR[prev])
+            if not major:
+                major = seg
+        elif prev.isdigit() and i >= 2 and parts[i - 2] == "webhooks":
+            out.append("{webhook_token}")
+            major = f"{major}/{seg}"
+        elif seg.isdigit():
+            out.append("{%s}" % _MINOR.get(prev, "id"))
+        else:
+            out.append(seg)
+    return "/" + "/".join(out), major
+
+
+def action_for_route(method: str, route: str) -> Optional[ActionType]:
+    for m, pat, action in _ROUTE_ACTIONS:
+        if (m is None or m == method) and pat.search(route):
+            return action
+    return None
+
+
+class _Bucket:
+    __slots__ = ("limit", "remaining", "reset_at", "window", "inflight", "open", "changed")
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.open = False  # answered without rate-limit headers: nothing to pace
+        self.remaining = 1
+        self.reset_at = 0.0
+        self.window = 1.0
+        self.inflight = 0
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class RestRateLimiter:
+    """
+    Schedules REST requests from Discord's own rate-limit headers.
+
+    Each request is mapped to its route (method + templated path + major
+    parameter, scoped by the Authorization header). The first response on a
+    route reveals its shared bucket via X-RateLimit-Bucket; from then on the
+    bucket's Limit / Remaining / Reset-After decide when the next request may
+    go, and waiters sleep until exactly the reset instead of a guessed
+    interval. A route whose bucket is not known yet allows one request in
+    flight. Authenticated requests also share a per-token global budget
+    (Discord's documented 50/s); 429s with X-RateLimit-Global pause every
+    route of that token until Retry-After passes.
+
+    Hook it into aiohttp sessions with `trace_config()`: requests to
+    `api_hosts` wait in on_request_start and feed their headers back on
+    completion; everything else (CDN downloads, ...) passes straight through.
+    """
+
+    def __init__(
+        self,
+        *,
+        api_hosts: Tuple[str, ...] = ("discord.com", "discordapp.com"),
+        global_rate: Tuple[int, float] = (50, 1.0),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.api_hosts = tuple(api_hosts)
+        self.global_rate = global_rate
+        self._clock = clock
+        self._global_sent: Dict[str, deque] = {}
+        self._route_bucket: KeyedRegistry[str] = KeyedRegistry(
+            "rest_routes", max_size=50_000, ttl=3600, clock=clock
+        )
+        self._buckets: KeyedRegistry[_Bucket] = KeyedRegistry(
+            "rest_buckets",
+            max_size=50_000,
+            ttl=600,
+            is_busy=lambda b: b.inflight > 0 or b.reset_at > clock(),
+            clock=clock,
+        )
+        self._global_until: Dict[str, float] = {}
+        self._learned: set[ActionType] = set()
+        self.stats = {"requests": 0, "waits": 0, "rate_limited": 0, "global": 0}
+
+    @staticmethod
+    def _scope(headers: Any) -> str:
+        auth = (headers or {}).get("Authorization") if headers is not None else None
+        if not auth:
+            return "-"
+        return hashlib.sha1(str(auth).encode()).hexdigest()[:10]
+
+    def _bucket_for(self, route_key: str, major: str) -> Tuple[str, _Bucket]:
+        h = self._route_bucket.get(route_key)
+        key = f"{h}:{major}" if h else route_key
+        b = self._buckets.get(key)
+        if b is None:
+            b = self._buckets[key] = _Bucket()
+        return key, b
+
+    def sweep(self) -> int:
+        return self._route_bucket.sweep() + self._buckets.sweep()
+
+    def learned(self, action: ActionType) -> bool:
+        """True once a response for `action` carried bucket headers."""
+        return action in self._learned
+
+    async def acquire(self, method: str, url: str, headers: Any = None) -> SimpleNamespace:
+        """Wait until `method url` may be sent; returns the ticket for `observe`."""
+        route, major = route_of(method.upper(), urlsplit(str(url)).path)
+        scope = self._scope(headers)
+        route_key = f"{scope}|{method.upper()} {route}|{major}"
+        self.stats["requests"] += 1
+        waited = False
+        while True:
+            now = self._clock()
+            gl = self._global_until.get(scope, 0.0)
+            if scope != "-":
+                limit, window = self.global_rate
+                sent = self._global_sent.setdefault(scope, deque())
+                while sent and now - sent[0][0] >= window:
+                    sent.popleft()
+                if len(sent) >= limit:
+                    gl = max(gl, sent[0][0] + window)
+            if gl > now:
+                waited = True
+                await asyncio.sleep(gl - now)
+                continue
+
+            _, b = self._bucket_for(route_key, major)
+            if b.limit is not None and now >= b.reset_at:
+                b.remaining = b.limit
+                b.reset_at = now + b.window
+            if b.open:
+                ok = True
+            elif b.limit is None:
+                ok = b.inflight == 0
+            else:
+                ok = b.remaining > 0
+            if ok:
+                stamp = [now]
+                if scope != "-":
+                    self._global_sent[scope].append(stamp)
+                b.remaining -= 1
+                b.inflight += 1
+                if waited:
+                    self.stats["waits"] += 1
+                return SimpleNamespace(
+                    route_key=route_key,
+                    major=major,
+                    scope=scope,
+                    bucket=b,
+                    stamp=stamp,
+                    action=action_for_route(method.upper(), route),
+                )
+
+            waited = True
+            ev = b.changed
+            timeout = None if b.limit is None else max(0.0, b.reset_at - now)
+            try:
+                await asyncio.wait_for(ev.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def observe(self, ticket: SimpleNamespace, status: int, headers: Any) -> None:
+        """Fold a response's rate-limit headers into the bucket state."""
+        prov = ticket.bucket
+        prov.inflight = max(0, prov.inflight - 1)
+        now = self._clock()
+        # count the global budget from when Discord answered, not when we asked
+        ticket.stamp[0] = now
+
+        def _f(name: str) -> Optional[float]:
+            try:
+                v = headers.get(name)
+                return float(v) if v is not None else None
+            except (TypeError, ValueError):
+                return None
+
+        bucket_hash = headers.get("X-RateLimit-Bucket")
+        b = prov
+        if bucket_hash:
+            self._route_bucket[ticket.route_key] = bucket_hash
+            _, b = self._bucket_for(ticket.route_key, ticket.major)
+            if b is not prov:
+                prov.notify()
+                if prov.inflight == 0:
+                    self._buckets.pop(ticket.route_key, None)
+            if ticket.action is not None:
+                self._learned.add(ticket.action)
+
+        limit = _f("X-RateLimit-Limit")
+        remaining = _f("X-RateLimit-Remaining")
+        reset_after = _f("X-RateLimit-Reset-After")
+        if limit is None and not bucket_hash and status != 429:
+            b.open = True
+        if limit is not None:
+            b.limit = int(limit)
+            b.open = False
+        # A response from the window we already rolled past says nothing
+        # about the current one.
+        stale = (
+            reset_after is not None
+            and b.reset_at
+            and now + reset_after < b.reset_at - b.window / 2
+        )
+        if reset_after is not None and not stale:
+            b.reset_at = now + reset_after
+            if b.limit and remaining is not None and remaining >= b.limit - 1:
+                b.window = reset_after  # measured right after the window opened
+        if remaining is not None and not stale:
+            b.remaining = max(0, int(remaining) - b.inflight)
+
+        if status == 429:
+            self.stats["rate_limited"] += 1
+            retry = _f("Retry-After") or reset_after or 1.0
+            if str(headers.get("X-RateLimit-Global", "")).lower() == "true":
+                self.stats["global"] += 1
+                self._global_until[ticket.scope] = now + retry
+            else:
+                b.remaining = 0
+                b.reset_at = max(b.reset_at, now + retry)
+        b.notify()
+
+    def release(self, ticket: SimpleNamespace) -> None:
+        """The request failed without a response; give its slot back."""
+        b = ticket.bucket
+        b.inflight = max(0, b.inflight - 1)
+        b.remaining += 1
+        b.notify()
+
+    def trace_config(self, *, bypass: Callable[[], bool] = lambda: False) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+
+        async def _start(session, ctx, params):
+            ctx.rl_ticket = None
+            host = params.url.host or ""
+            if bypass() or not any(
+                host == h or host.endswith("." + h) for h in self.api_hosts
+            ):
+                return
+            ctx.rl_ticket = await self.acquire(params.method, params.url, params.headers)
+
+        async def _end(session, ctx, params):
+            if ctx.rl_ticket is not None:
+                self.observe(ctx.rl_ticket, params.response.status, params.response.headers)
+
+        async def _exc(session, ctx, params):
+            if ctx.rl_ticket is not None:
+                self.release(ctx.rl_ticket)
+
+        tc.on_request_start.append(_start)
+        tc.on_request_end.append(_end)
+        tc.on_request_exception.append(_exc)
+        tc.freeze()
+        return tc
+
 
 class RateLimitManager:
-    def __init__(self, config: Dict[ActionType, Tuple[int, float]] = None):
+    """
+    Per-action pacing for the server's Discord calls.
+
+    The (rate, window) table is a starting guess. Sessions built with
+    `trace_config` report real bucket headers to `rest`; once an action's
+    route has been seen there, `acquire` stops pacing it by the guess (the
+    request itself waits for its bucket) and only honours explicit
+    cooldowns from `penalize`.
+    """
+
+    def __init__(
+        self,
+        config: Dict[ActionType, Tuple[int, float]] = None,
+        rest: Optional[RestRateLimiter] = None,
+    ):
         cfg = config or {
             ActionType.WEBHOOK_MESSAGE: (5, 2.5),
             ActionType.USER_MESSAGE: (5, 5.0),
@@ -99,9 +422,18 @@ class RateLimitManager:
         }
         self._cfg = cfg
         self._proxy_bypass: bool = False
+        self.rest = rest or RestRateLimiter()
+        self._trace_config: Optional[aiohttp.TraceConfig] = None
 
         self._webhook_config = cfg[ActionType.WEBHOOK_MESSAGE]
-        self._webhook_limiters: Dict[str, RateLimiter] = {}
+        # One limiter per webhook channel; idle ones are dropped, which
+        # costs nothing since an idle limiter has refilled anyway.
+        self._webhook_limiters: KeyedRegistry[RateLimiter] = KeyedRegistry(
+            "webhook_limiters",
+            max_size=20_000,
+            ttl=max(600.0, self._webhook_config[1] * 4),
+            is_busy=RateLimiter.busy,
+        )
 
         self._scoped_limiters: Dict[ActionType, Dict[str, RateLimiter]] = {
             a: {} for a in cfg if a is not ActionType.WEBHOOK_MESSAGE
@@ -149,11 +481,28 @@ class RateLimitManager:
     def proxy_bypass(self) -> bool:
         return self._proxy_bypass
 
+    def sweep(self) -> int:
+        """Drop idle per-key limiter state; returns how many entries went."""
+        return self._webhook_limiters.sweep() + self.rest.sweep()
+
+    @property
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Shared aiohttp TraceConfig feeding `rest`; pass it to every session."""
+        if self._trace_config is None:
+            self._trace_config = self.rest.trace_config(
+                bypass=lambda: self._proxy_bypass
+            )
+        return self._trace_config
+
     async def acquire(self, action: ActionType, key: str | None = None):
         if self._proxy_bypass:
             return
         lim = self._get(action, key)
-        if lim:
+        if not lim:
+            return
+        if self.rest.learned(action):
+            await lim.wait_cooldown()
+        else:
             await lim.acquire()
 
     async def acquire_for_guild(self, action: ActionType, clone_guild_id: int):
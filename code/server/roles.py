@@ -27,6 +27,7 @@ class RoleManager:
         delete_roles: bool | None = None,
         mirror_permissions: bool | None = None,
         emit_event_log=None,
+        on_mappings_changed=None,
     ):
         self.bot = bot
         self.db = db
@@ -38,6 +39,7 @@ class RoleManager:
             bool(mirror_permissions) if mirror_permissions is not None else False
         )
         self._emit_event_log = emit_event_log
+        self._on_mappings_changed = on_mappings_changed
 
         self._tasks: dict[int, asyncio.Task] = {}
         self._locks: dict[int, asyncio.Lock] = {}
@@ -81,6 +83,38 @@ class RoleManager:
         else:
             logger.debug(prefix + msg, *args)
 
+    def _mappings_changed(self, cloned_guild_id) -> None:
+        """Tell the owner its in-memory role lookups are stale."""
+        if self._on_mappings_changed:
+            try:
+                self._on_mappings_changed(cloned_guild_id)
+            except Exception:
+                logger.debug("on_mappings_changed callback failed", exc_info=True)
+
+    def _upsert_mapping(
+        self,
+        orig_id: int,
+        orig_name: str,
+        clone_id: int | None,
+        clone_name: str | None,
+        *,
+        original_guild_id: int | None = None,
+        cloned_guild_id: int | None = None,
+    ) -> None:
+        self.db.upsert_role_mapping(
+            orig_id,
+            orig_name,
+            clone_id,
+            clone_name,
+            original_guild_id=original_guild_id,
+            cloned_guild_id=cloned_guild_id,
+        )
+        self._mappings_changed(cloned_guild_id)
+
+    def _delete_mapping(self, orig_id: int, cloned_guild_id: int) -> None:
+        self.db.delete_role_mapping_for_clone(orig_id, cloned_guild_id)
+        self._mappings_changed(cloned_guild_id)
+
     def _get_lock_for_clone(self, clone_gid: int) -> asyncio.Lock:
         """
         Get/create a lock dedicated to this clone guild.
@@ -350,7 +384,7 @@ class RoleManager:
             cloned = await guild.create_role(**kwargs)
             await asyncio.sleep(self._ROLE_OP_DELAY)
 
-            self.db.upsert_role_mapping(
+            self._upsert_mapping(
                 orig_id,
                 want_name,
                 cloned.id,
@@ -379,7 +413,7 @@ class RoleManager:
                 try:
                     cloned = await guild.create_role(**kwargs)
                     await asyncio.sleep(self._ROLE_OP_DELAY)
-                    self.db.upsert_role_mapping(
+                    self._upsert_mapping(
                         orig_id, want_name, cloned.id, cloned.name,
                         original_guild_id=original_guild_id,
                         cloned_guild_id=cloned_guild_id,
@@ -483,7 +517,7 @@ class RoleManager:
 
                 if not delete_roles:
 
-                    self.db.delete_role_mapping_for_clone(orig_id, clone_id)
+                    self._delete_mapping(orig_id, clone_id)
                     if cloned_role:
                         self._log(
                             "info",
@@ -505,7 +539,7 @@ class RoleManager:
                     or cloned_role.position >= bot_top
                 ):
 
-                    self.db.delete_role_mapping_for_clone(orig_id, clone_id)
+                    self._delete_mapping(orig_id, clone_id)
                     if cloned_role:
                         self._log(
                             "info",
@@ -544,7 +578,7 @@ class RoleManager:
                         e,
                     )
                 finally:
-                    self.db.delete_role_mapping_for_clone(orig_id, clone_id)
+                    self._delete_mapping(orig_id, clone_id)
 
         rows = self.db.get_all_role_mappings()
         current: dict[int, dict] = {}
@@ -597,7 +631,7 @@ class RoleManager:
                             e,
                         )
                 if mapping:
-                    self.db.delete_role_mapping_for_clone(orig_id, clone_id)
+                    self._delete_mapping(orig_id, clone_id)
                 continue
 
             want_name = info["name"]
@@ -676,7 +710,7 @@ class RoleManager:
                     await asyncio.sleep(self._ROLE_OP_DELAY)
                     created += 1
 
-                    self.db.upsert_role_mapping(
+                    self._upsert_mapping(
                         orig_id,
                         want_name,
                         new_role.id,
@@ -710,7 +744,7 @@ class RoleManager:
                             new_role = await guild.create_role(**kwargs)
                             await asyncio.sleep(self._ROLE_OP_DELAY)
                             created += 1
-                            self.db.upsert_role_mapping(
+                            self._upsert_mapping(
                                 orig_id, want_name, new_role.id, new_role.name,
                                 original_guild_id=host_id, cloned_guild_id=clone_id,
                             )
@@ -875,7 +909,7 @@ class RoleManager:
                         await asyncio.sleep(self._ROLE_OP_DELAY)
                         updated += 1
 
-                        self.db.upsert_role_mapping(
+                        self._upsert_mapping(
                             orig_id,
                             want_name,
                             cloned_role.id,
@@ -13,7 +13,7 @@ import signal
 import asyncio
 import logging
 import random
-from typing import List, Optional, Set, Tuple, Dict, Union, Coroutine, Any
+from typing import List, Optional, Set, Tuple, Dict, Union, Coroutine, Any, Iterable
 import unicodedata
 import aiohttp
 import discord
@@ -49,7 +49,25 @@ from common.selfbot_headers import (
 from common.proxy_pool import get_pool as get_proxy_pool
 from common.websockets import WebsocketManager, AdminBus
 from common.db import DBManager
+from common.keywords import KeywordMatcher
+from common.keyed_registry import KeyedRegistry, registry_stats
 from server.rate_limiter import RateLimitManager, ActionType
+from server.discord_hooks import install_discord_rl_probe
+from server.pending_sends import PendingSends
+from server.forward_lanes import ForwardLanes
+from server.backfill_buffer import BackfillEventBuffer
+from common.sitemap_delta import SitemapDeltaDecoder, combined_hash, section_hashes
+from server.thread_index import ActiveThreadIndex
+from server.sync_scheduler import SyncJob, SyncScheduler
+from server.structure_plan import (
+    PLANNED_PHASES,
+    UNPLANNED_PHASES,
+    CloneSnapshot,
+    StructurePlan,
+    apply_layout,
+    incoming_channels,
+    plan_structure,
+)
 from server.token_sender import (
     UserTokenSender,
     SEND_OK,
@@ -77,6 +95,7 @@ from server.helpers import (
 )
 from server.permission_sync import ChannelPermissionSync
 from server.guild_resolver import GuildResolver
+from server.content_rewrite import RewriteProgram
 from server import logctx
 from fnmatch import fnmatch as _fnmatch
 
@@ -169,6 +188,8 @@ logger.setLevel(LEVEL)
 
 
 class ServerReceiver:
+    _M_ROLE = re.compile(r"<@&(?P<id>\d+)>")
+
     def __init__(self):
         self.config = Config(logger=logger)
         self.bot = discord.Bot(intents=discord.Intents.all())
@@ -178,46 +199,84 @@ class ServerReceiver:
             listen_host=self.config.SERVER_WS_HOST,
             listen_port=self.config.SERVER_WS_PORT,
             logger=logger,
+            persistent=self.config.WS_PERSISTENT,
+            queue_size=self.config.WS_SEND_QUEUE_SIZE,
         )
         self.bot.ws_manager = self.ws
         self.db = DBManager(self.config.DB_PATH)
+        self.db.enable_message_write_behind(
+            max_rows=self.config.MSG_MAPPING_BATCH_ROWS,
+            max_delay=self.config.MSG_MAPPING_FLUSH_MS / 1000.0,
+        )
         self._clone_guild_ids = set(self.db.get_all_clone_guild_ids())
         self.guild_resolver = GuildResolver(self.db, self.config)
         self.session: aiohttp.ClientSession = None
         self._processor_started = False
         self._sitemap_task_counter = 0
         self._sync_lock = asyncio.Lock()
-        self._thread_locks: dict[int, asyncio.Lock] = {}
+        self._thread_locks: KeyedRegistry[asyncio.Lock] = KeyedRegistry(
+            "thread_locks", asyncio.Lock, max_size=20_000, ttl=3600
+        )
         self.max_threads = 950
+        self.active_threads = ActiveThreadIndex()
         self.bot.event(self.on_ready)
         self.bot.event(self.on_webhooks_update)
         self.bot.event(self.on_guild_channel_delete)
         self.bot.event(self.on_member_join)
-        self._blocked_keywords_cache: dict[
-            tuple[int, int], list[tuple[re.Pattern, str]]
-        ] = {}
+        for ev in (
+            "on_guild_role_delete",
+            "on_guild_role_update",
+            "on_guild_emojis_update",
+            "on_guild_stickers_update",
+        ):
+            self.bot.add_listener(self._forget_applied_sync_phases, ev)
+        self.bot.add_listener(self._on_clone_thread_update, "on_thread_update")
+        self.bot.add_listener(self._on_clone_thread_delete, "on_raw_thread_delete")
+        self._blocked_keywords_cache: dict[tuple[int, int], list[str]] = {}
+        self._blocked_matchers: dict[tuple[int, int], KeywordMatcher] = {}
         self._blocked_keywords_lock = asyncio.Lock()
         self._channel_name_blacklist_cache: dict[tuple[int, int], list[str]] = {}
         self._channel_name_blacklist_lock = asyncio.Lock()
         self._user_filters_cache: dict[tuple[int, int], dict[str, set[int]]] = {}
-        self._word_rewrites_cache: dict[
-            tuple[int, int], list[tuple[re.Pattern, str]]
-        ] = {}
+        self._word_rewrites_cache: dict[tuple[int, int], list[tuple[str, str]]] = {}
         self._word_rewrites_lock = asyncio.Lock()
+        self._rewrite_programs: dict[tuple[int, int], RewriteProgram] = {}
         self._user_filters_lock = asyncio.Lock()
         self._default_avatar_bytes: Optional[bytes] = None
         self._ws_task: asyncio.Task | None = None
         self._sitemap_queues: dict[int, asyncio.Queue] = {}
         self._sitemap_workers: dict[int, asyncio.Task] = {}
         self._guild_sync_locks: dict[int, asyncio.Lock] = {}
-        self._running_sync_tasks: dict[int, asyncio.Task] = {}
+        self._sync_scheduler = SyncScheduler(
+            concurrency=self.config.SYNC_CONCURRENCY,
+            hot_origins=self._origins_with_pending_live,
+            on_change=self._publish_sync_queue,
+        )
+        self._sync_queue_publish: asyncio.Task | None = None
+        self._sync_queue_dirty = False
+        self._sitemap_decoder = SitemapDeltaDecoder()
+        # (host, clone) -> {phase: (fingerprint of the inputs it last
+        # applied, fingerprint of the clone state it left, when it was
+        # recorded)}. Each phase is trusted for _SYNC_PHASE_MAX_AGE only, so
+        # the periodic full sync still repairs drift the fingerprints don't
+        # see even on a mapping that syncs often; persisted so the first sync
+        # after a restart can start from it.
+        self._applied_sync_phases: KeyedRegistry[dict] = KeyedRegistry(
+            "applied_sync_phases", max_size=2_000, ttl=1800
+        )
+        self._restored_sync_phases: set[tuple[int, int]] = set()
+        # Clone guilds whose persisted phase state a role/emoji/sticker event
+        # invalidated; cleared from the DB once, at that clone's next sync.
+        self._stale_sync_phase_clones: set[int] = set()
         self._pending_msgs: dict[int, list[dict]] = {}
         self._pending_thread_msgs: List[Dict] = []
         self._flush_bg_task: asyncio.Task | None = None
         self._flush_full_flag: bool = False
         self._flush_targets: set[int] = set()
         self._flush_thread_targets: set[int] = set()
-        self._webhook_locks: Dict[int, asyncio.Lock] = {}
+        self._webhook_locks: KeyedRegistry[asyncio.Lock] = KeyedRegistry(
+            "webhook_locks", asyncio.Lock, max_size=20_000, ttl=3600
+        )
         self._new_webhook_gate = asyncio.Lock()
         self._pending_webhook_channels: dict[int, list[dict]] = {}
         self.sticker_map: dict[int, dict] = {}
@@ -225,36 +284,66 @@ class ServerReceiver:
         self.chan_map: dict[int, dict] = {}
         self.chan_map_by_clone: dict[int, dict[int, dict]] = {}
         self.cat_map_by_clone: dict[int, dict[int, dict]] = {}
+        self.emoji_map: dict[int, int] | None = None
+        self.emoji_map_by_clone: dict[int, dict[int, int]] = {}
+        self.role_map: dict[int, int] | None = None
+        self.role_map_by_clone: dict[int, dict[int, int]] = {}
         self._unmapped_warned: set[int] = set()
         self._unmapped_threads_warned: set[int] = set()
         self._webhooks: dict[str, Webhook] = {}
         self._warn_lock = asyncio.Lock()
-        self._webhook_gate_by_clone: dict[int, asyncio.Lock] = {}
-        self._bf_send_gate_by_source: dict[int, asyncio.Lock] = {}
+        self._webhook_gate_by_clone: KeyedRegistry[asyncio.Lock] = KeyedRegistry(
+            "webhook_gate_by_clone", asyncio.Lock, max_size=1_000, ttl=3600
+        )
+        self._bf_send_gate_by_source: KeyedRegistry[asyncio.Lock] = KeyedRegistry(
+            "bf_send_gate_by_source", asyncio.Lock, max_size=20_000, ttl=3600
+        )
         self._active_backfills: set[int] = set()
-        self._bf_event_buffer: dict[int, list[tuple[str, dict]]] = {}
+        self._bf_event_buffer = BackfillEventBuffer(self.db)
         self._send_tasks: set[asyncio.Task] = set()
+        self._forward_lanes = ForwardLanes(
+            concurrency=self.config.FORWARD_CONCURRENCY,
+            max_queued=self.config.FORWARD_QUEUE_MAX,
+            spawn=self._track,
+        )
         self._wh_identity_state: dict[int, bool] = {}
-        self._wh_meta: dict[int, dict] = {}
         self._wh_meta_ttl = 300
+        self._wh_meta: KeyedRegistry[dict] = KeyedRegistry(
+            "wh_meta", max_size=20_000, ttl=self._wh_meta_ttl * 4
+        )
         self._default_avatar_sha1: str | None = None
         self._shutting_down = False
-        self._inflight_events: dict[int, asyncio.Event] = {}
-        self._latest_edit_payload: dict[int, dict] = {}
-        self._pending_deletes: set[int] = set()
+        # Sends in flight and the mapping rows they stored; deletes that
+        # race a send wait on it here instead of polling the DB.
+        self._pending_sends = PendingSends(ttl=600, max_size=50_000)
+        # Newest edit per message whose send is still queued, applied on finish.
+        self._latest_edit_payload: KeyedRegistry[dict] = KeyedRegistry(
+            "latest_edit_payload", max_size=50_000, ttl=600
+        )
+        # Deletes that arrived before their send finished, replayed on finish.
+        self._pending_deletes: KeyedRegistry[dict] = KeyedRegistry(
+            "pending_deletes", max_size=50_000, ttl=600
+        )
         self._bf_throttle: dict[int, dict] = {}
         self._task_for_channel: dict[int, str] = {}
-        self._done_task_ids: set[str] = set()
+        self._done_task_ids: KeyedRegistry[bool] = KeyedRegistry(
+            "done_task_ids", max_size=5_000, ttl=86400
+        )
         self._host_name_cache: dict[int, str] = {}
-        self._task_display_id: dict[int, str] = {}
+        self._task_display_id: KeyedRegistry[str] = KeyedRegistry(
+            "task_display_id", max_size=5_000, ttl=86400
+        )
         self._bf_delay = 2.0
         orig_on_connect = self.bot.on_connect
-        self._M_ROLE = re.compile(r"<@&(?P<id>\d+)>")
         self.onclonejoin = OnCloneJoin(self.bot, self.db)
         self.bus = AdminBus(
-            role="server", logger=logger, admin_ws_url=self.config.ADMIN_WS_URL
+            role="server",
+            logger=logger,
+            admin_ws_url=self.config.ADMIN_WS_URL,
+            persistent=self.config.WS_PERSISTENT,
         )
         self.ratelimit = RateLimitManager()
+        install_discord_rl_probe(self.ratelimit, self.bot.http)
         self.user_token_sender = UserTokenSender(
             db=self.db,
             ratelimit=self.ratelimit,
@@ -283,6 +372,7 @@ class ServerReceiver:
             session=self.session,
             guild_resolver=self.guild_resolver,
             emit_event_log=self._emit_event_log,
+            on_mappings_changed=self._invalidate_emoji_index,
         )
         self.stickers = StickerManager(
             bot=self.bot,
@@ -298,6 +388,7 @@ class ServerReceiver:
             ratelimit=self.ratelimit,
             guild_resolver=self.guild_resolver,
             emit_event_log=self._emit_event_log,
+            on_mappings_changed=self._invalidate_role_index,
         )
         self.perms = ChannelPermissionSync(
             config=self.config,
@@ -383,69 +474,52 @@ class ServerReceiver:
         except Exception:
             logger.debug("_emit_event_log failed", exc_info=True)
 
-    async def _get_mappings_with_retry(
-        self,
-        original_message_id: int,
-        *,
-        attempts: int = 5,
-        base_delay: float = 0.08,
-        max_delay: float = 0.8,
-        jitter: float = 0.25,
-        log_prefix: str = "map-wait",
+    def _store_message_mapping(self, **fields) -> None:
+        """Upsert a message mapping and hand the row to anyone awaiting it."""
+        self.db.upsert_message_mapping(**fields)
+        self._pending_sends.record(fields)
+
+    async def _await_message_mappings(
+        self, original_message_id: int, *, timeout: float
     ) -> list[dict]:
         """
-        Poll the DB for *all* message->clone mappings for a given original message id.
-        Returns a list of plain dict rows (possibly empty).
+        Like `_message_mappings`, but if the message is still being sent,
+        wait (up to `timeout`) for that send to finish first. A lane worker
+        gives up its forwarding slot while it waits, since the send it waits
+        for may be queued in another lane.
+        """
+        mid = int(original_message_id)
+        if self._pending_sends.is_pending(mid):
+            async with self._forward_lanes.released():
+                rows = await self._pending_sends.wait(mid, timeout)
+        else:
+            rows = self._pending_sends.rows(mid)
+        return rows or self._message_mappings(original_message_id)
+
+    def _message_mappings(self, original_message_id: int) -> list[dict]:
+        """
+        All message->clone mappings for an original message id, as plain
+        dicts. Rows stored by this process come from memory; older ones
+        (sent before a restart) take a single DB read.
         """
         try:
             mid = int(original_message_id)
         except Exception:
             return []
-
-        delay = float(base_delay)
-        for i in range(max(1, int(attempts))):
-            try:
-                rows = self.db.get_message_mappings_for_original(mid) or []
-            except Exception:
-                rows = []
-
-            if rows:
-
-                return [r if isinstance(r, dict) else dict(r) for r in rows]
-
-            if i < attempts - 1:
-
-                try:
-                    import random as _rnd
-
-                    j = (2.0 * _rnd.random() - 1.0) * float(jitter)
-                except Exception:
-                    j = 0.0
-                await asyncio.sleep(max(0.0, delay + j))
-                delay = min(delay * 1.6, max_delay)
-
-        logger.debug(
-            "[%s] No mappings found for orig_mid=%s after %s attempts",
-            log_prefix,
-            mid,
-            attempts,
-        )
-        return []
+        rows = self._pending_sends.rows(mid)
+        if rows:
+            return rows
+        try:
+            rows = self.db.get_message_mappings_for_original(mid) or []
+        except Exception:
+            rows = []
+        return [r if isinstance(r, dict) else dict(r) for r in rows]
 
     def _get_webhook_gate(self, gid: int) -> asyncio.Lock:
-        lock = self._webhook_gate_by_clone.get(int(gid))
-        if lock is None:
-            lock = asyncio.Lock()
-            self._webhook_gate_by_clone[int(gid)] = lock
-        return lock
+        return self._webhook_gate_by_clone.get_or_create(int(gid))
 
     def _get_backfill_gate_for_source(self, source_channel_id: int) -> asyncio.Lock:
-        cid = int(source_channel_id)
-        lock = self._bf_send_gate_by_source.get(cid)
-        if lock is None:
-            lock = asyncio.Lock()
-            self._bf_send_gate_by_source[cid] = lock
-        return lock
+        return self._bf_send_gate_by_source.get_or_create(int(source_channel_id))
 
     @contextlib.contextmanager
     def _clone_log_label(self, clone_gid: int):
@@ -643,7 +717,8 @@ class ServerReceiver:
         - Coalesces per-clone for a short "idle gap" so near-simultaneous sitemaps batch together.
         - Never waits longer than MAX_COALESCE_TOTAL to avoid head-of-line blocking.
         - Keeps only the newest sitemap PER clone (older same-clone items are dropped).
-        - Launches one sync per clone IMMEDIATELY (fire-and-forget) and logs full tracebacks.
+        - Hands one sync per clone to the sync scheduler, which runs clones in
+          parallel under SYNC_CONCURRENCY, and logs full tracebacks.
         """
         IDLE_GAP = 0.25
         MAX_COALESCE_TOTAL = 2.0
@@ -728,20 +803,27 @@ class ServerReceiver:
                         logctx.sync_display_id.reset(disp_token)
 
                 for tid, did, sm in items:
-                    cgid = int((sm.get("target") or {}).get("cloned_guild_id") or 0)
-
-                    prev = self._running_sync_tasks.get(cgid)
-                    if prev and not prev.done():
-                        prev.cancel()
-                        logger.info(
-                            "[♻️] Canceling running sync for clone %s — newer sitemap arrived",
-                            cgid,
+                    # Key by the clone sync_structure will actually touch; an
+                    # origin with no resolvable clone gets a slot of its own.
+                    cgid = (
+                        self._clone_gid_for_ctx(
+                            host_guild_id=host_gid, mapping_row=sm.get("target")
+                        )
+                        or 0
+                    )
+                    self._sync_scheduler.submit(
+                        SyncJob(
+                            key=cgid or (host_gid, 0),
+                            origin=host_gid,
+                            label=did,
+                            factory=lambda _tid=tid, _sm=sm: self.sync_structure(
+                                _tid, _sm
+                            ),
+                            on_done=lambda fut, _did=did, _cgid=cgid: _on_done(
+                                fut, _did, _cgid
+                            ),
+                            meta={"mapping_id": self._mapping_id_for(host_gid, cgid)},
                         )
-
-                    task = asyncio.create_task(self.sync_structure(tid, sm))
-                    self._running_sync_tasks[cgid] = task
-                    task.add_done_callback(
-                        lambda fut, _did=did, _cgid=cgid: _on_done(fut, _did, _cgid)
                     )
 
             finally:
@@ -749,6 +831,40 @@ class ServerReceiver:
                     logctx.guild_name.reset(token)
                 q.task_done()
 
+    def _origins_with_pending_live(self) -> set[int]:
+        """Host guilds with live messages buffered until their structure exists."""
+        out: set[int] = set()
+        for msgs in list(self._pending_msgs.values()):
+            for m in msgs:
+                with contextlib.suppress(TypeError, ValueError):
+                    out.add(int(m.get("guild_id") or 0))
+        for m in self._pending_thread_msgs:
+            with contextlib.suppress(TypeError, ValueError):
+                out.add(int(m.get("guild_id") or 0))
+        out.discard(0)
+        return out
+
+    def _publish_sync_queue(self) -> None:
+        """Push the sync queue to the dashboard; bursts of changes send one update."""
+        self._sync_queue_dirty = True
+        if self._sync_queue_publish is None or self._sync_queue_publish.done():
+            self._sync_queue_publish = asyncio.create_task(self._send_sync_queue())
+
+    async def _send_sync_queue(self) -> None:
+        # Loop until a publish went out with no change arriving meanwhile, so
+        # the last change (e.g. the final job finishing) is never left unsent.
+        while self._sync_queue_dirty:
+            await asyncio.sleep(0.5)
+            self._sync_queue_dirty = False
+            with contextlib.suppress(Exception):
+                await self.bus.publish(
+                    "sync_queue",
+                    {
+                        "concurrency": self._sync_scheduler.concurrency,
+                        "jobs": self._sync_scheduler.snapshot(),
+                    },
+                )
+
     def _get_sync_lock(self, clone_guild_id: int) -> asyncio.Lock:
         lock = self._guild_sync_locks.get(int(clone_guild_id))
         if lock is None:
@@ -851,6 +967,7 @@ class ServerReceiver:
                 return
             if self._shutting_down:
                 return
+            self._sweep_registries()
             try:
                 if self.bot.is_ready() and not self.bot.is_closed():
                     await self.bus.status(
@@ -861,6 +978,27 @@ class ServerReceiver:
             except Exception:
                 logger.debug("[status] heartbeat publish failed", exc_info=True)
 
+    def _sweep_registries(self) -> None:
+        """Drop idle per-key state that no insert has pushed out yet."""
+        dropped = 0
+        for reg in (
+            self._thread_locks,
+            self._webhook_locks,
+            self._webhook_gate_by_clone,
+            self._bf_send_gate_by_source,
+            self._latest_edit_payload,
+            self._pending_deletes,
+            self._wh_meta,
+            self._task_display_id,
+            self._done_task_ids,
+            self._applied_sync_phases,
+        ):
+            dropped += reg.sweep()
+        dropped += self._pending_sends.sweep()
+        dropped += self.ratelimit.sweep()
+        if dropped:
+            logger.debug("[registry] swept %d idle entries", dropped)
+
     async def on_ready(self):
         """
         Event handler that is called when the bot is ready.
@@ -887,7 +1025,9 @@ class ServerReceiver:
         await self.update_status(f"{CURRENT_VERSION}")
 
         asyncio.create_task(self.config.setup_release_watcher(self))
-        self.session = aiohttp.ClientSession()
+        self.session = aiohttp.ClientSession(
+            trace_configs=[self.ratelimit.trace_config]
+        )
 
         asyncio.create_task(refresh_build_info(self.session))
         self.webhook_exporter = WebhookDMExporter(self.session, logger)
@@ -937,10 +1077,15 @@ class ServerReceiver:
             pass
 
         if not self._processor_started:
+            # Events journaled by a backfill the previous run never finished.
+            for cid in self._bf_event_buffer.journaled_channels():
+                if cid not in self._active_backfills:
+                    self._drain_bf_events(cid, interrupted=True)
             self._ws_task = asyncio.create_task(self.ws.start_server(self._on_ws))
             self._processor_started = True
             self._prune_old_messages_loop()
             self._reap_idle_tls_sessions_loop()
+            self._flush_message_mappings_loop()
 
     async def on_member_join(self, member: discord.Member):
         g = getattr(member, "guild", None)
@@ -1249,28 +1394,54 @@ class ServerReceiver:
         )
 
         if is_bf:
-            buf = self._bf_event_buffer.setdefault(key, [])
-
-            if typ in ("message_edit", "thread_message_edit"):
-                try:
-                    mid = int((data or {}).get("message_id") or 0)
-                except Exception:
-                    mid = 0
-                if mid:
-                    buf[:] = [
-                        (t, d)
-                        for (t, d) in buf
-                        if not (
-                            t in ("message_edit", "thread_message_edit")
-                            and int((d or {}).get("message_id") or 0) == mid
-                        )
-                    ]
-
-            buf.append((typ, data))
+            self._bf_event_buffer.add(key, typ, data)
             logger.debug("[bf] Buffered %s for #%s (backfill active)", typ, key)
             return True
         return False
 
+    def _drain_bf_events(self, channel_id: int, *, interrupted: bool = False) -> None:
+        """
+        Replay the live events held back while `channel_id` backfilled.
+
+        `interrupted` is the startup drain of a backfill the previous run never
+        finished: edits of messages it never got to clone are dropped, since
+        replaying them would post the edited text as new, out-of-order messages.
+        """
+        try:
+            pending = self._bf_event_buffer.drain(channel_id)
+        except Exception:
+            logger.exception("[bf] Failed reading buffered events for #%s", channel_id)
+            return
+        if interrupted and pending:
+            kept = []
+            for ev_typ, ev_data in pending:
+                if ev_typ in ("message_edit", "thread_message_edit"):
+                    if not self._message_mappings(_safe_mid(ev_data) or 0):
+                        continue
+                kept.append((ev_typ, ev_data))
+            if len(kept) < len(pending):
+                logger.info(
+                    "[bf] Dropped %d buffered edits of uncloned messages for #%s",
+                    len(pending) - len(kept),
+                    channel_id,
+                )
+            pending = kept
+        if pending:
+            logger.info(
+                "[bf] Draining %d buffered edit/delete events for #%s",
+                len(pending),
+                channel_id,
+            )
+        for ev_typ, ev_data in pending:
+            if ev_typ in ("message_edit", "thread_message_edit"):
+                self._track(self.handle_message_edit(ev_data), name="bf-drain-edit")
+            elif ev_typ in ("message_delete", "thread_message_delete"):
+                self._track(self.handle_message_delete(ev_data), name="bf-drain-del")
+            elif ev_typ == "thread_delete":
+                self._track(self.handle_thread_delete(ev_data), name="bf-drain-tdel")
+            elif ev_typ == "thread_rename":
+                self._track(self.handle_thread_rename(ev_data), name="bf-drain-tren")
+
     async def _on_ws(self, msg: dict):
         """
         Handles incoming WebSocket messages and dispatches them based on their type.
@@ -1292,6 +1463,12 @@ class ServerReceiver:
                 if getattr(self, "_shutting_down", False):
                     return
 
+                # Decoded here, in arrival order: each delta builds on the
+                # sitemap before it, even if coalescing later drops that one.
+                data = self._sitemap_decoder.apply(data)
+                if data is None:
+                    return {"type": "sitemap_ack", "data": {"need_full": True}}
+
                 self._sitemap_task_counter += 1
                 task_id = self._sitemap_task_counter
 
@@ -1309,7 +1486,10 @@ class ServerReceiver:
                 q.put_nowait((task_id, display_id, data))
 
                 logger.info("[✉️] Sync task %s received", display_id)
-                return
+                return {
+                    "type": "sitemap_ack",
+                    "data": {"version": data.get("sitemap_version")},
+                }
 
             elif typ == "message":
                 if data.get("__backfill__"):
@@ -1328,8 +1508,13 @@ class ServerReceiver:
                     )
                     self.backfill.attach_task(orig, t)
                 else:
-
-                    self._track(self.forward_message(data), name="live-forward")
+                    # Registered before the task runs so an edit or delete
+                    # dispatched right behind it already sees the send.
+                    self._pending_sends.begin(_safe_mid(data) or 0)
+                    await self._forward_lanes.submit(
+                        int(data.get("channel_id") or 0),
+                        lambda: self.forward_message(data),
+                    )
 
             elif typ == "message_edit":
                 if self._maybe_buffer_if_backfilling(typ, data):
@@ -1363,7 +1548,11 @@ class ServerReceiver:
                     if parent:
                         self.backfill.attach_task(parent, t)
                 else:
-                    self._track(self.handle_thread_message(data), name="thread-msg")
+                    self._pending_sends.begin(_safe_mid(data) or 0)
+                    await self._forward_lanes.submit(
+                        int(data.get("thread_id") or data.get("thread_parent_id") or 0),
+                        lambda: self.handle_thread_message(data),
+                    )
 
             elif typ == "thread_delete":
                 try:
@@ -1382,7 +1571,7 @@ class ServerReceiver:
                         parent_id = None
 
                 if parent_id and parent_id in self._active_backfills:
-                    self._bf_event_buffer.setdefault(parent_id, []).append((typ, data))
+                    self._bf_event_buffer.add(parent_id, typ, data)
                     logger.debug(
                         "[bf] Buffered thread_delete for parent #%s (backfill active)",
                         parent_id,
@@ -1398,7 +1587,7 @@ class ServerReceiver:
                     parent_id = 0
 
                 if parent_id and parent_id in self._active_backfills:
-                    self._bf_event_buffer.setdefault(parent_id, []).append((typ, data))
+                    self._bf_event_buffer.add(parent_id, typ, data)
                     logger.debug(
                         "[bf] Buffered thread_rename for parent #%s (backfill active)",
                         parent_id,
@@ -1500,7 +1689,9 @@ class ServerReceiver:
 
                 if total is not None:
                     try:
-                        self.backfill.update_expected_total(cid, int(total))
+                        self.backfill.update_expected_total(
+                            cid, int(total), estimated=bool(data.get("estimated"))
+                        )
                     except Exception:
                         pass
 
@@ -1542,22 +1733,7 @@ class ServerReceiver:
                         "[bf] Failed flushing queued live messages for #%s", orig
                     )
 
-                pending = self._bf_event_buffer.pop(orig, [])
-                if pending:
-                    logger.info(
-                        "[bf] Draining %d buffered edit/delete events for #%s",
-                        len(pending),
-                        orig,
-                    )
-                for ev_typ, ev_data in pending:
-                    if ev_typ in ("message_edit", "thread_message_edit"):
-                        self._track(
-                            self.handle_message_edit(ev_data), name="bf-drain-edit"
-                        )
-                    elif ev_typ in ("message_delete", "thread_message_delete"):
-                        self._track(
-                            self.handle_message_delete(ev_data), name="bf-drain-del"
-                        )
+                self._drain_bf_events(orig)
 
                 try:
                     delivered, total_est = self.backfill.get_progress(orig)
@@ -1603,6 +1779,34 @@ class ServerReceiver:
                     "data": {"items": items},
                 }
 
+            elif typ == "sync_queue_query":
+                return {
+                    "type": "sync_queue",
+                    "data": {
+                        "ok": True,
+                        "concurrency": self._sync_scheduler.concurrency,
+                        "jobs": self._sync_scheduler.snapshot(),
+                    },
+                }
+
+            elif typ == "structure_plan_query":
+                return {
+                    "type": "structure_plan",
+                    "data": self._structure_plan_dry_run(data or {}),
+                }
+
+            elif typ == "forward_lanes_query":
+                return {
+                    "type": "forward_lanes",
+                    "data": self._forward_lanes.stats(),
+                }
+
+            elif typ == "registry_stats_query":
+                return {
+                    "type": "registry_stats",
+                    "data": {"registries": registry_stats()},
+                }
+
             elif typ == "member_joined":
                 asyncio.create_task(self.onjoin.handle_member_joined(data))
 
@@ -1767,6 +1971,102 @@ class ServerReceiver:
             self.cat_map[int(ocid)] = rr
             self.cat_map_by_clone.setdefault(int(cg), {})[int(ocid)] = rr
 
+        self._invalidate_emoji_index()
+        self._invalidate_role_index()
+
+    @staticmethod
+    def _build_id_index(
+        rows, orig_key: str, clone_key: str
+    ) -> tuple[dict[int, int], dict[int, dict[int, int]]]:
+        """
+        Turn emoji/role mapping rows into {orig: cloned} lookups: one flat map
+        (the legacy "any clone" answer) and one map per clone guild. A row
+        whose clone id is missing maps the id to itself.
+
+        When an id is mapped in several clones the flat map deliberately
+        prefers unscoped rows, then the lowest clone guild id, so the answer
+        is stable; the old per-id query took whichever row came first in
+        rowid order.
+        """
+        flat: dict[int, int] = {}
+        by_clone: dict[int, dict[int, int]] = {}
+        parsed = []
+        for r in rows:
+            try:
+                orig = int(r[orig_key])
+                cg = int(r["cloned_guild_id"]) if r["cloned_guild_id"] is not None else None
+                cloned = int(r[clone_key] or orig)
+            except (TypeError, ValueError, KeyError, IndexError):
+                continue
+            parsed.append((orig, cg, cloned))
+        parsed.sort(key=lambda t: (t[0], t[1] is not None, t[1] or 0))
+        for orig, cg, cloned in parsed:
+            flat.setdefault(orig, cloned)
+            if cg is not None:
+                by_clone.setdefault(cg, {})[orig] = cloned
+        return flat, by_clone
+
+    def _emoji_index(self) -> tuple[dict[int, int], dict[int, dict[int, int]]]:
+        """Emoji id lookups for content rewriting, built from the DB on first use."""
+        if self.emoji_map is None:
+            try:
+                rows = self.db.get_all_emoji_mappings()
+            except Exception:
+                logger.debug("get_all_emoji_mappings failed", exc_info=True)
+                rows = []
+            self.emoji_map, self.emoji_map_by_clone = self._build_id_index(
+                rows, "original_emoji_id", "cloned_emoji_id"
+            )
+        return self.emoji_map, self.emoji_map_by_clone
+
+    def _role_index(self) -> tuple[dict[int, int], dict[int, dict[int, int]]]:
+        """Role id lookups for mention rewriting, built from the DB on first use."""
+        if self.role_map is None:
+            try:
+                rows = self.db.get_all_role_mappings()
+            except Exception:
+                logger.debug("get_all_role_mappings failed", exc_info=True)
+                rows = []
+            self.role_map, self.role_map_by_clone = self._build_id_index(
+                rows, "original_role_id", "cloned_role_id"
+            )
+        return self.role_map, self.role_map_by_clone
+
+    def _invalidate_emoji_index(self, cloned_guild_id: int | None = None) -> None:
+        """Drop the emoji lookups; the next rewrite reloads them."""
+        self.emoji_map = None
+        self.emoji_map_by_clone = {}
+        self._rewrite_programs.clear()
+
+    def _invalidate_role_index(self, cloned_guild_id: int | None = None) -> None:
+        """Drop the role lookups; the next rewrite reloads them."""
+        self.role_map = None
+        self.role_map_by_clone = {}
+        self._rewrite_programs.clear()
+
+    def _rewrite_program(
+        self, original_guild_id: int | None, cloned_guild_id: int | None
+    ) -> RewriteProgram:
+        """
+        Compiled rewrite program for one (host, clone) pair, cached until the
+        emoji/role indexes or the word rewrites change.
+        """
+        key = (int(original_guild_id or 0), int(cloned_guild_id or 0))
+        prog = self._rewrite_programs.get(key)
+        if prog is None:
+            emoji_flat, emoji_by_clone = self._emoji_index()
+            role_flat, role_by_clone = self._role_index()
+            words = (
+                self._get_word_rewrites_for_mapping(*key) if key[0] and key[1] else []
+            )
+            prog = RewriteProgram(
+                emojis={**emoji_flat, **emoji_by_clone.get(key[1], {})},
+                roles={**role_flat, **role_by_clone.get(key[1], {})},
+                words=words,
+            )
+            self._rewrite_programs[key] = prog
+        return prog
+
     def _purge_stale_mappings(self, guild: discord.Guild) -> int:
         removed = 0
         per = self.chan_map_by_clone.get(int(guild.id)) or {}
@@ -1804,6 +2104,200 @@ class ServerReceiver:
 
         return removed
 
+    # Sitemap sections each background sync phase reads.
+    _PHASE_SECTIONS = {
+        "roles": ("roles",),
+        "emojis": ("emojis",),
+        "stickers": ("stickers",),
+        "permissions": ("roles", "categories", "standalone_channels", "forums"),
+        "structure": (
+            "guild",
+            "categories",
+            "standalone_channels",
+            "forums",
+            "threads",
+            "community",
+        ),
+    }
+
+    def _sync_phase_fingerprints(self, sitemap: Dict, settings: Dict) -> dict[str, str]:
+        hashes = sitemap.get("section_hashes") or section_hashes(sitemap)
+        sig = json.dumps(settings, sort_keys=True, default=str)
+        return {
+            phase: combined_hash(hashes, sections, sig)
+            for phase, sections in self._PHASE_SECTIONS.items()
+        }
+
+    def _clone_phase_fingerprints(
+        self, guild: discord.Guild, phases: Iterable[str]
+    ) -> dict[str, str]:
+        """
+        Fingerprint of the clone-side state each phase leaves behind, read
+        from the gateway cache and this clone's mapping rows. A phase is only
+        skipped while the clone still looks the way it left it.
+        """
+        cid = int(guild.id)
+
+        def _digest(value) -> str:
+            return hashlib.sha1(
+                json.dumps(value, sort_keys=True, default=str).encode()
+            ).hexdigest()
+
+        def _rows(by_clone: dict, *, webhooks: bool = False) -> dict:
+            # Webhook URLs rotate on their own, so only whether a row has
+            # one counts, and only for the phase that (re)creates them.
+            return {
+                str(k): {
+                    c: bool(v) if "webhook" in c else v
+                    for c, v in dict(r).items()
+                    if c != "last_updated" and (webhooks or "webhook" not in c)
+                }
+                for k, r in (by_clone.get(cid) or {}).items()
+            }
+
+        def _roles():
+            return sorted(
+                (
+                    r.id,
+                    r.name,
+                    getattr(r.permissions, "value", None),
+                    getattr(r.color, "value", None),
+                    r.hoist,
+                    r.mentionable,
+                    r.position,
+                )
+                for r in guild.roles
+            )
+
+        def _overwrites():
+            out = []
+            for ch in guild.channels:
+                ows = []
+                for target, ow in (getattr(ch, "overwrites", None) or {}).items():
+                    allow, deny = ow.pair()
+                    ows.append((target.id, allow.value, deny.value))
+                out.append((ch.id, sorted(ows)))
+            return sorted(out)
+
+        def _channels():
+            return sorted(
+                (
+                    ch.id,
+                    ch.name,
+                    getattr(ch.type, "value", ch.type),
+                    getattr(ch, "category_id", None),
+                    getattr(ch, "position", None),
+                    getattr(ch, "topic", None),
+                    getattr(ch, "nsfw", None),
+                    getattr(ch, "slowmode_delay", None),
+                )
+                for ch in guild.channels
+            )
+
+        state = {
+            "roles": lambda: [_roles(), self._role_index()[1].get(cid)],
+            "emojis": lambda: [
+                sorted((e.id, e.name) for e in guild.emojis),
+                self._emoji_index()[1].get(cid),
+            ],
+            "stickers": lambda: sorted((st.id, st.name) for st in guild.stickers),
+            "permissions": lambda: [
+                _roles(),
+                _overwrites(),
+                self._role_index()[1].get(cid),
+                _rows(self.cat_map_by_clone),
+                _rows(self.chan_map_by_clone),
+            ],
+            "structure": lambda: [
+                _channels(),
+                sorted((t.id, t.name, t.parent_id) for t in guild.threads),
+                [
+                    guild.name,
+                    str(guild.icon),
+                    str(guild.banner),
+                    str(guild.splash),
+                    guild.description,
+                    sorted(guild.features),
+                ],
+                _rows(self.cat_map_by_clone, webhooks=True),
+                _rows(self.chan_map_by_clone, webhooks=True),
+                sorted(self.db.get_cloned_thread_ids(cid)),
+                sorted(
+                    (list(k), v)
+                    for k, v in self._channel_name_blacklist_cache.items()
+                    if k[1] == cid
+                ),
+            ],
+        }
+        return {p: _digest(state[p]()) for p in phases if p in state}
+
+    _SYNC_PHASE_MAX_AGE = 1800.0
+
+    def _applied_sync_phase_state(self, phase_key: tuple[int, int]) -> dict:
+        """
+        What each phase last applied to this mapping, as {phase: (source
+        fingerprint, clone fingerprint)}, leaving out phases recorded more
+        than _SYNC_PHASE_MAX_AGE ago. The first sync after a restart picks up
+        the persisted state (aged from when it was restored); after that the
+        in-memory entry is authoritative.
+        """
+        if phase_key[1] in self._stale_sync_phase_clones:
+            self._stale_sync_phase_clones.discard(phase_key[1])
+            self._restored_sync_phases.add(phase_key)
+            try:
+                self.db.clear_sync_phase_state(phase_key[1])
+            except Exception:
+                logger.debug("clear_sync_phase_state failed", exc_info=True)
+            return {}
+        applied = self._applied_sync_phases.get(phase_key)
+        if applied is None and phase_key not in self._restored_sync_phases:
+            self._restored_sync_phases.add(phase_key)
+            try:
+                applied = self.db.get_sync_phase_state(*phase_key) or None
+            except Exception:
+                logger.debug("get_sync_phase_state failed", exc_info=True)
+                applied = None
+            if applied:
+                now = time.monotonic()
+                applied = {p: (src, clone, now) for p, (src, clone) in applied.items()}
+                self._applied_sync_phases[phase_key] = applied
+        now = time.monotonic()
+        return {
+            p: (src, clone)
+            for p, (src, clone, recorded_at) in (applied or {}).items()
+            if now - recorded_at < self._SYNC_PHASE_MAX_AGE
+        }
+
+    def _record_applied_sync_phases(
+        self, phase_key: tuple[int, int], states: dict[str, tuple[str, str]]
+    ) -> None:
+        if not states:
+            return
+        now = time.monotonic()
+        self._applied_sync_phases[phase_key] = {
+            **(self._applied_sync_phases.get(phase_key) or {}),
+            **{p: (src, clone, now) for p, (src, clone) in states.items()},
+        }
+        try:
+            self.db.set_sync_phase_state(*phase_key, states)
+        except Exception:
+            logger.debug("set_sync_phase_state failed", exc_info=True)
+
+    async def _forget_applied_sync_phases(self, *args) -> None:
+        """A role/emoji/sticker changed in some guild: re-check its clones fully."""
+        first = args[0] if args else None
+        gid = getattr(getattr(first, "guild", None), "id", None) or getattr(
+            first, "id", None
+        )
+        if not gid:
+            return
+        for key in list(self._applied_sync_phases):
+            if key[1] == int(gid):
+                self._applied_sync_phases.discard(key)
+        # No DB write here: these events fire in bursts (the role sync itself
+        # triggers one per role), so the persisted rows go at the next sync.
+        self._stale_sync_phase_clones.add(int(gid))
+
     async def sync_structure(self, task_id: int, sitemap: Dict) -> str:
         """
         Synchronizes the structure of a clone based on the provided sitemap.
@@ -1888,9 +2382,37 @@ class ServerReceiver:
                         host_guild_id=host_guild_id,
                     )
 
+                    # Phases whose inputs (sitemap sections and settings) are
+                    # what they last applied successfully, and whose part of
+                    # the clone still looks the way they left it, are skipped;
+                    # bg_phases names the phase each background task completes.
+                    phase_key = (host_gid_int, int(target_clone_gid))
+                    fingerprints = self._sync_phase_fingerprints(sitemap, settings)
+                    applied = self._applied_sync_phase_state(phase_key)
+                    same_input = [
+                        p
+                        for p, fp in fingerprints.items()
+                        if (applied.get(p) or ("",))[0] == fp
+                    ]
+                    clone_now = self._clone_phase_fingerprints(guild, same_input)
+                    unchanged = {
+                        p for p in same_input if applied[p][1] == clone_now.get(p)
+                    }
+                    if unchanged:
+                        logger.debug(
+                            "[🛠️] Unchanged since last sync, skipping: %s",
+                            ", ".join(sorted(unchanged)),
+                        )
+
                     bg_tasks: list[asyncio.Task] = []
+                    bg_phases: list[str | None] = []
 
-                    if settings.get("CLONE_EMOJI", True):
+                    def _running(tasks: dict) -> bool:
+                        t = tasks.get(int(target_clone_gid))
+                        return bool(t and not t.done())
+
+                    if settings.get("CLONE_EMOJI", True) and "emojis" not in unchanged:
+                        fresh = not _running(self.emojis._tasks)
                         self.emojis.kickoff_sync(
                             sitemap.get("emojis", []),
                             host_guild_id,
@@ -1899,17 +2421,23 @@ class ServerReceiver:
                         _et = self.emojis._tasks.get(int(target_clone_gid))
                         if _et:
                             bg_tasks.append(_et)
+                            bg_phases.append("emojis" if fresh else None)
 
-                    if settings.get("CLONE_STICKER", True):
+                    if (
+                        settings.get("CLONE_STICKER", True)
+                        and "stickers" not in unchanged
+                    ):
+                        fresh = not _running(self.stickers._tasks)
                         self.stickers.kickoff_sync(
                             target_clone_guild_id=int(target_clone_gid)
                         )
                         _st = self.stickers._tasks.get(int(target_clone_gid))
                         if _st:
                             bg_tasks.append(_st)
+                            bg_phases.append("stickers" if fresh else None)
 
                     roles_handle = None
-                    if settings.get("CLONE_ROLES", True):
+                    if settings.get("CLONE_ROLES", True) and "roles" not in unchanged:
                         roles_handle = self.roles.kickoff_sync(
                             sitemap.get("roles", []),
                             host_guild_id=host_guild_id,
@@ -1925,47 +2453,35 @@ class ServerReceiver:
                         )
                         if roles_handle:
                             bg_tasks.append(roles_handle)
-
-                    cat_created, ch_repaired, repaired_ids = (
-                        await self._repair_deleted_categories(guild, sitemap)
-                    )
-                    self._purge_stale_mappings(guild)
+                            bg_phases.append("roles")
 
                     parts: List[str] = []
-                    if cat_created:
-                        parts.append(f"Created {cat_created} categories")
-
-                    parts += await self._sync_categories(guild, sitemap)
-                    parts += await self._sync_forums(guild, sitemap)
-                    parts += await self._sync_channels(guild, sitemap)
-                    parts += await self._sync_community(guild, sitemap)
-                    parts += await self._sync_channels(
-                        guild,
-                        sitemap,
-                        stage_only=True,
-                        skip_removed=True,
-                    )
-                    parts += await self._sync_guild_metadata(guild, sitemap, settings)
-                    parts += await self._sync_channel_metadata(guild, sitemap)
-
-                    moved = await self._handle_master_channel_moves(
-                        guild,
-                        self._parse_sitemap(sitemap),
-                        host_guild_id,
-                        skip_channel_ids=repaired_ids,
-                    )
-
-                    total_reparented = int(ch_repaired or 0) + int(moved or 0)
-                    if total_reparented:
-                        parts.append(f"Reparented {total_reparented} channels")
-
-                    parts += await self._sync_threads(guild, sitemap)
-
+                    if "structure" not in unchanged:
+                        parts = await self._sync_structure_passes(
+                            guild, sitemap, host_guild_id, settings
+                        )
                     self._load_mappings()
 
-                    if settings.get(
-                        "MIRROR_CHANNEL_PERMISSIONS", False
-                    ) and settings.get("CLONE_ROLES", False):
+                    # Only a pass that found nothing to change proves the
+                    # clone matches; that is the state a later sync may trust.
+                    if "structure" not in unchanged and not parts:
+                        self._record_applied_sync_phases(
+                            phase_key,
+                            {
+                                "structure": (
+                                    fingerprints["structure"],
+                                    self._clone_phase_fingerprints(
+                                        guild, ["structure"]
+                                    )["structure"],
+                                )
+                            },
+                        )
+
+                    if (
+                        settings.get("MIRROR_CHANNEL_PERMISSIONS", False)
+                        and settings.get("CLONE_ROLES", False)
+                        and "permissions" not in unchanged
+                    ):
                         perm_task = self.perms.schedule_after_role_sync(
                             roles_manager=self.roles,
                             roles_handle_or_none=roles_handle,
@@ -1974,6 +2490,7 @@ class ServerReceiver:
                         )
                         if perm_task:
                             bg_tasks.append(perm_task)
+                            bg_phases.append("permissions")
 
                     struct_detail = "; ".join(parts) if parts else ""
                     struct_log = struct_detail or "No changes needed"
@@ -1990,6 +2507,7 @@ class ServerReceiver:
                         self._create_pending_webhooks(pending_wh)
                     )
                     bg_tasks.append(wh_task)
+                    bg_phases.append(None)
                 elif pending_wh:
                     logger.debug(
                         "[🔗] Skipping %d webhook creates (ON_DEMAND_WEBHOOKS=True)",
@@ -2011,12 +2529,75 @@ class ServerReceiver:
                     except asyncio.CancelledError:
                         raise
 
+                    # Phases report a summary string on success, None on failure.
+                    done = [
+                        p
+                        for p, r in zip(bg_phases, bg_results)
+                        if p and isinstance(r, str)
+                    ]
+                    if done:
+                        left = self._clone_phase_fingerprints(guild, done)
+                        self._record_applied_sync_phases(
+                            phase_key, {p: (fingerprints[p], left[p]) for p in done}
+                        )
+
                 return "; ".join(summaries) if summaries else "No changes needed"
 
         finally:
             logctx.sync_host_name.reset(_host_token)
             logctx.sync_display_id.reset(_id_token)
 
+    async def _sync_structure_passes(
+        self,
+        guild: discord.Guild,
+        sitemap: Dict,
+        host_guild_id: int | None,
+        settings: Dict[str, object],
+    ) -> List[str]:
+        """
+        The category, channel, forum, community, metadata and thread passes
+        of a structure sync. Returns the summary of what changed.
+        """
+        cat_created, ch_repaired, repaired_ids = await self._repair_deleted_categories(
+            guild, sitemap
+        )
+        self._purge_stale_mappings(guild)
+
+        parts: List[str] = []
+        if cat_created:
+            parts.append(f"Created {cat_created} categories")
+
+        parts += await self._sync_categories(guild, sitemap)
+        parts += await self._sync_forums(guild, sitemap)
+        parts += await self._sync_channels(guild, sitemap)
+        parts += await self._sync_community(guild, sitemap)
+        parts += await self._sync_channels(
+            guild,
+            sitemap,
+            stage_only=True,
+            skip_removed=True,
+        )
+        parts += await self._sync_guild_metadata(guild, sitemap, settings)
+        parts += await self._sync_channel_metadata(guild, sitemap)
+
+        moved, reordered = await self._handle_master_channel_moves(
+            guild,
+            sitemap,
+            host_guild_id,
+            skip_channel_ids=repaired_ids,
+        )
+
+        total_reparented = int(ch_repaired or 0) + int(moved or 0)
+        if total_reparented:
+            parts.append(f"Reparented {total_reparented} channels")
+        # A reorder is a change too: the gateway may not have applied the
+        # moves yet, so this pass must not vouch for the clone's layout.
+        if reordered:
+            parts.append(f"Reordered {reordered} categories/channels")
+
+        parts += await self._sync_threads(guild, sitemap)
+        return parts
+
     async def _sync_guild_metadata(
         self,
         guild: discord.Guild,
@@ -2187,7 +2768,9 @@ class ServerReceiver:
                             ):
                                 import aiohttp
 
-                                self.session = aiohttp.ClientSession()
+                                self.session = aiohttp.ClientSession(
+                                    trace_configs=[self.ratelimit.trace_config]
+                                )
 
                             async with self.session.get(icon_url) as resp:
                                 resp.raise_for_status()
@@ -2243,7 +2826,9 @@ class ServerReceiver:
                             ):
                                 import aiohttp
 
-                                self.session = aiohttp.ClientSession()
+                                self.session = aiohttp.ClientSession(
+                                    trace_configs=[self.ratelimit.trace_config]
+                                )
 
                             async with self.session.get(banner_url) as resp:
                                 resp.raise_for_status()
@@ -2296,7 +2881,9 @@ class ServerReceiver:
                             ):
                                 import aiohttp
 
-                                self.session = aiohttp.ClientSession()
+                                self.session = aiohttp.ClientSession(
+                                    trace_configs=[self.ratelimit.trace_config]
+                                )
 
                             async with self.session.get(splash_url) as resp:
                                 resp.raise_for_status()
@@ -2352,7 +2939,9 @@ class ServerReceiver:
                             ):
                                 import aiohttp
 
-                                self.session = aiohttp.ClientSession()
+                                self.session = aiohttp.ClientSession(
+                                    trace_configs=[self.ratelimit.trace_config]
+                                )
 
                             async with self.session.get(ds_url) as resp:
                                 resp.raise_for_status()
@@ -6319,19 +6908,110 @@ class ServerReceiver:
 
         return int(original_id), int(ch.id), ""
 
+    def _plan_structure(
+        self,
+        guild: discord.Guild,
+        sitemap: Dict,
+        *,
+        settings: dict | None = None,
+        snapshot: CloneSnapshot | None = None,
+    ) -> StructurePlan:
+        """Plan a structure sync of `sitemap` onto `guild` from the current caches."""
+        host_gid = int((sitemap.get("guild") or {}).get("id") or 0)
+        clone_gid = int(guild.id)
+        if settings is None:
+            try:
+                settings = resolve_mapping_settings(
+                    self.db,
+                    self.config,
+                    original_guild_id=host_gid or None,
+                    cloned_guild_id=clone_gid,
+                )
+            except Exception:
+                settings = self.config.default_mapping_settings()
+
+        rewrite_topic = None
+        mrow = None
+        with contextlib.suppress(Exception):
+            mrow = self.db.get_mapping_by_original_and_clone(host_gid, clone_gid)
+        if host_gid and mrow:
+            mrow = dict(mrow)
+
+            def rewrite_topic(text):
+                if not text:
+                    return text
+                try:
+                    out = self._sanitize_inline(
+                        text, ctx_guild_id=host_gid, ctx_mapping_row=mrow
+                    )
+                except Exception:
+                    out = text
+                return out[:1024] if out else out
+
+        return plan_structure(
+            sitemap,
+            snapshot or CloneSnapshot.from_guild(guild),
+            category_rows=(self.cat_map_by_clone or {}).get(clone_gid, {}) or {},
+            channel_rows=(self.chan_map_by_clone or {}).get(clone_gid, {}) or {},
+            settings=settings,
+            name_blacklist=self._get_channel_name_blacklist(host_gid, clone_gid),
+            rewrite_topic=rewrite_topic,
+        )
+
+    def _structure_plan_dry_run(self, req: dict) -> dict:
+        """
+        What a structure sync would do for one mapping right now, planned
+        against the last sitemap the client sent for it. Nothing is applied.
+        Only PLANNED_PHASES are in the plan; the response names the rest.
+        """
+        try:
+            if req.get("mapping_id"):
+                m = self.db.get_mapping_by_id(str(req["mapping_id"]))
+                if not m:
+                    return {"ok": False, "error": "unknown-mapping"}
+                host_gid = int(m["original_guild_id"] or 0)
+                clone_gid = int(m["cloned_guild_id"] or 0)
+            else:
+                host_gid = int(req.get("original_guild_id") or 0)
+                clone_gid = int(req.get("cloned_guild_id") or 0)
+        except (TypeError, ValueError, KeyError):
+            return {"ok": False, "error": "invalid-mapping"}
+
+        sitemap = self._sitemap_decoder.latest(host_gid, clone_gid)
+        if sitemap is None:
+            return {"ok": False, "error": "no-sitemap"}
+        guild = self.bot.get_guild(clone_gid)
+        if guild is None:
+            return {"ok": False, "error": "clone-guild-missing"}
+
+        if not self.chan_map_by_clone:
+            self._load_mappings()
+        t0 = time.perf_counter()
+        plan = self._plan_structure(guild, sitemap)
+        return {
+            "ok": True,
+            "sitemap_version": sitemap.get("sitemap_version"),
+            "planned_ms": round((time.perf_counter() - t0) * 1000, 2),
+            "planned_phases": list(PLANNED_PHASES),
+            "unplanned_phases": list(UNPLANNED_PHASES),
+            **plan.to_dict(),
+        }
+
     async def _handle_master_channel_moves(
         self,
         guild: discord.Guild,
-        incoming: list[dict],
+        sitemap: Dict,
         host_guild_id: int | None,
         *,
         skip_channel_ids: set[int] | None = None,
-    ) -> int:
+    ) -> tuple[int, int]:
         """
         Re-parent cloned channels for THIS clone guild only, when upstream parent differs.
-        Updates DB mapping for THIS clone so future syncs keep the new parent.
+        Also puts categories and channels back in host order. The moves and the
+        minimal set of position changes come from the structure planner and go
+        out as one bulk channel update; the DB mapping for THIS clone is updated
+        so future syncs keep the new parent. Returns (reparented, reordered).
         """
-        moved = 0
         skip_channel_ids = skip_channel_ids or set()
         host_guild_id = int(host_guild_id or 0)
 
@@ -6350,152 +7030,108 @@ class ServerReceiver:
                 "[reparent] Skipping channel repositioning for clone_g=%s (REPOSITION_CHANNELS=False)",
                 guild.id,
             )
-            return 0
-
-        per_chan = (self.chan_map_by_clone or {}).get(int(guild.id), {}) or {}
-        per_cat = (self.cat_map_by_clone or {}).get(int(guild.id), {}) or {}
-
-        if not per_chan or not per_cat:
-            import contextlib
+            return 0, 0
 
+        if not (self.chan_map_by_clone or {}).get(int(guild.id)):
             with contextlib.suppress(Exception):
                 self._load_mappings()
-                per_chan = (self.chan_map_by_clone or {}).get(int(guild.id), {}) or {}
-                per_cat = (self.cat_map_by_clone or {}).get(int(guild.id), {}) or {}
 
-        for item in incoming:
-            orig_id = int(item["id"])
-            row = per_chan.get(orig_id)
-            if not row:
-                r = self.db.get_channel_mapping_by_original_and_clone(
-                    orig_id, int(guild.id)
-                )
-                if r and not isinstance(r, dict):
-                    r = dict(r)
-                if r:
-                    row = r
-                    per_chan[orig_id] = row
-            if not row:
-                continue
+        snapshot = CloneSnapshot.from_guild(guild)
+        plan = self._plan_structure(
+            guild, sitemap, settings=settings, snapshot=snapshot
+        )
+        changes = [
+            op for op in plan.layout_changes() if op.clone_id not in skip_channel_ids
+        ]
+        if not changes:
+            return 0, 0
 
-            clone_id = int(row.get("cloned_channel_id") or 0)
-            ch = guild.get_channel(clone_id) if clone_id else None
-            if not ch:
-                continue
-
-            if int(ch.id) in skip_channel_ids:
-                continue
-
-            upstream_parent = item.get("parent_id", None)
-            upstream_parent_id = (
-                int(upstream_parent) if upstream_parent is not None else None
+        done = await apply_layout(
+            guild,
+            changes,
+            before_request=lambda: self.ratelimit.acquire_for_guild(
+                ActionType.EDIT_CHANNEL, guild.id
+            ),
+        )
+        reordered = sum(1 for op in done if "position" in op.fields)
+        if reordered:
+            logger.info(
+                "[↕️] Reordered %d categories/channels to match the host", reordered
             )
+        done = [op for op in done if "parent_id" in op.fields]
 
-            cat_row = None
-            if upstream_parent_id is not None:
-                cat_row = per_cat.get(upstream_parent_id)
-                if cat_row is None:
-                    cr = self.db.get_category_mapping_by_original_and_clone(
-                        upstream_parent_id, int(guild.id)
-                    )
-                    if cr and not isinstance(cr, dict):
-                        cr = dict(cr)
-                    if cr:
-                        cat_row = cr
-                        self.cat_map_by_clone.setdefault(int(guild.id), {})[
-                            upstream_parent_id
-                        ] = cr
-
-            desired_parent_clone_id = (
-                int(cat_row["cloned_category_id"]) if cat_row else None
-            )
+        upstream_parent_of = {
+            int(c["id"]): c.get("parent_id") for c in incoming_channels(sitemap)
+        }
+        per_chan = self.chan_map_by_clone.setdefault(int(guild.id), {})
+        for op in done:
+            before = snapshot.get(op.clone_id)
+            old_parent = snapshot.get(before.parent_id) if before else None
+            desired_parent_clone_id = op.fields["parent_id"]
             desired_parent = (
-                guild.get_channel(desired_parent_clone_id)
+                guild.get_channel(int(desired_parent_clone_id))
                 if desired_parent_clone_id
                 else None
             )
+            old_name = getattr(old_parent, "name", None) or "standalone"
+            new_name = getattr(desired_parent, "name", None) or "standalone"
+            logger.info(
+                "[reparent:done] guild=%s(%d) ch=%r id=%d from %r → %r",
+                guild.name,
+                int(guild.id),
+                op.name,
+                int(op.clone_id),
+                old_name,
+                new_name,
+            )
+            await self._emit_event_log(
+                "channel_moved",
+                f"Moved channel '{op.name}' from '{old_name}' to '{new_name}'",
+                guild_id=guild.id,
+                guild_name=getattr(guild, "name", None),
+                channel_id=op.clone_id,
+                channel_name=op.name,
+                category_id=desired_parent_clone_id,
+                category_name=getattr(desired_parent, "name", None),
+                extra={
+                    "original_channel_id": int(op.origin_id),
+                    "clone_channel_id": int(op.clone_id),
+                },
+            )
 
-            actual_parent_id = int(ch.category.id) if ch.category else None
-            actual_parent_name = getattr(ch.category, "name", None)
-
-            if actual_parent_id == (
-                desired_parent_clone_id if desired_parent_clone_id is not None else None
-            ):
-                continue
-
-            try:
-                await ch.edit(category=desired_parent)
-                moved += 1
-                old_name = actual_parent_name or "standalone"
-                new_name = getattr(desired_parent, "name", None) or "standalone"
-                logger.info(
-                    "[reparent:done] guild=%s(%d) ch=%r id=%d from %r → %r",
-                    guild.name,
-                    int(guild.id),
-                    getattr(ch, "name", "?"),
-                    int(ch.id),
-                    old_name,
-                    new_name,
-                )
-                await self._emit_event_log(
-                    "channel_moved",
-                    f"Moved channel '{getattr(ch, 'name', '?')}' from '{old_name}' to '{new_name}'",
-                    guild_id=guild.id,
-                    guild_name=getattr(guild, "name", None),
-                    channel_id=ch.id,
-                    channel_name=getattr(ch, "name", None),
-                    category_id=desired_parent_clone_id,
-                    category_name=getattr(desired_parent, "name", None),
-                    extra={
-                        "original_channel_id": int(orig_id),
-                        "clone_channel_id": int(ch.id),
-                    },
-                )
-            except Exception:
-                logger.warning(
-                    "[reparent:failed] guild=%s(%d) ch=%r id=%d (desired_parent=%s)",
-                    guild.name,
-                    int(guild.id),
-                    getattr(ch, "name", "?"),
-                    int(ch.id),
-                    str(desired_parent_clone_id),
-                    exc_info=True,
-                )
+            row = per_chan.get(int(op.origin_id))
+            if not row:
                 continue
-
-            ctype = (
-                int(getattr(ch.type, "value", 0))
-                if hasattr(ch.type, "value")
-                else int(ch.type)
+            upstream_parent = upstream_parent_of.get(int(op.origin_id))
+            upstream_parent_id = (
+                int(upstream_parent) if upstream_parent is not None else None
             )
             try:
                 self.db.upsert_channel_mapping(
-                    int(orig_id),
+                    int(op.origin_id),
                     row.get("original_channel_name"),
-                    int(ch.id),
+                    int(op.clone_id),
                     row.get("channel_webhook_url"),
-                    int(upstream_parent_id) if upstream_parent_id is not None else None,
+                    upstream_parent_id,
                     (
                         int(desired_parent_clone_id)
                         if desired_parent_clone_id is not None
                         else None
                     ),
-                    ctype,
+                    before.type if before else row.get("channel_type"),
                     original_guild_id=host_guild_id,
                     cloned_guild_id=int(guild.id),
                     clone_name=(row.get("clone_channel_name") or None),
                 )
             finally:
-                row["original_parent_category_id"] = (
-                    int(upstream_parent_id) if upstream_parent_id is not None else None
-                )
+                row["original_parent_category_id"] = upstream_parent_id
                 row["cloned_parent_category_id"] = (
                     int(desired_parent_clone_id)
                     if desired_parent_clone_id is not None
                     else None
                 )
 
-        return moved
+        return len(done), reordered
 
     async def _get_default_avatar_bytes(self) -> Optional[bytes]:
         if self._default_avatar_bytes is None:
@@ -6504,7 +7140,9 @@ class ServerReceiver:
                 return None
             try:
                 if self.session is None or self.session.closed:
-                    self.session = aiohttp.ClientSession()
+                    self.session = aiohttp.ClientSession(
+                        trace_configs=[self.ratelimit.trace_config]
+                    )
                 async with self.session.get(url) as resp:
                     if resp.status == 200:
                         self._default_avatar_bytes = await resp.read()
@@ -6543,7 +7181,9 @@ class ServerReceiver:
             return meta
 
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = aiohttp.ClientSession(
+                trace_configs=[self.ratelimit.trace_config]
+            )
 
         try:
             wh = await self.bot.fetch_webhook(webhook_id)
@@ -6601,7 +7241,7 @@ class ServerReceiver:
             )
             return None
 
-        lock = self._webhook_locks.setdefault(original_id, asyncio.Lock())
+        lock = self._webhook_locks.get_or_create(original_id)
 
         async with lock:
 
@@ -6967,6 +7607,7 @@ class ServerReceiver:
                     original_guild_id=int(r.get("original_guild_id") or host_gid or 0),
                     cloned_guild_id=clone_gid,
                 )
+                self._track_clone_thread(clone_gid, ch)
             except Exception:
                 logger.exception("[db] upsert_forum_thread_mapping failed on rename")
 
@@ -7064,36 +7705,68 @@ class ServerReceiver:
                     e,
                 )
 
-    async def _enforce_thread_limit(self, guild: discord.Guild):
-        """
-        Enforces the thread limit for the clone guild by archiving the oldest active threads
-        if the number of active threads exceeds the configured maximum.
-        """
-
-        valid_clone_ids = {r["cloned_thread_id"] for r in self.db.get_all_threads()}
+    # How often the active-thread index is re-seeded from the gateway cache.
+    _THREAD_INDEX_RECONCILE_SEC = 600
 
-        active = [
-            t
-            for t in guild.threads
-            if not getattr(t, "archived", False) and t.id in valid_clone_ids
-        ]
-        logger.debug(
-            "Guild %d has %d active, mapped threads: %s",
+    @staticmethod
+    def _thread_created_ts(thread) -> float:
+        """Creation time used to order threads for auto-archiving (unknown sorts first)."""
+        created = getattr(thread, "created_at", None)
+        return created.timestamp() if created else 0.0
+
+    def _reconcile_active_threads(self, guild: discord.Guild) -> None:
+        """Re-seed the active-thread index for `guild` from its mappings and the gateway cache."""
+        self.active_threads.reset(
             guild.id,
-            len(active),
-            [t.id for t in active],
+            self.db.get_cloned_thread_ids(guild.id),
+            (
+                (t.id, self._thread_created_ts(t))
+                for t in guild.threads
+                if not getattr(t, "archived", False)
+            ),
+        )
+
+    def _track_clone_thread(self, guild_id: int, thread) -> None:
+        """Note a thread mapping upsert in the active-thread index."""
+        if thread is None:
+            return
+        self.active_threads.track(
+            int(guild_id),
+            thread.id,
+            self._thread_created_ts(thread),
+            active=not getattr(thread, "archived", False),
         )
 
-        if len(active) <= self.max_threads:
+    async def _on_clone_thread_update(self, before, after) -> None:
+        gid = getattr(getattr(after, "guild", None), "id", None)
+        if not gid or not self.active_threads.seeded(gid):
             return
+        if getattr(after, "archived", False):
+            self.active_threads.deactivate(gid, after.id)
+        else:
+            self.active_threads.activate(gid, after.id, self._thread_created_ts(after))
 
-        active.sort(
-            key=lambda t: t.created_at or datetime.min.replace(tzinfo=timezone.utc)
+    async def _on_clone_thread_delete(self, payload) -> None:
+        self.active_threads.forget(
+            getattr(payload, "guild_id", None), int(payload.thread_id)
         )
-        num_to_archive = len(active) - self.max_threads
-        to_archive = active[:num_to_archive]
 
-        for thread in to_archive:
+    async def _enforce_thread_limit(self, guild: discord.Guild):
+        """
+        Enforces the thread limit for the clone guild by archiving the oldest active threads
+        if the number of active threads exceeds the configured maximum.
+
+        Works off the per-guild active-thread index, which thread events and
+        mapping upserts keep current; it is re-seeded from the gateway cache
+        every _THREAD_INDEX_RECONCILE_SEC in case an event was missed.
+        """
+        if self.active_threads.stale(guild.id, self._THREAD_INDEX_RECONCILE_SEC):
+            self._reconcile_active_threads(guild)
+
+        for tid in self.active_threads.overflow(guild.id, self.max_threads):
+            thread = guild.get_thread(tid)
+            if thread is None or getattr(thread, "archived", False):
+                continue
             try:
                 await self.ratelimit.acquire_for_guild(
                     ActionType.EDIT_CHANNEL, guild.id
@@ -7115,7 +7788,11 @@ class ServerReceiver:
                     )
 
                     self.db.delete_forum_thread_mapping(thread.id)
+                    self.active_threads.forget(guild.id, thread.id)
                 else:
+                    self.active_threads.activate(
+                        guild.id, thread.id, self._thread_created_ts(thread)
+                    )
                     logger.warning(
                         "[⚠️] Failed to auto-archive thread '%s' in #%s: %s",
                         thread.name,
@@ -7140,22 +7817,10 @@ class ServerReceiver:
         if not original_guild_id or not cloned_guild_id:
             return text, embeds
 
-        patterns = self._get_word_rewrites_for_mapping(
-            original_guild_id, cloned_guild_id
-        )
-        if not patterns:
+        prog = self._rewrite_program(original_guild_id, cloned_guild_id)
+        if not prog.has_words:
             return text, embeds
-
-        def _apply_to_str(s: str | None) -> str | None:
-            if not s:
-                return s
-            out = s
-            for pat, repl in patterns:
-                try:
-                    out = pat.sub(repl, out)
-                except Exception:
-                    continue
-            return out
+        _apply_to_str = prog.rewrite_words
 
         if isinstance(text, str):
             text = _apply_to_str(text)
@@ -7217,173 +7882,15 @@ class ServerReceiver:
             mapping_row=ctx_mapping_row,
         )
 
-        s = self._replace_emoji_ids(
-            s,
-            cloned_guild_id=clone_gid,
-        )
-        s = self._remap_channel_mentions(
-            s,
-            cloned_guild_id=clone_gid,
-        )
-        s = self._remap_role_mentions(
+        prog = self._rewrite_program(ctx_guild_id, clone_gid)
+        return prog.rewrite_tokens(
             s,
-            cloned_guild_id=clone_gid,
-        )
-        s = self._rewrite_message_links(
-            s,
-            ctx_guild_id=ctx_guild_id,
-            ctx_mapping_row=ctx_mapping_row,
+            channels=self.chan_map_by_clone.get(int(clone_gid)) if clone_gid else None,
+            channels_fallback=self.chan_map,
+            link=lambda m: self._rewrite_message_link(
+                m, ctx_guild_id=ctx_guild_id, ctx_mapping_row=ctx_mapping_row
+            ),
         )
-        return s
-
-    def _replace_emoji_ids(
-        self,
-        content: str,
-        *,
-        cloned_guild_id: int | None = None,
-    ) -> str:
-        """
-        Replace custom emoji IDs with the clone's emoji IDs.
-
-        If cloned_guild_id is provided, we prefer the mapping in that clone.
-        Otherwise we fall back to the legacy "any mapping" behaviour.
-        """
-        _emoji_re = re.compile(r"<:(\w+):(\d+)?\>")
-
-        def repl(m: re.Match) -> str:
-            full = m.group(0)
-            name = m.group(1)
-            mid = m.group(2)
-            if not mid:
-                return full
-            try:
-                orig_id = int(mid)
-            except Exception:
-                return full
-
-            row = None
-
-            if cloned_guild_id:
-                try:
-                    row = self.db.get_emoji_mapping_for_clone(
-                        original_id=orig_id,
-                        cloned_guild_id=int(cloned_guild_id),
-                    )
-                except Exception:
-                    row = None
-
-            if row is None:
-                row = self.db.get_emoji_mapping(orig_id)
-
-            if not row:
-                return full
-
-            if not isinstance(row, dict):
-                try:
-                    row = {k: row[k] for k in row.keys()}
-                except Exception:
-                    return full
-
-            cloned_id = int(row.get("cloned_emoji_id") or orig_id)
-            return f"<:{name}:{cloned_id}>"
-
-        return _emoji_re.sub(repl, content)
-
-    def _remap_channel_mentions(
-        self,
-        content: str,
-        *,
-        cloned_guild_id: int | None = None,
-    ) -> str:
-        """
-        Rewrite <
-
-        If cloned_guild_id is provided, use the mapping for THAT clone; otherwise
-        fall back to the old global chan_map behaviour.
-        """
-        _m_ch = re.compile(r"<#(\d+)>")
-
-        def repl(m: re.Match) -> str:
-            full = m.group(0)
-            raw_id = m.group(1)
-            try:
-                cid = int(raw_id)
-            except Exception:
-                return full
-
-            row = None
-
-            if cloned_guild_id:
-                try:
-                    per_clone_map = (
-                        self.chan_map_by_clone.get(int(cloned_guild_id)) or {}
-                    )
-                    row = per_clone_map.get(cid)
-                except Exception:
-                    row = None
-
-            if row is None:
-                row = self.chan_map.get(cid)
-
-            if not row:
-                return full
-
-            if not isinstance(row, dict):
-                try:
-                    row = {k: row[k] for k in row.keys()}
-                except Exception:
-                    return full
-
-            cloned_id = int(row.get("cloned_channel_id") or cid)
-            return f"<#{cloned_id}>"
-
-        return _m_ch.sub(repl, content)
-
-    def _remap_role_mentions(
-        self,
-        content: str,
-        *,
-        cloned_guild_id: int | None = None,
-    ) -> str:
-        """
-        Rewrite <@&role_id> mentions to the appropriate cloned role id.
-        """
-
-        def repl(m: re.Match) -> str:
-            full = m.group(0)
-            raw_id = m.group("id")
-            try:
-                rid = int(raw_id)
-            except Exception:
-                return full
-
-            row = None
-
-            if cloned_guild_id:
-                try:
-                    row = self.db.get_role_mapping_for_clone(
-                        original_id=rid,
-                        cloned_guild_id=int(cloned_guild_id),
-                    )
-                except Exception:
-                    row = None
-
-            if row is None:
-                row = self.db.get_role_mapping(rid)
-
-            if not row:
-                return full
-
-            if not isinstance(row, dict):
-                try:
-                    row = {k: row[k] for k in row.keys()}
-                except Exception:
-                    return full
-
-            cloned_id = int(row.get("cloned_role_id") or rid)
-            return f"<@&{cloned_id}>"
-
-        return self._M_ROLE.sub(repl, content)
 
     def _fallback_unknown_role_mentions(
         self,
@@ -7427,21 +7934,18 @@ class ServerReceiver:
 
         return self._M_ROLE.sub(repl, content)
 
-    def _rewrite_message_links(
+    def _rewrite_message_link(
         self,
-        content: str,
+        m: re.Match,
         *,
         ctx_guild_id: int | None = None,
         ctx_mapping_row: dict | None = None,
     ) -> str:
         """
-        Rewrites https://discord.com/channels/<gid>/<cid>/<mid> links in `content`
-        to point at the mapped *clone* guild/channel/message where we can.
+        Rewrite one https://discord.com/channels/<gid>/<cid>/<mid> link match
+        (named groups base/gid/cid/mid) to point at the mapped *clone*
+        guild/channel/message where we can.
         """
-        _link = re.compile(
-            r"(https?://(?:ptb\.|canary\.)?discord(?:app)?\.com/channels/)"
-            r"(?P<gid>\d+|@me)/(?P<cid>\d+)/(?P<mid>\d+)"
-        )
 
         def _row_to_dict(r):
             if r is None or isinstance(r, dict):
@@ -7451,103 +7955,100 @@ class ServerReceiver:
             except Exception:
                 return None
 
-        def repl(m: re.Match) -> str:
-            base = m.group(1)
-            gid_str = m.group("gid")
-            try:
-                cid = int(m.group("cid"))
-                mid = int(m.group("mid"))
-            except Exception:
-                return m.group(0)
+        base = m.group("base")
+        gid_str = m.group("gid")
+        try:
+            cid = int(m.group("cid"))
+            mid = int(m.group("mid"))
+        except Exception:
+            return m.group(0)
 
-            if gid_str == "@me":
-                return m.group(0)
+        if gid_str == "@me":
+            return m.group(0)
 
+        host_gid = None
+        try:
+            if ctx_guild_id:
+                host_gid = int(ctx_guild_id)
+            elif gid_str != "@me":
+                host_gid = int(gid_str)
+        except Exception:
             host_gid = None
+
+        clone_gid = None
+        if host_gid:
             try:
-                if ctx_guild_id:
-                    host_gid = int(ctx_guild_id)
-                elif gid_str != "@me":
-                    host_gid = int(gid_str)
+                clone_gid = self._clone_gid_for_ctx(
+                    host_guild_id=host_gid,
+                    mapping_row=ctx_mapping_row,
+                )
             except Exception:
-                host_gid = None
+                clone_gid = None
 
-            clone_gid = None
-            if host_gid:
+            if not clone_gid:
                 try:
-                    clone_gid = self._clone_gid_for_ctx(
-                        host_guild_id=host_gid,
-                        mapping_row=ctx_mapping_row,
-                    )
+                    clone_gid = self._target_clone_gid_for_origin(host_gid)
                 except Exception:
                     clone_gid = None
 
-                if not clone_gid:
-                    try:
-                        clone_gid = self._target_clone_gid_for_origin(host_gid)
-                    except Exception:
-                        clone_gid = None
-
-            if not clone_gid:
-                return m.group(0)
+        if not clone_gid:
+            return m.group(0)
 
+        row = None
+        try:
+            if hasattr(self.db, "get_message_mapping_pair"):
+                row = self.db.get_message_mapping_pair(mid, int(clone_gid))
+        except Exception:
             row = None
+
+        if row is None and hasattr(self.db, "get_mapping_by_cloned"):
             try:
-                if hasattr(self.db, "get_message_mapping_pair"):
-                    row = self.db.get_message_mapping_pair(mid, int(clone_gid))
+                src = self.db.get_mapping_by_cloned(mid)
             except Exception:
-                row = None
-
-            if row is None and hasattr(self.db, "get_mapping_by_cloned"):
+                src = None
+            src = _row_to_dict(src)
+            if src:
                 try:
-                    src = self.db.get_mapping_by_cloned(mid)
+                    orig_mid = int(src.get("original_message_id") or mid)
                 except Exception:
-                    src = None
-                src = _row_to_dict(src)
-                if src:
-                    try:
-                        orig_mid = int(src.get("original_message_id") or mid)
-                    except Exception:
-                        orig_mid = mid
-                    try:
-                        row = self.db.get_message_mapping_pair(orig_mid, int(clone_gid))
-                    except Exception:
-                        row = None
-
-            row = _row_to_dict(row)
-
-            ch_row = None
-            if (row is None) or not row.get("cloned_channel_id"):
+                    orig_mid = mid
                 try:
-                    per_clone = getattr(self, "chan_map_by_clone", None) or {}
-                    per = per_clone.get(int(clone_gid)) or {}
-                    ch_row = per.get(cid)
+                    row = self.db.get_message_mapping_pair(orig_mid, int(clone_gid))
                 except Exception:
-                    ch_row = None
-                ch_row = _row_to_dict(ch_row)
+                    row = None
 
-            try:
-                if row:
-                    cloned_cid = int(
-                        row.get("cloned_channel_id")
-                        or (ch_row or {}).get("cloned_channel_id")
-                        or cid
-                    )
-                    cloned_mid = int(row.get("cloned_message_id") or mid)
-                elif ch_row:
-                    cloned_cid = int(ch_row.get("cloned_channel_id") or cid)
-                    cloned_mid = mid
-                else:
+        row = _row_to_dict(row)
 
-                    cloned_cid = cid
-                    cloned_mid = mid
+        ch_row = None
+        if (row is None) or not row.get("cloned_channel_id"):
+            try:
+                per_clone = getattr(self, "chan_map_by_clone", None) or {}
+                per = per_clone.get(int(clone_gid)) or {}
+                ch_row = per.get(cid)
             except Exception:
+                ch_row = None
+            ch_row = _row_to_dict(ch_row)
+
+        try:
+            if row:
+                cloned_cid = int(
+                    row.get("cloned_channel_id")
+                    or (ch_row or {}).get("cloned_channel_id")
+                    or cid
+                )
+                cloned_mid = int(row.get("cloned_message_id") or mid)
+            elif ch_row:
+                cloned_cid = int(ch_row.get("cloned_channel_id") or cid)
+                cloned_mid = mid
+            else:
 
-                return m.group(0)
+                cloned_cid = cid
+                cloned_mid = mid
+        except Exception:
 
-            return f"{base}{int(clone_gid)}/{cloned_cid}/{cloned_mid}"
+            return m.group(0)
 
-        return _link.sub(repl, content)
+        return f"{base}{int(clone_gid)}/{cloned_cid}/{cloned_mid}"
 
     def _get_role_mentions_for_message(
         self,
@@ -7590,7 +8091,9 @@ class ServerReceiver:
         one connection pool.
         """
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = aiohttp.ClientSession(
+                trace_configs=[self.ratelimit.trace_config]
+            )
         return self.session
 
     def _mapping_id_for(self, original_guild_id, cloned_guild_id) -> str | None:
@@ -7739,7 +8242,7 @@ class ServerReceiver:
             return
 
         try:
-            self.db.upsert_message_mapping(
+            self._store_message_mapping(
                 original_guild_id=int(msg.get("guild_id") or 0),
                 original_channel_id=int(msg.get("channel_id") or 0),
                 original_message_id=orig_mid,
@@ -8448,37 +8951,13 @@ class ServerReceiver:
             if tmp_orig:
                 orig_id_to_name = tmp_orig
                 tmp_cloned: dict[int, str] = {}
+                flat, by_clone = self._role_index()
+                per_clone = by_clone.get(int(cloned_guild_id_for_mentions), {})
 
                 for orig_id, name in tmp_orig.items():
-                    row = None
-                    try:
-                        row = self.db.get_role_mapping_for_clone(
-                            original_id=orig_id,
-                            cloned_guild_id=int(cloned_guild_id_for_mentions),
-                        )
-                    except Exception:
-                        row = None
-
-                    if row is None:
-                        try:
-                            row = self.db.get_role_mapping(orig_id)
-                        except Exception:
-                            row = None
-
-                    if not row:
+                    cloned_id = per_clone.get(orig_id) or flat.get(orig_id)
+                    if cloned_id is None:
                         continue
-
-                    if not isinstance(row, dict):
-                        try:
-                            row = {k: row[k] for k in row.keys()}
-                        except Exception:
-                            continue
-
-                    try:
-                        cloned_id = int(row.get("cloned_role_id") or orig_id)
-                    except Exception:
-                        cloned_id = orig_id
-
                     tmp_cloned[cloned_id] = name
 
                 cloned_id_to_name = tmp_cloned
@@ -8893,12 +9372,42 @@ class ServerReceiver:
 
         is_backfill = bool(msg.get("__backfill__"))
 
-        if not is_backfill or not source_id:
-            return await self._forward_message_inner(msg)
+        self._pending_sends.begin(_safe_mid(msg) or 0)
+        try:
+            if not is_backfill or not source_id:
+                return await self._forward_message_inner(msg)
 
-        gate = self._get_backfill_gate_for_source(source_id)
-        async with gate:
-            return await self._forward_message_inner(msg)
+            gate = self._get_backfill_gate_for_source(source_id)
+            async with gate:
+                return await self._forward_message_inner(msg)
+        finally:
+            await self._finish_pending_send(
+                msg, self._pending_msgs.get(source_id) or ()
+            )
+
+    async def _finish_pending_send(self, msg: dict, queue) -> None:
+        """
+        Mark a message's send finished, waking deletes waiting on it, and
+        replay a delete or the newest edit that arrived while it was in
+        flight. A message parked in `queue` (its channel isn't cloned yet)
+        stays pending until the flush that finally sends it.
+        """
+        mid = _safe_mid(msg)
+        if not mid or any(_safe_mid(m) == mid for m in queue):
+            return
+        self._pending_sends.finish(mid)
+        queued = self._pending_deletes.pop(mid, None)
+        if queued is not None:
+            self._latest_edit_payload.pop(mid, None)
+            logger.debug("[🧹] Applying queued delete after send for orig %s", mid)
+            await self.handle_message_delete(queued)
+            return
+        edit = self._latest_edit_payload.pop(mid, None)
+        if edit is not None:
+            # Run as its own task: a resend goes back through the lanes, and
+            # this is usually called from inside a lane worker.
+            logger.debug("[✏️] Applying parked edit after send for orig %s", mid)
+            self._track(self.handle_message_edit(edit), name="edit-msg")
 
     async def _forward_message_inner(self, msg: Dict):
         """
@@ -8993,16 +9502,6 @@ class ServerReceiver:
             customized = bool(name and name != canonical)
             return purl, name, avatar_url, customized
 
-        try:
-            _orig_mid_for_inflight = int((msg.get("message_id") or 0))
-        except Exception:
-            _orig_mid_for_inflight = 0
-        if (
-            _orig_mid_for_inflight
-            and _orig_mid_for_inflight not in self._inflight_events
-        ):
-            self._inflight_events[_orig_mid_for_inflight] = asyncio.Event()
-
         if not msg.get("__split_total__"):
             try:
                 atts = list(msg.get("attachments") or [])
@@ -9128,7 +9627,9 @@ class ServerReceiver:
             import aiohttp, asyncio
 
             if self.session is None or self.session.closed:
-                self.session = aiohttp.ClientSession()
+                self.session = aiohttp.ClientSession(
+                    trace_configs=[self.ratelimit.trace_config]
+                )
 
             webhook = self._webhooks.get(url_to_use)
             if webhook is None or webhook.session is None or webhook.session.closed:
@@ -9193,7 +9694,7 @@ class ServerReceiver:
                             host_guild_id=orig_gid or None,
                             mapping_row=mapping_row,
                         )
-                        self.db.upsert_message_mapping(
+                        self._store_message_mapping(
                             original_guild_id=orig_gid,
                             original_channel_id=orig_cid,
                             original_message_id=orig_mid,
@@ -9202,53 +9703,6 @@ class ServerReceiver:
                             webhook_url=used_url,
                             cloned_guild_id=int(clone_gid) if clone_gid else None,
                         )
-
-                        ev = self._inflight_events.get(orig_mid)
-                        if ev:
-                            ev.set()
-
-                        try:
-                            row = self.db.get_mapping_by_original(orig_mid)
-                        except Exception:
-                            row = None
-
-                        is_last_chunk = not msg.get("__skip_backfill_mark__")
-                        if is_last_chunk:
-                            if orig_mid in self._pending_deletes:
-                                try:
-                                    if row:
-                                        ok = await self._delete_with_row(
-                                            row, orig_mid, msg.get("channel_name")
-                                        )
-                                        if ok:
-                                            logger.debug(
-                                                "[🧹] Applied queued delete right after initial send for orig %s",
-                                                orig_mid,
-                                            )
-                                    else:
-                                        logger.debug(
-                                            "[🕒] Pending delete found but mapping re-read failed for orig %s",
-                                            orig_mid,
-                                        )
-                                finally:
-                                    self._pending_deletes.discard(orig_mid)
-                                    self._latest_edit_payload.pop(orig_mid, None)
-                                    self._inflight_events.pop(orig_mid, None)
-                            else:
-                                latest = self._latest_edit_payload.pop(orig_mid, None)
-                                if latest and row:
-                                    try:
-                                        await self._edit_with_row(row, latest, orig_mid)
-                                        logger.debug(
-                                            "[edit-coalesce] applied latest edit after initial send for orig %s",
-                                            orig_mid,
-                                        )
-                                    except Exception:
-                                        logger.debug(
-                                            "[edit-coalesce] immediate apply failed",
-                                            exc_info=True,
-                                        )
-                                self._inflight_events.pop(orig_mid, None)
                     except Exception:
                         logger.exception("upsert_message_mapping failed (clone-aware)")
 
@@ -9989,66 +10443,6 @@ class ServerReceiver:
                 result.append(emb)
         return result
 
-    async def _get_message_mappings_with_retry(
-        self,
-        original_message_id: int,
-        *,
-        attempts: int = 5,
-        base_delay: float = 0.08,
-        max_delay: float = 0.8,
-        jitter: float = 0.25,
-        log_prefix: str = "get-msg-maps",
-    ) -> list[dict]:
-        """
-        Retry helper to fetch ALL message-mapping rows for a given original message id.
-        """
-        delay = base_delay
-        for i in range(attempts):
-            try:
-                raw_rows = list(
-                    self.db.get_message_mappings_for_original(original_message_id) or []
-                )
-            except Exception:
-                raw_rows = []
-
-            if raw_rows:
-                norm_rows: list[dict] = []
-                for r in raw_rows:
-                    if isinstance(r, dict):
-                        norm_rows.append(r)
-                    else:
-                        try:
-                            norm_rows.append({k: r[k] for k in r.keys()})
-                        except Exception:
-                            logger.warning(
-                                "[%s] failed to normalize row for original_message_id=%s: %r",
-                                log_prefix,
-                                original_message_id,
-                                r,
-                            )
-                logger.debug(
-                    "[%s] found %d mapping row(s) for original_message_id=%s",
-                    log_prefix,
-                    len(norm_rows),
-                    original_message_id,
-                )
-                return norm_rows
-
-            if i < attempts - 1:
-                jd = jitter * (2 * (random.random() - 0.5)) if jitter else 0.0
-                await asyncio.sleep(max(0.0, min(max_delay, delay + jd)))
-                delay = min(max_delay, delay * 2)
-            else:
-                logger.debug(
-                    "[%s] no message mappings found for original_message_id=%s "
-                    "after %s attempt(s)",
-                    log_prefix,
-                    original_message_id,
-                    attempts,
-                )
-
-        return []
-
     def _token_row_context(self, row) -> tuple[str, str] | None:
         """(mapping_id, token_id) when this row was posted by a user token."""
         try:
@@ -10154,7 +10548,9 @@ class ServerReceiver:
 
         try:
             if self.session is None or self.session.closed:
-                self.session = aiohttp.ClientSession()
+                self.session = aiohttp.ClientSession(
+                    trace_configs=[self.ratelimit.trace_config]
+                )
             wh = Webhook.from_url(webhook_url, session=self.session)
             with self._clone_log_label(clone_gid):
                 try:
@@ -10259,7 +10655,13 @@ class ServerReceiver:
 
         resend = dict(data)
         resend["__limit_clone_cids__"] = list(allowed)
-        await self.forward_message(resend)
+        # Through the lanes, so the resend lands behind anything still queued
+        # for the channel rather than overtaking it.
+        self._pending_sends.begin(_safe_mid(resend) or 0)
+        await self._forward_lanes.submit(
+            int(resend.get("channel_id") or 0),
+            lambda: self.forward_message(resend),
+        )
 
     async def handle_message_edit(self, data: dict):
         """
@@ -10311,78 +10713,33 @@ class ServerReceiver:
 
             return await self._edit_with_row(row, payload, orig_mid)
 
-        rows = []
-        try:
-            rows = self.db.get_message_mappings_for_original(orig_mid) or []
-        except Exception:
-            rows = []
-
-        rows = [dict(r) if not isinstance(r, dict) else r for r in rows]
-
-        if rows:
-
-            payload = self._latest_edit_payload.pop(orig_mid, data)
-
-            edited_any = False
-            for r in rows:
-                cg = int((r or {}).get("cloned_guild_id") or 0)
-                with self._clone_log_label(cg):
-                    ok = await _maybe_edit_for_row(r, payload)
-                edited_any = edited_any or ok
-            if not edited_any:
-                logger.debug(
-                    "[✏️] No edits performed for orig %s (all disabled or failed). Attempting resend.",
-                    orig_mid,
-                )
-                await self._fallback_resend_edit(payload, orig_mid)
-            return
-
-        ev = self._inflight_events.get(orig_mid)
-        if ev and not ev.is_set():
-
+        if self._pending_sends.is_pending(orig_mid):
+            # The send may still be queued behind a long lane, so never resend
+            # here: park the newest payload and let the send's completion
+            # apply it once, the same way queued deletes are replayed.
             self._latest_edit_payload[orig_mid] = data
-            try:
-                await asyncio.wait_for(ev.wait(), timeout=5.0)
-            except asyncio.TimeoutError:
-
-                await self._fallback_resend_edit(data, orig_mid)
-                return
-
-            try:
-                rows = self.db.get_message_mappings_for_original(orig_mid) or []
-            except Exception:
-                rows = []
-
-            rows = [dict(r) if not isinstance(r, dict) else r for r in rows]
-            payload = self._latest_edit_payload.pop(orig_mid, data)
-            if rows:
-                for r in rows:
-                    await _maybe_edit_for_row(r, payload)
-                self._inflight_events.pop(orig_mid, None)
-                return
-
-            await self._fallback_resend_edit(payload, orig_mid)
+            logger.debug("[✏️] Edit parked until send finishes for orig %s", orig_mid)
             return
 
-        self._latest_edit_payload[orig_mid] = data
-        rows = await self._get_mappings_with_retry(
-            orig_mid,
-            attempts=5,
-            base_delay=0.08,
-            max_delay=0.8,
-            jitter=0.25,
-            log_prefix="edit-wait",
-        )
+        rows = self._message_mappings(orig_mid)
         payload = self._latest_edit_payload.pop(orig_mid, data)
 
-        if rows:
-            for r in rows:
-                if not isinstance(r, dict):
-                    r = dict(r)
-                await _maybe_edit_for_row(r, payload)
+        if not rows:
+            await self._fallback_resend_edit(payload, orig_mid)
             return
 
-        await self._fallback_resend_edit(payload, orig_mid)
+        edited_any = False
+        for r in rows:
+            cg = int((r or {}).get("cloned_guild_id") or 0)
+            with self._clone_log_label(cg):
+                ok = await _maybe_edit_for_row(r, payload)
+            edited_any = edited_any or ok
+        if not edited_any:
+            logger.debug(
+                "[✏️] No edits performed for orig %s (all disabled or failed). Attempting resend.",
+                orig_mid,
+            )
+            await self._fallback_resend_edit(payload, orig_mid)
 
     async def forward_to_webhook(self, msg_data: dict, webhook_url: str):
         async with self.session.post(
@@ -10404,6 +10761,16 @@ class ServerReceiver:
         if self._shutting_down:
             return
 
+        self._pending_sends.begin(_safe_mid(data) or 0)
+        try:
+            return await self._handle_thread_message_inner(data)
+        finally:
+            await self._finish_pending_send(data, self._pending_thread_msgs)
+
+    async def _handle_thread_message_inner(self, data: dict):
+        if self._shutting_down:
+            return
+
         try:
             parent_id = int(data.get("thread_parent_id") or 0)
             orig_tid = int(data.get("thread_id") or 0)
@@ -10811,7 +11178,9 @@ class ServerReceiver:
                     continue
 
                 if self.session is None or self.session.closed:
-                    self.session = aiohttp.ClientSession()
+                    self.session = aiohttp.ClientSession(
+                        trace_configs=[self.ratelimit.trace_config]
+                    )
 
                 thread_webhook = Webhook.from_url(webhook_url, session=self.session)
 
@@ -10825,8 +11194,8 @@ class ServerReceiver:
                     sem = None
                     rl_key_backfill = webhook_url
 
-                lock = self._thread_locks.setdefault(
-                    _thread_lock_key(orig_tid, guild.id), asyncio.Lock()
+                lock = self._thread_locks.get_or_create(
+                    _thread_lock_key(orig_tid, guild.id)
                 )
 
                 def _thread_mapping(thread_id: int) -> dict:
@@ -11003,7 +11372,7 @@ class ServerReceiver:
                         )
                         used_url = getattr(wh, "url", None)
 
-                        self.db.upsert_message_mapping(
+                        self._store_message_mapping(
                             original_guild_id=orig_gid,
                             original_channel_id=orig_cid,
                             original_message_id=orig_mid,
@@ -11233,11 +11602,8 @@ class ServerReceiver:
                                 for cand in candidates:
                                     try:
                                         starter_maps = (
-                                            await self._get_message_mappings_with_retry(
-                                                cand,
-                                                attempts=6,
-                                                base_delay=0.2,
-                                                log_prefix=f"thread-starter-{cand}",
+                                            await self._await_message_mappings(
+                                                cand, timeout=5.0
                                             )
                                         )
                                     except Exception:
@@ -12006,6 +12372,7 @@ class ServerReceiver:
                                 original_guild_id=int(data.get("guild_id") or 0),
                                 cloned_guild_id=int(guild.id),
                             )
+                            self._track_clone_thread(guild.id, clone_thread)
 
                             if created:
                                 await self._emit_event_log(
@@ -12713,6 +13080,32 @@ class ServerReceiver:
         self._prune_task = asyncio.create_task(_runner(), name="prune-old-messages")
         return self._prune_task
 
+    def _flush_message_mappings_loop(self) -> asyncio.Task:
+        """Write out buffered message mappings once they reach the flush
+        delay, so a quiet channel's last few mappings don't sit in memory
+        until the next burst fills the batch.
+        """
+        if getattr(self, "_mapping_flush_task", None) and not self._mapping_flush_task.done():
+            return self._mapping_flush_task
+
+        interval = max(0.05, self.config.MSG_MAPPING_FLUSH_MS / 1000.0)
+
+        async def _runner():
+            try:
+                while True:
+                    await asyncio.sleep(interval)
+                    try:
+                        self.db.flush_message_mappings(only_if_due=True)
+                    except Exception:
+                        logger.exception("[💾] flushing message mappings failed")
+            except asyncio.CancelledError:
+                raise
+
+        self._mapping_flush_task = asyncio.create_task(
+            _runner(), name="flush-message-mappings"
+        )
+        return self._mapping_flush_task
+
     def _reap_idle_tls_sessions_loop(self) -> asyncio.Task:
         """Periodically close user-token curl_cffi sessions — and their
         associated lock/cooldown/rotation bookkeeping in the token sender —
@@ -12817,6 +13210,7 @@ class ServerReceiver:
         )
 
     def _clear_message_mapping(self, orig_mid: int) -> None:
+        self._pending_sends.forget(orig_mid)
         try:
             self.db.delete_message_mapping(orig_mid)
         except Exception:
@@ -12913,7 +13307,9 @@ class ServerReceiver:
 
         try:
             if self.session is None or self.session.closed:
-                self.session = aiohttp.ClientSession()
+                self.session = aiohttp.ClientSession(
+                    trace_configs=[self.ratelimit.trace_config]
+                )
             wh = Webhook.from_url(webhook_url, session=self.session)
 
             clone_gid = int(row.get("cloned_guild_id") or 0)
@@ -12938,6 +13334,7 @@ class ServerReceiver:
             )
             return False
 
+        self._pending_sends.forget(orig_mid)
         try:
             self.db.delete_message_mapping(orig_mid)
         except Exception:
@@ -13005,75 +13402,36 @@ class ServerReceiver:
 
             return await self._delete_with_row(r, orig_mid, channel_name)
 
-        rows = []
-        try:
-            rows = self.db.get_message_mappings_for_original(orig_mid) or []
-        except Exception:
-            rows = []
-
-        if rows:
-            deleted_any = False
-            for r in rows:
-                cg = int(
-                    (dict(r) if not isinstance(r, dict) else r).get("cloned_guild_id")
-                    or 0
-                )
-                with self._clone_log_label(cg):
-                    ok = await _maybe_delete_for_row(r)
-                deleted_any = deleted_any or ok
-            if not deleted_any:
-                logger.debug(
-                    "[🗑️] No deletes performed for orig %s (all disabled or failed).",
-                    orig_mid,
-                )
-            return
-
-        ev = self._inflight_events.get(orig_mid)
-        if ev and not ev.is_set():
-            self._pending_deletes.add(orig_mid)
-            try:
-                await asyncio.wait_for(ev.wait(), timeout=7.0)
-            except asyncio.TimeoutError:
+        if self._pending_sends.is_pending(orig_mid):
+            # The send's completion replays this delete, so a timeout here
+            # just leaves it queued.
+            self._pending_deletes[orig_mid] = data
+            if await self._pending_sends.wait(orig_mid, timeout=7.0) is None:
                 logger.debug(
                     "[🕒] Delete queued; mapping not ready yet for orig %s", orig_mid
                 )
-                return
-
-            try:
-                rows = self.db.get_message_mappings_for_original(orig_mid) or []
-            except Exception:
-                rows = []
-
-            if rows:
-                for r in rows:
-                    await _maybe_delete_for_row(r)
-                self._pending_deletes.discard(orig_mid)
-                self._inflight_events.pop(orig_mid, None)
-                return
+            return
 
+        rows = self._message_mappings(orig_mid)
+        if not rows:
+            self._pending_deletes[orig_mid] = data
             logger.debug(
-                "[🕒] Delete remains queued; mapping still missing for orig %s",
+                "[🕒] Delete queued with no mapping/in-flight info for orig %s",
                 orig_mid,
             )
             return
 
-        rows = await self._get_mappings_with_retry(
-            orig_mid,
-            attempts=5,
-            base_delay=0.08,
-            max_delay=0.8,
-            jitter=0.25,
-            log_prefix="delete-wait",
-        )
-        if rows:
-            for r in rows:
-                await _maybe_delete_for_row(r)
-            return
-
-        self._pending_deletes.add(orig_mid)
-        logger.debug(
-            "[🕒] Delete queued with no mapping/in-flight info for orig %s", orig_mid
-        )
+        deleted_any = False
+        for r in rows:
+            cg = int((r or {}).get("cloned_guild_id") or 0)
+            with self._clone_log_label(cg):
+                ok = await _maybe_delete_for_row(r)
+            deleted_any = deleted_any or ok
+        if not deleted_any:
+            logger.debug(
+                "[🗑️] No deletes performed for orig %s (all disabled or failed).",
+                orig_mid,
+            )
 
     def _pick_verify_guild_id(self) -> int | None:
         """
@@ -13210,12 +13568,13 @@ class ServerReceiver:
 
     async def _load_blocked_keywords_cache(self) -> None:
         """
-        Load all blocked keywords from DB and compile regex patterns.
-        Builds cache for all (original_guild_id, cloned_guild_id) pairs.
-        Called at startup and after keyword updates.
+        Load all blocked keywords from DB, grouped by
+        (original_guild_id, cloned_guild_id) scope. Matchers are compiled per
+        mapping on first use. Called at startup and after keyword updates.
         """
         async with self._blocked_keywords_lock:
             self._blocked_keywords_cache.clear()
+            self._blocked_matchers.clear()
 
             logger.debug("[keywords] Loading blocked keywords from database...")
 
@@ -13257,63 +13616,37 @@ class ServerReceiver:
                 key = (orig_gid, clone_gid)
                 grouped.setdefault(key, []).append(keyword)
 
-            total_patterns = 0
-            failed_patterns = 0
-
-            for key, keywords in grouped.items():
-                patterns = []
-                for keyword in keywords:
-                    try:
-                        regex = re.compile(
-                            rf"(?<!\w){re.escape(keyword)}(?!\w)",
-                            re.IGNORECASE,
-                        )
-                        patterns.append((regex, keyword))
-                        total_patterns += 1
-                    except Exception as e:
-                        failed_patterns += 1
-                        logger.warning(
-                            "[keywords] Failed to compile regex for keyword '%s': %s",
-                            keyword,
-                            e,
-                        )
-
-                if patterns:
-                    self._blocked_keywords_cache[key] = patterns
+            self._blocked_keywords_cache.update(grouped)
 
             logger.debug(
-                "[keywords] Loaded %d keyword patterns across %d mapping scopes (%d failed)",
-                total_patterns,
+                "[keywords] Loaded %d keywords across %d mapping scopes",
+                sum(len(v) for v in grouped.values()),
                 len(grouped),
-                failed_patterns,
             )
 
-    def _get_blocked_patterns_for_mapping(
+    def _blocked_matcher_for_mapping(
         self,
         original_guild_id: int,
         cloned_guild_id: int,
-    ) -> list[tuple[re.Pattern, str]]:
+    ) -> KeywordMatcher:
         """
-        Get compiled regex patterns for blocked keywords for a specific mapping.
-        Returns list of (pattern, keyword) tuples from the pre-loaded cache.
+        Blocked-keyword matcher for a specific mapping, built once from the
+        pre-loaded cache and reused until the keywords are reloaded.
 
-        Checks three scopes in order:
+        Combines three scopes:
         1. Mapping-specific (original_guild_id, cloned_guild_id)
         2. Host-level (original_guild_id, 0)
         3. Global (0, 0)
         """
-        patterns = []
-
-        key_mapping = (int(original_guild_id), int(cloned_guild_id))
-        patterns.extend(self._blocked_keywords_cache.get(key_mapping, []))
-
-        key_host = (int(original_guild_id), 0)
-        patterns.extend(self._blocked_keywords_cache.get(key_host, []))
-
-        key_global = (0, 0)
-        patterns.extend(self._blocked_keywords_cache.get(key_global, []))
-
-        return patterns
+        key = (int(original_guild_id), int(cloned_guild_id))
+        matcher = self._blocked_matchers.get(key)
+        if matcher is None:
+            keywords: list[str] = []
+            for scope in (key, (key[0], 0), (0, 0)):
+                keywords.extend(self._blocked_keywords_cache.get(scope, []))
+            matcher = KeywordMatcher(keywords, whole_word=True)
+            self._blocked_matchers[key] = matcher
+        return matcher
 
     async def _load_channel_name_blacklist_cache(self) -> None:
         async with self._channel_name_blacklist_lock:
@@ -13366,13 +13699,15 @@ class ServerReceiver:
 
     async def _load_word_rewrites_cache(self) -> None:
         """
-        Load all mapping word/phrase rewrites from DB and compile regex patterns.
+        Load all mapping word/phrase rewrites from DB, longest source first.
+        RewriteProgram compiles them per mapping.
 
         Cache structure:
-            {(original_guild_id, cloned_guild_id): [(pattern, replacement), ...]}
+            {(original_guild_id, cloned_guild_id): [(source, replacement), ...]}
         """
         async with self._word_rewrites_lock:
             self._word_rewrites_cache.clear()
+            self._rewrite_programs.clear()
 
             logger.debug("[rewrites] Loading word rewrites from database.")
 
@@ -13412,50 +13747,33 @@ class ServerReceiver:
                 grouped.setdefault(key, []).append((source, repl))
 
             total_patterns = 0
-            failed_patterns = 0
 
             for key, pairs in grouped.items():
-                patterns: list[tuple[re.Pattern, str]] = []
-
-                pairs_sorted = sorted(pairs, key=lambda p: len(p[0]), reverse=True)
-                for source, repl in pairs_sorted:
-                    try:
-
-                        regex = re.compile(re.escape(source), re.IGNORECASE)
-                        patterns.append((regex, repl))
-                        total_patterns += 1
-                    except Exception as e:
-                        failed_patterns += 1
-                        logger.warning(
-                            "[rewrites] Failed to compile regex for source '%s': %s",
-                            source,
-                            e,
-                        )
-
-                if patterns:
-                    self._word_rewrites_cache[key] = patterns
+                self._word_rewrites_cache[key] = sorted(
+                    pairs, key=lambda p: len(p[0]), reverse=True
+                )
+                total_patterns += len(pairs)
 
             logger.debug(
-                "[rewrites] Loaded %d rewrite patterns across %d mapping scopes (%d failed)",
+                "[rewrites] Loaded %d rewrite patterns across %d mapping scopes",
                 total_patterns,
                 len(grouped),
-                failed_patterns,
             )
 
     def _get_word_rewrites_for_mapping(
         self,
         original_guild_id: int,
         cloned_guild_id: int,
-    ) -> list[tuple[re.Pattern, str]]:
+    ) -> list[tuple[str, str]]:
         """
-        Get compiled rewrite patterns for a specific mapping.
+        Get (source, replacement) rewrites for a specific mapping.
 
         Checks three scopes in order:
         1. Mapping-specific (original_guild_id, cloned_guild_id)
         2. Host-level (original_guild_id, 0)
         3. Global (0, 0)
         """
-        patterns: list[tuple[re.Pattern, str]] = []
+        patterns: list[tuple[str, str]] = []
 
         key_mapping = (int(original_guild_id), int(cloned_guild_id))
         patterns.extend(self._word_rewrites_cache.get(key_mapping, []))
@@ -13497,18 +13815,12 @@ class ServerReceiver:
         if not content:
             return False, None
 
-        normalized = unicodedata.normalize("NFKC", content)
-
-        patterns = self._get_blocked_patterns_for_mapping(
-            original_guild_id,
-            cloned_guild_id,
-        )
-
-        for pattern, keyword in patterns:
-            if pattern.search(normalized):
-                return True, keyword
+        matcher = self._blocked_matcher_for_mapping(original_guild_id, cloned_guild_id)
+        if not matcher:
+            return False, None
 
-        return False, None
+        keyword = matcher.first(unicodedata.normalize("NFKC", content))
+        return (True, keyword) if keyword else (False, None)
 
     async def _load_user_filters_cache(self) -> None:
         """
@@ -13642,6 +13954,8 @@ class ServerReceiver:
         hb = getattr(self, "_status_hb_task", None)
         if hb is not None:
             hb.cancel()
+        if getattr(self, "_sync_scheduler", None):
+            self._sync_scheduler.cancel_all()
         if getattr(self, "_send_tasks", None):
 
             for t in list(self._send_tasks):
@@ -13680,6 +13994,7 @@ class ServerReceiver:
             ws = getattr(self, "ws_manager", None) or getattr(self, "ws", None)
             if ws and hasattr(ws, "stop"):
                 await ws.stop()
+            await self.bus.stop()
         except Exception:
             logger.debug("[shutdown] ws stop failed", exc_info=True)
 
@@ -13703,6 +14018,9 @@ class ServerReceiver:
         await _cancel_and_wait(
             getattr(self, "_tls_reap_task", None), "reap-idle-tls-sessions"
         )
+        await _cancel_and_wait(
+            getattr(self, "_mapping_flush_task", None), "flush-message-mappings"
+        )
 
         setattr(self, "_suppress_backfill_dm", True)
         try:
@@ -13712,6 +14030,13 @@ class ServerReceiver:
         except Exception:
             logger.debug("[shutdown] backfill cleanup failed", exc_info=True)
 
+        try:
+            n = self.db.flush_message_mappings()
+            if n:
+                logger.info("[💾] Flushed %d buffered message mappings", n)
+        except Exception:
+            logger.exception("[shutdown] flushing message mappings failed")
+
         try:
             if getattr(self, "session", None) and not self.session.closed:
                 await self.session.close()
@@ -13757,6 +14082,8 @@ class ServerReceiver:
             for task in pending:
                 task.cancel()
             loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            with contextlib.suppress(Exception):
+                self.db.flush_message_mappings()
 
 
 def _autostart_enabled() -> bool:
@@ -436,7 +436,9 @@ class StickerManager:
             raw = None
             try:
                 if self.session is None or self.session.closed:
-                    self.session = aiohttp.ClientSession()
+                    self.session = aiohttp.ClientSession(
+                        trace_configs=[self.ratelimit.trace_config]
+                    )
                 async with self.session.get(url) as resp:
                     raw = await resp.read()
             except Exception as e:
@@ -0,0 +1,528 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from discord import ChannelType
+
+logger = logging.getLogger("server")
+
+_CATEGORY = ChannelType.category.value
+_TEXT = ChannelType.text.value
+_NEWS = ChannelType.news.value
+_VOICE = ChannelType.voice.value
+_STAGE = ChannelType.stage_voice.value
+_FORUM = ChannelType.forum.value
+
+# Execution order: creations first (they unblock forwarding), then edits,
+# category renames, and removals last so nothing is deleted from under a
+# channel that is still being moved out of it.
+OP_ORDER = (
+    "create_category",
+    "create_channel",
+    "edit_channel",
+    "edit_category",
+    "delete_channel",
+    "unmap_channel",
+    "delete_category",
+    "unmap_category",
+)
+
+# What a plan covers. The sync runs other passes the planner knows nothing
+# about, so a dry run reports them instead of implying they have nothing to do.
+PLANNED_PHASES = (
+    "categories",  # create, rename, remove
+    "channels",  # create, rename, news conversion, remove
+    "channel_metadata",  # topic, nsfw, slowmode
+    "layout",  # parent category and position
+)
+UNPLANNED_PHASES = (
+    "forum_properties",
+    "voice_properties",
+    "webhooks",
+    "community",
+    "guild_metadata",
+    "threads",
+)
+
+
+@dataclass
+class ChannelState:
+    id: int
+    name: str
+    type: int
+    parent_id: Optional[int] = None
+    position: int = 0
+    topic: Optional[str] = None
+    nsfw: bool = False
+    slowmode_delay: int = 0
+
+
+@dataclass
+class CloneSnapshot:
+    """What the planner needs to know about the clone guild, as plain data."""
+
+    guild_id: int
+    features: frozenset = frozenset()
+    channels: Dict[int, ChannelState] = field(default_factory=dict)
+    protected_ids: frozenset = frozenset()
+
+    @classmethod
+    def from_guild(cls, guild) -> "CloneSnapshot":
+        channels = {}
+        for ch in guild.channels:
+            t = getattr(ch, "type", None)
+            channels[int(ch.id)] = ChannelState(
+                id=int(ch.id),
+                name=ch.name or "",
+                type=int(getattr(t, "value", t) or 0),
+                parent_id=getattr(ch, "category_id", None),
+                position=int(getattr(ch, "position", 0) or 0),
+                topic=getattr(ch, "topic", None),
+                nsfw=bool(getattr(ch, "nsfw", False)),
+                slowmode_delay=int(getattr(ch, "slowmode_delay", 0) or 0),
+            )
+        protected = {
+            int(c.id)
+            for c in (
+                getattr(guild, a, None)
+                for a in ("rules_channel", "public_updates_channel", "system_channel")
+            )
+            if c
+        }
+        return cls(
+            guild_id=int(guild.id),
+            features=frozenset(getattr(guild, "features", None) or ()),
+            channels=channels,
+            protected_ids=frozenset(protected),
+        )
+
+    def get(self, channel_id: Optional[int]) -> Optional[ChannelState]:
+        return self.channels.get(int(channel_id)) if channel_id else None
+
+
+@dataclass
+class PlanOp:
+    kind: str
+    origin_id: Optional[int] = None
+    clone_id: Optional[int] = None
+    name: Optional[str] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "origin_id": str(self.origin_id) if self.origin_id else None,
+            "clone_id": str(self.clone_id) if self.clone_id else None,
+            "name": self.name,
+            "fields": {
+                k: (str(v) if k.endswith("_id") and v is not None else v)
+                for k, v in self.fields.items()
+            },
+        }
+
+
+@dataclass
+class StructurePlan:
+    guild_id: int
+    ops: List[PlanOp] = field(default_factory=list)
+
+    def of(self, kind: str) -> List[PlanOp]:
+        return [op for op in self.ops if op.kind == kind]
+
+    def parent_moves(self) -> List[PlanOp]:
+        """Channel edits that change the parent category."""
+        return [op for op in self.of("edit_channel") if "parent_id" in op.fields]
+
+    def layout_changes(self) -> List[PlanOp]:
+        """Category and channel edits that move or reorder something."""
+        return [
+            op
+            for op in self.ops
+            if op.kind in ("edit_channel", "edit_category")
+            and ("parent_id" in op.fields or "position" in op.fields)
+        ]
+
+    def summary(self) -> Dict[str, int]:
+        return dict(Counter(op.kind for op in self.ops))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "guild_id": str(self.guild_id),
+            "summary": self.summary(),
+            "ops": [op.to_dict() for op in self.ops],
+        }
+
+
+def _blacklisted(name: str, patterns: Iterable[str]) -> bool:
+    """Same matching as CHANNEL_NAME_BLACKLIST in the sync phases."""
+    name = (name or "").lower()
+    for p in patterns or ():
+        if "*" in p or "?" in p:
+            if fnmatch(name, p):
+                return True
+        elif p in name:
+            return True
+    return False
+
+
+def incoming_channels(sitemap: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Every host channel the sitemap carries, with its parent category id."""
+    out = []
+    for cat in sitemap.get("categories") or ():
+        for ch in cat.get("channels") or ():
+            out.append({**ch, "parent_id": cat["id"]})
+    for ch in sitemap.get("standalone_channels") or ():
+        out.append({**ch, "parent_id": None})
+    for fm in sitemap.get("forums") or ():
+        out.append({**fm, "type": _FORUM, "parent_id": fm.get("category_id")})
+    return out
+
+
+_CATEGORIES = "categories"
+
+
+def _host_rank(entry: Mapping[str, Any]):
+    """Host display order; entries without a position keep sitemap order."""
+    pos = entry.get("position")
+    return (0, int(pos), int(entry["id"])) if pos is not None else (1, 0, 0)
+
+
+def _bucket(ctype: int) -> int:
+    """Discord lists voice-type channels after text-type ones in a parent."""
+    return 1 if ctype in (_VOICE, _STAGE) else 0
+
+
+def _container_of(ch: ChannelState) -> Any:
+    if ch.type == _CATEGORY:
+        return _CATEGORIES
+    return (ch.parent_id, _bucket(ch.type))
+
+
+def _longest_increasing(seq: List[int]) -> List[int]:
+    """Indices of one longest strictly increasing subsequence, O(n log n)."""
+    tails: List[int] = []  # tails[k]: index ending the best run of length k+1
+    prev: List[int] = [-1] * len(seq)
+    for i, v in enumerate(seq):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if seq[tails[mid]] < v:
+                lo = mid + 1
+            else:
+                hi = mid
+        prev[i] = tails[lo - 1] if lo else -1
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+    out, i = [], tails[-1] if tails else -1
+    while i != -1:
+        out.append(i)
+        i = prev[i]
+    return out[::-1]
+
+
+def minimal_positions(desired: List[int], current: Mapping[int, int]) -> Dict[int, int]:
+    """
+    New positions that put `desired` (ids, in display order) in that order,
+    touching as few channels as possible.
+
+    `current` holds the position of every desired id already in this
+    container. The longest run of them that is already in order (by
+    position, then id, as Discord sorts) keeps its positions; every other
+    channel gets the lowest position that still sorts after its predecessor,
+    and a kept channel is only renumbered when such a placement has taken
+    its slot. Channels moving in from elsewhere have no current position and
+    are always placed.
+    """
+    present = [cid for cid in desired if cid in current]
+    order = {cid: r for r, cid in enumerate(sorted(present, key=lambda c: (current[c], c)))}
+    keep = {present[i] for i in _longest_increasing([order[c] for c in present])}
+
+    out: Dict[int, int] = {}
+    last: Optional[Tuple[int, int]] = None  # (position, id) of the previous channel
+    for cid in desired:
+        pos = current.get(cid)
+        if cid in keep and (last is None or (pos, cid) > last):
+            last = (pos, cid)
+            continue
+        new = 0 if last is None else last[0] + (cid < last[1])
+        last = (new, cid)
+        if pos != new:
+            out[cid] = new
+    return out
+
+
+def _int(v) -> Optional[int]:
+    try:
+        return int(v) if v is not None and v != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def plan_structure(
+    sitemap: Mapping[str, Any],
+    snapshot: CloneSnapshot,
+    *,
+    category_rows: Mapping[int, Mapping[str, Any]],
+    channel_rows: Mapping[int, Mapping[str, Any]],
+    settings: Mapping[str, Any],
+    name_blacklist: Iterable[str] = (),
+    rewrite_topic: Optional[Callable[[Optional[str]], Optional[str]]] = None,
+) -> StructurePlan:
+    """
+    Diff a sitemap against the clone in one pass and return every operation
+    a structure sync would perform, in execution order.
+
+    `category_rows` / `channel_rows` are this clone's mapping rows keyed by
+    host id (as in `cat_map_by_clone[clone]` / `chan_map_by_clone[clone]`).
+    Nothing here touches Discord or the database, so the same plan serves
+    as a dry run and as input to the executor.
+    """
+    rename = bool(settings.get("RENAME_CHANNELS", True))
+    reposition = bool(settings.get("REPOSITION_CHANNELS", True))
+    delete = bool(settings.get("DELETE_CHANNELS", False))
+    clone_voice = bool(settings.get("CLONE_VOICE", False))
+    clone_stage = bool(settings.get("CLONE_STAGE", False))
+    sync_topic = bool(settings.get("SYNC_CHANNEL_TOPIC", False))
+    sync_nsfw = bool(settings.get("SYNC_CHANNEL_NSFW", False))
+    sync_slowmode = bool(settings.get("SYNC_CHANNEL_SLOWMODE", False))
+    community = "COMMUNITY" in snapshot.features or bool(
+        (sitemap.get("community") or {}).get("enabled")
+    )
+    rewrite_topic = rewrite_topic or (lambda t: t)
+
+    ops: List[PlanOp] = []
+    # clone id -> the one merged edit_category / edit_channel for it
+    edits: Dict[int, PlanOp] = {}
+
+    def _edit(kind: str, oid: int, clone: ChannelState) -> Dict[str, Any]:
+        op = edits.get(clone.id)
+        if op is None:
+            op = edits[clone.id] = PlanOp(kind, origin_id=oid, clone_id=clone.id, name=clone.name)
+        return op.fields
+
+    # host category id -> clone category id, for categories that exist (or
+    # will: None marks "created by this plan, id not known yet")
+    cat_target: Dict[int, Optional[int]] = {}
+    host_cats = {int(c["id"]): c for c in sitemap.get("categories") or ()}
+    # layout container -> clone ids in host order; containers are the
+    # category list and, per parent, the text-like and the voice channels
+    layout: Dict[Any, List[int]] = {}
+    origin_of: Dict[int, int] = {}
+    for oid, cat in sorted(host_cats.items(), key=lambda kv: _host_rank(kv[1])):
+        row = category_rows.get(oid) or {}
+        clone = snapshot.get(_int(row.get("cloned_category_id")))
+        if clone is None or clone.type != _CATEGORY:
+            ops.append(PlanOp("create_category", origin_id=oid, name=cat["name"]))
+            cat_target[oid] = None
+            continue
+        cat_target[oid] = clone.id
+        layout.setdefault(_CATEGORIES, []).append(clone.id)
+        origin_of[clone.id] = oid
+        pinned = (row.get("cloned_category_name") or "").strip()
+        want = pinned or (cat["name"].strip() if rename else clone.name)
+        if clone.name.strip() != want:
+            _edit("edit_category", oid, clone)["name"] = want
+
+    incoming = incoming_channels(sitemap)
+    for ch in sorted(incoming, key=_host_rank):
+        oid = int(ch["id"])
+        ctype = int(ch.get("type") or 0)
+        name = ch.get("name") or ""
+        if _blacklisted(name, name_blacklist):
+            continue
+        if ctype == _VOICE and not clone_voice:
+            continue
+        if ctype == _STAGE and not (clone_stage and community):
+            continue
+
+        parent_origin = _int(ch.get("parent_id"))
+        row = channel_rows.get(oid) or {}
+        clone = snapshot.get(_int(row.get("cloned_channel_id")))
+        if clone is None:
+            ops.append(
+                PlanOp(
+                    "create_channel",
+                    origin_id=oid,
+                    name=name,
+                    fields={
+                        "type": ctype,
+                        "parent_origin_id": parent_origin,
+                        "parent_id": cat_target.get(parent_origin)
+                        if parent_origin
+                        else None,
+                    },
+                )
+            )
+            continue
+
+        fields: Dict[str, Any] = {}
+        pinned = (row.get("clone_channel_name") or "").strip()
+        want = pinned or (name.strip() if rename else clone.name)
+        if clone.name.strip() != want:
+            fields["name"] = want
+        if ctype == _NEWS and clone.type == _TEXT and "NEWS" in snapshot.features:
+            fields["type"] = _NEWS
+        if reposition:
+            parent = None
+            placed = True
+            if parent_origin in cat_target:
+                parent = cat_target[parent_origin]
+                # created by this plan, id not known yet: leave the channel alone
+                placed = parent is not None
+            elif parent_origin is not None:
+                # parent is not in the sitemap; fall back to its mapping, and
+                # to the root when that category is not mapped in this clone
+                prow = category_rows.get(parent_origin) or {}
+                pclone = snapshot.get(_int(prow.get("cloned_category_id")))
+                if pclone is not None and pclone.type == _CATEGORY:
+                    parent = pclone.id
+            if placed:
+                if parent != clone.parent_id:
+                    fields["parent_id"] = parent
+                layout.setdefault((parent, _bucket(clone.type)), []).append(clone.id)
+                origin_of[clone.id] = oid
+        if sync_topic and clone.type in (_TEXT, _NEWS, _FORUM):
+            src = ch.get("post_guidelines") if ctype == _FORUM else ch.get("topic")
+            want_topic = rewrite_topic(src)
+            if (clone.topic or None) != (want_topic or None):
+                fields["topic"] = want_topic
+        if sync_nsfw and bool(ch.get("nsfw")) != clone.nsfw:
+            fields["nsfw"] = bool(ch.get("nsfw"))
+        if sync_slowmode and clone.type != _FORUM and "slowmode_delay" in ch:
+            want_delay = max(0, min(21600, int(ch.get("slowmode_delay") or 0)))
+            if clone.slowmode_delay != want_delay:
+                fields["slowmode_delay"] = want_delay
+        if fields:
+            _edit("edit_channel", oid, clone).update(fields)
+
+    if reposition:
+        for container, desired in layout.items():
+            current = {
+                cid: snapshot.channels[cid].position
+                for cid in desired
+                if _container_of(snapshot.channels[cid]) == container
+            }
+            kind = "edit_category" if container == _CATEGORIES else "edit_channel"
+            for cid, pos in minimal_positions(desired, current).items():
+                _edit(kind, origin_of[cid], snapshot.channels[cid])["position"] = pos
+
+    ops.extend(edits.values())
+
+    host_ids = {int(c["id"]) for c in incoming}
+    for oid, row in channel_rows.items():
+        if int(oid) in host_ids:
+            continue
+        clone = snapshot.get(_int(row.get("cloned_channel_id")))
+        if clone and delete and clone.id not in snapshot.protected_ids:
+            ops.append(
+                PlanOp("delete_channel", origin_id=int(oid), clone_id=clone.id, name=clone.name)
+            )
+        else:
+            ops.append(
+                PlanOp(
+                    "unmap_channel",
+                    origin_id=int(oid),
+                    clone_id=clone.id if clone else None,
+                    name=row.get("original_channel_name"),
+                )
+            )
+
+    for oid, row in category_rows.items():
+        if int(oid) in host_cats:
+            continue
+        clone = snapshot.get(_int(row.get("cloned_category_id")))
+        kind = "delete_category" if clone and delete else "unmap_category"
+        ops.append(
+            PlanOp(
+                kind,
+                origin_id=int(oid),
+                clone_id=clone.id if clone else None,
+                name=clone.name if clone else row.get("original_category_name"),
+            )
+        )
+
+    rank = {k: i for i, k in enumerate(OP_ORDER)}
+    ops.sort(key=lambda op: rank[op.kind])
+    return StructurePlan(guild_id=snapshot.guild_id, ops=ops)
+
+
+async def apply_layout(
+    guild,
+    changes: List[PlanOp],
+    *,
+    before_request: Optional[Callable[[], Any]] = None,
+) -> List[PlanOp]:
+    """
+    Apply planned parent and position changes with one bulk
+    `PATCH /guilds/{id}/channels` instead of one channel edit each.
+    Existing permission overwrites are kept (`lock_permissions` is off).
+
+    If the bulk call is rejected (a channel vanished, a category is full),
+    the changes are retried one by one so a single bad entry does not
+    block the rest. Returns the changes that were applied.
+    """
+    if not changes:
+        return []
+    payload = []
+    for op in changes:
+        entry: Dict[str, Any] = {"id": str(op.clone_id)}
+        if "parent_id" in op.fields:
+            parent_id = op.fields["parent_id"]
+            entry["parent_id"] = str(parent_id) if parent_id else None
+            entry["lock_permissions"] = False
+        if "position" in op.fields:
+            entry["position"] = int(op.fields["position"])
+        payload.append(entry)
+    try:
+        if before_request:
+            await before_request()
+        await guild._state.http.bulk_channel_update(
+            guild.id, payload, reason="Copycord channel sync"
+        )
+        return list(changes)
+    except Exception as e:
+        logger.warning(
+            "[reparent] Bulk update of %d channels failed (%s); applying one by one",
+            len(changes),
+            e,
+        )
+
+    done = []
+    for op in changes:
+        ch = guild.get_channel(int(op.clone_id))
+        if ch is None:
+            continue
+        kwargs: Dict[str, Any] = {}
+        if "parent_id" in op.fields:
+            parent_id = op.fields["parent_id"]
+            kwargs["category"] = guild.get_channel(int(parent_id)) if parent_id else None
+        if "position" in op.fields:
+            kwargs["position"] = int(op.fields["position"])
+        try:
+            if before_request:
+                await before_request()
+            await ch.edit(**kwargs)
+            done.append(op)
+        except Exception:
+            logger.warning(
+                "[reparent:failed] ch=%r id=%d (%s)",
+                getattr(ch, "name", "?"),
+                int(ch.id),
+                kwargs,
+                exc_info=True,
+            )
+    return done
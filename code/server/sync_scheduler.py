@@ -0,0 +1,186 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger("server")
+
+
+def _clone_id(key: Hashable) -> str:
+    return str(key[1] if isinstance(key, tuple) else key)
+
+
+@dataclass
+class SyncJob:
+    key: Hashable  # clone guild id, or (host guild id, 0) if none resolved
+    origin: int  # host guild id
+    label: str  # task display id
+    factory: Callable[[], Awaitable[Any]]
+    on_done: Optional[Callable[[asyncio.Task], None]] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    seq: int = 0
+    queued_at: float = 0.0
+
+
+class SyncScheduler:
+    """
+    Runs structure syncs for different clone guilds concurrently, at most
+    `concurrency` at once, one per clone.
+
+    A clone has at most one queued job: a newer sitemap replaces the queued
+    one in place (keeping its turn) and cancels the clone's running sync,
+    whose slot then goes to the newest job. Free slots go to clones whose
+    origin has live messages waiting on structure (`hot_origins()`), then in
+    arrival order. `snapshot()` reports each clone's state, queue position
+    and estimated wait from the recent sync durations; `on_change` fires
+    whenever that picture changes.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 4,
+        hot_origins: Callable[[], Set[int]] = set,
+        on_change: Optional[Callable[[], None]] = None,
+        default_duration: float = 30.0,
+    ) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self._hot_origins = hot_origins
+        self._on_change = on_change
+        self._pending: Dict[Hashable, SyncJob] = {}
+        self._running: Dict[Hashable, tuple[asyncio.Task, SyncJob, float]] = {}
+        self._seq = 0
+        # Moving averages of how long a sync takes, per clone and overall.
+        self._durations: Dict[Hashable, float] = {}
+        self._avg = float(default_duration)
+
+    def submit(self, job: SyncJob) -> None:
+        """Queue `job`, superseding whatever is queued or running for its clone."""
+        prev = self._pending.get(job.key)
+        if prev is not None:
+            job.seq, job.queued_at = prev.seq, prev.queued_at
+        else:
+            self._seq += 1
+            job.seq, job.queued_at = self._seq, time.monotonic()
+        self._pending[job.key] = job
+
+        running = self._running.get(job.key)
+        if running and not running[0].done():
+            running[0].cancel()
+            logger.info(
+                "[♻️] Canceling running sync for clone %s — newer sitemap arrived",
+                job.key,
+            )
+        self._dispatch()
+
+    def running_task(self, key: Hashable) -> Optional[asyncio.Task]:
+        entry = self._running.get(key)
+        return entry[0] if entry else None
+
+    def cancel_all(self) -> None:
+        self._pending.clear()
+        for task, _, _ in list(self._running.values()):
+            task.cancel()
+
+    def _order(self, hot: Set[int]) -> List[SyncJob]:
+        """Queued jobs in the order free slots would take them."""
+        return sorted(
+            self._pending.values(), key=lambda j: (j.origin not in hot, j.seq)
+        )
+
+    def _dispatch(self) -> None:
+        hot = self._hot_origins() if self._pending else set()
+        for job in self._order(hot):
+            if len(self._running) >= self.concurrency:
+                break
+            if job.key in self._running:
+                continue  # its superseded sync is still unwinding
+            del self._pending[job.key]
+            task = asyncio.create_task(job.factory())
+            self._running[job.key] = (task, job, time.monotonic())
+            task.add_done_callback(lambda t, _job=job: self._finished(_job, t))
+        self._changed()
+
+    def _finished(self, job: SyncJob, task: asyncio.Task) -> None:
+        entry = self._running.get(job.key)
+        if entry and entry[0] is task:
+            del self._running[job.key]
+            if not task.cancelled():
+                took = time.monotonic() - entry[2]
+                prev = self._durations.get(job.key)
+                self._durations[job.key] = took if prev is None else 0.5 * prev + 0.5 * took
+                self._avg = 0.8 * self._avg + 0.2 * took
+        if job.on_done:
+            try:
+                job.on_done(task)
+            except Exception:
+                logger.exception("sync done-callback failed for clone %s", job.key)
+        self._dispatch()
+
+    def _estimate(self, key: Hashable) -> float:
+        return self._durations.get(key, self._avg)
+
+    def _changed(self) -> None:
+        if self._on_change:
+            try:
+                self._on_change()
+            except Exception:
+                logger.debug("sync queue change hook failed", exc_info=True)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Running syncs with their estimated time left, then queued ones with
+        their 1-based position and estimated wait before they start.
+        """
+        now = time.monotonic()
+        out: List[Dict[str, Any]] = []
+        free_at: List[float] = []
+        busy_until: Dict[Hashable, float] = {}
+        for key, (_, job, started) in self._running.items():
+            left = max(0.0, self._estimate(key) - (now - started))
+            free_at.append(left)
+            busy_until[key] = left
+            out.append(
+                {
+                    **job.meta,
+                    "cloned_guild_id": _clone_id(key),
+                    "original_guild_id": str(job.origin),
+                    "task": job.label,
+                    "state": "running",
+                    "elapsed_sec": round(now - started, 1),
+                    "eta_sec": round(left, 1),
+                }
+            )
+        free_at.extend([0.0] * max(0, self.concurrency - len(free_at)))
+        heapq.heapify(free_at)
+
+        hot = self._hot_origins() if self._pending else set()
+        for pos, job in enumerate(self._order(hot), 1):
+            start = max(heapq.heappop(free_at), busy_until.get(job.key, 0.0))
+            heapq.heappush(free_at, start + self._estimate(job.key))
+            out.append(
+                {
+                    **job.meta,
+                    "cloned_guild_id": _clone_id(job.key),
+                    "original_guild_id": str(job.origin),
+                    "task": job.label,
+                    "state": "queued",
+                    "position": pos,
+                    "priority": job.origin in hot,
+                    "waited_sec": round(now - job.queued_at, 1),
+                    "eta_sec": round(start, 1),
+                }
+            )
+        return out
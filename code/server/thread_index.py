@@ -0,0 +1,128 @@
+# =============================================================================
+#  Copycord
+#  Copyright (C) 2025 github.com/Copycord
+#
+#  This source code is released under the GNU Affero General Public License
+#  version 3.0. A copy of the license is available at:
+#  https://www.gnu.org/licenses/agpl-3.0.en.html
+# =============================================================================
+from __future__ import annotations
+
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ActiveThreadIndex:
+    """
+    Mapped, unarchived clone threads per clone guild, oldest first.
+
+    Each guild keeps the set of clone thread ids that have a mapping row and
+    a min-heap of (created, thread_id) for the ones that are active, so the
+    thread limit can be enforced in O(log n) per archive instead of a scan
+    over every mapping and every cached thread. Archives and deletes only
+    drop the id from `_active`; their heap entries are skipped when they
+    surface and compacted away once they outnumber the live ones.
+
+    A guild is unknown until `reset` seeds it from the mapping table and the
+    gateway cache; events for unknown guilds are ignored, since the next
+    `reset` sees their effect anyway. `reset` is also the periodic
+    reconciliation that corrects anything the events missed.
+    """
+
+    def __init__(self) -> None:
+        self._mapped: Dict[int, Set[int]] = {}
+        self._active: Dict[int, Dict[int, float]] = {}
+        self._heaps: Dict[int, List[Tuple[float, int]]] = {}
+        self._seeded_at: Dict[int, float] = {}
+
+    def reset(
+        self,
+        guild_id: int,
+        mapped_ids: Iterable[int],
+        active: Iterable[Tuple[int, float]],
+    ) -> None:
+        """Rebuild `guild_id` from its mapped ids and its (id, created) active threads."""
+        mapped = set(mapped_ids)
+        live = {tid: created for tid, created in active if tid in mapped}
+        heap = [(created, tid) for tid, created in live.items()]
+        heapq.heapify(heap)
+        self._mapped[guild_id] = mapped
+        self._active[guild_id] = live
+        self._heaps[guild_id] = heap
+        self._seeded_at[guild_id] = time.monotonic()
+
+    def drop(self, guild_id: int) -> None:
+        for d in (self._mapped, self._active, self._heaps, self._seeded_at):
+            d.pop(guild_id, None)
+
+    def seeded(self, guild_id: int) -> bool:
+        return guild_id in self._seeded_at
+
+    def stale(self, guild_id: int, max_age: float) -> bool:
+        """True when `guild_id` was never seeded or was seeded over `max_age` seconds ago."""
+        at = self._seeded_at.get(guild_id)
+        return at is None or time.monotonic() - at > max_age
+
+    def count(self, guild_id: int) -> int:
+        return len(self._active.get(guild_id, ()))
+
+    def track(
+        self, guild_id: int, thread_id: int, created: float, *, active: bool = True
+    ) -> None:
+        """Record a mapping upsert for `thread_id`, active unless told otherwise."""
+        mapped = self._mapped.get(guild_id)
+        if mapped is None:
+            return
+        mapped.add(thread_id)
+        if active:
+            self.activate(guild_id, thread_id, created)
+        else:
+            self.deactivate(guild_id, thread_id)
+
+    def activate(self, guild_id: int, thread_id: int, created: float) -> None:
+        """A mapped thread was created or unarchived."""
+        live = self._active.get(guild_id)
+        if live is None or thread_id in live or thread_id not in self._mapped[guild_id]:
+            return
+        live[thread_id] = created
+        heapq.heappush(self._heaps[guild_id], (created, thread_id))
+
+    def deactivate(self, guild_id: int, thread_id: int) -> None:
+        """A thread was archived; it stays mapped."""
+        live = self._active.get(guild_id)
+        if live is not None and live.pop(thread_id, None) is not None:
+            self._maybe_compact(guild_id)
+
+    def forget(self, guild_id: Optional[int], thread_id: int) -> None:
+        """A thread or its mapping is gone; `guild_id=None` searches every guild."""
+        guilds = self._mapped if guild_id is None else (guild_id,)
+        for gid in list(guilds):
+            mapped = self._mapped.get(gid)
+            if mapped is not None and thread_id in mapped:
+                mapped.discard(thread_id)
+                self.deactivate(gid, thread_id)
+
+    def overflow(self, guild_id: int, limit: int) -> List[int]:
+        """
+        Remove and return the oldest active threads beyond `limit`, oldest
+        first. The caller archives them, or `activate`s them again if that
+        fails.
+        """
+        live = self._active.get(guild_id)
+        if not live or len(live) <= limit:
+            return []
+        heap = self._heaps[guild_id]
+        out: List[int] = []
+        while len(live) > limit and heap:
+            created, tid = heapq.heappop(heap)
+            if live.get(tid) == created:
+                del live[tid]
+                out.append(tid)
+        return out
+
+    def _maybe_compact(self, guild_id: int) -> None:
+        live, heap = self._active[guild_id], self._heaps[guild_id]
+        if len(heap) > 2 * len(live) + 64:
+            heap[:] = [(c, t) for c, t in heap if live.get(t) == c]
+            heapq.heapify(heap)
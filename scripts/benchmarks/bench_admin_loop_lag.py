@@ -0,0 +1,100 @@
+"""
+Load test: admin event-loop lag while the dashboard hammers DB-backed routes.
+
+Seeds a scratch database with event logs, then drives the real FastAPI app
+in-process (httpx + ASGITransport) with concurrent dashboard clients polling
+/api/event-logs (a LIKE search over every row) and /api/guild-mappings. A probe
+coroutine sleeps 5ms in a loop and records how late it wakes up: that
+overshoot is what the /bus websocket, SSE log streams and BusHub fan-out
+would see. Compares handlers calling the DB inline (ADMIN_DB_WORKERS=0, the
+old behaviour) with the AsyncDB worker pool.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_admin_loop_lag.py [--rows 100000] [-c 8] [-s 5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+_tmp = tempfile.mkdtemp(prefix="cc-bench-")
+os.environ.setdefault("DATA_DIR", _tmp)
+os.environ.setdefault("DB_PATH", os.path.join(_tmp, "bench.db"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+import admin.app as app_mod  # noqa: E402
+from common.async_db import AsyncDB  # noqa: E402
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _seed(rows: int) -> None:
+    db = app_mod.db
+    with db.lock, db.conn:
+        db.conn.executemany(
+            "INSERT INTO event_logs (log_id, event_type, guild_id, guild_name, details, created_at)"
+            " VALUES (?, ?, ?, ?, ?, CAST(strftime('%s','now') AS INTEGER))",
+            (
+                (uuid.uuid4().hex[:12], f"type{i % 7}", i % 13, "Guild", f"event number {i} ok")
+                for i in range(rows)
+            ),
+        )
+
+
+async def _run(workers: int, clients: int, seconds: float):
+    app_mod.adb = AsyncDB(app_mod.db, max_workers=workers, name="bench-db")
+    lag: list[float] = []
+    served = 0
+    stop = asyncio.Event()
+
+    async def probe():
+        while not stop.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag.append((time.perf_counter() - t) * 1000 - 5)
+
+    async def dashboard(client: AsyncClient):
+        nonlocal served
+        while not stop.is_set():
+            await client.get("/api/event-logs", params={"search": "number 9", "limit": 200})
+            await client.get("/api/guild-mappings")
+            served += 2
+
+    transport = ASGITransport(app=app_mod.app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        tasks = [asyncio.create_task(probe())]
+        tasks += [asyncio.create_task(dashboard(client)) for _ in range(clients)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    app_mod.adb.shutdown()
+    return served / seconds, _pct(lag, 50), _pct(lag, 99), max(lag or [0.0])
+
+
+async def main(rows: int, clients: int, seconds: float) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    _seed(rows)
+    print(f"{'mode':<16}{'req/s':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}   (ms)")
+    for label, workers in (("inline", 0), ("AsyncDB x4", 4)):
+        rps, p50, p99, worst = await _run(workers, clients, seconds)
+        print(f"{label:<16}{rps:>10.0f}{p50:>10.2f}{p99:>10.2f}{worst:>10.2f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=100_000, help="event logs to seed")
+    ap.add_argument("-c", "--clients", type=int, default=8, help="concurrent dashboard clients")
+    ap.add_argument("-s", "--seconds", type=float, default=5.0, help="run time per mode")
+    args = ap.parse_args()
+    asyncio.run(main(args.rows, args.clients, args.seconds))
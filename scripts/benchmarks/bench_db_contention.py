@@ -0,0 +1,97 @@
+"""
+Benchmark: dashboard read latency while the forwarding path is writing.
+
+One thread upserts message mappings write-through (the server's hot path)
+while reader threads poll the queries the admin dashboard runs (event logs,
+guild mappings). Compares the safe profile, WAL with every read serialised on
+the writer connection (--pool 0), and WAL with the pooled reader connections.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_db_contention.py [-s 5] [-r 4] [--dir /data]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common.db import DBManager
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _scrub(path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def bench(profile: str, pool: int, seconds: float, readers: int, directory: str):
+    path = os.path.join(directory, f"contention-{profile}-{pool}.db")
+    _scrub(path)
+    db = DBManager(path, init_schema=True, durability=profile, read_pool_size=pool)
+    for i in range(500):
+        db.add_event_log("bench", f"seed {i}", guild_id=1, guild_name="G")
+
+    stop = threading.Event()
+    writes = [0]
+    latencies: list[list[float]] = [[] for _ in range(readers)]
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            db.upsert_message_mapping(
+                1, 100, 10_000 + i, 200, 20_000 + i, None, cloned_guild_id=2
+            )
+            i += 1
+        writes[0] = i
+
+    def reader(out: list[float]):
+        while not stop.is_set():
+            t = time.perf_counter()
+            db.get_event_logs(limit=100)
+            db.list_guild_mappings()
+            out.append((time.perf_counter() - t) * 1000)
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(latencies[i],)) for i in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    db.conn.close()
+    _scrub(path)
+    lat = [x for out in latencies for x in out]
+    return writes[0] / seconds, len(lat) / seconds, _pct(lat, 50), _pct(lat, 99)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-s", "--seconds", type=float, default=5.0, help="run time per mode")
+    ap.add_argument("-r", "--readers", type=int, default=4, help="reader threads")
+    ap.add_argument("--dir", default=None, help="directory for the scratch DB")
+    args = ap.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="cc-bench-")
+    print(f"{'mode':<24}{'writes/s':>10}{'reads/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, profile, pool in (
+        ("safe", "safe", 0),
+        ("performance, no pool", "performance", 0),
+        ("performance, pooled", "performance", args.readers),
+    ):
+        w, r, p50, p99 = bench(profile, pool, args.seconds, args.readers, directory)
+        print(f"{label:<24}{w:>10.0f}{r:>10.0f}{p50:>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: message-mapping writes per second under each DB durability profile,
+written through (one committed transaction per upsert, the server's historic
+behaviour) and write-behind (upserts coalesced into executemany batches).
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_db_durability.py [-n 5000] [--dir /data]
+
+Run it with --dir on the disk the real database lives on; fsync cost is the
+whole story here and varies wildly between tmpfs, SSDs and network volumes.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common.db import DBManager, DURABILITY_PROFILES
+
+
+def bench(profile: str, n: int, directory: str, batch: int) -> float:
+    path = os.path.join(directory, f"bench-{profile}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db = DBManager(path, init_schema=True, durability=profile)
+    db.enable_message_write_behind(max_rows=batch, max_delay=0.5)
+    t0 = time.perf_counter()
+    for i in range(n):
+        db.upsert_message_mapping(
+            1, 100, 10_000 + i, 200, 20_000 + i, "https://example/webhook",
+            cloned_guild_id=2,
+        )
+    db.flush_message_mappings()
+    elapsed = time.perf_counter() - t0
+    db.conn.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return n / elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=5000, help="writes per profile")
+    ap.add_argument("--dir", default=None, help="directory for the scratch DB")
+    ap.add_argument("--batch", type=int, default=256, help="write-behind batch size")
+    args = ap.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="cc-bench-")
+    print(f"{'profile':<14}{'write-through/s':>18}{'write-behind/s':>18}")
+    for profile in DURABILITY_PROFILES:
+        through = bench(profile, args.n, directory, 0)
+        behind = bench(profile, args.n, directory, args.batch)
+        print(f"{profile:<14}{through:>18.0f}{behind:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: shipping a channel's already-cloned message ids to a backfill.
+
+Seeds a scratch database with --n cloned messages for one channel (snowflakes
+--gap-ms apart on average), then compares the old path (id list from SQL,
+JSON list of strings on the wire, Python set of strings on the client) with
+the packed one (ids walked in order off the covering index, hex gaps on the
+wire, sorted uint64 array + bisect on the client): query time, payload
+bytes, client decode time and memory, and membership checks per second.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_exclude_ids.py [-n 300000] [--gap-ms 2000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from common.db import DBManager
+from common.idset import SortedIdSet
+
+CHANNEL = 100
+CLONE = 2
+BASE = 1_200_000_000_000_000_000
+
+
+def _seed(db: DBManager, n: int, gap_ms: int) -> list[int]:
+    rnd = random.Random(7)
+    ids, ts = [], 0
+    for _ in range(n):
+        ts += rnd.randint(1, 2 * gap_ms)
+        ids.append(BASE + (ts << 22) + rnd.randrange(1 << 22))
+    with db.conn:
+        db.conn.executemany(
+            "INSERT INTO messages(original_message_id, original_guild_id, original_channel_id, "
+            "cloned_guild_id, cloned_channel_id, cloned_message_id) VALUES (?, 1, ?, ?, 200, ?)",
+            [(i, CHANNEL, CLONE, i + 1) for i in ids],
+        )
+    return ids
+
+
+def _measure(build):
+    """(result, seconds, bytes still held afterwards, peak bytes while building)."""
+    t0 = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    out = build()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, held, peak
+
+
+def _lookups(s, probes: list) -> float:
+    t0 = time.perf_counter()
+    for p in probes:
+        _ = p in s
+    return len(probes) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=300_000, help="already-cloned messages")
+    ap.add_argument("--gap-ms", type=int, default=2_000, help="mean gap between messages")
+    ap.add_argument("--probes", type=int, default=200_000, help="membership checks")
+    args = ap.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="cc-bench-"), "bench.db")
+    db = DBManager(path, init_schema=True)
+    ids = _seed(db, args.n, args.gap_ms)
+    rnd = random.Random(11)
+    probes = [rnd.choice(ids) if rnd.random() < 0.5 else rnd.choice(ids) + 1 for _ in range(args.probes)]
+
+    t0 = time.perf_counter()
+    old_wire = json.dumps([str(i) for i in db.get_cloned_original_ids_for_channel(CHANNEL, CLONE)])
+    old_query = time.perf_counter() - t0
+    old_set, old_build, old_mem, old_peak = _measure(lambda: set(json.loads(old_wire)))
+    old_rate = _lookups(old_set, [str(p) for p in probes])
+
+    t0 = time.perf_counter()
+    new_wire = json.dumps(db.get_cloned_original_ids_packed(CHANNEL, CLONE))
+    new_query = time.perf_counter() - t0
+    new_set, new_build, new_mem, new_peak = _measure(lambda: SortedIdSet.unpack(json.loads(new_wire)))
+    new_rate = _lookups(new_set, probes)
+    assert len(new_set) == len(old_set) == args.n
+
+    print(
+        f"{'':<8}{'query ms':>10}{'payload KB':>12}{'decode ms':>11}"
+        f"{'held KB':>10}{'peak KB':>10}{'lookups/s':>12}"
+    )
+    for label, q, wire, b, mem, peak, rate in (
+        ("list", old_query, old_wire, old_build, old_mem, old_peak, old_rate),
+        ("packed", new_query, new_wire, new_build, new_mem, new_peak, new_rate),
+    ):
+        print(
+            f"{label:<8}{q * 1e3:>10.0f}{len(wire) / 1024:>12.0f}{b * 1e3:>11.0f}"
+            f"{mem / 1024:>10.0f}{peak / 1024:>10.0f}{rate:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: event-loop stalls and memory of a message export's write phase.
+
+Feeds --n synthetic serialized messages through the old path (accumulate
+every row, then one synchronous json.dump(indent=2) on the loop) and the
+streaming NDJSON writer (plain and gzip), while a ticker task measures the
+longest time the event loop went without running it. Peak memory is
+measured by tracemalloc on a separate run of each.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_export_writer.py [-n 50000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from client.export_writer import NDJSONExportWriter
+
+
+def _row(i: int) -> dict:
+    return {
+        "guild_id": 1,
+        "channel_id": 1000 + i // 5000,
+        "message": {
+            "id": 10**18 + i,
+            "content": f"message {i} " + "lorem ipsum dolor sit amet " * 8,
+            "author": {"id": 42, "name": "someone", "bot": False},
+            "attachments": [{"url": f"https://cdn.example/{i}.png", "filename": f"{i}.png"}],
+            "embeds": [],
+            "_export_ctx": {"channel_name": "general", "is_thread": False},
+        },
+    }
+
+
+async def _old(out_dir: str, n: int) -> None:
+    rows = []
+    for i in range(n):
+        rows.append(_row(i))
+        if i % 200 == 0:
+            await asyncio.sleep(0)
+    with open(os.path.join(out_dir, "messages.json"), "w", encoding="utf-8") as f:
+        json.dump({"count": len(rows), "messages": [r["message"] for r in rows]}, f, ensure_ascii=False, indent=2)
+
+
+def _new(compression: str):
+    async def run(out_dir: str, n: int) -> None:
+        w = await NDJSONExportWriter(out_dir, compression=compression).open()
+        for i in range(n):
+            await w.write(_row(i))
+            if i % 200 == 0:
+                await asyncio.sleep(0)
+        await w.close()
+
+    return run
+
+
+async def _with_ticker(fn, out_dir: str, n: int) -> tuple[float, float]:
+    worst = 0.0
+    stop = False
+
+    async def tick():
+        nonlocal worst
+        last = time.perf_counter()
+        while not stop:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    t = asyncio.create_task(tick())
+    t0 = time.perf_counter()
+    await fn(out_dir, n)
+    elapsed = time.perf_counter() - t0
+    stop = True
+    await t
+    return elapsed, worst
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=50_000, help="messages to export")
+    args = ap.parse_args()
+
+    print(f"{'writer':<10}{'total s':>9}{'worst stall ms':>16}{'peak MB':>10}")
+    for label, fn in (("json", _old), ("ndjson", _new("none")), ("ndjson.gz", _new("gzip"))):
+        elapsed, worst = asyncio.run(_with_ticker(fn, tempfile.mkdtemp(prefix="cc-bench-"), args.n))
+        tracemalloc.start()
+        asyncio.run(fn(tempfile.mkdtemp(prefix="cc-bench-"), args.n))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<10}{elapsed:>9.2f}{worst * 1e3:>16.0f}{peak / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: per-keyword regex loops vs. the shared KeywordMatcher.
+
+Generates --keywords random keywords and --n messages, then times the three
+shapes the bot uses: whole-word blocking (first hit), substring "any"
+(forwarding include/exclude) and "all" (forwarding require-all /
+announcement triggers). "loop" is the previous approach of one compiled
+regex (or `in` test) per keyword per message.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_keywords.py [-n 5000] [--keywords 2000]
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from common.keywords import KeywordMatcher
+
+
+def _word(rnd: random.Random) -> str:
+    return "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(4, 10)))
+
+
+def _time(fn, msgs: list[str]) -> float:
+    t0 = time.perf_counter()
+    for m in msgs:
+        fn(m)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=5_000, help="messages to scan")
+    ap.add_argument("--keywords", type=int, default=2_000, help="keywords per list")
+    ap.add_argument("--words", type=int, default=60, help="words per message")
+    args = ap.parse_args()
+
+    rnd = random.Random(7)
+    keywords = sorted({_word(rnd) for _ in range(args.keywords)})
+    vocab = [_word(rnd) for _ in range(5_000)] + keywords[:20]
+    msgs = [" ".join(rnd.choice(vocab) for _ in range(args.words)) for _ in range(args.n)]
+
+    patterns = [re.compile(rf"(?<!\w){re.escape(k)}(?!\w)", re.IGNORECASE) for k in keywords]
+    ww = KeywordMatcher(keywords, whole_word=True)
+    sub = KeywordMatcher(keywords)
+
+    def loop_block(m):
+        for p in patterns:
+            if p.search(m):
+                return True
+        return False
+
+    def loop_any(m):
+        lower = m.lower()
+        return any(k in lower for k in keywords)
+
+    def loop_all(m):
+        lower = m.lower()
+        return [k for k in keywords if k in lower]
+
+    cases = (
+        ("block", loop_block, ww.search),
+        ("any", loop_any, sub.search),
+        ("all", loop_all, sub.found),
+    )
+    print(f"{'shape':<8}{'loop msg/s':>12}{'matcher msg/s':>15}{'speedup':>10}")
+    for label, old, new in cases:
+        for m in msgs[:50]:
+            assert bool(old(m)) == bool(new(m)), label
+        t_old = _time(old, msgs)
+        t_new = _time(new, msgs)
+        print(f"{label:<8}{args.n / t_old:>12.0f}{args.n / t_new:>15.0f}{t_old / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: ServerReceiver._sanitize_inline on mention-heavy messages.
+
+Seeds a scratch database with emoji and role mappings for several clone
+guilds, then rewrites messages carrying custom emoji, role and channel
+mentions for a rotating target clone. "warm" is the steady state; "cold"
+drops the emoji/role indexes before every message to show the rebuild cost
+paid after a sync touches the mappings; "words" runs the mapping's word
+rewrites (--words of them) over the same messages.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_sanitize_inline.py [-n 20000] [--mentions 24]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common.db import DBManager
+from server.server import ServerReceiver
+
+HOST = 1
+
+
+def _receiver(db: DBManager, clones: list[int], words: int) -> ServerReceiver:
+    r = ServerReceiver.__new__(ServerReceiver)
+    r.db = db
+    r.chan_map = {}
+    r.chan_map_by_clone = {}
+    r.emoji_map = None
+    r.emoji_map_by_clone = {}
+    r.role_map = None
+    r.role_map_by_clone = {}
+    r._rewrite_programs = {}
+    r._word_rewrites_cache = {}
+    pairs = sorted(
+        ((f"term{i}", f"word{i}") for i in range(words)), key=lambda p: len(p[0]), reverse=True
+    )
+    for cg in clones:
+        r._word_rewrites_cache[(HOST, cg)] = list(pairs)
+        per = r.chan_map_by_clone.setdefault(cg, {})
+        for i in range(50):
+            row = {"original_channel_id": 9000 + i, "cloned_channel_id": cg * 100_000 + i}
+            per[9000 + i] = row
+            r.chan_map[9000 + i] = row
+    return r
+
+
+def _seed(db: DBManager, clones: list[int], emojis: int, roles: int) -> None:
+    for cg in clones:
+        for i in range(emojis):
+            db.upsert_emoji_mapping(
+                1000 + i, f"e{i}", cg * 100_000 + i, f"e{i}",
+                original_guild_id=HOST, cloned_guild_id=cg,
+            )
+        for i in range(roles):
+            db.upsert_role_mapping(
+                5000 + i, f"r{i}", cg * 100_000 + 50_000 + i, f"r{i}",
+                original_guild_id=HOST, cloned_guild_id=cg,
+            )
+
+
+def _messages(n: int, mentions: int, emojis: int, roles: int) -> list[str]:
+    rnd = random.Random(7)
+    out = []
+    for _ in range(n):
+        parts = []
+        for _ in range(mentions):
+            kind = rnd.randrange(3)
+            if kind == 0:
+                parts.append(f"<:e:{1000 + rnd.randrange(emojis)}>")
+            elif kind == 1:
+                parts.append(f"<@&{5000 + rnd.randrange(roles)}>")
+            else:
+                parts.append(f"<#{9000 + rnd.randrange(50)}>")
+            parts.append(f"some words term{rnd.randrange(40)} in between")
+        out.append(" ".join(parts))
+    return out
+
+
+def _run(r: ServerReceiver, msgs: list[str], clones: list[int], cold: bool) -> float:
+    t0 = time.perf_counter()
+    for i, m in enumerate(msgs):
+        if cold:
+            r._invalidate_emoji_index()
+            r._invalidate_role_index()
+        r._sanitize_inline(
+            m, ctx_guild_id=HOST, ctx_mapping_row={"cloned_guild_id": clones[i % len(clones)]}
+        )
+    return time.perf_counter() - t0
+
+
+def _run_words(r: ServerReceiver, msgs: list[str], clones: list[int]) -> float:
+    t0 = time.perf_counter()
+    for i, m in enumerate(msgs):
+        r._apply_word_rewrites(
+            m, None, original_guild_id=HOST, cloned_guild_id=clones[i % len(clones)]
+        )
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=20_000, help="messages to rewrite")
+    ap.add_argument("--mentions", type=int, default=24, help="mentions per message")
+    ap.add_argument("--clones", type=int, default=3, help="clone guilds")
+    ap.add_argument("--emojis", type=int, default=300, help="emoji mappings per clone")
+    ap.add_argument("--roles", type=int, default=150, help="role mappings per clone")
+    ap.add_argument("--words", type=int, default=40, help="word rewrites per mapping")
+    args = ap.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="cc-bench-"), "bench.db")
+    db = DBManager(path, init_schema=True)
+    clones = [10 + i for i in range(args.clones)]
+    _seed(db, clones, args.emojis, args.roles)
+    r = _receiver(db, clones, args.words)
+    msgs = _messages(args.n, args.mentions, args.emojis, args.roles)
+
+    print(f"{'mode':<8}{'msg/s':>10}{'us/msg':>10}")
+    for label, cold, n in (("warm", False, args.n), ("cold", True, min(args.n, 500))):
+        elapsed = _run(r, msgs[:n], clones, cold)
+        print(f"{label:<8}{n / elapsed:>10.0f}{elapsed / n * 1e6:>10.1f}")
+    elapsed = _run_words(r, msgs, clones)
+    print(f"{'words':<8}{args.n / elapsed:>10.0f}{elapsed / args.n * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: sitemaps for one origin guild mirrored to several clones.
+
+Builds a synthetic guild (--channels text channels in categories of 25,
+--roles roles, --emojis emojis, a few role overwrites per channel) and a
+scratch database in which every clone excludes a different category. Then
+compares building each clone's sitemap from scratch (serialize the guild
+and filter it, once per clone) with serializing it once and projecting
+that raw sitemap per clone. --rest-ms adds the latency of the two REST
+calls a build makes (stickers and raw role colors).
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_sitemap_projection.py [--clones 1,2,4,8] [--channels 500]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import discord
+
+from client.sitemap import SitemapService
+from common.db import DBManager
+
+ORIGIN = 1
+
+
+class _Text(discord.TextChannel):
+    type = discord.ChannelType.text
+
+    def __init__(self, cid, name, category, overwrites):
+        self.id = cid
+        self.name = name
+        self.nsfw = False
+        self.topic = f"topic of {name}"
+        self.slowmode_delay = 0
+        self._category = category
+        self._ow = overwrites
+
+    category = property(lambda self: self._category)
+    permission_overwrites = property(lambda self: self._ow)
+
+
+class _Category(discord.CategoryChannel):
+    def __init__(self, cid, name, overwrites):
+        self.id = cid
+        self.name = name
+        self._channels = []
+        self._ow = overwrites
+
+    category = None
+    channels = property(lambda self: self._channels)
+    permission_overwrites = property(lambda self: self._ow)
+
+
+def _guild(channels: int, roles: int, emojis: int, rest_ms: float):
+    async def _rest(result):
+        if rest_ms:
+            await asyncio.sleep(rest_ms / 1000)
+        return result
+
+    def _ow(i):
+        return [
+            SimpleNamespace(type=0, id=10_000 + (i + k) % roles, allow=1024, deny=2048)
+            for k in range(3)
+        ]
+
+    g = SimpleNamespace(id=ORIGIN, name="Origin", features=[], description=None)
+    role_objs = []
+    for i in range(roles):
+        role_objs.append(
+            SimpleNamespace(
+                id=10_000 + i,
+                name=f"role-{i}",
+                permissions=SimpleNamespace(value=1 << (i % 40)),
+                color=SimpleNamespace(value=i * 97),
+                hoist=False,
+                mentionable=True,
+                managed=False,
+                position=i,
+                icon=None,
+                unicode_emoji=None,
+                guild=g,
+            )
+        )
+    g.roles = role_objs
+    g.default_role = role_objs[0]
+    g.emojis = [
+        SimpleNamespace(id=20_000 + i, name=f"e{i}", url=f"https://cdn/e/{i}.png", animated=False)
+        for i in range(emojis)
+    ]
+    g.categories, g.channels = [], []
+    for i in range(channels):
+        if i % 25 == 0:
+            cat = _Category(30_000 + i // 25, f"cat-{i // 25}", _ow(i))
+            g.categories.append(cat)
+            g.channels.append(cat)
+        ch = _Text(40_000 + i, f"chan-{i}", cat, _ow(i))
+        cat._channels.append(ch)
+        g.channels.append(ch)
+    g.forums = []
+    g.rules_channel = g.public_updates_channel = None
+    g.fetch_stickers = lambda: _rest([])
+    g._state = SimpleNamespace(http=SimpleNamespace(get_roles=lambda gid: _rest([])))
+    return g
+
+
+async def _per_clone(svc, g, clones):
+    out = []
+    for cg in clones:
+        out.append(svc.project_sitemap(await svc.build_raw_for_guild(g), cg))
+    return out
+
+
+async def _projected(svc, g, clones):
+    raw = await svc.build_raw_for_guild(g)
+    return [svc.project_sitemap(raw, cg) for cg in clones]
+
+
+async def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = await fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--clones", default="1,2,4,8", help="comma-separated clone counts")
+    ap.add_argument("--channels", type=int, default=500)
+    ap.add_argument("--roles", type=int, default=150)
+    ap.add_argument("--emojis", type=int, default=200)
+    ap.add_argument("--rest-ms", type=float, default=0.0, help="latency per REST call")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    path = os.path.join(tempfile.mkdtemp(prefix="cc-bench-"), "bench.db")
+    db = DBManager(path, init_schema=True)
+    counts = [int(c) for c in args.clones.split(",")]
+    clone_ids = list(range(100, 100 + max(counts)))
+    for n, cg in enumerate(clone_ids):
+        db.add_filter("exclude", "category", 30_000 + n, original_guild_id=ORIGIN, cloned_guild_id=cg)
+        db.add_filter("exclude", "channel", 40_000 + n, original_guild_id=ORIGIN, cloned_guild_id=cg)
+
+    svc = SitemapService(bot=None, config=None, db=db, ws=None)
+    g = _guild(args.channels, args.roles, args.emojis, args.rest_ms)
+    size = len(json.dumps(await svc.build_raw_for_guild(g), default=str))
+    print(
+        f"guild: {args.channels} channels, {args.roles} roles, {args.emojis} emojis "
+        f"(raw sitemap {size / 1024:.0f} KiB), REST latency {args.rest_ms:.0f} ms/call"
+    )
+    print(f"{'clones':>6}  {'per clone':>10}  {'raw once':>10}  {'speedup':>7}")
+    for n in counts:
+        clones = clone_ids[:n]
+        old, t_old = await _time(lambda: _per_clone(svc, g, clones), args.repeat)
+        new, t_new = await _time(lambda: _projected(svc, g, clones), args.repeat)
+        assert json.dumps(old, default=str) == json.dumps(new, default=str)
+        print(
+            f"{n:>6}  {t_old * 1000:>8.1f}ms  {t_new * 1000:>8.1f}ms  {t_old / t_new:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
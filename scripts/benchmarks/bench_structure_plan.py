@@ -0,0 +1,125 @@
+"""
+Benchmark: planning and applying a structure sync on a 500-channel guild.
+
+Builds a synthetic host sitemap (--categories categories of equal size,
+--channels channels in total) and a mapped clone in which --moved channels
+sit in the wrong category, --shuffled channels were dragged to another
+spot inside their category and --renamed channels have a stale name.
+Reports how long the one-pass planner takes and what it plans, how many
+channels the minimal reorder touches against renumbering every channel,
+then runs the layout changes through apply_layout against a recording fake
+guild and compares the request count with one edit per channel. Times for
+the requests themselves use the EDIT_CHANNEL pacing of the server's rate
+limiter (3 per 15 s), not a live Discord.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_structure_plan.py [--channels 500] [--moved 200] [--shuffled 40]
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from server.rate_limiter import ActionType, RateLimitManager
+from server.structure_plan import ChannelState, CloneSnapshot, apply_layout, plan_structure
+
+CAT, TEXT = 4, 0
+
+
+def _build(n_cats: int, n_channels: int, moved: int, shuffled: int, renamed: int, seed: int = 3):
+    rnd = random.Random(seed)
+    per = n_channels // n_cats
+    cats, snap_channels, cat_rows, chan_rows = [], {}, {}, {}
+    for c in range(n_cats):
+        ocat, ccat = 1_000 + c, 9_000 + c
+        cat_rows[ocat] = {"cloned_category_id": ccat}
+        snap_channels[ccat] = ChannelState(ccat, f"cat-{c}", CAT, position=c)
+        chans = []
+        for i in range(per):
+            oid, cid = 10_000 + c * per + i, 90_000 + c * per + i
+            chans.append(
+                {"id": oid, "name": f"chan-{c}-{i}", "type": TEXT, "position": i, "nsfw": False}
+            )
+            chan_rows[oid] = {"cloned_channel_id": cid}
+            snap_channels[cid] = ChannelState(cid, f"chan-{c}-{i}", TEXT, parent_id=ccat, position=i)
+        cats.append({"id": ocat, "name": f"cat-{c}", "position": c, "channels": chans})
+
+    text_ids = [cid for cid, ch in snap_channels.items() if ch.type == TEXT]
+    picked = rnd.sample(text_ids, moved + shuffled)
+    for cid in picked[:moved]:
+        ch = snap_channels[cid]
+        ch.parent_id = 9_000 + (ch.parent_id - 9_000 + 1) % n_cats
+    for cid in picked[moved:]:
+        snap_channels[cid].position = rnd.randrange(per)
+    for cid in rnd.sample(text_ids, renamed):
+        snap_channels[cid].name += "-old"
+
+    sitemap = {"guild": {"id": 1}, "categories": cats, "standalone_channels": [], "forums": []}
+    snapshot = CloneSnapshot(guild_id=2, channels=snap_channels)
+    return sitemap, snapshot, cat_rows, chan_rows
+
+
+class _RecordingGuild:
+    def __init__(self):
+        self.id = 2
+        self.requests = 0
+        self._state = SimpleNamespace(http=SimpleNamespace(bulk_channel_update=self._bulk))
+
+    async def _bulk(self, guild_id, payload, reason=None):
+        self.requests += 1
+
+
+def _paced_seconds(requests: int) -> float:
+    """Wall time `requests` calls need under the EDIT_CHANNEL pacing."""
+    rate, window = RateLimitManager()._cfg[ActionType.EDIT_CHANNEL]
+    return max(0, requests - rate) * window / rate
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--categories", type=int, default=20)
+    ap.add_argument("--channels", type=int, default=500)
+    ap.add_argument("--moved", type=int, default=200, help="channels in the wrong category")
+    ap.add_argument("--shuffled", type=int, default=40, help="channels out of order in their category")
+    ap.add_argument("--renamed", type=int, default=50, help="channels with a stale name")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    sitemap, snapshot, cat_rows, chan_rows = _build(
+        args.categories, args.channels, args.moved, args.shuffled, args.renamed
+    )
+    best = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        plan = plan_structure(
+            sitemap,
+            snapshot,
+            category_rows=cat_rows,
+            channel_rows=chan_rows,
+            settings={"SYNC_CHANNEL_NSFW": True},
+        )
+        best = min(best, time.perf_counter() - t0)
+
+    changes = plan.layout_changes()
+    reordered = sum(1 for op in changes if "position" in op.fields)
+    print(
+        f"guild: {args.channels} channels in {args.categories} categories; "
+        f"{args.moved} misplaced, {args.shuffled} shuffled, {args.renamed} renamed"
+    )
+    print(f"plan: {best * 1000:.2f} ms (best of {args.repeat}), ops {plan.summary()}")
+    print(
+        f"layout: {len(changes)} entries ({len(plan.parent_moves())} reparents, "
+        f"{reordered} with a new position) vs {len(snapshot.channels)} when renumbering all"
+    )
+
+    guild = _RecordingGuild()
+    applied = asyncio.run(apply_layout(guild, changes))
+    assert len(applied) == len(changes)
+    print(f"{'layout path':<22}{'requests':>10}{'paced time':>14}")
+    print(f"{'one edit per channel':<22}{len(changes):>10}{_paced_seconds(len(changes)):>13.0f}s")
+    print(f"{'bulk update':<22}{guild.requests:>10}{_paced_seconds(guild.requests):>13.0f}s")
+
+
+if __name__ == "__main__":
+    main()
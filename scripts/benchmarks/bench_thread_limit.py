@@ -0,0 +1,111 @@
+"""
+Benchmark: thread-limit enforcement as new threads arrive in a busy clone.
+
+Fills a scratch database with --mapped thread mappings spread over --guilds
+clone guilds and gives the measured guild --active cached, unarchived
+threads (already at the limit). Then creates --new threads one at a time and
+enforces the limit after each, as the forwarding path does: once the old
+way (read every mapping row, scan and sort the guild's cached threads) and
+once with the active-thread index (track the upsert, pop the oldest). No
+Discord calls are made; archiving just marks the fake thread.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_thread_limit.py [--mapped 50000] [--active 950] [--new 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from common.db import DBManager
+from server.thread_index import ActiveThreadIndex
+
+GUILD = 1_000
+
+
+def _fill(db: DBManager, mapped: int, guilds: int) -> None:
+    rows = [
+        (10_000 + i, f"t{i}", 10_000 + i, None, None, 1, GUILD + i % guilds)
+        for i in range(mapped)
+    ]
+    with db.lock, db.conn:
+        db.conn.executemany(
+            "INSERT INTO threads (original_thread_id, original_thread_name, cloned_thread_id,"
+            " forum_original_id, forum_cloned_id, original_guild_id, cloned_guild_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def _threads(db: DBManager, active: int):
+    ids = sorted(db.get_cloned_thread_ids(GUILD))[:active]
+    return [SimpleNamespace(id=tid, created=float(tid), archived=False) for tid in ids]
+
+
+def _scan(db: DBManager, threads, limit: int) -> int:
+    """The previous enforcement: full mapping read, scan, sort."""
+    valid = {r["cloned_thread_id"] for r in db.get_all_threads()}
+    active = [t for t in threads if not t.archived and t.id in valid]
+    if len(active) <= limit:
+        return 0
+    active.sort(key=lambda t: t.created)
+    for t in active[: len(active) - limit]:
+        t.archived = True
+    return len(active) - limit
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--mapped", type=int, default=50_000, help="thread mappings in the database")
+    ap.add_argument("--guilds", type=int, default=20, help="clone guilds they belong to")
+    ap.add_argument("--active", type=int, default=950, help="active threads in the measured guild")
+    ap.add_argument("--new", type=int, default=200, help="threads created, one enforcement each")
+    args = ap.parse_args()
+    limit = args.active
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, "bench.db"), init_schema=True)
+        _fill(db, args.mapped, args.guilds)
+        next_id = 10_000 + args.mapped
+
+        threads = _threads(db, args.active)
+        t0 = time.perf_counter()
+        for i in range(args.new):
+            db.upsert_forum_thread_mapping(next_id + i, "new", next_id + i, None, None,
+                                           original_guild_id=1, cloned_guild_id=GUILD)
+            threads.append(SimpleNamespace(id=next_id + i, created=float(next_id + i), archived=False))
+            _scan(db, threads, limit)
+        scan = time.perf_counter() - t0
+
+        next_id += args.new
+        threads = _threads(db, args.active)
+        index = ActiveThreadIndex()
+        t0 = time.perf_counter()
+        index.reset(GUILD, db.get_cloned_thread_ids(GUILD), ((t.id, t.created) for t in threads))
+        seed = time.perf_counter() - t0
+        by_id = {t.id: t for t in threads}
+        t0 = time.perf_counter()
+        for i in range(args.new):
+            tid = next_id + i
+            db.upsert_forum_thread_mapping(tid, "new", tid, None, None,
+                                           original_guild_id=1, cloned_guild_id=GUILD)
+            by_id[tid] = SimpleNamespace(id=tid, created=float(tid), archived=False)
+            index.track(GUILD, tid, float(tid))
+            for old in index.overflow(GUILD, limit):
+                by_id[old].archived = True
+        indexed = time.perf_counter() - t0
+
+    print(
+        f"{args.mapped} mappings in {args.guilds} clone guilds; "
+        f"{args.active} active threads at the limit, {args.new} new threads"
+    )
+    print(f"{'enforcement':<18}{'total ms':>10}{'per thread':>14}")
+    print(f"{'scan':<18}{scan * 1000:>10.1f}{scan / args.new * 1e6:>12.0f}us")
+    print(f"{'index':<18}{indexed * 1000:>10.1f}{indexed / args.new * 1e6:>12.0f}us")
+    print(f"index seed (one reconciliation): {seed * 1000:.1f} ms")
+    print("(both include the mapping upsert each new thread costs anyway)")
+
+
+if __name__ == "__main__":
+    main()
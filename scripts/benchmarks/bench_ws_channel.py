@@ -0,0 +1,100 @@
+"""
+Benchmark: client → server websocket throughput and latency.
+
+Compares connect-per-message (persistent=False, the old behaviour) with the
+persistent multiplexed channel, for fire-and-forget `send()` and for
+`request()` round trips. Runs a real WebsocketManager server on 127.0.0.1.
+
+Usage (from the repo root):
+    PYTHONPATH=code python scripts/benchmarks/bench_ws_channel.py [-n 2000]
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import statistics
+import time
+
+from common.websockets import WebsocketManager
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def _bench_send(url: str, persistent: bool, n: int, latencies: list[float], done: asyncio.Event):
+    ws = WebsocketManager(send_url=url, persistent=persistent)
+    t0 = time.perf_counter()
+    for i in range(n):
+        await ws.send({"type": "message", "data": {"i": i, "t": time.perf_counter()}})
+    await asyncio.wait_for(done.wait(), 120)
+    elapsed = time.perf_counter() - t0
+    await ws.stop()
+    return n / elapsed, _pct(latencies, 50), _pct(latencies, 99)
+
+
+async def _bench_request(url: str, persistent: bool, n: int, concurrency: int):
+    ws = WebsocketManager(send_url=url, persistent=persistent)
+    lat: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            t = time.perf_counter()
+            await ws.request({"type": "ping", "data": i}, timeout=30)
+            lat.append((time.perf_counter() - t) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - t0
+    await ws.stop()
+    return n / elapsed, statistics.median(lat), _pct(lat, 99)
+
+
+async def main(n: int, concurrency: int) -> None:
+    logging.basicConfig(level=logging.WARNING)
+    port = _free_port()
+    url = f"ws://127.0.0.1:{port}"
+    state = {"latencies": [], "expected": 0, "done": asyncio.Event()}
+
+    async def handler(req):
+        d = req.get("data") or {}
+        if req.get("type") == "message":
+            state["latencies"].append((time.perf_counter() - d["t"]) * 1000)
+            if len(state["latencies"]) >= state["expected"]:
+                state["done"].set()
+        return {"ok": True}
+
+    srv = WebsocketManager(send_url="", listen_host="127.0.0.1", listen_port=port)
+    srv_task = asyncio.create_task(srv.start_server(handler))
+    await asyncio.sleep(0.2)
+
+    print(f"{'mode':<28}{'msg/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, persistent in (("send  per-message", False), ("send  persistent", True)):
+        state.update(latencies=[], expected=n, done=asyncio.Event())
+        rate, p50, p99 = await _bench_send(url, persistent, n, state["latencies"], state["done"])
+        print(f"{label:<28}{rate:>10.0f}{p50:>10.2f}{p99:>10.2f}")
+    for label, persistent in (("request per-message", False), ("request persistent", True)):
+        rate, p50, p99 = await _bench_request(url, persistent, n, concurrency)
+        print(f"{label:<28}{rate:>10.0f}{p50:>10.2f}{p99:>10.2f}")
+
+    srv_task.cancel()
+    await asyncio.gather(srv_task, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=2000, help="messages per mode")
+    ap.add_argument("-c", "--concurrency", type=int, default=16, help="in-flight requests")
+    args = ap.parse_args()
+    asyncio.run(main(args.n, args.concurrency))
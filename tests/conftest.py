@@ -11,6 +11,12 @@ CODE_DIR = os.path.join(os.path.dirname(__file__), "..", "code")
 if CODE_DIR not in sys.path:
     sys.path.insert(0, os.path.abspath(CODE_DIR))
 
+# Client modules are written against discord.py-self, which is not installed
+# here (py-cord is, for the server): import them against a stub `discord`.
+from tests import discord_stub  # noqa: E402
+
+discord_stub.install()
+
 
 @pytest.fixture()
 def tmp_db_path(tmp_path):
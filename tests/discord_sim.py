@@ -0,0 +1,106 @@
+"""
+A small simulated Discord REST API for rate-limit tests.
+
+Routes are grouped into buckets the way Discord does it: each bucket has a
+hash, a request limit and a window, and is tracked per major parameter
+(channel, guild or webhook id+token). Responses carry the real
+X-RateLimit-* headers; over-limit requests get a 429 with Retry-After. An
+optional global limit per Authorization header answers with
+X-RateLimit-Global like the real API.
+"""
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class DiscordSim:
+    def __init__(self, *, buckets, global_limit=None, clock=time.monotonic):
+        """
+        buckets: {(method, route pattern): (hash, limit, window_seconds)},
+        with aiohttp route patterns such as "/api/v10/channels/{channel_id}/messages".
+        global_limit: (limit, window_seconds) per Authorization, or None.
+        """
+        self.buckets = buckets
+        self.global_limit = global_limit
+        self.clock = clock
+        self.state = {}
+        self.ok = 0
+        self.limited = 0
+        self.sent_at = []
+        self.app = web.Application()
+        for (method, pattern), spec in buckets.items():
+            self.app.router.add_route(method, pattern, self._handler(pattern, spec))
+        self.server = None
+
+    async def start(self) -> "DiscordSim":
+        self.server = TestServer(self.app)
+        await self.server.start_server()
+        return self
+
+    async def close(self) -> None:
+        if self.server is not None:
+            await self.server.close()
+
+    def url(self, path: str) -> str:
+        return str(self.server.make_url(path))
+
+    def _window(self, key, limit, window):
+        now = self.clock()
+        st = self.state.get(key)
+        if st is None or now >= st["reset"]:
+            st = self.state[key] = {"count": 0, "reset": now + window}
+        return st, now
+
+    def _handler(self, pattern, spec):
+        bucket_hash, limit, window = spec
+
+        async def handle(request):
+            if self.global_limit:
+                g, now = self._window(
+                    ("global", request.headers.get("Authorization")), *self.global_limit
+                )
+                if g["count"] >= self.global_limit[0]:
+                    self.limited += 1
+                    return web.json_response(
+                        {"message": "You are being rate limited.", "global": True},
+                        status=429,
+                        headers={
+                            "Retry-After": f"{g['reset'] - now:.3f}",
+                            "X-RateLimit-Global": "true",
+                            "X-RateLimit-Scope": "global",
+                        },
+                    )
+                g["count"] += 1
+
+            info = request.match_info
+            major = info.get("channel_id") or info.get("guild_id") or (
+                f"{info.get('webhook_id')}/{info.get('webhook_token')}"
+            )
+            st, now = self._window((bucket_hash, major), limit, window)
+            headers = {
+                "X-RateLimit-Bucket": bucket_hash,
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Reset-After": f"{st['reset'] - now:.3f}",
+            }
+            if st["count"] >= limit:
+                self.limited += 1
+                headers.update(
+                    {
+                        "X-RateLimit-Remaining": "0",
+                        "Retry-After": f"{st['reset'] - now:.3f}",
+                        "X-RateLimit-Scope": "user",
+                    }
+                )
+                return web.json_response(
+                    {"message": "You are being rate limited.", "global": False},
+                    status=429,
+                    headers=headers,
+                )
+            st["count"] += 1
+            self.ok += 1
+            self.sent_at.append(now)
+            headers["X-RateLimit-Remaining"] = str(limit - st["count"])
+            return web.json_response({"id": str(self.ok)}, headers=headers)
+
+        return handle
@@ -0,0 +1,127 @@
+"""
+A stand-in `discord` package for importing client code under test.
+
+The client runs on discord.py-self, the server on py-cord; both install as
+`discord`, and the test environment has py-cord. `install()` puts a finder on
+sys.meta_path so every `client.*` module executes against this stub instead:
+while a client module runs its top-level code, `discord` and its submodules
+resolve to stub modules, and the real package is put back afterwards.
+Server modules imported in the same session keep seeing py-cord.
+
+The stub only has to survive import time and the attribute access tests
+exercise: CamelCase names are placeholder classes (usable as exception types,
+base classes and `isinstance` targets; instances keep their keyword
+arguments as attributes), attributes of those are unique per-name sentinels
+(`ChannelType.text is ChannelType.text`), and lowercase names are submodules.
+"""
+import importlib.abc
+import importlib.machinery
+import sys
+import types
+
+
+class _StubMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        member = _StubMeta(name, (_Stub,), {"name": name, "value": name})
+        setattr(cls, name, member)
+        return member
+
+
+class _Stub(Exception, metaclass=_StubMeta):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args)
+        self.__dict__.update(kwargs)
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name[:1].islower() or name.startswith("_"):
+            member = _StubModule(f"{self.__name__}.{name}")
+            member.__path__ = []
+        else:
+            member = _StubMeta(name, (_Stub,), {"__module__": self.__name__})
+        setattr(self, name, member)
+        return member
+
+
+def _is_discord(name: str) -> bool:
+    return name == "discord" or name.startswith("discord.")
+
+
+class _StubLoader(importlib.abc.Loader):
+    def create_module(self, spec):
+        mod = _StubModule(spec.name)
+        mod.__path__ = []
+        return mod
+
+    def exec_module(self, module):
+        pass
+
+
+class _StubFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        if not _is_discord(name):
+            return None
+        return importlib.machinery.ModuleSpec(name, _StubLoader(), is_package=True)
+
+
+class _Swap:
+    """Swap `discord*` in sys.modules for the stub; re-entrant."""
+
+    def __init__(self):
+        self.depth = 0
+        self.saved = {}
+        self.stubs = {}
+        self.finder = _StubFinder()
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.saved = {k: sys.modules.pop(k) for k in list(sys.modules) if _is_discord(k)}
+            sys.modules.update(self.stubs)
+            sys.meta_path.insert(0, self.finder)
+        self.depth += 1
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            sys.meta_path.remove(self.finder)
+            self.stubs = {k: sys.modules.pop(k) for k in list(sys.modules) if _is_discord(k)}
+            sys.modules.update(self.saved)
+            self.saved = {}
+        return False
+
+
+class _ClientLoader(importlib.abc.Loader):
+    def __init__(self, loader, swap):
+        self._loader = loader
+        self._swap = swap
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._swap:
+            self._loader.exec_module(module)
+
+
+class _ClientFinder(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        self.swap = _Swap()
+
+    def find_spec(self, name, path, target=None):
+        if name != "client" and not name.startswith("client."):
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is not None and spec.loader is not None:
+            spec.loader = _ClientLoader(spec.loader, self.swap)
+        return spec
+
+
+def install() -> None:
+    """Route `client.*` imports through the stub (idempotent)."""
+    if not any(isinstance(f, _ClientFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _ClientFinder())
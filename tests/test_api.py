@@ -4,9 +4,12 @@ FastAPI endpoint tests for the Copycord admin API.
 These tests use httpx AsyncClient to exercise endpoints that don't
 require live Discord connections. WebSocket control commands are mocked.
 """
+import asyncio
 import os
 import sys
 import tempfile
+import threading
+import time
 from unittest.mock import AsyncMock
 
 import pytest
@@ -527,6 +530,54 @@ class TestMappingUserTokensAPI:
         assert resp.status_code == 404
 
 
+# ---------------------------------------------------------------------------
+# Config save
+# ---------------------------------------------------------------------------
+
+class TestSaveConfig:
+
+    @pytest.mark.asyncio
+    async def test_save_does_not_block_loop_while_db_locked(
+        self, client, monkeypatch
+    ):
+        import admin.app as app_mod
+
+        monkeypatch.setattr(
+            app_mod, "_verify_tokens_for_save", AsyncMock(return_value=[])
+        )
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            held.set()
+            release.wait(2)
+
+        holder = asyncio.create_task(app_mod.adb.run(hold_lock))
+        await asyncio.to_thread(held.wait, 2)
+
+        save = asyncio.create_task(
+            client.post(
+                "/save",
+                data={
+                    "SERVER_TOKEN": "srv-token",
+                    "CLIENT_TOKEN": "cli-token",
+                    "LOG_LEVEL": "INFO",
+                },
+            )
+        )
+        t0 = time.monotonic()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        assert time.monotonic() - t0 < 1.0
+        assert not save.done()
+
+        release.set()
+        resp = await save
+        await holder
+        assert resp.status_code == 303
+        assert db.get_config("SERVER_TOKEN") == "srv-token"
+
+
 # ---------------------------------------------------------------------------
 # Version endpoint
 # ---------------------------------------------------------------------------
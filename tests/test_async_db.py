@@ -0,0 +1,123 @@
+"""
+Tests for common.async_db.AsyncDB: DBManager calls awaited from the event loop
+run on the worker pool, results and errors come back unchanged, and the loop
+keeps running while a slow call is in flight.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from common.async_db import AsyncDB
+
+
+@pytest.mark.asyncio
+async def test_calls_run_off_the_loop_thread(db):
+    adb = AsyncDB(db, max_workers=2)
+    seen = []
+    db.probe = lambda: seen.append(threading.get_ident()) or "ok"
+    try:
+        assert await adb.probe() == "ok"
+        assert seen and seen[0] != threading.get_ident()
+        await adb.set_config("K", "v")
+        assert await adb.get_config("K") == "v"
+        assert adb.stats()["calls"] == 3
+    finally:
+        adb.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_zero_workers_runs_inline(db):
+    adb = AsyncDB(db, max_workers=0)
+    seen = []
+    db.probe = lambda: seen.append(threading.get_ident())
+    await adb.probe()
+    assert seen == [threading.get_ident()]
+    assert adb.stats()["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate(db):
+    adb = AsyncDB(db, max_workers=1)
+
+    def boom():
+        raise ValueError("nope")
+
+    try:
+        with pytest.raises(ValueError):
+            await adb.run(boom)
+        assert adb.stats()["pending"] == 0
+    finally:
+        adb.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_loop_stays_responsive_during_slow_call(db):
+    adb = AsyncDB(db, max_workers=1)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        await adb.run(time.sleep, 0.3)
+        assert ticks >= 10
+        assert adb.stats()["slowest_call"] == "sleep"
+    finally:
+        task.cancel()
+        adb.shutdown()
+
+
+def test_non_callable_attributes_pass_through(db):
+    adb = AsyncDB(db)
+    try:
+        assert adb.path == db.path
+        assert adb.db is db
+    finally:
+        adb.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_writers_hold_db_lock_readers_do_not(db):
+    adb = AsyncDB(db, max_workers=2)
+    held = {}
+
+    def probe(name):
+        # RLock._is_owned is True only for the thread currently holding it.
+        held[name] = db.lock._is_owned()
+
+    db.upsert_probe = lambda: probe("write")
+    db.get_probe = lambda: probe("read")
+    try:
+        await adb.upsert_probe()
+        await adb.get_probe()
+        await adb.run(lambda: probe("run"))
+        assert held == {"write": True, "read": False, "run": True}
+    finally:
+        adb.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_do_not_interleave(db):
+    adb = AsyncDB(db, max_workers=4)
+    inside = 0
+    overlap = False
+
+    def writer():
+        nonlocal inside, overlap
+        inside += 1
+        overlap = overlap or inside > 1
+        time.sleep(0.02)
+        inside -= 1
+
+    db.replace_probe = writer
+    try:
+        await asyncio.gather(*(adb.replace_probe() for _ in range(6)))
+        assert not overlap
+    finally:
+        adb.shutdown()
@@ -0,0 +1,148 @@
+"""
+Tests for the backfill event buffer: edits and deletes of one message
+collapse to the event that matters, arrival order is kept, and a buffer
+that outgrows memory spills to the journal table and survives a restart.
+"""
+from server.backfill_buffer import BackfillEventBuffer, event_key
+
+
+def _edit(mid, content):
+    return ("message_edit", {"message_id": mid, "channel_id": 5, "content": content})
+
+
+def _delete(mid):
+    return ("message_delete", {"message_id": mid, "channel_id": 5})
+
+
+def _summary(events):
+    return [(t, d.get("message_id") or d.get("thread_id"), d.get("content") or d.get("name")) for t, d in events]
+
+
+class TestCollapse:
+
+    def test_newest_edit_wins_and_moves_to_the_back(self, db):
+        buf = BackfillEventBuffer(db)
+        for ev in (_edit(1, "a"), _edit(2, "b"), _edit(1, "c")):
+            buf.add(5, *ev)
+        assert _summary(buf.drain(5)) == [
+            ("message_edit", 2, "b"),
+            ("message_edit", 1, "c"),
+        ]
+        assert 5 not in buf
+
+    def test_delete_replaces_edits_and_later_edits_are_dropped(self, db):
+        buf = BackfillEventBuffer(db)
+        for ev in (_edit(1, "a"), _delete(1), _edit(1, "late"), _edit(2, "x")):
+            buf.add(5, *ev)
+        assert _summary(buf.drain(5)) == [
+            ("message_delete", 1, None),
+            ("message_edit", 2, "x"),
+        ]
+        assert buf.stats()["collapsed"] == 2
+
+    def test_thread_delete_replaces_renames(self, db):
+        buf = BackfillEventBuffer(db)
+        buf.add(5, "thread_rename", {"thread_id": 9, "name": "one"})
+        buf.add(5, "thread_rename", {"thread_id": 9, "name": "two"})
+        buf.add(5, "thread_delete", {"thread_id": 9})
+        buf.add(5, "thread_rename", {"thread_id": 9, "name": "three"})
+        assert _summary(buf.drain(5)) == [("thread_delete", 9, None)]
+
+    def test_events_without_an_id_never_collapse(self):
+        assert event_key("message_edit", {}, 1) != event_key("message_edit", {}, 2)
+        assert event_key("thread_message_edit", {"message_id": 3}, 1) == "m:3"
+
+
+class TestSpill:
+
+    def test_spills_largest_channel_and_keeps_order(self, db):
+        buf = BackfillEventBuffer(db, spill_after=4)
+        buf.add(6, *_edit(100, "other"))
+        for mid in range(1, 5):
+            buf.add(5, *_edit(mid, f"v{mid}"))
+        assert buf.stats()["spilled_channels"] == 1
+        assert buf.stats()["in_memory"] == 1
+        # collapsing still works against the spilled index
+        buf.add(5, *_edit(2, "v2b"))
+        buf.add(5, *_delete(3))
+        buf.add(5, *_edit(3, "ignored"))
+        assert _summary(buf.drain(5)) == [
+            ("message_edit", 1, "v1"),
+            ("message_edit", 4, "v4"),
+            ("message_edit", 2, "v2b"),
+            ("message_delete", 3, None),
+        ]
+        assert db.bf_journal_load(5) == []
+        assert _summary(buf.drain(6)) == [("message_edit", 100, "other")]
+
+    def test_journal_survives_a_restart(self, db):
+        buf = BackfillEventBuffer(db, spill_after=1)
+        buf.add(5, *_edit(1, "a"))
+        buf.add(5, *_edit(2, "b"))
+
+        restarted = BackfillEventBuffer(db, spill_after=1)
+        assert restarted.journaled_channels() == [5]
+        restarted.add(5, *_edit(1, "a2"))
+        restarted.add(5, *_delete(2))
+        restarted.add(5, *_edit(2, "late"))
+        assert _summary(restarted.drain(5)) == [
+            ("message_edit", 1, "a2"),
+            ("message_delete", 2, None),
+        ]
+        assert restarted.journaled_channels() == []
+
+    def test_drain_of_a_journal_never_loaded_this_run(self, db):
+        for first in (1, 3):
+            run = BackfillEventBuffer(db, spill_after=1)
+            run.add(5, *_edit(first, "a"))
+            run.add(5, *_edit(first + 1, "b"))
+        assert [mid for _t, mid, _c in _summary(BackfillEventBuffer(db).drain(5))] == [
+            1,
+            2,
+            3,
+            4,
+        ]
+
+
+class TestStartupDrain:
+
+    def _receiver(self, db, mapped):
+        from server.server import ServerReceiver
+
+        r = ServerReceiver.__new__(ServerReceiver)
+        r._bf_event_buffer = BackfillEventBuffer(db)
+        r._message_mappings = lambda mid: [{"cloned_guild_id": 9}] if mid in mapped else []
+        r.replayed = []
+
+        async def _edit(data):
+            r.replayed.append(("edit", data["message_id"]))
+
+        async def _delete(data):
+            r.replayed.append(("delete", data["message_id"]))
+
+        r.handle_message_edit = _edit
+        r.handle_message_delete = _delete
+        r._track = lambda coro, name=None: _run(coro)
+        return r
+
+    def test_interrupted_backfill_drops_edits_of_uncloned_messages(self, db):
+        run = BackfillEventBuffer(db, spill_after=1)
+        for ev in (_edit(1, "a"), _edit(2, "b"), _delete(3)):
+            run.add(5, *ev)
+        r = self._receiver(db, mapped={1})
+        r._drain_bf_events(5, interrupted=True)
+        assert r.replayed == [("edit", 1), ("delete", 3)]
+
+    def test_finished_backfill_replays_every_edit(self, db):
+        r = self._receiver(db, mapped=set())
+        for ev in (_edit(1, "a"), _edit(2, "b")):
+            r._bf_event_buffer.add(5, *ev)
+        r._drain_bf_events(5)
+        assert r.replayed == [("edit", 1), ("edit", 2)]
+
+
+def _run(coro):
+    try:
+        coro.send(None)
+    except StopIteration:
+        pass
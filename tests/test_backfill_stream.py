@@ -0,0 +1,203 @@
+"""
+Tests for single-pass channel backfill: history is walked once per channel or
+thread, progress carries a snowflake-interpolated estimate of the total, and
+the server's BackfillManager accepts those estimates without ending the run.
+Already-cloned messages are skipped via the compact exclude list.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace as NS
+
+import pytest
+
+from common.idset import SortedIdSet
+from client.export_runners import (
+    BackfillEngine,
+    ChannelType,
+    MessageType,
+    _SentTotalEstimate,
+    _snowflake_from_dt,
+)
+from server.backfill import BackfillManager
+
+T0 = _snowflake_from_dt(datetime(2024, 1, 1, tzinfo=timezone.utc))
+STEP = 1_000 << 22  # one second between messages
+
+
+class _History:
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+        self.calls = 0
+
+    def __call__(self, *, limit, oldest_first, after=None, before=None):
+        self.calls += 1
+        ids = self.ids if oldest_first else self.ids[::-1]
+        lo = getattr(after, "id", None)
+        hi = getattr(before, "id", None)
+        ids = [i for i in ids if (lo is None or i > lo) and (hi is None or i < hi)]
+        return self._gen(ids[:limit])
+
+    async def _gen(self, ids):
+        for i in ids:
+            yield _msg(i)
+
+
+def _msg(mid):
+    return NS(
+        id=mid, content=f"m{mid}", type=MessageType.default,
+        author=NS(id=1, name="a", display_name="a", bot=False, system=False, display_avatar=None),
+        attachments=[], embeds=[], stickers=[], reference=None, webhook_id=None,
+        channel=NS(id=5, name="c", type=ChannelType.text, parent=None),
+        guild=NS(id=1), created_at=None, flags=NS(value=0), is_system=lambda: False,
+    )
+
+
+def _channel(ids, threads=()):
+    ch = NS(
+        id=T0 - STEP, name="general", type=ChannelType.text, guild=NS(id=1),
+        last_message_id=max(ids) if ids else None, threads=list(threads),
+    )
+    ch.history = _History(ids)
+    return ch
+
+
+def _thread(tid, ids):
+    th = NS(id=tid, name="t", type=ChannelType.public_thread, last_message_id=max(ids))
+    th.history = _History(ids)
+    return th
+
+
+class _WS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+
+class _Msg:
+    async def build_mention_map(self, m, embeds):
+        return {}
+
+    def sanitize_embed_dict(self, e, m, mm):
+        return e
+
+    def sanitize_inline(self, s, m, mm):
+        return s
+
+    def stickers_payload(self, stickers, guild):
+        return []
+
+
+def _engine(ch, monkeypatch):
+    guild = NS(id=1, name="g", get_channel=lambda cid: ch)
+    receiver = NS(bot=NS(get_guild=lambda gid: guild, guilds=[guild]), ws=_WS(), msg=_Msg(), host_guild_id=1)
+    eng = BackfillEngine(receiver)
+    eng.PAGE_DELAY = 0
+
+    async def _no_sleep(_):
+        return None
+
+    monkeypatch.setattr("client.export_runners.asyncio.sleep", _no_sleep)
+    return eng
+
+
+def _progress(ws):
+    return [p["data"] for p in ws.sent if p["type"] == "backfill_progress"]
+
+
+class TestSentTotalEstimate:
+
+    def test_interpolates_from_cursor_position(self):
+        est = _SentTotalEstimate()
+        est.begin(0, T0, T0 + 100 * STEP)
+        est.advance(T0 + 25 * STEP)
+        assert est.total(10) == 40
+
+    def test_earlier_streams_are_exact(self):
+        est = _SentTotalEstimate()
+        est.begin(50, T0, T0 + 10 * STEP)
+        est.advance(T0 + 5 * STEP)
+        assert est.total(53) == 56
+
+    def test_never_below_sent(self):
+        est = _SentTotalEstimate()
+        est.begin(0, T0, T0 + 10 * STEP)
+        assert est.total(3) == 3
+        est.advance(T0)
+        assert est.total(3) == 3
+
+    def test_known_size(self):
+        est = _SentTotalEstimate()
+        est.expect(10, 5)
+        assert est.total(11) == 15
+
+
+class TestSinglePass:
+
+    @pytest.mark.asyncio
+    async def test_history_walked_once(self, monkeypatch):
+        th = _thread(T0 + 50 * STEP, [T0 + 50 * STEP + i * STEP for i in range(1, 4)])
+        ch = _channel([T0 + i * STEP for i in range(10)], threads=[th])
+        eng = _engine(ch, monkeypatch)
+        await eng.run_channel(ch.id)
+        assert ch.history.calls == 2  # one page plus the empty page that ends it
+        assert th.history.calls == 2
+        prog = _progress(eng.ws)
+        assert prog[-1]["sent"] == 13 and prog[-1]["total"] == 13
+        assert "estimated" not in prog[-1]
+        assert all(p["estimated"] for p in prog[:-1])
+        assert eng.ws.sent[-1]["type"] == "backfill_stream_end"
+
+    @pytest.mark.asyncio
+    async def test_last_n_reports_buffered_size(self, monkeypatch):
+        ch = _channel([T0 + i * STEP for i in range(10)])
+        eng = _engine(ch, monkeypatch)
+        await eng.run_channel(ch.id, last_n=4)
+        msgs = [p["data"]["message_id"] for p in eng.ws.sent if p["type"] == "message"]
+        assert msgs == [T0 + i * STEP for i in range(6, 10)]
+        assert _progress(eng.ws)[0]["total"] == 4
+
+
+class TestExpectedTotal:
+
+    def _mgr(self):
+        mgr = BackfillManager.__new__(BackfillManager)
+        mgr._progress = {7: {"delivered": 5, "expected_total": None}}
+        mgr._flags = set()
+        return mgr
+
+    def test_estimates_replace_each_other(self):
+        mgr = self._mgr()
+        mgr.update_expected_total(7, 100, estimated=True)
+        mgr.update_expected_total(7, 40, estimated=True)
+        assert mgr._progress[7]["expected_total"] == 40
+        mgr.update_expected_total(7, 0, estimated=True)
+        assert mgr._progress[7]["expected_total"] == 5
+        assert not mgr._progress[7].get("no_work")
+
+    def test_exact_total_replaces_estimate_and_keeps_extras(self):
+        mgr = self._mgr()
+        mgr.add_expected_total(7, 2)
+        mgr.update_expected_total(7, 100, estimated=True)
+        assert mgr._progress[7]["expected_total"] == 102
+        mgr.update_expected_total(7, 30)
+        assert mgr._progress[7]["expected_total"] == 32
+
+
+class TestExcludeIds:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("packed", [True, False])
+    async def test_already_cloned_are_skipped(self, monkeypatch, packed):
+        ids = [T0 + i * STEP for i in range(6)]
+        ch = _channel(ids)
+        eng = _engine(ch, monkeypatch)
+        done = ids[1:4]
+        kw = (
+            {"exclude_ids_packed": SortedIdSet(done).pack()}
+            if packed
+            else {"exclude_ids": [str(i) for i in done]}
+        )
+        await eng.run_channel(ch.id, **kw)
+        msgs = [p["data"]["message_id"] for p in eng.ws.sent if p["type"] == "message"]
+        assert msgs == [ids[0], ids[4], ids[5]]
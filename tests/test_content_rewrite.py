@@ -0,0 +1,174 @@
+"""
+Tests for the server's inline content rewriting: custom emoji and role
+mentions are mapped to the target clone's ids from in-memory indexes, and
+those indexes follow EmojiManager/RoleManager mapping writes.
+"""
+import asyncio
+
+import pytest
+
+from server.content_rewrite import RewriteProgram
+from server.emojis import EmojiManager
+from server.roles import RoleManager
+from server.server import ServerReceiver
+
+HOST = 1
+CLONE_A = 10
+CLONE_B = 20
+
+
+def _receiver(db) -> ServerReceiver:
+    r = ServerReceiver.__new__(ServerReceiver)
+    r.db = db
+    r.chan_map = {}
+    r.chan_map_by_clone = {}
+    r.emoji_map = None
+    r.emoji_map_by_clone = {}
+    r.role_map = None
+    r.role_map_by_clone = {}
+    r._rewrite_programs = {}
+    r._word_rewrites_cache = {}
+    return r
+
+
+@pytest.fixture()
+def receiver(db):
+    db.upsert_emoji_mapping(100, "wave", 1100, "wave", original_guild_id=HOST, cloned_guild_id=CLONE_A)
+    db.upsert_emoji_mapping(100, "wave", 2100, "wave", original_guild_id=HOST, cloned_guild_id=CLONE_B)
+    db.upsert_role_mapping(500, "mods", 1500, "mods", original_guild_id=HOST, cloned_guild_id=CLONE_A)
+    db.upsert_role_mapping(500, "mods", 2500, "mods", original_guild_id=HOST, cloned_guild_id=CLONE_B)
+    return _receiver(db)
+
+
+def _rewrite(r, s, clone=None):
+    row = {"cloned_guild_id": clone} if clone else None
+    return r._sanitize_inline(s, ctx_guild_id=None, ctx_mapping_row=row)
+
+
+class TestEmojiRewrite:
+
+    def test_uses_the_target_clone(self, receiver):
+        assert _rewrite(receiver, "hi <:wave:100>", CLONE_A) == "hi <:wave:1100>"
+        assert _rewrite(receiver, "hi <:wave:100>", CLONE_B) == "hi <:wave:2100>"
+
+    def test_falls_back_to_any_clone(self, receiver):
+        assert _rewrite(receiver, "<:wave:100>") == "<:wave:1100>"
+        assert _rewrite(receiver, "<:wave:100>", 99) == "<:wave:1100>"
+
+    def test_unknown_emoji_is_untouched(self, receiver):
+        assert _rewrite(receiver, "<:nope:7>", CLONE_A) == "<:nope:7>"
+
+    def test_index_is_built_once(self, receiver, db, monkeypatch):
+        _rewrite(receiver, "<:wave:100>", CLONE_A)
+        monkeypatch.setattr(db, "get_all_emoji_mappings", lambda: pytest.fail("reloaded"))
+        for _ in range(3):
+            _rewrite(receiver, "<:wave:100> <:wave:100>", CLONE_B)
+
+    def test_manager_writes_invalidate(self, receiver, db):
+        mgr = EmojiManager(None, db, None, None, on_mappings_changed=receiver._invalidate_emoji_index)
+        assert _rewrite(receiver, "<:wave:100>", CLONE_A) == "<:wave:1100>"
+        mgr._upsert_mapping(100, "wave", 3100, "wave", original_guild_id=HOST, cloned_guild_id=CLONE_A)
+        assert _rewrite(receiver, "<:wave:100>", CLONE_A) == "<:wave:3100>"
+        mgr._delete_mapping(100, CLONE_A)
+        assert _rewrite(receiver, "<:wave:100>", CLONE_A) == "<:wave:2100>"
+
+
+class TestRoleRewrite:
+
+    def test_uses_the_target_clone(self, receiver):
+        assert _rewrite(receiver, "<@&500> ping", CLONE_B) == "<@&2500> ping"
+
+    def test_unknown_role_is_untouched(self, receiver):
+        assert _rewrite(receiver, "<@&42>", CLONE_A) == "<@&42>"
+
+    def test_manager_writes_invalidate(self, receiver, db):
+        mgr = RoleManager(None, db, None, None, on_mappings_changed=receiver._invalidate_role_index)
+        assert _rewrite(receiver, "<@&500>", CLONE_A) == "<@&1500>"
+        mgr._delete_mapping(500, CLONE_A)
+        mgr._delete_mapping(500, CLONE_B)
+        assert _rewrite(receiver, "<@&500>", CLONE_A) == "<@&500>"
+
+    def test_sanitize_inline_rewrites_everything(self, receiver):
+        out = receiver._sanitize_inline(
+            "<:wave:100> hey <@&500>",
+            ctx_guild_id=HOST,
+            ctx_mapping_row={"cloned_guild_id": CLONE_B},
+        )
+        assert out == "<:wave:2100> hey <@&2500>"
+
+
+class TestRewriteProgram:
+
+    def _prog(self, words=()):
+        return RewriteProgram(
+            emojis={100: 1100},
+            roles={500: 1500},
+            words=words,
+        )
+
+    def test_one_pass_over_every_token_kind(self):
+        prog = self._prog()
+        out = prog.rewrite_tokens(
+            "<:wave:100> <#7> <@&500> https://discord.com/channels/1/2/3",
+            channels={7: {"cloned_channel_id": 77}},
+            channels_fallback={},
+            link=lambda m: f"{m.group('base')}LINK",
+        )
+        assert out == "<:wave:1100> <#77> <@&1500> https://discord.com/channels/LINK"
+
+    def test_channel_falls_back_to_flat_map(self):
+        out = self._prog().rewrite_tokens(
+            "<#7> <#8>",
+            channels=None,
+            channels_fallback={7: {"cloned_channel_id": 70}},
+            link=lambda m: m.group(0),
+        )
+        assert out == "<#70> <#8>"
+
+    def test_word_rewrites_prefer_longest_and_ignore_case(self):
+        prog = self._prog([("category", "section"), ("cat", "dog")])
+        assert prog.rewrite_words("A Cat in a CATEGORY") == "A dog in a section"
+
+    def test_longest_wins_across_shared_prefixes(self):
+        prog = self._prog([("term1", "a"), ("term12", "b"), ("term", "c")])
+        assert prog.rewrite_words("term12 term1 term9") == "b a c9"
+
+    def test_tokens_pass_skips_plain_text(self):
+        out = self._prog().rewrite_tokens(
+            "nothing to see", channels=None, channels_fallback={}, link=None
+        )
+        assert out == "nothing to see"
+
+    def test_replacement_is_literal(self):
+        prog = self._prog([("path", r"C:\new")])
+        assert prog.rewrite_words("the path") == r"the C:\new"
+
+    def test_first_scope_wins_for_duplicate_sources(self):
+        prog = self._prog([("hello", "mapping"), ("HELLO", "global")])
+        assert prog.rewrite_words("hello") == "mapping"
+
+    def test_no_words(self):
+        prog = self._prog()
+        assert not prog.has_words
+        assert prog.rewrite_words("unchanged") == "unchanged"
+
+
+class TestProgramCache:
+
+    def test_cached_per_pair_and_dropped_with_indexes(self, receiver):
+        a = receiver._rewrite_program(HOST, CLONE_A)
+        assert receiver._rewrite_program(HOST, CLONE_A) is a
+        assert receiver._rewrite_program(HOST, CLONE_B) is not a
+        receiver._invalidate_emoji_index(CLONE_A)
+        assert receiver._rewrite_program(HOST, CLONE_A) is not a
+
+    @pytest.mark.asyncio
+    async def test_word_rewrites_reload_rebuilds(self, receiver, monkeypatch):
+        receiver._word_rewrites_lock = asyncio.Lock()
+        rows = [{"source_text": "foo", "replacement_text": "bar",
+                 "original_guild_id": HOST, "cloned_guild_id": CLONE_A}]
+        monkeypatch.setattr(receiver.db, "get_all_mapping_rewrites", lambda: rows, raising=False)
+        assert not receiver._rewrite_program(HOST, CLONE_A).has_words
+        await receiver._load_word_rewrites_cache()
+        assert receiver._rewrite_program(HOST, CLONE_A).rewrite_words("foo!") == "bar!"
+        assert not receiver._rewrite_program(HOST, CLONE_B).has_words
@@ -48,6 +48,152 @@ class TestSchemaInit:
         assert db.get_config("test_key") == "hello"
 
 
+# ---------------------------------------------------------------------------
+# Durability profiles (journal mode / synchronous)
+# ---------------------------------------------------------------------------
+
+class TestDurability:
+
+    def test_default_is_safe_rollback_journal(self, db):
+        assert db.durability == "safe"
+        assert db.journal_mode() == "delete"
+        assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+
+    def test_performance_profile_switches_to_wal(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        assert perf.journal_mode() == "wal"
+        assert perf.conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_profile_selected_from_app_config(self, db, tmp_db_path):
+        from common.db import DBManager
+        db.set_config("DB_DURABILITY", "performance")
+        other = DBManager(tmp_db_path)
+        assert other.durability == "performance"
+        assert other.journal_mode() == "wal"
+
+    def test_unknown_profile_falls_back_to_safe(self, tmp_db_path):
+        from common.db import DBManager
+        assert DBManager(tmp_db_path, durability="yolo").durability == "safe"
+
+    def test_migrates_back_to_delete_when_sole_connection(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        perf.set_config("K", "v")
+        perf.conn.close()
+        safe = DBManager(tmp_db_path, durability="safe")
+        assert safe.journal_mode() == "delete"
+        assert safe.get_config("K") == "v"
+
+    def test_checkpoint_reports_pages(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        perf.set_config("K", "v")
+        res = perf.checkpoint("TRUNCATE")
+        assert res["busy"] == 0
+        with pytest.raises(ValueError):
+            perf.checkpoint("BOGUS")
+
+    def test_backup_of_wal_db_is_self_contained(self, tmp_path, tmp_db_path):
+        import asyncio
+        import tarfile
+        from common.backup_scheduler import BackupConfig, DailySQLiteBackupScheduler
+        from common.db import DBManager
+
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        perf.set_config("K", "in-wal")
+        sched = DailySQLiteBackupScheduler(
+            BackupConfig(db_path=tmp_db_path, backup_dir=tmp_path / "bk"),
+            logger=__import__("logging").getLogger("test"),
+        )
+        out = asyncio.run(sched._backup_once())
+        with tarfile.open(out, "r:gz") as tar:
+            tar.extract("data.db", path=tmp_path / "x")
+        snap = sqlite3.connect(str(tmp_path / "x" / "data.db"))
+        assert snap.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert snap.execute(
+            "SELECT value FROM app_config WHERE key='K'"
+        ).fetchone()[0] == "in-wal"
+
+        # ...and restores into the live WAL database through the backup API.
+        perf.set_config("K", "changed")
+        perf.restore_from(str(tmp_path / "x" / "data.db"))
+        assert perf.get_config("K") == "in-wal"
+        assert perf.journal_mode() == "wal"
+
+
+# ---------------------------------------------------------------------------
+# Read pool (WAL readers)
+# ---------------------------------------------------------------------------
+
+class TestReadPool:
+
+    def test_no_pool_outside_wal(self, db):
+        db.set_config("A", "1")
+        assert db.get_config("A") == "1"
+        assert db.read_pool_stats() == {"open": 0, "size": 0}
+
+    def test_pooled_reads_see_committed_writes(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        perf.set_config("A", "1")
+        assert perf.get_config("A") == "1"
+        perf.set_config("A", "2")
+        assert perf.get_config("A") == "2"
+        assert perf.read_pool_stats()["open"] == 1
+
+    def test_pooled_readers_are_read_only(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        with pytest.raises(sqlite3.OperationalError):
+            perf._read("DELETE FROM app_config")
+
+    def test_reads_inside_a_write_transaction_see_its_rows(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        perf.get_config("A")  # open a pooled reader first
+        with perf.lock, perf.conn:
+            perf.conn.execute("INSERT INTO app_config(key,value) VALUES('A','tx')")
+            assert perf.get_config("A") == "tx"
+
+    def test_cursor_shape_is_preserved(self, tmp_db_path):
+        from common.db import DBManager
+        perf = DBManager(tmp_db_path, init_schema=True, durability="performance")
+        perf.upsert_guild(1, "G", None, 2, 3, "d")
+        assert perf.get_all_guilds()[0]["name"] == "G"
+
+    def test_concurrent_readers_and_writer(self, tmp_db_path):
+        import threading
+        from common.db import DBManager
+        perf = DBManager(
+            tmp_db_path, init_schema=True, durability="performance", read_pool_size=2
+        )
+        errors = []
+
+        def writer():
+            for i in range(200):
+                perf.upsert_message_mapping(1, 2, i, 3, 1000 + i, None, cloned_guild_id=5)
+
+        def reader():
+            try:
+                for _ in range(100):
+                    perf.list_guild_mappings()
+                    perf.get_event_logs()
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer)] + [
+            threading.Thread(target=reader) for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert perf.read_pool_stats()["open"] <= 2
+        assert perf.get_mapping_by_cloned(1199)["original_message_id"] == 199
+
+
 # ---------------------------------------------------------------------------
 # App config
 # ---------------------------------------------------------------------------
@@ -534,6 +680,72 @@ class TestMessageMappings:
         deleted = db.delete_message_mapping(5000)
         assert deleted >= 1
 
+    def test_cloned_ids_packed(self, db):
+        from common.idset import SortedIdSet
+
+        for mid in (9000, 5000, 7000):
+            db.upsert_message_mapping(1, 100, mid, 200, mid + 1, "", cloned_guild_id=2)
+        db.upsert_message_mapping(1, 101, 8000, 201, 8001, "", cloned_guild_id=2)
+        db.upsert_message_mapping(1, 100, 6000, 300, 6001, "", cloned_guild_id=3)
+        packed = db.get_cloned_original_ids_packed(100, 2)
+        assert list(SortedIdSet.unpack(packed)) == [5000, 7000, 9000]
+        assert db.get_cloned_original_ids_packed(100, 99) == ""
+
+
+class TestMessageMappingWriteBehind:
+
+    def _stored(self, db):
+        return db.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def test_buffered_rows_visible_before_flush(self, db):
+        db.enable_message_write_behind(max_rows=100, max_delay=60)
+        db.upsert_message_mapping(1, 100, 5000, 200, 6000, "wh", cloned_guild_id=2)
+        db.upsert_message_mapping(1, 100, 5000, 300, 7000, "wh", cloned_guild_id=3)
+        assert self._stored(db) == 0
+        rows = db.get_message_mappings_for_original(5000)
+        assert [r["cloned_message_id"] for r in rows] == [6000, 7000]
+        assert db.get_mapping_by_cloned(7000)["cloned_guild_id"] == 3
+        assert db.get_message_mapping_pair(5000, 2)["cloned_channel_id"] == 200
+
+    def test_flush_writes_one_batch(self, db):
+        db.enable_message_write_behind(max_rows=100, max_delay=60)
+        for i in range(10):
+            db.upsert_message_mapping(1, 100, 5000 + i, 200, 6000 + i, None, cloned_guild_id=2)
+        assert db.pending_message_mappings() == 10
+        assert db.flush_message_mappings() == 10
+        assert db.pending_message_mappings() == 0
+        assert self._stored(db) == 10
+
+    def test_size_threshold_flushes(self, db):
+        db.enable_message_write_behind(max_rows=3, max_delay=60)
+        for i in range(3):
+            db.upsert_message_mapping(1, 100, 5000 + i, 200, 6000 + i, None, cloned_guild_id=2)
+        assert self._stored(db) == 3
+
+    def test_time_threshold_only_if_due(self, db):
+        db.enable_message_write_behind(max_rows=100, max_delay=60)
+        db.upsert_message_mapping(1, 100, 5000, 200, 6000, None, cloned_guild_id=2)
+        assert db.flush_message_mappings(only_if_due=True) == 0
+        db._msg_buffer_since -= 61
+        assert db.flush_message_mappings(only_if_due=True) == 1
+
+    def test_coalesces_without_overwriting_with_null(self, db):
+        db.upsert_message_mapping(1, 100, 5000, 200, 6000, "old", cloned_guild_id=2)
+        db.enable_message_write_behind(max_rows=100, max_delay=60)
+        db.upsert_message_mapping(1, 100, 5000, None, None, "new", cloned_guild_id=2)
+        db.upsert_message_mapping(1, 100, 5000, None, None, None, cloned_guild_id=2, sent_token_id="t")
+        row = db.get_message_mappings_for_original(5000)[0]
+        assert (row["cloned_message_id"], row["webhook_url"], row["sent_token_id"]) == (6000, "new", "t")
+        db.flush_message_mappings()
+        row = db.get_message_mapping_pair(5000, 2)
+        assert (row["cloned_message_id"], row["webhook_url"], row["sent_token_id"]) == (6000, "new", "t")
+
+    def test_delete_sees_buffered_rows(self, db):
+        db.enable_message_write_behind(max_rows=100, max_delay=60)
+        db.upsert_message_mapping(1, 100, 5000, 200, 6000, None, cloned_guild_id=2)
+        assert db.delete_message_mapping(5000) == 1
+        assert db.get_message_mappings_for_original(5000) == []
+
 
 # ---------------------------------------------------------------------------
 # Thread mappings
@@ -566,6 +778,38 @@ class TestThreadMappings:
         db.delete_forum_thread_mapping(3000)
         assert db.get_all_threads() == []
 
+    def test_cloned_thread_ids_per_clone_guild(self, db):
+        self._setup_channel(db)
+        db.upsert_forum_thread_mapping(3000, "a", 4000, 100, 200, original_guild_id=1, cloned_guild_id=2)
+        db.upsert_forum_thread_mapping(3001, "b", 4001, 100, 200, original_guild_id=1, cloned_guild_id=2)
+        db.upsert_forum_thread_mapping(3000, "a", 5000, None, None, original_guild_id=1, cloned_guild_id=3)
+        assert db.get_cloned_thread_ids(2) == {4000, 4001}
+        assert db.get_cloned_thread_ids(3) == {5000}
+        assert db.get_cloned_thread_ids(9) == set()
+
+
+# ---------------------------------------------------------------------------
+# Sync phase state
+# ---------------------------------------------------------------------------
+
+class TestSyncPhaseState:
+
+    def test_roundtrip_and_overwrite(self, db):
+        db.set_sync_phase_state(1, 2, {"roles": ("src", "clone"), "structure": ("s", "c")})
+        db.set_sync_phase_state(1, 2, {"roles": ("src2", "clone2")})
+        assert db.get_sync_phase_state(1, 2) == {
+            "roles": ("src2", "clone2"),
+            "structure": ("s", "c"),
+        }
+        assert db.get_sync_phase_state(1, 3) == {}
+
+    def test_clear_by_clone(self, db):
+        db.set_sync_phase_state(1, 2, {"roles": ("a", "b")})
+        db.set_sync_phase_state(1, 3, {"roles": ("a", "b")})
+        db.clear_sync_phase_state(2)
+        assert db.get_sync_phase_state(1, 2) == {}
+        assert db.get_sync_phase_state(1, 3) != {}
+
 
 # ---------------------------------------------------------------------------
 # Mapping user tokens (self-bot senders)
@@ -0,0 +1,170 @@
+"""
+Tests for the streaming message export: rows are written to NDJSON in
+batches off the event loop, read back for the media/forwarding phases, and
+rewritten as the classic messages.json on request.
+"""
+import asyncio
+import json
+import os
+from types import SimpleNamespace as NS
+
+import pytest
+
+from client.export_runners import ExportMessagesRunner
+from client.export_writer import (
+    NDJSONExportWriter,
+    iter_export_rows,
+    ndjson_to_json,
+)
+
+
+def _row(cid, mid, name="general"):
+    return {
+        "guild_id": 1,
+        "channel_id": cid,
+        "message": {"id": mid, "content": f"héllo\n{mid}", "_export_ctx": {"channel_name": name}},
+    }
+
+
+async def _write(tmp_path, rows, **kw):
+    w = await NDJSONExportWriter(str(tmp_path), batch_size=3, **kw).open()
+    for r in rows:
+        await w.write(r)
+    await w.close()
+    return w
+
+
+class TestNDJSONExportWriter:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("compression", ["none", "gzip"])
+    async def test_round_trip(self, tmp_path, compression):
+        rows = [_row(10, i) for i in range(7)] + [_row(20, i, "other") for i in range(7, 9)]
+        w = await _write(tmp_path, rows, compression=compression)
+        assert w.path.endswith(".ndjson" + (".gz" if compression == "gzip" else ""))
+        assert [r async for r in iter_export_rows(w.path, batch=4)] == rows
+        assert w.count == 9
+
+    @pytest.mark.asyncio
+    async def test_manifest_indexes_channels(self, tmp_path):
+        rows = [_row(10, 1), _row(10, 2), _row(20, 3, "other")]
+        w = await _write(tmp_path, rows)
+        m = w.manifest(guild_id="1")
+        assert m["count"] == 3 and m["file"] == "messages.ndjson" and m["guild_id"] == "1"
+        assert m["channels"] == [
+            {"channel_id": 10, "channel_name": "general", "first_line": 0, "count": 2},
+            {"channel_id": 20, "channel_name": "other", "first_line": 2, "count": 1},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_unknown_compression_falls_back(self, tmp_path):
+        w = NDJSONExportWriter(str(tmp_path), compression="lzma")
+        assert w.compression == "none"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("n", [0, 1, 5])
+    async def test_json_rewrite_matches_old_document(self, tmp_path, n):
+        rows = [_row(10, i) for i in range(n)]
+        w = await _write(tmp_path, rows, compression="gzip")
+        dest = os.path.join(tmp_path, "messages.json")
+        header = {"guild_id": "1", "exported_at": "20250101-000000Z", "count": n}
+        assert ndjson_to_json(w.path, dest, header) == n
+        with open(dest, encoding="utf-8") as f:
+            doc = json.load(f)
+        assert doc == {**header, "messages": [r["message"] for r in rows]}
+
+
+def _msg(mid):
+    return NS(
+        id=mid, content=f"m{mid}", system_content="", author=NS(id=1, bot=False),
+        type=NS(name="default"), reactions=[], pinned=False, stickers=[],
+        mentions=[], role_mentions=[], channel_mentions=[], attachments=[],
+        embeds=[], reference=None, flags=NS(value=0),
+    )
+
+
+class _Chan:
+    def __init__(self, cid, n):
+        self.id = cid
+        self.name = f"c{cid}"
+        self._msgs = [_msg(cid * 100 + i) for i in range(n)]
+
+    def permissions_for(self, me):
+        return NS(read_message_history=True)
+
+    async def history(self, **kw):
+        for m in self._msgs:
+            yield m
+
+
+class _WS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+
+class TestExportRun:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("fmt", ["json", "ndjson"])
+    async def test_streams_then_forwards_from_file(self, tmp_path, fmt):
+        ws = _WS()
+        runner = ExportMessagesRunner(
+            NS(user=NS(id=9)), ws, lambda m: {"id": m.id, "content": m.content},
+            send_sleep=0, out_root=str(tmp_path),
+        )
+        guild = NS(id=1, name="g", text_channels=[_Chan(1, 3), _Chan(2, 2)], get_member=lambda uid: None)
+        await runner.run(
+            {"webhook_url": "https://hook", "format": fmt, "filters": {"threads": False}}, guild
+        )
+
+        forwarded = [p["data"]["message"]["id"] for p in ws.sent if p["type"] == "export_message"]
+        assert forwarded == [100, 101, 102, 200, 201]
+        done = ws.sent[-1]["data"]
+        assert done["forwarded"] == 5 and done["matched"] == 5
+        with open(done["manifest_path"], encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert [c["count"] for c in manifest["channels"]] == [3, 2]
+        if fmt == "json":
+            assert done["json_path"].endswith("messages.json")
+            with open(done["json_path"], encoding="utf-8") as f:
+                assert json.load(f)["count"] == 5
+            assert "ndjson_path" not in done and manifest["file"] == "messages.json"
+            folder = os.path.dirname(done["json_path"])
+            assert not [n for n in os.listdir(folder) if ".ndjson" in n]
+        else:
+            assert done["json_path"] == done["ndjson_path"]
+            assert os.path.exists(done["ndjson_path"])
+
+    @pytest.mark.asyncio
+    async def test_cancelled_scan_closes_the_stream_file(self, tmp_path, monkeypatch):
+        from client import export_runners
+
+        writers = []
+
+        class _Writer(export_runners.NDJSONExportWriter):
+            def __init__(self, *a, **kw):
+                super().__init__(*a, **kw)
+                writers.append(self)
+
+        monkeypatch.setattr(export_runners, "NDJSONExportWriter", _Writer)
+        started = asyncio.Event()
+
+        class _Stuck(_Chan):
+            async def history(self, **kw):
+                started.set()
+                await asyncio.Event().wait()
+                yield  # pragma: no cover
+
+        runner = ExportMessagesRunner(
+            NS(user=NS(id=9)), _WS(), lambda m: {}, send_sleep=0, out_root=str(tmp_path)
+        )
+        guild = NS(id=1, name="g", text_channels=[_Stuck(1, 0)], get_member=lambda uid: None)
+        task = asyncio.ensure_future(runner.run({"filters": {"threads": False}}, guild))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert writers and writers[0]._fh is None
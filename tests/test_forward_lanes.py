@@ -0,0 +1,158 @@
+"""
+Tests for ForwardLanes, the live forwarding scheduler: one channel's sends
+go out in arrival order, different channels overlap up to the global limit,
+a full queue pushes back in arrival order, and drained lanes disappear.
+"""
+import asyncio
+
+import pytest
+
+from server.forward_lanes import ForwardLanes
+
+
+def _sender(log, key, i, delay=0.0, active=None, peak=None):
+    async def send():
+        if active is not None:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(delay)
+        if active is not None:
+            active[0] -= 1
+        log.append((key, i))
+
+    return send
+
+
+async def _settle(lanes, timeout=2.0):
+    async def idle():
+        while lanes.queued or lanes.running or lanes._lanes:
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(idle(), timeout)
+
+
+class TestForwardLanes:
+
+    @pytest.mark.asyncio
+    async def test_each_lane_keeps_arrival_order(self):
+        lanes = ForwardLanes(concurrency=4)
+        log = []
+        # later messages are faster: unordered tasks would finish them first
+        for i in range(10):
+            for key in ("a", "b"):
+                await lanes.submit(key, _sender(log, key, i, delay=0.01 * (10 - i) / 10))
+        await _settle(lanes)
+        for key in ("a", "b"):
+            assert [i for k, i in log if k == key] == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_lanes_overlap_up_to_the_global_limit(self):
+        lanes = ForwardLanes(concurrency=3)
+        log, active, peak = [], [0], [0]
+        for key in range(6):
+            for i in range(2):
+                await lanes.submit(key, _sender(log, key, i, 0.02, active, peak))
+        assert lanes.stats()["queued"] == 12
+        await _settle(lanes)
+        assert peak[0] == 3 and len(log) == 12
+
+    @pytest.mark.asyncio
+    async def test_full_queue_admits_in_arrival_order(self):
+        lanes = ForwardLanes(concurrency=1, max_queued=2)
+        release = asyncio.Event()
+        log = []
+
+        async def blocker():
+            await release.wait()
+
+        await lanes.submit("x", blocker)
+        await asyncio.sleep(0)  # blocker starts; the queue is empty again
+        await lanes.submit("y", _sender(log, "y", 0))
+        await lanes.submit("y", _sender(log, "y", 1))
+        waiting = [
+            asyncio.ensure_future(lanes.submit("y", _sender(log, "y", i)))
+            for i in (2, 3, 4)
+        ]
+        await asyncio.sleep(0.01)
+        assert not any(w.done() for w in waiting)
+        assert lanes.stats()["waiting_admission"] == 3
+        release.set()
+        await asyncio.gather(*waiting)
+        await _settle(lanes)
+        assert log == [("y", i) for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_stall_the_lane(self):
+        lanes = ForwardLanes()
+        log = []
+
+        async def boom():
+            raise RuntimeError("send failed")
+
+        await lanes.submit(1, boom)
+        await lanes.submit(1, _sender(log, 1, 0))
+        await _settle(lanes)
+        assert log == [(1, 0)]
+        assert lanes.stats()["failed"] == 1 and lanes.stats()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_depth_and_lane_cleanup(self):
+        lanes = ForwardLanes(concurrency=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        for _ in range(3):
+            await lanes.submit(7, blocker)
+        await asyncio.sleep(0)
+        assert lanes.depth(7) == 3
+        assert lanes.stats()["lanes"] == {"7": 3}
+        release.set()
+        await _settle(lanes)
+        assert lanes.depth(7) == 0 and lanes.stats()["lanes"] == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_worker_drops_its_queue(self):
+        tasks = []
+
+        def spawn(coro, name=None):
+            t = asyncio.create_task(coro, name=name)
+            tasks.append(t)
+            return t
+
+        lanes = ForwardLanes(spawn=spawn)
+        for _ in range(3):
+            await lanes.submit("s", lambda: asyncio.sleep(10))
+        await asyncio.sleep(0)
+        tasks[0].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert lanes.queued == 0 and lanes.running == 0 and not lanes._lanes
+
+    @pytest.mark.asyncio
+    async def test_released_slot_lets_the_awaited_lane_run(self):
+        lanes = ForwardLanes(concurrency=1)
+        starter_sent = asyncio.Event()
+        log = []
+
+        async def reply():
+            async with lanes.released():
+                await asyncio.wait_for(starter_sent.wait(), 1)
+            log.append("reply")
+
+        async def starter():
+            log.append("starter")
+            starter_sent.set()
+
+        await lanes.submit("thread", reply)
+        await lanes.submit("parent", starter)
+        await _settle(lanes)
+        assert log == ["starter", "reply"]
+        assert lanes.stats()["completed"] == 2 and lanes._sem._value == 1
+
+    @pytest.mark.asyncio
+    async def test_released_is_a_no_op_outside_a_worker(self):
+        lanes = ForwardLanes(concurrency=1)
+        async with lanes.released():
+            pass
+        assert lanes._sem._value == 1 and lanes.running == 0
@@ -0,0 +1,44 @@
+"""
+Tests for common.idset: the compact already-cloned id list sent with
+resumable backfills.
+"""
+import json
+import random
+
+from common.idset import SortedIdSet, pack_deltas
+
+
+class TestSortedIdSet:
+
+    def test_membership(self):
+        s = SortedIdSet([30, 10, 20, 10])
+        assert len(s) == 3
+        assert 10 in s and 30 in s
+        assert 15 not in s and 40 not in s and 0 not in s
+        assert "20" in s
+        assert None not in s
+
+    def test_pack_round_trip(self):
+        rnd = random.Random(3)
+        ids = {rnd.randrange(1 << 60, 1 << 62) for _ in range(2_000)}
+        s = SortedIdSet(ids)
+        back = SortedIdSet.unpack(s.pack())
+        assert list(back) == sorted(ids)
+        assert all(i in back for i in ids)
+
+    def test_pack_deltas_matches_pack(self):
+        ids = [5, 12, 40]
+        assert pack_deltas([5, 7, 28]) == SortedIdSet(ids).pack() == "5,7,1c"
+
+    def test_empty(self):
+        for s in (SortedIdSet(), SortedIdSet.unpack(""), SortedIdSet.unpack(None)):
+            assert not s
+            assert 1 not in s
+            assert s.pack() == ""
+
+    def test_smaller_than_json_id_list(self):
+        # Snowflakes ~1s apart, like a busy channel.
+        base = 1_200_000_000_000_000_000
+        ids = [base + (i * 1000 << 22) + i % 4096 for i in range(1_000)]
+        packed = SortedIdSet(ids).pack()
+        assert len(packed) * 2 < len(json.dumps([str(i) for i in ids]))
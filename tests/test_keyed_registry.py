@@ -0,0 +1,121 @@
+"""
+Tests for KeyedRegistry, the bounded per-key state used for the server's
+locks, gates and small caches: idle keys expire, the least recently used
+go first when full, held locks are never evicted, and the counters add up.
+"""
+import asyncio
+
+import pytest
+
+from common.keyed_registry import KeyedRegistry, registry_stats
+from server.rate_limiter import ActionType, RateLimitManager
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestKeyedRegistry:
+
+    def test_ttl_expires_idle_keys_on_access_and_insert(self):
+        clk = _Clock()
+        reg = KeyedRegistry("t", ttl=10, clock=clk)
+        reg["a"] = 1
+        reg["b"] = 2
+        clk.t = 5
+        assert reg.get("a") == 1  # touched: a is fresh again
+        clk.t = 12
+        assert "b" not in reg and reg.get("a") == 1
+        clk.t = 30
+        reg["c"] = 3
+        assert list(reg) == ["c"]
+        assert reg.stats()["evicted_ttl"] == 2
+
+    def test_lru_evicts_least_recently_used(self):
+        reg = KeyedRegistry("t", max_size=3)
+        for k in "abc":
+            reg[k] = k
+        reg.get("a")
+        reg["d"] = "d"
+        assert list(reg) == ["c", "a", "d"]
+        assert reg.stats()["evicted_lru"] == 1
+
+    @pytest.mark.asyncio
+    async def test_held_lock_is_never_evicted(self):
+        clk = _Clock()
+        reg = KeyedRegistry("locks", asyncio.Lock, max_size=2, ttl=5, clock=clk)
+        held = reg.get_or_create("held")
+        async with held:
+            reg.get_or_create("x")
+            reg.get_or_create("y")  # over capacity: "held" is oldest but busy
+            assert list(reg) == ["held", "y"]
+            clk.t = 100
+            assert reg.sweep() == 1
+            assert reg.get_or_create("held") is held
+            assert reg.stats()["busy_skips"] >= 2
+        clk.t = 200
+        assert reg.sweep() == 1 and len(reg) == 0
+
+    @pytest.mark.asyncio
+    async def test_released_lock_with_a_woken_waiter_stays(self):
+        clk = _Clock()
+        reg = KeyedRegistry("locks", asyncio.Lock, ttl=5, clock=clk)
+        lock = reg.get_or_create("k")
+        await lock.acquire()
+        waiter = asyncio.ensure_future(lock.acquire())
+        await asyncio.sleep(0)
+        lock.release()  # waiter woken but has not re-acquired yet
+        assert not lock.locked()
+        clk.t = 100
+        assert reg.sweep() == 0
+        assert reg.get_or_create("k") is lock
+        await waiter
+        lock.release()
+
+    def test_dict_and_set_helpers(self):
+        reg = KeyedRegistry("t", factory=dict)
+        assert reg.setdefault("k", {"v": 1}) == {"v": 1}
+        assert reg.setdefault("k", {"v": 2}) == {"v": 1}
+        assert reg.pop("k") == {"v": 1} and reg.pop("k", None) is None
+        with pytest.raises(KeyError):
+            reg["missing"]
+        reg.add("seen")
+        assert "seen" in reg
+        reg.discard("seen")
+        assert "seen" not in reg
+        assert reg.get_or_create("new") == {}
+
+    def test_stats_are_collected_by_name(self):
+        reg = KeyedRegistry("zz_test_registry", max_size=1)
+        reg["a"] = 1
+        reg["b"] = 2
+        s = next(r for r in registry_stats() if r["name"] == "zz_test_registry")
+        assert s == {
+            "name": "zz_test_registry",
+            "size": 1,
+            "peak": 2,
+            "max_size": 1,
+            "ttl": None,
+            "evicted_ttl": 0,
+            "evicted_lru": 1,
+            "busy_skips": 0,
+        }
+
+
+class TestWebhookLimiters:
+
+    @pytest.mark.asyncio
+    async def test_idle_webhook_limiters_are_dropped_but_cooling_ones_kept(self):
+        mgr = RateLimitManager()
+        clk = _Clock()
+        mgr._webhook_limiters._clock = clk
+        await mgr.acquire(ActionType.WEBHOOK_MESSAGE, key="channel:1")
+        await mgr.acquire(ActionType.WEBHOOK_MESSAGE, key="channel:2")
+        mgr.penalize(ActionType.WEBHOOK_MESSAGE, 60, key="channel:2")
+        clk.t = 10_000
+        assert mgr.sweep() == 1
+        assert mgr.remaining(ActionType.WEBHOOK_MESSAGE, key="channel:2") > 0
@@ -0,0 +1,193 @@
+"""
+Tests for common.keywords.KeywordMatcher and the call sites that share it:
+server blocked keywords, client announcement triggers (and their cache) and
+forwarding filters.
+"""
+import random
+import re
+
+import pytest
+
+from common.keywords import KeywordMatcher
+
+
+def _naive_whole_word(keywords, text):
+    return {
+        k for k in keywords
+        if re.search(rf"(?<!\w){re.escape(k)}(?!\w)", text, re.IGNORECASE)
+    }
+
+
+class TestKeywordMatcher:
+
+    def test_substring_mode(self):
+        m = KeywordMatcher(["Spoiler", "leak"])
+        assert m.search("big LEAKS today")
+        assert m.first("no Spoilers") == "spoiler"
+        assert not m.search("nothing here")
+
+    def test_whole_word_mode(self):
+        m = KeywordMatcher(["cat"], whole_word=True)
+        assert m.search("a Cat!")
+        assert not m.search("category")
+        assert not m.search("bobcat")
+
+    def test_whole_word_backs_off_to_shorter_keyword(self):
+        m = KeywordMatcher(["new", "newer"], whole_word=True)
+        assert m.first("newest and new") == "new"
+
+    def test_found_reports_overlaps(self):
+        m = KeywordMatcher(["new", "new york", "york"])
+        assert m.found("New York!") == {"new", "new york", "york"}
+        w = KeywordMatcher(["new", "new york", "newark"], whole_word=True)
+        assert w.found("new york newarks") == {"new", "new york"}
+
+    def test_contains_all(self):
+        m = KeywordMatcher(["alpha", "beta"])
+        assert m.contains_all("beta then alpha")
+        assert not m.contains_all("alpha only")
+
+    def test_case_sensitive(self):
+        m = KeywordMatcher(["Foo"], case_sensitive=True)
+        assert m.search("Foo")
+        assert not m.search("foo")
+
+    def test_regex_metacharacters_are_literal(self):
+        m = KeywordMatcher(["a.b", "(x)"], whole_word=True)
+        assert m.found("a.b and (x)") == {"a.b", "(x)"}
+        assert not m.search("axb")
+
+    def test_empty(self):
+        m = KeywordMatcher(["", None])
+        assert not m
+        assert m.first("anything") is None
+        assert m.contains_all("anything")
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_naive_per_keyword_scan(self, seed):
+        rnd = random.Random(seed)
+        alphabet = "abc _!"
+        keywords = {"".join(rnd.choice("abc") for _ in range(rnd.randint(1, 4))) for _ in range(30)}
+        for _ in range(50):
+            text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 40)))
+            sub = KeywordMatcher(keywords)
+            assert sub.found(text) == {k for k in keywords if k in text}
+            ww = KeywordMatcher(keywords, whole_word=True)
+            assert ww.found(text) == _naive_whole_word(keywords, text)
+            assert ww.search(text) == bool(_naive_whole_word(keywords, text))
+
+
+class TestForwardingFilters:
+
+    def _filters(self, **kw):
+        from client.forwarding import ForwardingFilters
+        return ForwardingFilters.from_dict(kw)
+
+    def test_include_any(self):
+        f = self._filters(include_keywords="Alert, outage")
+        assert f.apply({"content": "OUTAGE in eu"})
+        assert not f.apply({"content": "all good"})
+
+    def test_require_all_and_exclude(self):
+        f = self._filters(require_all_keywords=["btc", "price"], exclude_keywords=["scam"])
+        assert f.apply({"content": "BTC price up"})
+        assert not f.apply({"content": "btc up"})
+        assert not f.apply({"content": "btc price scam"})
+
+    def test_case_sensitive(self):
+        f = self._filters(include_keywords=["BTC"], case_sensitive=True)
+        assert f.apply({"content": "BTC"})
+        assert not f.apply({"content": "btc"})
+
+
+class TestServerBlockedKeywords:
+
+    def _receiver(self, cache):
+        from server.server import ServerReceiver
+        r = ServerReceiver.__new__(ServerReceiver)
+        r._blocked_keywords_cache = cache
+        r._blocked_matchers = {}
+        return r
+
+    def test_scopes_are_combined(self):
+        r = self._receiver({(1, 10): ["mapword"], (1, 0): ["hostword"], (0, 0): ["globalword"]})
+        assert r._should_block_for_mapping("a HostWord here", 1, 10) == (True, "hostword")
+        assert r._should_block_for_mapping("globalword", 1, 10) == (True, "globalword")
+        assert r._should_block_for_mapping("mapword", 1, 20) == (False, None)
+        assert r._should_block_for_mapping("hostwords", 1, 10) == (False, None)
+
+    def test_matcher_is_cached_per_mapping(self):
+        r = self._receiver({(0, 0): ["x"]})
+        assert r._blocked_matcher_for_mapping(1, 2) is r._blocked_matcher_for_mapping(1, 2)
+
+
+class _Msg:
+    def __init__(self, content, guild_id=1, author_id=7, channel_id=3):
+        from types import SimpleNamespace as NS
+        self.content = content
+        self.guild = NS(id=guild_id, name="g")
+        self.author = NS(id=author_id, name="someone")
+        self.channel = NS(id=channel_id, name="general")
+        self.created_at = "now"
+
+
+class TestAnnouncementTriggerCache:
+
+    @pytest.fixture()
+    def listener(self, db):
+        from client.client import ClientListener
+
+        class _WS:
+            def __init__(self):
+                self.sent = []
+
+            async def send(self, payload):
+                self.sent.append(payload)
+
+        cl = ClientListener.__new__(ClientListener)
+        cl.db = db
+        cl.ws = _WS()
+        cl._announce_cache = {}
+        cl._announce_version = 0
+        cl._announce_ttl = 300.0
+        return cl
+
+    @pytest.mark.asyncio
+    async def test_db_is_read_once(self, listener, db, monkeypatch):
+        db.add_announcement_trigger(1, "Launch", 0, 0)
+        assert await listener.maybe_send_announcement(_Msg("the LAUNCH is on"))
+        monkeypatch.setattr(db, "get_effective_announcement_triggers", lambda g: pytest.fail("reloaded"))
+        assert await listener.maybe_send_announcement(_Msg("launch again"))
+        assert not await listener.maybe_send_announcement(_Msg("nothing"))
+        assert [p["data"]["keyword"] for p in listener.ws.sent] == ["Launch", "Launch"]
+
+    @pytest.mark.asyncio
+    async def test_filters_by_user_and_channel(self, listener, db):
+        db.add_announcement_trigger(1, "drop", 42, 3)
+        assert not await listener.maybe_send_announcement(_Msg("drop", author_id=7))
+        assert not await listener.maybe_send_announcement(_Msg("drop", author_id=42, channel_id=4))
+        assert await listener.maybe_send_announcement(_Msg("drop", author_id=42))
+
+    @pytest.mark.asyncio
+    async def test_reload_notification_invalidates(self, listener, db):
+        assert not await listener.maybe_send_announcement(_Msg("sale"))
+        db.add_announcement_trigger(1, "sale", 0, 0)
+        assert not await listener.maybe_send_announcement(_Msg("sale"))
+        await listener._on_ws({"type": "announcements_reload", "data": {"guild_id": 1}})
+        assert await listener.maybe_send_announcement(_Msg("sale"))
+
+    @pytest.mark.asyncio
+    async def test_global_triggers_invalidate_every_guild(self, listener, db):
+        assert not await listener.maybe_send_announcement(_Msg("sale", guild_id=1))
+        assert not await listener.maybe_send_announcement(_Msg("sale", guild_id=2))
+        db.add_announcement_trigger(0, "sale", 0, 0)
+        await listener._on_ws({"type": "announcements_reload", "data": {"guild_id": 0}})
+        assert await listener.maybe_send_announcement(_Msg("sale", guild_id=1))
+        assert await listener.maybe_send_announcement(_Msg("sale", guild_id=2))
+
+    @pytest.mark.asyncio
+    async def test_ttl_backstop(self, listener, db):
+        listener._announce_ttl = 0.0
+        assert not await listener.maybe_send_announcement(_Msg("sale"))
+        db.add_announcement_trigger(1, "sale", 0, 0)
+        assert await listener.maybe_send_announcement(_Msg("sale"))
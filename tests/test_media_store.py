@@ -0,0 +1,225 @@
+"""
+Tests for the content-addressed export media store: one download per
+attachment key, one object per distinct content, Range-resumed partials,
+and a journal that lets a re-run export skip what it already has.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from types import SimpleNamespace as NS
+
+import pytest
+
+from client import export_runners
+from client.export_runners import ExportMessagesRunner
+from client.media_store import MediaStore, attachment_key
+
+
+class _Resp:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+        self.content = self
+
+    async def iter_chunked(self, n):
+        for i in range(0, len(self._body), n):
+            await asyncio.sleep(0)
+            yield self._body[i:i + n]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Session:
+    """aiohttp-like session serving `files` (url -> bytes); honours Range unless told not to."""
+
+    def __init__(self, files, *, ranges=True):
+        self.files = files
+        self.ranges = ranges
+        self.calls = []
+
+    def get(self, url, timeout=None, headers=None):
+        headers = headers or {}
+        self.calls.append((url, headers))
+        body = self.files[url.split("?", 1)[0]]
+        rng = headers.get("Range")
+        if rng and self.ranges:
+            start = int(rng.split("=")[1].rstrip("-"))
+            if start >= len(body):
+                return _Resp(416, b"")
+            return _Resp(206, body[start:])
+        return _Resp(200, body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+BODY = bytes(range(256)) * 300
+
+
+class TestMediaStore:
+
+    def test_attachment_key_prefers_id_and_ignores_signature(self):
+        assert attachment_key({"id": 5}, "https://cdn/x.png?ex=1") == "att:5"
+        a = attachment_key({}, "https://cdn.example/a/b.png?ex=1&hm=2")
+        assert a == attachment_key({}, "https://cdn.example/a/b.png?ex=9&hm=8")
+
+    @pytest.mark.asyncio
+    async def test_same_key_downloads_once(self, tmp_path):
+        store = await MediaStore(str(tmp_path)).open()
+        sess = _Session({"https://cdn/a": BODY})
+        (r1, f1), (r2, f2) = await asyncio.gather(
+            store.fetch(sess, "https://cdn/a?ex=1", key="att:1", ext=".png"),
+            store.fetch(sess, "https://cdn/a?ex=2", key="att:1", ext=".png"),
+        )
+        assert len(sess.calls) == 1 and [f1, f2].count(True) == 1
+        assert r1 == r2 and r1["sha256"] == hashlib.sha256(BODY).hexdigest()
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_identical_content_stored_once(self, tmp_path):
+        store = await MediaStore(str(tmp_path)).open()
+        sess = _Session({"https://cdn/a": BODY, "https://cdn/b": BODY})
+        r1, _ = await store.fetch(sess, "https://cdn/a", key="att:1", ext=".png")
+        r2, _ = await store.fetch(sess, "https://cdn/b", key="att:2", ext=".png")
+        store.close()
+        assert r1["sha256"] == r2["sha256"]
+        objects = [f for _, _, fs in os.walk(tmp_path / "objects") for f in fs]
+        assert len(objects) == 1
+        assert os.listdir(tmp_path / "partial") == []
+
+    @pytest.mark.asyncio
+    async def test_journal_survives_reopen_and_torn_line(self, tmp_path):
+        store = await MediaStore(str(tmp_path)).open()
+        await store.fetch(_Session({"https://cdn/a": BODY}), "https://cdn/a", key="att:1", ext="")
+        store.close()
+        with open(tmp_path / "journal.ndjson", "a") as f:
+            f.write('{"key": "att:2", "sha')
+
+        store = await MediaStore(str(tmp_path)).open()
+        sess = _Session({"https://cdn/a": BODY})
+        rec, fetched = await store.fetch(sess, "https://cdn/a", key="att:1", ext="")
+        store.close()
+        assert not fetched and sess.calls == [] and rec["size"] == len(BODY)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_downloads_keep_journal_lines_whole(self, tmp_path):
+        files = {f"https://cdn/{i}": bytes([i]) * 5000 for i in range(20)}
+        store = await MediaStore(str(tmp_path)).open()
+        await asyncio.gather(*(
+            store.fetch(_Session(files), url, key=f"att:{i}", ext="")
+            for i, url in enumerate(files)
+        ))
+        store.close()
+        with open(tmp_path / "journal.ndjson", encoding="utf-8") as f:
+            keys = sorted(json.loads(ln)["key"] for ln in f)
+        assert keys == sorted(f"att:{i}" for i in range(20))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("ranges", [True, False])
+    async def test_partial_download_resumes(self, tmp_path, ranges):
+        store = await MediaStore(str(tmp_path)).open()
+        part = tmp_path / "partial" / (hashlib.sha1(b"att:1").hexdigest() + ".part")
+        part.write_bytes(BODY[:1000])
+        sess = _Session({"https://cdn/a": BODY}, ranges=ranges)
+        rec, _ = await store.fetch(sess, "https://cdn/a", key="att:1", ext=".bin")
+        store.close()
+        assert sess.calls[0][1] == {"Range": "bytes=1000-"}
+        with open(store.object_path(rec["sha256"], ".bin"), "rb") as f:
+            assert f.read() == BODY
+
+    @pytest.mark.asyncio
+    async def test_http_error_leaves_no_record(self, tmp_path):
+        class _Gone(_Session):
+            def get(self, url, timeout=None, headers=None):
+                return _Resp(404, b"")
+
+        store = await MediaStore(str(tmp_path)).open()
+        with pytest.raises(RuntimeError):
+            await store.fetch(_Gone({}), "https://cdn/a", key="att:1", ext="")
+        assert store.lookup("att:1") is None
+        store.close()
+
+
+def _msg(mid, att_id, url):
+    att = {"id": att_id, "filename": "pic.png", "url": url, "content_type": "image/png"}
+    return NS(
+        id=mid, content="", system_content="", author=NS(id=1, bot=False),
+        type=NS(name="default"), reactions=[], pinned=False, stickers=[],
+        mentions=[], role_mentions=[], channel_mentions=[], attachments=[NS(**att)],
+        embeds=[], reference=None, flags=NS(value=0),
+        raw={"id": mid, "attachments": [att]},
+    )
+
+
+class _Chan:
+    def __init__(self, cid, msgs):
+        self.id = cid
+        self.name = f"c{cid}"
+        self._msgs = msgs
+
+    def permissions_for(self, me):
+        return NS(read_message_history=True)
+
+    async def history(self, **kw):
+        for m in self._msgs:
+            yield m
+
+
+class _WS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+
+class TestExportMedia:
+
+    @pytest.mark.asyncio
+    async def test_rerun_only_fetches_missing(self, tmp_path, monkeypatch):
+        files = {"https://cdn/1.png": b"one" * 100, "https://cdn/2.png": b"two" * 100}
+        sess = _Session(files)
+        monkeypatch.setattr(export_runners.aiohttp, "ClientSession", lambda: sess)
+        msgs = [
+            _msg(101, 1, "https://cdn/1.png?ex=a"),
+            _msg(102, 1, "https://cdn/1.png?ex=b"),  # same attachment again
+            _msg(201, 2, "https://cdn/2.png"),
+        ]
+        guild = NS(id=1, name="g", text_channels=[_Chan(1, msgs[:2]), _Chan(2, msgs[2:])],
+                   get_member=lambda uid: None)
+        payload = {"filters": {"threads": False, "download_media": {"images": True}}}
+
+        async def run(out):
+            ws = _WS()
+            runner = ExportMessagesRunner(
+                NS(user=NS(id=9)), ws, lambda m: m.raw, send_sleep=0,
+                out_root=str(tmp_path / out), media_store_root=str(tmp_path / "store"),
+            )
+            await runner.run(payload, guild)
+            return ws.sent[-1]["data"]
+
+        done = await run("first")
+        assert len(sess.calls) == 2
+        rep = done["media_download"]
+        assert rep["images"] == 3 and rep["downloaded"] == 2 and rep["reused"] == 1
+
+        sess.calls.clear()
+        done = await run("second")
+        assert sess.calls == [] and done["media_download"]["reused"] == 3
+
+        media = os.path.join(os.path.dirname(done["json_path"]), "media")
+        with open(os.path.join(media, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)["files"]
+        assert sorted(e["file"] for e in index) == [
+            "images/101.png", "images/102.png", "images/201.png"
+        ]
+        with open(os.path.join(media, "images", "102.png"), "rb") as f:
+            assert f.read() == files["https://cdn/1.png"]
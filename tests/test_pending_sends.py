@@ -0,0 +1,269 @@
+"""
+Tests for event-driven mapping readiness: edits and deletes that race a
+send wait for exactly that send and get its mapping rows from memory, the
+newest of several racing edits is parked and applied once the send finishes,
+and only messages this process never sent cost a database read.
+"""
+import asyncio
+from types import SimpleNamespace as NS
+
+import pytest
+
+import server.server as server_mod
+from server.forward_lanes import ForwardLanes
+from server.pending_sends import PendingSends
+from server.server import ServerReceiver
+
+HOST = 1
+CLONE_A = 10
+CLONE_B = 20
+
+
+def _row(mid, clone, cloned_mid, **kw):
+    row = {
+        "original_guild_id": HOST,
+        "original_channel_id": 5,
+        "original_message_id": mid,
+        "cloned_guild_id": clone,
+        "cloned_channel_id": clone + 1,
+        "cloned_message_id": cloned_mid,
+        "webhook_url": f"https://wh/{clone}",
+    }
+    row.update(kw)
+    return row
+
+
+class _DB:
+    def __init__(self, stored=None):
+        self.stored = stored or {}
+        self.reads = 0
+        self.upserts = []
+
+    def upsert_message_mapping(self, **kw):
+        self.upserts.append(kw)
+
+    def get_message_mappings_for_original(self, mid):
+        self.reads += 1
+        return list(self.stored.get(mid, []))
+
+
+def _receiver(db, monkeypatch) -> ServerReceiver:
+    monkeypatch.setattr(
+        server_mod,
+        "resolve_mapping_settings",
+        lambda *a, **k: {
+            "ENABLE_CLONING": True,
+            "EDIT_MESSAGES": True,
+            "DELETE_MESSAGES": True,
+        },
+    )
+    r = ServerReceiver.__new__(ServerReceiver)
+    r.db = db
+    r.config = NS()
+    r._shutting_down = False
+    r._pending_sends = PendingSends()
+    r._forward_lanes = ForwardLanes()
+    r._latest_edit_payload = {}
+    r._pending_deletes = {}
+    r._pending_msgs = {}
+    r._pending_thread_msgs = []
+    r.edits = []
+    r.deletes = []
+    r.resends = []
+    r.tasks = []
+
+    def _track(coro, name=None):
+        t = asyncio.ensure_future(coro)
+        r.tasks.append(t)
+        return t
+
+    r._track = _track
+
+    async def _edit_with_row(row, payload, orig_mid):
+        r.edits.append((row["cloned_guild_id"], payload["content"]))
+        return True
+
+    async def _delete_with_row(row, orig_mid, channel_name):
+        r.deletes.append(row["cloned_guild_id"])
+        return True
+
+    async def _fallback_resend_edit(payload, orig_mid):
+        r.resends.append(payload["content"])
+
+    r._edit_with_row = _edit_with_row
+    r._delete_with_row = _delete_with_row
+    r._fallback_resend_edit = _fallback_resend_edit
+    return r
+
+
+def _slow_sender(r, release: asyncio.Event, clones=(CLONE_A, CLONE_B)):
+    async def _forward_message_inner(msg):
+        await release.wait()
+        for i, cg in enumerate(clones):
+            r._store_message_mapping(**_row(msg["message_id"], cg, 900 + i))
+
+    return _forward_message_inner
+
+
+def _msg(mid, **kw):
+    return {"message_id": mid, "channel_id": 5, "guild_id": HOST, **kw}
+
+
+class TestPendingSends:
+
+    def test_unknown_ids_fall_through(self):
+        ps = PendingSends()
+        assert ps.rows(1) is None and not ps.is_pending(1)
+
+    def test_record_never_overwrites_with_none(self):
+        ps = PendingSends()
+        ps.record(_row(1, CLONE_A, 900, sent_token_id="t"))
+        ps.record(_row(1, CLONE_A, None, webhook_url=None))
+        assert ps.rows(1)[0]["cloned_message_id"] == 900
+        assert ps.rows(1)[0]["sent_token_id"] == "t"
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_and_wakes_on_finish(self):
+        ps = PendingSends()
+        ps.begin(1)
+        assert await ps.wait(1, 0.01) is None
+        waiter = asyncio.ensure_future(ps.wait(1, 1.0))
+        await asyncio.sleep(0)
+        ps.record(_row(1, CLONE_A, 900))
+        ps.finish(1)
+        assert [r["cloned_message_id"] for r in await waiter] == [900]
+
+    def test_begin_reopens_a_finished_send(self):
+        ps = PendingSends()
+        ps.record(_row(1, CLONE_A, 900))
+        ps.begin(1)
+        assert ps.is_pending(1)
+        ps.forget(1)
+        assert ps.rows(1) is None
+
+
+class TestReceiverReadiness:
+
+    @pytest.mark.asyncio
+    async def test_racing_edits_apply_newest_once_without_db(self, monkeypatch):
+        db = _DB()
+        r = _receiver(db, monkeypatch)
+        release = asyncio.Event()
+        r._forward_message_inner = _slow_sender(r, release)
+
+        send = asyncio.ensure_future(r.forward_message(_msg(1)))
+        await asyncio.sleep(0)
+        edits = [
+            asyncio.ensure_future(r.handle_message_edit(_msg(1, content=c)))
+            for c in ("v1", "v2", "v3")
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(send, *edits)
+        await asyncio.gather(*r.tasks)
+
+        assert r.edits == [(CLONE_A, "v3"), (CLONE_B, "v3")]
+        assert r.resends == [] and db.reads == 0
+        assert len(db.upserts) == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_racing_the_send_hits_every_clone(self, monkeypatch):
+        db = _DB()
+        r = _receiver(db, monkeypatch)
+        release = asyncio.Event()
+        r._forward_message_inner = _slow_sender(r, release)
+
+        send = asyncio.ensure_future(r.forward_message(_msg(2)))
+        await asyncio.sleep(0)
+        delete = asyncio.ensure_future(r.handle_message_delete(_msg(2)))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(send, delete)
+
+        assert sorted(r.deletes) == [CLONE_A, CLONE_B]
+        assert not r._pending_deletes and db.reads == 0
+
+    @pytest.mark.asyncio
+    async def test_edit_of_a_queued_send_is_parked_not_resent(self, monkeypatch):
+        r = _receiver(_DB(), monkeypatch)
+        r._pending_sends.begin(3)
+        await r.handle_message_edit(_msg(3, content="late"))
+        assert r.resends == [] and r.edits == []
+        assert r._latest_edit_payload[3]["content"] == "late"
+
+        r._forward_message_inner = lambda m: asyncio.sleep(0)
+        await r.forward_message(_msg(3))
+        await asyncio.gather(*r.tasks)
+        # The send stored no mapping, so the parked edit falls back to a
+        # resend only now that the original is no longer queued.
+        assert r.resends == ["late"] and not r._latest_edit_payload
+
+    @pytest.mark.asyncio
+    async def test_thread_reply_does_not_hold_the_only_slot(self, monkeypatch):
+        r = _receiver(_DB(), monkeypatch)
+        r._forward_lanes = ForwardLanes(concurrency=1)
+        starter_rows = []
+
+        async def _forward_message_inner(msg):
+            r._store_message_mapping(**_row(msg["message_id"], CLONE_A, 900))
+
+        async def _handle_thread_message_inner(msg):
+            # What creating the cloned thread does: wait for the starter's mapping.
+            starter_rows.extend(await r._await_message_mappings(6, timeout=5.0))
+
+        r._forward_message_inner = _forward_message_inner
+        r._handle_thread_message_inner = _handle_thread_message_inner
+        reply = _msg(7, thread_id=6, thread_parent_id=5)
+        # The reply's lane takes the only slot before the starter's lane runs.
+        r._pending_sends.begin(6)
+        r._pending_sends.begin(7)
+        await r._forward_lanes.submit(6, lambda: r.handle_thread_message(reply))
+        await r._forward_lanes.submit(5, lambda: r.forward_message(_msg(6)))
+
+        async def idle():
+            while r._forward_lanes._lanes:
+                await asyncio.sleep(0.005)
+
+        await asyncio.wait_for(idle(), 1)
+        assert [row["cloned_message_id"] for row in starter_rows] == [900]
+
+    @pytest.mark.asyncio
+    async def test_messages_from_before_a_restart_read_the_db_once(self, monkeypatch):
+        db = _DB({4: [_row(4, CLONE_A, 77)]})
+        r = _receiver(db, monkeypatch)
+        await r.handle_message_edit(_msg(4, content="x"))
+        assert r.edits == [(CLONE_A, "x")] and db.reads == 1
+
+    @pytest.mark.asyncio
+    async def test_buffered_message_stays_pending(self, monkeypatch):
+        r = _receiver(_DB(), monkeypatch)
+        msg = _msg(5)
+
+        async def _park(m):
+            r._pending_msgs.setdefault(5, []).append(m)
+
+        r._forward_message_inner = _park
+        await r.forward_message(msg)
+        assert r._pending_sends.is_pending(5)
+
+        r._pending_msgs.pop(5)
+        r._forward_message_inner = lambda m: asyncio.sleep(0)
+        await r.forward_message(msg)
+        assert not r._pending_sends.is_pending(5)
+
+    @pytest.mark.asyncio
+    async def test_split_copies_parked_keep_the_send_pending(self, monkeypatch):
+        r = _receiver(_DB(), monkeypatch)
+
+        async def _park_chunks(m):
+            for idx in range(2):  # what the >5 images split parks: copies
+                sub = dict(m)
+                sub["__split_seq__"] = idx
+                r._pending_msgs.setdefault(m["channel_id"], []).append(sub)
+
+        r._forward_message_inner = _park_chunks
+        await r.forward_message(_msg(5))
+        assert r._pending_sends.is_pending(5)
+
+        await r.handle_message_edit(_msg(5, content="late"))
+        assert r.resends == [] and r._latest_edit_payload[5]["content"] == "late"
@@ -0,0 +1,272 @@
+"""
+Tests for the header-driven REST rate limiter, driven against the simulated
+Discord API in tests/discord_sim.py: bursts finish without 429s in about the
+minimum time the buckets allow, shared buckets and global limits are
+honoured, and the per-action guesses step aside once real headers arrive.
+"""
+import asyncio
+import time
+from types import SimpleNamespace as NS
+
+import aiohttp
+import pytest
+
+from server.discord_hooks import install_discord_rl_probe
+from server.rate_limiter import (
+    ActionType,
+    RateLimitManager,
+    RestRateLimiter,
+    action_for_route,
+    route_of,
+)
+from tests.discord_sim import DiscordSim
+
+WEBHOOK = ("POST", "/api/v10/webhooks/{webhook_id}/{webhook_token}")
+MESSAGES = ("POST", "/api/v10/channels/{channel_id}/messages")
+MESSAGE_EDIT = ("PATCH", "/api/v10/channels/{channel_id}/messages/{message_id}")
+
+
+def _limiter(**kw):
+    return RestRateLimiter(api_hosts=("127.0.0.1", "localhost"), **kw)
+
+
+async def _burst(sim, session, paths, *, method="POST", headers=None):
+    async def one(path):
+        while True:
+            async with session.request(method, sim.url(path), headers=headers) as r:
+                if r.status != 429:
+                    return r.status
+                await asyncio.sleep(float(r.headers["Retry-After"]))
+
+    return await asyncio.gather(*[one(p) for p in paths])
+
+
+class TestRoutes:
+
+    @pytest.mark.parametrize(
+        "method,path,route,major",
+        [
+            ("POST", "/api/v10/channels/11/messages", "/channels/{channel_id}/messages", "11"),
+            ("PATCH", "/api/v10/channels/11/messages/22", "/channels/{channel_id}/messages/{message_id}", "11"),
+            ("POST", "/api/v10/webhooks/33/tok", "/webhooks/{webhook_id}/{webhook_token}", "33/tok"),
+            ("PATCH", "/api/v9/guilds/44/roles/55", "/guilds/{guild_id}/roles/{role_id}", "44"),
+        ],
+    )
+    def test_route_of(self, method, path, route, major):
+        assert route_of(method, path) == (route, major)
+
+    def test_action_for_route(self):
+        assert action_for_route("POST", "/webhooks/{webhook_id}/{webhook_token}") is ActionType.WEBHOOK_MESSAGE
+        assert action_for_route("POST", "/guilds/{guild_id}/channels") is ActionType.CREATE_CHANNEL
+        assert action_for_route("PATCH", "/guilds/{guild_id}/channels") is ActionType.EDIT_CHANNEL
+        assert action_for_route("GET", "/users/@me") is None
+
+
+class TestRestRateLimiter:
+
+    @pytest.mark.asyncio
+    async def test_burst_without_429s_at_bucket_speed(self):
+        sim = await DiscordSim(buckets={WEBHOOK: ("wh", 5, 0.3)}).start()
+        rl = _limiter()
+        try:
+            async with aiohttp.ClientSession(trace_configs=[rl.trace_config()]) as s:
+                t0 = time.monotonic()
+                res = await _burst(sim, s, ["/api/v10/webhooks/1/a"] * 20)
+                elapsed = time.monotonic() - t0
+        finally:
+            await sim.close()
+        assert res == [200] * 20
+        assert sim.limited == 0
+        # four windows' worth of requests: three resets to wait out
+        assert 0.85 < elapsed < 2.0
+
+    @pytest.mark.asyncio
+    async def test_unpaced_burst_hits_429s(self):
+        sim = await DiscordSim(buckets={WEBHOOK: ("wh", 5, 0.3)}).start()
+        try:
+            async with aiohttp.ClientSession() as s:
+                await _burst(sim, s, ["/api/v10/webhooks/1/a"] * 20)
+        finally:
+            await sim.close()
+        assert sim.limited > 0
+
+    @pytest.mark.asyncio
+    async def test_majors_do_not_block_each_other(self):
+        sim = await DiscordSim(buckets={WEBHOOK: ("wh", 2, 1.0)}).start()
+        rl = _limiter()
+        try:
+            async with aiohttp.ClientSession(trace_configs=[rl.trace_config()]) as s:
+                t0 = time.monotonic()
+                await _burst(sim, s, [f"/api/v10/webhooks/{i}/t" for i in range(6) for _ in range(2)])
+                elapsed = time.monotonic() - t0
+        finally:
+            await sim.close()
+        assert sim.limited == 0 and elapsed < 0.5
+
+    @pytest.mark.asyncio
+    async def test_routes_sharing_a_bucket_share_its_limit(self):
+        sim = await DiscordSim(
+            buckets={MESSAGES: ("msg", 4, 0.3), MESSAGE_EDIT: ("msg", 4, 0.3)}
+        ).start()
+        rl = _limiter()
+        try:
+            async with aiohttp.ClientSession(trace_configs=[rl.trace_config()]) as s:
+                # learn both routes' bucket first, then mix them
+                await _burst(sim, s, ["/api/v10/channels/7/messages"])
+                await _burst(sim, s, ["/api/v10/channels/7/messages/1"], method="PATCH")
+                await asyncio.gather(
+                    _burst(sim, s, ["/api/v10/channels/7/messages"] * 6),
+                    _burst(sim, s, ["/api/v10/channels/7/messages/1"] * 6, method="PATCH"),
+                )
+        finally:
+            await sim.close()
+        assert sim.ok == 14 and sim.limited == 0
+
+    @pytest.mark.asyncio
+    async def test_global_budget_spans_routes(self):
+        sim = await DiscordSim(
+            buckets={MESSAGES: ("msg", 50, 1.0)}, global_limit=(3, 0.3)
+        ).start()
+        rl = _limiter(global_rate=(3, 0.3))
+        auth = {"Authorization": "Bot x"}
+        try:
+            async with aiohttp.ClientSession(trace_configs=[rl.trace_config()]) as s:
+                paths = [f"/api/v10/channels/{i}/messages" for i in range(8)]
+                await _burst(sim, s, paths, headers=auth)
+        finally:
+            await sim.close()
+        assert sim.ok == 8 and sim.limited == 0
+
+    @pytest.mark.asyncio
+    async def test_global_429_pauses_every_route(self):
+        sim = await DiscordSim(
+            buckets={MESSAGES: ("msg", 50, 1.0)}, global_limit=(3, 0.3)
+        ).start()
+        rl = _limiter(global_rate=(50, 1.0))  # budget guess too generous
+        auth = {"Authorization": "Bot x"}
+        try:
+            async with aiohttp.ClientSession(trace_configs=[rl.trace_config()]) as s:
+                await _burst(sim, s, ["/api/v10/channels/1/messages"] * 3, headers=auth)
+                t0 = time.monotonic()
+                await _burst(sim, s, ["/api/v10/channels/2/messages"], headers=auth)
+                await _burst(sim, s, ["/api/v10/channels/3/messages"], headers=auth)
+                elapsed = time.monotonic() - t0
+        finally:
+            await sim.close()
+        # channel 2 hits the global 429; channel 3 then waits instead of trying
+        assert sim.ok == 5 and sim.limited == 1 and rl.stats["global"] == 1
+        assert elapsed > 0.1
+
+    @pytest.mark.asyncio
+    async def test_failed_request_returns_its_slot(self):
+        rl = _limiter()
+        t = await rl.acquire("POST", "http://127.0.0.1/api/v10/channels/1/messages")
+        rl.release(t)
+        t2 = await asyncio.wait_for(
+            rl.acquire("POST", "http://127.0.0.1/api/v10/channels/1/messages"), 0.2
+        )
+        assert t2.bucket is t.bucket
+
+    @pytest.mark.asyncio
+    async def test_other_hosts_pass_through(self):
+        rl = RestRateLimiter()
+        seen = []
+        tc = rl.trace_config()
+        ctx = NS(trace_request_ctx=None)
+        params = NS(method="GET", url=NS(host="cdn.discordapp.net"), headers={})
+        await tc.on_request_start[0](None, ctx, params)
+        seen.append(ctx.rl_ticket)
+        assert seen == [None] and rl.stats["requests"] == 0
+
+
+class TestRateLimitManager:
+
+    @pytest.mark.asyncio
+    async def test_guess_steps_aside_once_headers_are_seen(self):
+        sim = await DiscordSim(buckets={WEBHOOK: ("wh", 5, 1.0)}).start()
+        mgr = RateLimitManager(rest=_limiter())
+        mgr._webhook_config = (1, 10.0)
+        try:
+            await mgr.acquire(ActionType.WEBHOOK_MESSAGE, key="channel:1")
+            async with aiohttp.ClientSession(trace_configs=[mgr.trace_config]) as s:
+                await _burst(sim, s, ["/api/v10/webhooks/1/a"])
+        finally:
+            await sim.close()
+        assert mgr.rest.learned(ActionType.WEBHOOK_MESSAGE)
+        # the 1-per-10s guess would block here; header-driven pacing does not
+        await asyncio.wait_for(
+            mgr.acquire(ActionType.WEBHOOK_MESSAGE, key="channel:1"), 0.2
+        )
+
+    @pytest.mark.asyncio
+    async def test_penalty_still_applies_after_learning(self):
+        mgr = RateLimitManager(rest=_limiter())
+        mgr.rest._learned.add(ActionType.ROLE)
+        mgr.penalize(ActionType.ROLE, 0.2)
+        t0 = time.monotonic()
+        await mgr.acquire(ActionType.ROLE)
+        assert time.monotonic() - t0 >= 0.15
+
+
+class _FakeHTTP:
+    def __init__(self):
+        self._HTTPClient__session = None
+
+    async def static_login(self, token):
+        self._HTTPClient__session = NS(_trace_configs=[])
+        return token
+
+    def recreate(self):
+        self._HTTPClient__session = NS(_trace_configs=[])
+
+
+class TestDiscordProbe:
+
+    @pytest.mark.asyncio
+    async def test_attaches_after_login_and_recreate(self):
+        mgr = RateLimitManager()
+        http = _FakeHTTP()
+        install_discord_rl_probe(mgr, http)
+        install_discord_rl_probe(mgr, http)
+        assert await http.static_login("t") == "t"
+        assert http._HTTPClient__session._trace_configs == [mgr.trace_config]
+        http.recreate()
+        assert http._HTTPClient__session._trace_configs == [mgr.trace_config]
+
+    @pytest.mark.asyncio
+    async def test_attaches_to_pycord_session(self, monkeypatch):
+        from discord.http import HTTPClient
+
+        async def fake_request(self, route, **kwargs):
+            return {"id": "1"}
+
+        monkeypatch.setattr(HTTPClient, "request", fake_request)
+        mgr = RateLimitManager()
+        http = HTTPClient()
+        install_discord_rl_probe(mgr, http)
+        try:
+            await http.static_login("t")
+            session = http._HTTPClient__session
+            assert mgr.trace_config in session._trace_configs
+            await session.close()
+            http.recreate()
+            assert http._HTTPClient__session is not session
+            assert mgr.trace_config in http._HTTPClient__session._trace_configs
+        finally:
+            await http.close()
+
+    @pytest.mark.asyncio
+    async def test_warns_once_when_session_unreachable(self, caplog):
+        class _Renamed(_FakeHTTP):
+            async def static_login(self, token):
+                self._HTTPClient__client = NS(_trace_configs=[])
+                return token
+
+        mgr = RateLimitManager()
+        http = _Renamed()
+        install_discord_rl_probe(mgr, http)
+        with caplog.at_level("WARNING", logger="discord_hooks"):
+            await http.static_login("t")
+            await http.static_login("t")
+        warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 1
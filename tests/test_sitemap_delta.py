@@ -0,0 +1,119 @@
+"""
+Tests for the sitemap delta protocol: the client sends only the sections
+that changed since the version the server acknowledged, the server rebuilds
+the full sitemap from them, and any base mismatch falls back to a full send.
+Also covers the per-phase fingerprints the server uses to skip sync phases
+whose inputs did not change.
+"""
+from common.sitemap_delta import (
+    SitemapDeltaDecoder,
+    SitemapDeltaEncoder,
+    section_hashes,
+)
+from server.server import ServerReceiver
+
+
+def _sitemap(**overrides):
+    sm = {
+        "guild": {"id": "1", "name": "Host"},
+        "target": {"cloned_guild_id": "2"},
+        "categories": [{"id": 10, "name": "cat", "channels": []}],
+        "standalone_channels": [],
+        "forums": [],
+        "threads": [],
+        "roles": [{"id": 5, "name": "mod"}],
+        "emojis": [{"id": 7, "name": "wave"}],
+        "stickers": [],
+    }
+    sm.update(overrides)
+    return sm
+
+
+def _strip(sm):
+    return {k: v for k, v in sm.items() if k not in ("sitemap_version", "section_hashes")}
+
+
+def _roundtrip(enc, dec, sm):
+    msg = enc.encode(sm)
+    out = dec.apply(msg)
+    if out is not None:
+        enc.acknowledge(msg)
+    return msg, out
+
+
+class TestSitemapDelta:
+
+    def test_first_send_is_full_then_only_changes(self):
+        enc, dec = SitemapDeltaEncoder(), SitemapDeltaDecoder()
+        first, out = _roundtrip(enc, dec, _sitemap())
+        assert not first.get("delta") and _strip(out) == _sitemap()
+
+        changed = _sitemap(emojis=[{"id": 7, "name": "wave2"}])
+        msg, out = _roundtrip(enc, dec, changed)
+        assert msg["delta"] and set(msg["changed"]) == {"emojis"}
+        assert msg["base_version"] == first["sitemap_version"]
+        assert _strip(out) == changed
+        assert out["section_hashes"] == section_hashes(changed)
+
+    def test_unchanged_sitemap_is_an_empty_delta(self):
+        enc, dec = SitemapDeltaEncoder(), SitemapDeltaDecoder()
+        _roundtrip(enc, dec, _sitemap())
+        msg, out = _roundtrip(enc, dec, _sitemap())
+        assert msg["changed"] == {} and msg["removed"] == []
+        assert _strip(out) == _sitemap()
+        assert dec.stats() == {"targets": 1, "full": 1, "deltas": 1, "misses": 0}
+
+    def test_removed_sections_are_dropped(self):
+        enc, dec = SitemapDeltaEncoder(), SitemapDeltaDecoder()
+        _roundtrip(enc, dec, _sitemap(community={"enabled": True}))
+        msg, out = _roundtrip(enc, dec, _sitemap())
+        assert msg["removed"] == ["community"]
+        assert "community" not in out
+
+    def test_restarted_server_asks_for_a_full_send(self):
+        enc = SitemapDeltaEncoder()
+        _roundtrip(enc, SitemapDeltaDecoder(), _sitemap())
+        restarted = SitemapDeltaDecoder()
+        msg = enc.encode(_sitemap(roles=[]))
+        assert msg["delta"] and restarted.apply(msg) is None
+        assert restarted.stats()["misses"] == 1
+
+        enc.forget(msg)
+        full = enc.encode(_sitemap(roles=[]))
+        assert not full.get("delta")
+        assert _strip(restarted.apply(full)) == _sitemap(roles=[])
+
+    def test_targets_are_tracked_separately(self):
+        enc, dec = SitemapDeltaEncoder(), SitemapDeltaDecoder()
+        _roundtrip(enc, dec, _sitemap())
+        other = _sitemap(target={"cloned_guild_id": "3"})
+        msg, out = _roundtrip(enc, dec, other)
+        assert not msg.get("delta") and out["target"] == {"cloned_guild_id": "3"}
+        assert dec.stats()["targets"] == 2
+
+    def test_unacknowledged_version_is_not_a_base(self):
+        enc, dec = SitemapDeltaEncoder(), SitemapDeltaDecoder()
+        _roundtrip(enc, dec, _sitemap())
+        lost = enc.encode(_sitemap(roles=[]))  # never reaches the server
+        msg, out = _roundtrip(enc, dec, _sitemap(emojis=[]))
+        assert msg["base_version"] != lost["sitemap_version"]
+        assert _strip(out) == _sitemap(emojis=[])
+
+
+class TestPhaseFingerprints:
+
+    def test_only_phases_reading_a_changed_section_change(self):
+        srv = ServerReceiver.__new__(ServerReceiver)
+        settings = {"CLONE_ROLES": True}
+        before = srv._sync_phase_fingerprints(_sitemap(), settings)
+        after = srv._sync_phase_fingerprints(
+            _sitemap(categories=[{"id": 10, "name": "renamed", "channels": []}]),
+            settings,
+        )
+        assert {p for p in before if before[p] != after[p]} == {"permissions", "structure"}
+
+    def test_settings_change_every_phase(self):
+        srv = ServerReceiver.__new__(ServerReceiver)
+        a = srv._sync_phase_fingerprints(_sitemap(), {"CLONE_ROLES": True})
+        b = srv._sync_phase_fingerprints(_sitemap(), {"CLONE_ROLES": False})
+        assert all(a[p] != b[p] for p in a)
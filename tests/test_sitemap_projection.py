@@ -0,0 +1,65 @@
+"""
+Tests for SitemapService.project_sitemap: one raw sitemap serves every
+clone of an origin guild, each clone sees its own mapping's filters, and
+projecting never changes the raw sitemap the other clones share.
+"""
+import copy
+import logging
+
+from client.sitemap import SitemapService
+
+ORIGIN = 1
+
+
+def _raw():
+    return {
+        "guild": {"id": ORIGIN, "name": "Origin"},
+        "categories": [
+            {"id": 10, "name": "a", "channels": [{"id": 11, "name": "a1"}, {"id": 12, "name": "a2"}]},
+            {"id": 20, "name": "b", "channels": [{"id": 21, "name": "b1"}]},
+        ],
+        "standalone_channels": [{"id": 30, "name": "lobby"}],
+        "forums": [{"id": 40, "name": "forum", "category_id": 20}],
+        "threads": [{"id": 41, "forum_id": 40, "name": "post"}],
+        "roles": [{"id": 5, "name": "mod"}],
+        "emojis": [],
+        "stickers": [],
+    }
+
+
+def _channel_ids(sm):
+    ids = [ch["id"] for c in sm["categories"] for ch in c["channels"]]
+    return sorted(ids + [ch["id"] for ch in sm["standalone_channels"]] + [f["id"] for f in sm["forums"]])
+
+
+def _service(db):
+    return SitemapService(bot=None, config=None, db=db, ws=None, logger=logging.getLogger("test"))
+
+
+class TestProjectSitemap:
+
+    def test_each_clone_gets_its_own_filters(self, db):
+        db.add_filter("exclude", "category", 20, original_guild_id=ORIGIN, cloned_guild_id=100)
+        db.add_filter("exclude", "channel", 12, original_guild_id=ORIGIN, cloned_guild_id=200)
+        svc = _service(db)
+        raw = _raw()
+
+        a = svc.project_sitemap(raw, 100)
+        b = svc.project_sitemap(raw, 200)
+        assert _channel_ids(a) == [11, 12, 30]
+        assert _channel_ids(b) == [11, 21, 30, 40]
+        assert a["target"] == {"original_guild_id": ORIGIN, "cloned_guild_id": 100}
+        assert b["target"]["cloned_guild_id"] == 200
+
+    def test_raw_sitemap_is_left_untouched(self, db):
+        db.add_filter("exclude", "channel", 11, original_guild_id=ORIGIN, cloned_guild_id=100)
+        svc = _service(db)
+        raw = _raw()
+        before = copy.deepcopy(raw)
+        svc.project_sitemap(raw, 100)
+        svc.project_sitemap(raw, None)
+        assert raw == before
+
+    def test_without_a_clone_there_is_no_target(self, db):
+        sm = _service(db).project_sitemap(_raw())
+        assert "target" not in sm and _channel_ids(sm) == [11, 12, 21, 30, 40]
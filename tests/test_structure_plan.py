@@ -0,0 +1,347 @@
+"""
+Tests for the structure-sync planner and its bulk layout executor: one
+pass over sitemap + clone snapshot + mapping rows yields every operation in
+execution order, honours the mapping settings, reorders with as few
+position changes as possible, and moves go out as a single bulk channel
+update.
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from server.structure_plan import (
+    ChannelState,
+    CloneSnapshot,
+    PlanOp,
+    apply_layout,
+    minimal_positions,
+    plan_structure,
+)
+
+CAT, TEXT, NEWS, VOICE, FORUM = 4, 0, 5, 2, 15
+
+
+def _snapshot(*channels, features=(), protected=()):
+    return CloneSnapshot(
+        guild_id=900,
+        features=frozenset(features),
+        channels={c.id: c for c in channels},
+        protected_ids=frozenset(protected),
+    )
+
+
+def _sitemap(categories=(), standalone=(), forums=()):
+    return {
+        "guild": {"id": 1},
+        "categories": list(categories),
+        "standalone_channels": list(standalone),
+        "forums": list(forums),
+    }
+
+
+def _cat(cid, name, *channels):
+    return {"id": cid, "name": name, "channels": list(channels)}
+
+
+def _ch(cid, name, ctype=TEXT, **kw):
+    return {"id": cid, "name": name, "type": ctype, **kw}
+
+
+def _plan(sitemap, snapshot, cats=None, chans=None, **settings):
+    return plan_structure(
+        sitemap,
+        snapshot,
+        category_rows=cats or {},
+        channel_rows=chans or {},
+        settings=settings,
+    )
+
+
+def _kinds(plan):
+    return [(op.kind, op.origin_id) for op in plan.ops]
+
+
+class TestPlanStructure:
+
+    def test_fresh_clone_creates_everything_categories_first(self):
+        sm = _sitemap(
+            [_cat(10, "general", _ch(11, "chat"))],
+            standalone=[_ch(20, "lobby")],
+            forums=[{"id": 30, "name": "help", "category_id": 10}],
+        )
+        plan = _plan(sm, _snapshot())
+        assert _kinds(plan) == [
+            ("create_category", 10),
+            ("create_channel", 11),
+            ("create_channel", 20),
+            ("create_channel", 30),
+        ]
+        assert plan.of("create_channel")[2].fields["type"] == FORUM
+
+    def test_in_sync_clone_has_an_empty_plan(self):
+        sm = _sitemap([_cat(10, "general", _ch(11, "chat"))])
+        snap = _snapshot(
+            ChannelState(100, "general", CAT), ChannelState(110, "chat", TEXT, parent_id=100)
+        )
+        plan = _plan(sm, snap, {10: {"cloned_category_id": 100}}, {11: {"cloned_channel_id": 110}})
+        assert plan.ops == []
+
+    def test_one_merged_edit_per_channel(self):
+        sm = _sitemap(
+            [_cat(10, "a"), _cat(12, "b", _ch(11, "renamed", NEWS, nsfw=True, slowmode_delay=5))]
+        )
+        snap = _snapshot(
+            ChannelState(100, "a", CAT),
+            ChannelState(120, "b", CAT),
+            ChannelState(110, "old", TEXT, parent_id=100),
+            features={"NEWS"},
+        )
+        plan = _plan(
+            sm,
+            snap,
+            {10: {"cloned_category_id": 100}, 12: {"cloned_category_id": 120}},
+            {11: {"cloned_channel_id": 110}},
+            SYNC_CHANNEL_NSFW=True,
+            SYNC_CHANNEL_SLOWMODE=True,
+        )
+        (op,) = plan.ops
+        assert op.kind == "edit_channel" and op.clone_id == 110
+        assert op.fields == {
+            "name": "renamed",
+            "type": NEWS,
+            "parent_id": 120,
+            "position": 0,
+            "nsfw": True,
+            "slowmode_delay": 5,
+        }
+        assert plan.parent_moves() == [op]
+
+    def test_settings_gate_renames_moves_and_voice(self):
+        sm = _sitemap(
+            [_cat(10, "a", _ch(11, "new-name"))], standalone=[_ch(40, "vc", VOICE)]
+        )
+        snap = _snapshot(ChannelState(100, "a", CAT), ChannelState(110, "old", TEXT))
+        plan = _plan(
+            sm,
+            snap,
+            {10: {"cloned_category_id": 100}},
+            {11: {"cloned_channel_id": 110}},
+            RENAME_CHANNELS=False,
+            REPOSITION_CHANNELS=False,
+        )
+        assert plan.ops == []
+
+    def test_channel_under_an_unmapped_category_moves_to_the_root(self):
+        # the forum's category is neither in the sitemap nor mapped here
+        sm = _sitemap(forums=[{"id": 30, "name": "help", "category_id": 99}])
+        snap = _snapshot(
+            ChannelState(100, "old", CAT), ChannelState(300, "help", FORUM, parent_id=100)
+        )
+        plan = _plan(sm, snap, chans={30: {"cloned_channel_id": 300}})
+        (op,) = plan.parent_moves()
+        assert op.clone_id == 300 and op.fields["parent_id"] is None
+
+        mapped = _plan(
+            sm, snap, {99: {"cloned_category_id": 100}}, {30: {"cloned_channel_id": 300}}
+        )
+        assert mapped.parent_moves() == []
+
+    def test_pinned_names_win_over_upstream(self):
+        sm = _sitemap([_cat(10, "host-cat", _ch(11, "host-name"))])
+        snap = _snapshot(
+            ChannelState(100, "host-cat", CAT), ChannelState(110, "host-name", TEXT, parent_id=100)
+        )
+        plan = _plan(
+            sm,
+            snap,
+            {10: {"cloned_category_id": 100, "cloned_category_name": "mine"}},
+            {11: {"cloned_channel_id": 110, "clone_channel_name": "pinned"}},
+        )
+        assert [(op.kind, op.fields["name"]) for op in plan.ops] == [
+            ("edit_channel", "pinned"),
+            ("edit_category", "mine"),
+        ]
+
+    def test_removed_channels_delete_only_when_allowed(self):
+        sm = _sitemap()
+        snap = _snapshot(
+            ChannelState(100, "gone-cat", CAT),
+            ChannelState(110, "gone", TEXT),
+            ChannelState(120, "rules", TEXT),
+            protected={120},
+        )
+        cats = {10: {"cloned_category_id": 100}}
+        chans = {11: {"cloned_channel_id": 110}, 12: {"cloned_channel_id": 120}}
+        assert _kinds(_plan(sm, snap, cats, chans, DELETE_CHANNELS=True)) == [
+            ("delete_channel", 11),
+            ("unmap_channel", 12),
+            ("delete_category", 10),
+        ]
+        assert {op.kind for op in _plan(sm, snap, cats, chans).ops} == {
+            "unmap_channel",
+            "unmap_category",
+        }
+
+    def test_blacklisted_names_are_left_alone(self):
+        sm = _sitemap(standalone=[_ch(11, "staff-only"), _ch(12, "chat")])
+        plan = plan_structure(
+            sm,
+            _snapshot(),
+            category_rows={},
+            channel_rows={},
+            settings={},
+            name_blacklist=["staff*"],
+        )
+        assert _kinds(plan) == [("create_channel", 12)]
+
+    def test_plan_serializes_ids_as_strings(self):
+        sm = _sitemap([_cat(10, "a", _ch(11, "chat"))])
+        out = _plan(sm, _snapshot()).to_dict()
+        assert out["summary"] == {"create_category": 1, "create_channel": 1}
+        assert out["ops"][1]["fields"]["parent_origin_id"] == "10"
+
+
+class _Guild:
+    def __init__(self, fail_bulk=False):
+        self.id = 900
+        self.bulk = []
+        self.edits = []
+        self.fail_bulk = fail_bulk
+        self._state = SimpleNamespace(http=SimpleNamespace(bulk_channel_update=self._bulk))
+
+    async def _bulk(self, guild_id, payload, reason=None):
+        if self.fail_bulk:
+            raise RuntimeError("400")
+        self.bulk.append(payload)
+
+    def get_channel(self, cid):
+        if cid == 404:
+            return None
+        guild = self
+
+        async def edit(category=None, position=None):
+            guild.edits.append((cid, getattr(category, "id", None)))
+
+        return SimpleNamespace(id=cid, name=f"c{cid}", edit=edit)
+
+
+def _move(clone_id, parent_id):
+    return PlanOp("edit_channel", origin_id=clone_id, clone_id=clone_id, fields={"parent_id": parent_id})
+
+
+def _reordered(desired, current, moves):
+    """Display order after applying `moves` (Discord sorts by position, then id)."""
+    pos = {**current, **moves}
+    return sorted(desired, key=lambda c: (pos[c], c))
+
+
+class TestMinimalPositions:
+
+    def test_in_order_container_is_untouched(self):
+        assert minimal_positions([1, 2, 3], {1: 0, 2: 5, 3: 9}) == {}
+
+    def test_one_misplaced_channel_is_the_only_move(self):
+        desired = list(range(1, 11))
+        current = {c: c for c in desired}
+        current[10] = 0  # last channel was dragged to the top on the clone
+        moves = minimal_positions(desired, current)
+        assert list(moves) == [10]
+        assert _reordered(desired, current, moves) == desired
+
+    def test_channels_moving_in_are_always_placed(self):
+        moves = minimal_positions([1, 7, 2], {1: 0, 2: 1})
+        assert 7 in moves
+        assert _reordered([1, 7, 2], {1: 0, 2: 1, 7: 99}, moves) == [1, 7, 2]
+
+    def test_random_shuffles_end_in_host_order(self):
+        rnd = random.Random(5)
+        for _ in range(200):
+            n = rnd.randint(1, 30)
+            desired = list(range(100, 100 + n))
+            present = [c for c in desired if rnd.random() < 0.9]
+            current = {c: rnd.randint(0, n) for c in present}
+            moves = minimal_positions(desired, current)
+            start = {c: current.get(c, 10_000) for c in desired}
+            assert _reordered(desired, start, moves) == desired
+            assert len(moves) <= n
+
+
+class TestPlanLayout:
+
+    def _guild(self):
+        snap = _snapshot(
+            ChannelState(100, "a", CAT, position=1),
+            ChannelState(200, "b", CAT, position=0),
+            ChannelState(101, "a1", TEXT, parent_id=100, position=0),
+            ChannelState(102, "a2", TEXT, parent_id=100, position=1),
+            ChannelState(103, "a3", TEXT, parent_id=100, position=2),
+            ChannelState(104, "a-vc", VOICE, parent_id=100, position=0),
+        )
+        cats = {10: {"cloned_category_id": 100}, 20: {"cloned_category_id": 200}}
+        chans = {11: {"cloned_channel_id": 101}, 12: {"cloned_channel_id": 102},
+                 13: {"cloned_channel_id": 103}, 14: {"cloned_channel_id": 104}}
+        return snap, cats, chans
+
+    def test_reorders_categories_and_channels_minimally(self):
+        snap, cats, chans = self._guild()
+        sm = _sitemap([
+            {"id": 10, "name": "a", "position": 0, "channels": [
+                _ch(13, "a3", position=0), _ch(11, "a1", position=1),
+                _ch(12, "a2", position=2), _ch(14, "a-vc", VOICE, position=3),
+            ]},
+            {"id": 20, "name": "b", "position": 1, "channels": []},
+        ])
+        plan = _plan(sm, snap, cats, chans, CLONE_VOICE=True)
+        changes = {op.clone_id: op.fields for op in plan.layout_changes()}
+        # a1 has to give up position 0 to a3, a2 keeps its slot, and the voice
+        # channel sorts apart from the text channels
+        assert changes == {100: {"position": 0}, 103: {"position": 0}, 101: {"position": 1}}
+
+    def test_host_order_already_matched(self):
+        snap, cats, chans = self._guild()
+        sm = _sitemap([
+            {"id": 20, "name": "b", "position": 0, "channels": []},
+            {"id": 10, "name": "a", "position": 1, "channels": [
+                _ch(11, "a1", position=0), _ch(12, "a2", position=1),
+                _ch(13, "a3", position=2),
+            ]},
+        ])
+        assert _plan(sm, snap, cats, chans).layout_changes() == []
+
+    def test_reposition_off_leaves_layout_alone(self):
+        snap, cats, chans = self._guild()
+        sm = _sitemap([
+            {"id": 10, "name": "a", "position": 0, "channels": [_ch(13, "a3", position=0)]},
+            {"id": 20, "name": "b", "position": 1, "channels": [_ch(11, "a1"), _ch(12, "a2")]},
+        ])
+        assert _plan(sm, snap, cats, chans, REPOSITION_CHANNELS=False).layout_changes() == []
+
+
+class TestApplyLayout:
+
+    @pytest.mark.asyncio
+    async def test_moves_go_out_as_one_bulk_update(self):
+        g, paced = _Guild(), []
+
+        async def pace():
+            paced.append(1)
+
+        moves = [_move(1, 100), _move(2, None), PlanOp("edit_category", clone_id=3, fields={"position": 4})]
+        assert await apply_layout(g, moves, before_request=pace) == moves
+        assert g.bulk == [
+            [
+                {"id": "1", "parent_id": "100", "lock_permissions": False},
+                {"id": "2", "parent_id": None, "lock_permissions": False},
+                {"id": "3", "position": 4},
+            ]
+        ]
+        assert paced == [1] and g.edits == []
+
+    @pytest.mark.asyncio
+    async def test_rejected_bulk_falls_back_to_single_edits(self):
+        g = _Guild(fail_bulk=True)
+        moves = [_move(1, 100), _move(404, 100), _move(2, None)]
+        done = await apply_layout(g, moves)
+        assert [op.clone_id for op in done] == [1, 2]
+        assert g.edits == [(1, 100), (2, None)]
@@ -0,0 +1,308 @@
+"""
+The structure plan against the sync that executes it: on a fixture clone,
+the category and channel operations `_sync_structure_passes` performs are
+the operations `plan_structure` predicts, and the dry run names the phases
+it does not plan.
+"""
+import asyncio
+import logging
+from types import SimpleNamespace as NS
+
+import pytest
+from discord import ChannelType
+
+from common.keyed_registry import KeyedRegistry
+from server.structure_plan import PLANNED_PHASES, UNPLANNED_PHASES
+from server.server import ServerReceiver
+
+HOST, CLONE = 1, 900
+
+
+class _Channel:
+    def __init__(self, guild, id, name, type, category_id=None, position=0):
+        self.guild = guild
+        self.id = id
+        self.name = name
+        self.type = type
+        self.category_id = category_id
+        self.position = position
+        self.topic = None
+        self.nsfw = False
+        self.slowmode_delay = 0
+        self.overwrites = {}
+        self.mention = f"<#{id}>"
+
+    @property
+    def category(self):
+        return self.guild.get_channel(self.category_id)
+
+    @property
+    def channels(self):
+        return [c for c in self.guild.channels if c.category_id == self.id]
+
+    async def edit(self, **kw):
+        kind = "edit_category" if self.type == ChannelType.category else "edit_channel"
+        self.guild.log.append((kind, self.id, dict(kw)))
+        if "name" in kw:
+            self.name = kw["name"]
+        if "category" in kw:
+            self.category_id = getattr(kw["category"], "id", None)
+        if "position" in kw:
+            self.position = kw["position"]
+        return self
+
+    async def delete(self, **kw):
+        kind = "delete_category" if self.type == ChannelType.category else "delete_channel"
+        self.guild.log.append((kind, self.id, {}))
+        self.guild.channels.remove(self)
+
+    async def webhooks(self):
+        return []
+
+    async def create_webhook(self, name=None, **kw):
+        return NS(id=self.id * 10, url=f"https://wh/{self.id}", name=name)
+
+
+class _Guild:
+    def __init__(self):
+        self.id = CLONE
+        self.name = "Clone"
+        self.features = []
+        self.channels = []
+        self.threads = []
+        self.roles = []
+        self.log = []
+        self._next_id = 5000
+        self.me = NS(
+            id=42,
+            guild_permissions=NS(administrator=False, manage_guild=False, manage_channels=True),
+        )
+        self.default_role = NS(id=CLONE)
+        self._state = NS(http=NS(bulk_channel_update=self._bulk))
+
+    def add(self, *args, **kw):
+        ch = _Channel(self, *args, **kw)
+        self.channels.append(ch)
+        return ch
+
+    def get_channel(self, cid):
+        return next((c for c in self.channels if c.id == cid), None) if cid else None
+
+    def get_member(self, uid):
+        return self.me
+
+    def _by_type(self, t):
+        return [c for c in self.channels if c.type == t]
+
+    @property
+    def categories(self):
+        return self._by_type(ChannelType.category)
+
+    @property
+    def text_channels(self):
+        return self._by_type(ChannelType.text)
+
+    @property
+    def voice_channels(self):
+        return self._by_type(ChannelType.voice)
+
+    @property
+    def forums(self):
+        return self._by_type(ChannelType.forum)
+
+    def _create(self, kind, name, type, category=None, position=None, **kw):
+        self._next_id += 1
+        ch = self.add(
+            self._next_id,
+            name,
+            type,
+            category_id=getattr(category, "id", None),
+            position=len(self.channels) if position is None else position,
+        )
+        self.log.append((kind, name, {}))
+        return ch
+
+    async def create_category(self, name, **kw):
+        return self._create("create_category", name, ChannelType.category, **kw)
+
+    async def create_text_channel(self, name, **kw):
+        return self._create("create_channel", name, ChannelType.text, **kw)
+
+    async def create_forum_channel(self, name, **kw):
+        return self._create("create_channel", name, ChannelType.forum, **kw)
+
+    async def _bulk(self, guild_id, payload, reason=None):
+        for entry in payload:
+            ch = self.get_channel(int(entry["id"]))
+            kind = "edit_category" if ch.type == ChannelType.category else "edit_channel"
+            fields = {}
+            if "parent_id" in entry:
+                ch.category_id = int(entry["parent_id"]) if entry["parent_id"] else None
+                fields["category"] = ch.category_id
+            if "position" in entry:
+                ch.position = entry["position"]
+                fields["position"] = entry["position"]
+            self.log.append((kind, ch.id, fields))
+
+
+class _RateLimit:
+    async def acquire_for_guild(self, *a, **k):
+        return None
+
+    async def acquire(self, *a, **k):
+        return None
+
+    def __getattr__(self, name):
+        async def noop(*a, **k):
+            return None
+
+        return noop
+
+
+def _receiver(db, guild, monkeypatch):
+    from common.config import Config
+
+    monkeypatch.setenv("DB_PATH", db.path)
+    r = ServerReceiver.__new__(ServerReceiver)
+    r.db = db
+    r.config = Config(logger=logging.getLogger("test"))
+    r.bot = NS(get_guild=lambda gid: guild if int(gid) == CLONE else None, user=NS(id=42))
+    r.ratelimit = _RateLimit()
+    r.cat_map, r.chan_map = {}, {}
+    r.cat_map_by_clone, r.chan_map_by_clone = {}, {}
+    r.emoji_map = r.role_map = None
+    r.emoji_map_by_clone, r.role_map_by_clone = {}, {}
+    r.sticker_map = {}
+    r._rewrite_programs = {}
+    r._shutting_down = False
+    r._flush_targets, r._flush_thread_targets = set(), set()
+    r._flush_full_flag = False
+    r._flush_bg_task = None
+    r._pending_msgs, r._pending_thread_msgs = {}, []
+    r._channel_name_blacklist_cache = {}
+    r._channel_name_blacklist_lock = asyncio.Lock()
+    r._pending_webhook_channels = {}
+    r._webhooks = {}
+    r._webhook_locks = KeyedRegistry("webhook_locks", asyncio.Lock, max_size=100, ttl=60)
+    r._webhook_gate_by_clone = KeyedRegistry(
+        "webhook_gate_by_clone", asyncio.Lock, max_size=100, ttl=60
+    )
+    r._new_webhook_gate = asyncio.Lock()
+    r._clone_guild_ids = {CLONE}
+    r._host_name_cache = {}
+    r._unmapped_warned = set()
+    r.MAX_GUILD_CHANNELS = 500
+    r.MAX_CATEGORIES = 50
+    r.MAX_CHANNELS_PER_CATEGORY = 50
+    r.active_threads = NS()
+
+    async def _emit_event_log(*a, **k):
+        return None
+
+    r._emit_event_log = _emit_event_log
+    return r
+
+
+def _sitemap():
+    return {
+        "guild": {"id": HOST, "name": "Host"},
+        "categories": [
+            {"id": 10, "name": "general", "position": 0,
+             "channels": [{"id": 11, "name": "chat", "type": 0, "position": 0}]},
+            {"id": 12, "name": "new-cat", "position": 1,
+             "channels": [{"id": 13, "name": "announcements", "type": 0, "position": 0}]},
+        ],
+        "standalone_channels": [],
+        "forums": [],
+        "threads": [],
+        "community": {"enabled": False},
+    }
+
+
+def _fixture_clone(db):
+    guild = _Guild()
+    guild.add(100, "old-general", ChannelType.category, position=0)
+    guild.add(110, "old-chat", ChannelType.text, category_id=100, position=0)
+    guild.add(990, "gone", ChannelType.text, position=1)
+    db.upsert_guild_mapping(
+        mapping_id=None,
+        mapping_name="m",
+        original_guild_id=HOST,
+        original_guild_name="Host",
+        original_guild_icon_url=None,
+        cloned_guild_id=CLONE,
+        cloned_guild_name="Clone",
+        settings={"DELETE_CHANNELS": False, "ON_DEMAND_WEBHOOKS": True},
+    )
+    db.upsert_category_mapping(
+        10, "general", 100, None, original_guild_id=HOST, cloned_guild_id=CLONE
+    )
+    for orig, name, clone, parent_o, parent_c in ((11, "chat", 110, 10, 100), (99, "gone", 990, None, None)):
+        db.upsert_channel_mapping(
+            orig, name, clone, None, parent_o, parent_c, 0,
+            original_guild_id=HOST, cloned_guild_id=CLONE,
+        )
+    return guild
+
+
+def _performed(log, unmapped):
+    """The sync's Discord calls and mapping removals, as (kind, key) pairs."""
+    out = set()
+    for kind, key, fields in log:
+        if kind.startswith("edit_") and not fields:
+            continue
+        out.add((kind, key))
+    out |= {("unmap_channel", oid) for oid in unmapped}
+    return out
+
+
+def _planned(plan):
+    out = set()
+    for op in plan.ops:
+        if op.kind.startswith("create_"):
+            out.add((op.kind, op.name))
+        elif op.kind.startswith("unmap_"):
+            out.add((op.kind, op.origin_id))
+        else:
+            out.add((op.kind, op.clone_id))
+    return out
+
+
+class TestPlanMatchesSync:
+
+    @pytest.mark.asyncio
+    async def test_sync_performs_exactly_the_planned_ops(self, db, monkeypatch):
+        guild = _fixture_clone(db)
+        r = _receiver(db, guild, monkeypatch)
+        r._load_mappings()
+        plan = r._plan_structure(guild, _sitemap())
+        assert plan.summary() == {
+            "create_category": 1,
+            "create_channel": 1,
+            "edit_category": 1,
+            "edit_channel": 1,
+            "unmap_channel": 1,
+        }
+
+        unmapped = []
+        real_unmap = db.delete_channel_mapping_pair
+        monkeypatch.setattr(
+            db,
+            "delete_channel_mapping_pair",
+            lambda oid, cg: unmapped.append(int(oid)) or real_unmap(oid, cg),
+        )
+        settings = r.config.default_mapping_settings()
+        await r._sync_structure_passes(guild, _sitemap(), HOST, settings)
+
+        assert _performed(guild.log, unmapped) == _planned(plan)
+
+    def test_dry_run_names_the_phases_it_does_not_plan(self, db, monkeypatch):
+        guild = _fixture_clone(db)
+        r = _receiver(db, guild, monkeypatch)
+        r._sitemap_decoder = NS(latest=lambda host, clone: _sitemap())
+        out = r._structure_plan_dry_run(
+            {"original_guild_id": HOST, "cloned_guild_id": CLONE}
+        )
+        assert out["ok"] and out["summary"]["create_channel"] == 1
+        assert out["planned_phases"] == list(PLANNED_PHASES)
+        assert {"threads", "community", "guild_metadata"} <= set(out["unplanned_phases"])
@@ -0,0 +1,177 @@
+"""
+Tests for the persisted sync-phase state: what each phase last applied is
+kept per mapping with a fingerprint of the clone it left, restored once
+after a restart, and a phase only counts as unchanged while the clone
+still matches that fingerprint.
+"""
+import asyncio
+from types import SimpleNamespace as NS
+
+import server.server as server_mod
+from common.keyed_registry import KeyedRegistry
+from server.server import ServerReceiver
+
+HOST, CLONE = 1, 2
+
+
+def _receiver(db):
+    r = ServerReceiver.__new__(ServerReceiver)
+    r.db = db
+    r._applied_sync_phases = KeyedRegistry("applied_sync_phases", max_size=10, ttl=60)
+    r._restored_sync_phases = set()
+    r._stale_sync_phase_clones = set()
+    r.role_map, r.role_map_by_clone = {}, {}
+    r.emoji_map, r.emoji_map_by_clone = {}, {}
+    r.cat_map_by_clone = {CLONE: {10: {"cloned_category_id": 100, "last_updated": "t1"}}}
+    r.chan_map_by_clone = {}
+    r._channel_name_blacklist_cache = {}
+    return r
+
+
+class _Perms:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Target:
+    def __init__(self, id):
+        self.id = id
+
+
+class _Overwrite:
+    def pair(self):
+        return _Perms(1024), _Perms(0)
+
+
+def _guild(role_name="mod", channel_name="chat"):
+    role = NS(id=5, name=role_name, permissions=_Perms(8), color=_Perms(0), hoist=False,
+              mentionable=False, position=1)
+    chat = NS(id=110, name=channel_name, type=NS(value=0), category_id=100, position=0,
+              topic=None, nsfw=False, slowmode_delay=0, overwrites={_Target(role.id): _Overwrite()})
+    return NS(
+        id=CLONE, name="Clone", icon=None, banner=None, splash=None, description=None,
+        features=[], roles=[role], channels=[chat], emojis=[], stickers=[], threads=[],
+    )
+
+
+class TestCloneFingerprints:
+
+    def test_each_phase_sees_only_its_part_of_the_clone(self, db):
+        r = _receiver(db)
+        phases = ["roles", "emojis", "stickers", "permissions", "structure"]
+        base = r._clone_phase_fingerprints(_guild(), phases)
+
+        renamed_role = r._clone_phase_fingerprints(_guild(role_name="admin"), phases)
+        assert {p for p in phases if base[p] != renamed_role[p]} == {"roles", "permissions"}
+
+        renamed_chan = r._clone_phase_fingerprints(_guild(channel_name="lobby"), phases)
+        assert {p for p in phases if base[p] != renamed_chan[p]} == {"structure"}
+
+    def test_mapping_rows_count_but_their_timestamps_do_not(self, db):
+        r = _receiver(db)
+        before = r._clone_phase_fingerprints(_guild(), ["structure"])
+        r.cat_map_by_clone[CLONE][10]["last_updated"] = "t2"
+        assert r._clone_phase_fingerprints(_guild(), ["structure"]) == before
+        r.cat_map_by_clone[CLONE][10]["clone_category_name"] = "pinned"
+        assert r._clone_phase_fingerprints(_guild(), ["structure"]) != before
+
+    def test_webhook_presence_counts_for_structure_but_not_its_url(self, db):
+        r = _receiver(db)
+        r.chan_map_by_clone = {
+            CLONE: {11: {"cloned_channel_id": 110, "channel_webhook_url": "https://a"}}
+        }
+        phases = ["permissions", "structure"]
+        before = r._clone_phase_fingerprints(_guild(), phases)
+
+        r.chan_map_by_clone[CLONE][11]["channel_webhook_url"] = "https://b"
+        assert r._clone_phase_fingerprints(_guild(), phases) == before
+
+        r._record_applied_sync_phases(
+            (HOST, CLONE), {p: ("src", before[p]) for p in phases}
+        )
+        r.chan_map_by_clone[CLONE][11]["channel_webhook_url"] = None
+        after = r._clone_phase_fingerprints(_guild(), phases)
+        applied = r._applied_sync_phase_state((HOST, CLONE))
+        unchanged = {p for p in phases if applied[p][1] == after[p]}
+        assert unchanged == {"permissions"}  # the next sync runs structure
+
+
+class TestPersistedPhaseState:
+
+    def test_recorded_state_survives_a_restart(self, db):
+        _receiver(db)._record_applied_sync_phases((HOST, CLONE), {"roles": ("src", "clone")})
+
+        fresh = _receiver(db)  # a restarted server: empty memo
+        assert fresh._applied_sync_phase_state((HOST, CLONE)) == {"roles": ("src", "clone")}
+
+    def test_restored_once_then_memory_decides(self, db):
+        db.set_sync_phase_state(HOST, CLONE, {"roles": ("src", "clone")})
+        r = _receiver(db)
+        assert r._applied_sync_phase_state((HOST, CLONE))
+        r._applied_sync_phases.discard((HOST, CLONE))  # memo expired
+        assert r._applied_sync_phase_state((HOST, CLONE)) == {}
+
+    def test_each_phase_expires_even_while_the_mapping_keeps_syncing(
+        self, db, monkeypatch
+    ):
+        now = [0.0]
+        monkeypatch.setattr(server_mod.time, "monotonic", lambda: now[0])
+        r = _receiver(db)
+        r._record_applied_sync_phases((HOST, CLONE), {"roles": ("src", "clone")})
+
+        # Syncs inside the window read (and so refresh) the memo entry, and
+        # another phase running re-records it.
+        for t in (600.0, 1200.0):
+            now[0] = t
+            assert "roles" in r._applied_sync_phase_state((HOST, CLONE))
+        r._record_applied_sync_phases((HOST, CLONE), {"structure": ("s", "c")})
+
+        now[0] = 1800.0  # 30 minutes after roles last ran: run it again
+        assert r._applied_sync_phase_state((HOST, CLONE)) == {"structure": ("s", "c")}
+
+    def test_forgetting_a_clone_clears_what_was_persisted_at_next_sync(
+        self, db, monkeypatch
+    ):
+        r = _receiver(db)
+        r._record_applied_sync_phases((HOST, CLONE), {"emojis": ("a", "b")})
+        clears = []
+        real_clear = db.clear_sync_phase_state
+        monkeypatch.setattr(
+            db, "clear_sync_phase_state", lambda g: clears.append(g) or real_clear(g)
+        )
+        for _ in range(3):  # e.g. one event per role the role sync touched
+            asyncio.run(r._forget_applied_sync_phases(NS(id=CLONE)))
+        assert clears == [] and r._applied_sync_phases.get((HOST, CLONE)) is None
+
+        assert r._applied_sync_phase_state((HOST, CLONE)) == {}
+        assert clears == [CLONE] and db.get_sync_phase_state(HOST, CLONE) == {}
+        assert r._applied_sync_phase_state((HOST, CLONE)) == {}
+        assert clears == [CLONE]
+
+
+class TestStructurePasses:
+
+    def test_reorder_only_pass_is_a_change(self, db):
+        r = _receiver(db)
+
+        async def none(*a, **k):
+            return []
+
+        async def no_repairs(guild, sitemap):
+            return 0, 0, set()
+
+        async def reorder_only(*a, **k):
+            return 0, 3
+
+        r._repair_deleted_categories = no_repairs
+        r._purge_stale_mappings = lambda guild: None
+        for name in ("_sync_categories", "_sync_forums", "_sync_channels",
+                     "_sync_community", "_sync_guild_metadata",
+                     "_sync_channel_metadata", "_sync_threads"):
+            setattr(r, name, none)
+        r._handle_master_channel_moves = reorder_only
+
+        parts = asyncio.run(r._sync_structure_passes(_guild(), {}, HOST, {}))
+        # Non-empty parts keep the sync from recording the clone fingerprint
+        # before the gateway has applied the moves.
+        assert parts == ["Reordered 3 categories/channels"]
@@ -0,0 +1,158 @@
+"""
+Tests for the structure-sync scheduler: clones sync in parallel up to the
+concurrency budget, one sync per clone, newer sitemaps supersede older
+ones, clones with live traffic waiting go first, and the snapshot reports
+queue positions and ETAs.
+"""
+import asyncio
+
+import pytest
+
+from server.sync_scheduler import SyncJob, SyncScheduler
+
+
+class _Jobs:
+    """Sync factories that block until released, recording what ran."""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+        self.done = []
+
+    def job(self, key, origin=1, label=None):
+        label = label or f"t{key}"
+
+        async def run():
+            self.started.append(label)
+            gate = self.gates.setdefault(label, asyncio.Event())
+            await gate.wait()
+            return label
+
+        return SyncJob(
+            key=key,
+            origin=origin,
+            label=label,
+            factory=run,
+            on_done=lambda t, _l=label: self.done.append((_l, t.cancelled())),
+        )
+
+    async def release(self, label):
+        self.gates.setdefault(label, asyncio.Event()).set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestSyncScheduler:
+
+    @pytest.mark.asyncio
+    async def test_runs_up_to_the_budget_in_arrival_order(self):
+        jobs, sched = _Jobs(), SyncScheduler(concurrency=2)
+        for key in (10, 20, 30, 40):
+            sched.submit(jobs.job(key))
+        await _settle()
+        assert jobs.started == ["t10", "t20"]
+
+        await jobs.release("t20")
+        assert jobs.started == ["t10", "t20", "t30"]
+        assert jobs.done == [("t20", False)]
+        sched.cancel_all()
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_clones_with_waiting_live_traffic_go_first(self):
+        hot = set()
+        jobs = _Jobs()
+        sched = SyncScheduler(concurrency=1, hot_origins=lambda: hot)
+        sched.submit(jobs.job(10, origin=1))
+        sched.submit(jobs.job(20, origin=1))
+        sched.submit(jobs.job(30, origin=2))
+        await _settle()
+        hot.add(2)
+        await jobs.release("t10")
+        assert jobs.started == ["t10", "t30"]
+        sched.cancel_all()
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_newer_sitemap_supersedes_queued_and_running(self):
+        jobs, sched = _Jobs(), SyncScheduler(concurrency=1)
+        sched.submit(jobs.job(10, label="a1"))
+        sched.submit(jobs.job(20, label="b1"))
+        sched.submit(jobs.job(20, label="b2"))  # replaces b1 in its place
+        await _settle()
+        sched.submit(jobs.job(10, label="a2"))  # cancels a1
+        await _settle()
+        assert ("a1", True) in jobs.done
+        # b was queued before a2, so it runs next; b1 never runs
+        assert jobs.started == ["a1", "b2"]
+        await jobs.release("b2")
+        assert jobs.started == ["a1", "b2", "a2"]
+        sched.cancel_all()
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_reports_position_and_eta(self):
+        jobs = _Jobs()
+        sched = SyncScheduler(concurrency=2, default_duration=10.0)
+        for key in (10, 20, 30, 40, 50):
+            sched.submit(jobs.job(key))
+        await _settle()
+        snap = sched.snapshot()
+        assert [j["state"] for j in snap] == ["running"] * 2 + ["queued"] * 3
+        queued = snap[2:]
+        assert [j["position"] for j in queued] == [1, 2, 3]
+        assert [j["cloned_guild_id"] for j in queued] == ["30", "40", "50"]
+        etas = [j["eta_sec"] for j in queued]
+        assert 9 <= etas[0] <= 10 and 9 <= etas[1] <= 10 and 19 <= etas[2] <= 20
+        sched.cancel_all()
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_unresolved_clones_get_a_slot_per_origin(self):
+        jobs, sched = _Jobs(), SyncScheduler(concurrency=2)
+        sched.submit(jobs.job((1, 0), origin=1, label="o1"))
+        sched.submit(jobs.job((2, 0), origin=2, label="o2"))
+        await _settle()
+        assert jobs.started == ["o1", "o2"] and jobs.done == []
+        assert [j["cloned_guild_id"] for j in sched.snapshot()] == ["0", "0"]
+        sched.cancel_all()
+        await _settle()
+
+
+class TestDashboardPublish:
+
+    @pytest.mark.asyncio
+    async def test_change_during_publish_is_sent_afterwards(self, monkeypatch):
+        import server.server as server_mod
+        from types import SimpleNamespace as NS
+
+        real_sleep = asyncio.sleep
+        monkeypatch.setattr(server_mod.asyncio, "sleep", lambda _s: real_sleep(0))
+        jobs = ["a"]
+        published = []
+        in_publish = asyncio.Event()
+        release = asyncio.Event()
+
+        async def publish(topic, data):
+            published.append(list(data["jobs"]))
+            in_publish.set()
+            await release.wait()
+
+        r = server_mod.ServerReceiver.__new__(server_mod.ServerReceiver)
+        r.bus = NS(publish=publish)
+        r._sync_scheduler = NS(concurrency=1, snapshot=lambda: list(jobs))
+        r._sync_queue_publish = None
+        r._sync_queue_dirty = False
+
+        r._publish_sync_queue()
+        await in_publish.wait()
+        jobs.clear()  # the last job finishes while the first update is in flight
+        r._publish_sync_queue()
+        release.set()
+        await r._sync_queue_publish
+        assert published == [["a"], []]
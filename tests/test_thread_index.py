@@ -0,0 +1,129 @@
+"""
+Tests for the active-thread index behind thread-limit enforcement: the
+oldest mapped, unarchived threads are archived first, thread events and
+mapping upserts keep the index current without rescanning, and a stale
+index is re-seeded from the mapping table and the gateway cache.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace as NS
+
+import pytest
+
+from server.server import ServerReceiver
+from server.thread_index import ActiveThreadIndex
+
+G = 900
+
+
+def _seeded(*threads, mapped=None):
+    idx = ActiveThreadIndex()
+    ids = [tid for tid, _ in threads]
+    idx.reset(G, ids if mapped is None else mapped, threads)
+    return idx
+
+
+class TestActiveThreadIndex:
+
+    def test_overflow_returns_oldest_first(self):
+        idx = _seeded((1, 30.0), (2, 10.0), (3, 20.0), (4, 40.0))
+        assert idx.overflow(G, 2) == [2, 3]
+        assert idx.count(G) == 2
+        assert idx.overflow(G, 2) == []
+
+    def test_unmapped_threads_are_not_counted(self):
+        idx = _seeded((1, 1.0), (2, 2.0), mapped=[2])
+        assert idx.count(G) == 1
+        idx.activate(G, 7, 0.5)  # not mapped: ignored
+        assert idx.overflow(G, 0) == [2]
+
+    def test_archive_unarchive_and_delete(self):
+        idx = _seeded((1, 1.0), (2, 2.0), (3, 3.0))
+        idx.deactivate(G, 1)
+        assert idx.overflow(G, 1) == [2]
+        idx.activate(G, 1, 1.0)
+        assert idx.overflow(G, 1) == [1]
+        idx.forget(None, 3)
+        idx.activate(G, 3, 3.0)  # mapping gone: stays out
+        assert idx.count(G) == 0
+
+    def test_track_adds_new_mappings(self):
+        idx = _seeded((1, 5.0))
+        idx.track(G, 2, 1.0)
+        idx.track(G, 3, 9.0, active=False)
+        assert idx.overflow(G, 1) == [2]
+        idx.activate(G, 3, 9.0)
+        assert idx.count(G) == 2
+
+    def test_unseeded_guilds_ignore_events(self):
+        idx = ActiveThreadIndex()
+        idx.track(G, 1, 1.0)
+        idx.activate(G, 1, 1.0)
+        assert not idx.seeded(G) and idx.count(G) == 0 and idx.stale(G, 60)
+
+    def test_churn_compacts_the_heap(self):
+        idx = _seeded(*((t, float(t)) for t in range(10)))
+        for _ in range(100):
+            for t in range(10):
+                idx.deactivate(G, t)
+                idx.activate(G, t, float(t))
+        assert len(idx._heaps[G]) <= 2 * idx.count(G) + 64
+        assert idx.overflow(G, 8) == [0, 1]
+
+
+def _thread(archived_ids, tid, minute, archived=False):
+    async def edit(archived):
+        archived_ids.append(tid)
+
+    created = datetime(2025, 1, 1, 0, minute, tzinfo=timezone.utc)
+    return NS(id=tid, created_at=created, archived=archived, edit=edit, name=f"t{tid}", parent=None)
+
+
+class _Ratelimit:
+    async def acquire_for_guild(self, *a, **kw):
+        pass
+
+
+class TestEnforceThreadLimit:
+
+    def _setup(self, db, threads, mapped):
+        for tid in mapped:
+            db.upsert_forum_thread_mapping(tid, f"o{tid}", tid, None, None, original_guild_id=1, cloned_guild_id=G)
+        receiver = ServerReceiver.__new__(ServerReceiver)
+        receiver.db = db
+        receiver.max_threads = 2
+        receiver.ratelimit = _Ratelimit()
+        receiver.active_threads = ActiveThreadIndex()
+        by_id = {t.id: t for t in threads}
+        guild = NS(id=G, threads=threads, get_thread=by_id.get)
+        return receiver, guild
+
+    @pytest.mark.asyncio
+    async def test_archives_oldest_mapped_threads_over_the_limit(self, db):
+        out = []
+        threads = [
+            _thread(out, 11, 3),
+            _thread(out, 12, 1),
+            _thread(out, 13, 2),
+            _thread(out, 14, 0),
+            _thread(out, 15, 4, archived=True),
+        ]
+        r, guild = self._setup(db, threads, [11, 12, 13, 15])
+        await r._enforce_thread_limit(guild)
+        assert out == [12]
+        assert r.active_threads.count(G) == 2
+
+    @pytest.mark.asyncio
+    async def test_new_thread_costs_one_archive_without_rescan(self, db):
+        out = []
+        threads = [_thread(out, 11, 1), _thread(out, 12, 2)]
+        r, guild = self._setup(db, threads, [11, 12])
+        await r._enforce_thread_limit(guild)
+        assert out == []
+
+        new = _thread(out, 13, 3)
+        threads.append(new)
+        db.upsert_forum_thread_mapping(13, "o13", 13, None, None, original_guild_id=1, cloned_guild_id=G)
+        r._track_clone_thread(G, new)
+        r.db = None  # no reconciliation is due, so nothing may touch the database
+        await r._enforce_thread_limit(guild)
+        assert out == [11]
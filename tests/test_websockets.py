@@ -0,0 +1,237 @@
+"""
+Tests for common.websockets.WebsocketManager: the persistent multiplexed
+channel, its rid-based request/response matching and the connect-per-message
+fallback. Everything runs against a real server on 127.0.0.1.
+"""
+import asyncio
+import socket
+
+import pytest
+
+from common.websockets import WebsocketManager
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _start_server(handler):
+    port = _free_port()
+    srv = WebsocketManager(send_url="", listen_host="127.0.0.1", listen_port=port)
+    task = asyncio.create_task(srv.start_server(handler))
+    await asyncio.sleep(0.1)
+    return port, task
+
+
+async def _stop(task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_persistent_send_preserves_order_on_one_connection():
+    seen = []
+
+    async def handler(req):
+        seen.append(req["data"])
+
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}")
+    try:
+        for i in range(50):
+            await ws.send({"type": "message", "data": i})
+        for _ in range(100):
+            if len(seen) == 50:
+                break
+            await asyncio.sleep(0.02)
+        assert seen == list(range(50))
+        assert ws.channel_stats()["connects"] == 1
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_waits_instead_of_overtaking(monkeypatch):
+    from common.websockets import _PersistentChannel
+
+    seen = []
+
+    async def handler(req):
+        seen.append(req["data"])
+
+    orig_dial = _PersistentChannel._dial
+
+    async def slow_dial(self):
+        await asyncio.sleep(0.3)
+        return await orig_dial(self)
+
+    monkeypatch.setattr(_PersistentChannel, "_dial", slow_dial)
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}", queue_size=2)
+    try:
+        # The writer holds frame 0 while it dials; 1 and 2 fill the queue,
+        # so every later send has to wait for room rather than dial past them.
+        for i in range(6):
+            await ws.send({"type": "message", "data": i}, send_timeout=0.05)
+        for _ in range(100):
+            if len(seen) == 6:
+                break
+            await asyncio.sleep(0.02)
+        assert seen == list(range(6))
+        assert ws.channel_stats()["connects"] == 1
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_matched_by_rid():
+    async def handler(req):
+        n = req["data"]
+        # Later requests answer first, so replies arrive out of order.
+        await asyncio.sleep(0.05 - n * 0.01)
+        return {"ok": True, "echo": n}
+
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}")
+    try:
+        results = await asyncio.gather(
+            *(ws.request({"type": "ping", "data": n}, timeout=2) for n in range(5))
+        )
+        assert [r["echo"] for r in results] == list(range(5))
+        assert ws.channel_stats()["connects"] == 1
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_returns_none():
+    async def handler(req):
+        await asyncio.sleep(1)
+
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}")
+    try:
+        assert await ws.request({"type": "slow"}, timeout=0.1) is None
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_channel_reconnects_after_server_restart():
+    seen = []
+
+    async def handler(req):
+        seen.append(req["data"])
+
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}")
+    try:
+        await ws.send({"type": "message", "data": "before"})
+        await asyncio.sleep(0.1)
+        await _stop(task)
+        await asyncio.sleep(0.1)
+
+        srv = WebsocketManager(send_url="", listen_host="127.0.0.1", listen_port=port)
+        task = asyncio.create_task(srv.start_server(handler))
+        await asyncio.sleep(0.1)
+        await ws.send({"type": "message", "data": "after"})
+        for _ in range(100):
+            if "after" in seen:
+                break
+            await asyncio.sleep(0.05)
+        assert seen == ["before", "after"]
+        assert ws.channel_stats()["connects"] == 2
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_channel_recovers_after_peer_was_down(monkeypatch):
+    from common.websockets import _PersistentChannel
+
+    monkeypatch.setattr(_PersistentChannel, "REDIAL_BASE", 0.02)
+    monkeypatch.setattr(_PersistentChannel, "REDIAL_MAX", 0.1)
+    seen = []
+
+    async def handler(req):
+        seen.append(req["data"])
+
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}")
+    try:
+        await ws.send({"type": "message", "data": "before"})
+        await asyncio.sleep(0.1)
+        await _stop(task)
+        await asyncio.sleep(0.1)
+
+        # Peer is gone: the queued send keeps failing until the channel is
+        # marked down and callers fall back to dialling per message.
+        await ws.send({"type": "message", "data": "lost"}, max_attempts=1)
+        for _ in range(100):
+            if ws._get_channel() is None:
+                break
+            await asyncio.sleep(0.02)
+        assert ws._get_channel() is None
+
+        srv = WebsocketManager(send_url="", listen_host="127.0.0.1", listen_port=port)
+        task = asyncio.create_task(srv.start_server(handler))
+        # Nothing is sent while down; the background probe alone reconnects.
+        for _ in range(100):
+            if ws.channel_stats()["connected"]:
+                break
+            await asyncio.sleep(0.02)
+        assert ws.channel_stats()["connects"] == 2
+        assert ws._get_channel() is not None
+
+        await ws.send({"type": "message", "data": "after"})
+        for _ in range(100):
+            if "after" in seen:
+                break
+            await asyncio.sleep(0.02)
+        assert seen[0] == "before" and seen[-1] == "after"
+        assert ws.channel_stats()["connects"] == 2
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_non_persistent_mode_dials_per_message():
+    async def handler(req):
+        return {"ok": True, "echo": req["data"]}
+
+    port, task = await _start_server(handler)
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{port}", persistent=False)
+    try:
+        resp = await ws.request({"type": "ping", "data": 7}, timeout=2)
+        assert resp["echo"] == 7
+        assert ws.channel_stats() == {}
+    finally:
+        await ws.stop()
+        await _stop(task)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_peer_falls_back_and_gives_up():
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{_free_port()}")
+    ws.begin_shutdown()
+    assert await ws.request({"type": "ping"}, timeout=0.2) is None
+
+
+@pytest.mark.asyncio
+async def test_request_without_timeout_does_not_hang_when_peer_is_down():
+    ws = WebsocketManager(send_url=f"ws://127.0.0.1:{_free_port()}")
+    try:
+        resp = await asyncio.wait_for(
+            ws.request({"type": "ping"}, max_attempts=1), timeout=10
+        )
+        assert resp is None
+    finally:
+        await ws.stop()